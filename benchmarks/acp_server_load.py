@@ -0,0 +1,202 @@
+"""
+ACPServer 负载测试
+
+在本地启动 ACPServer，模拟大量 Agent 连接：每个 Agent 注册后向自己发送任务
+（服务器把任务原样投递回来），任务分属几个 trace，同时定期重发注册消息作为
+控制面探测。服务端任务处理注入固定延迟，用来观察慢任务是否阻塞同一连接上的
+其他 trace 和控制消息：
+
+    python benchmarks/acp_server_load.py --agents 1000 --tasks 20 --handler-delay 0.05
+
+--codec msgpack 时客户端通过 acp.msgpack 子协议协商二进制编解码。
+
+输出任务吞吐、任务往返延迟、控制消息往返延迟，并校验每个 trace 内的顺序。
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import websockets
+
+from src.communication.protocols.acp.acp_server import ACP_SUBPROTOCOL, ACPServer
+from src.communication.protocols.codec import get_codec
+
+
+def _p(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _message(codec, message_type, agent_id, trace_id, data):
+    return codec.encode({
+        "meta": {
+            "message_id": str(uuid.uuid4()),
+            "message_type": message_type,
+            "timestamp": str(time.time()),
+            "sender_id": agent_id,
+            "receiver_id": agent_id,
+            "trace_id": trace_id,
+        },
+        "context": {"session_id": agent_id},
+        "payload": {"command_type": "call", "action_type": "execution", "data": data},
+    })
+
+
+class _Results:
+    def __init__(self):
+        self.task_rtts = []
+        self.control_rtts = []
+        self.order_violations = 0
+        self.lost = 0
+        self.failed_agents = 0
+
+
+async def _agent(index, args, results):
+    agent_id = f"agent-{index}"
+    traces = [f"{agent_id}-trace-{t}" for t in range(args.traces)]
+    uri = f"ws://{args.host}:{args.port}"
+    codec = get_codec(args.codec)
+    subprotocols = [f"{ACP_SUBPROTOCOL}.{args.codec}"]
+
+    try:
+        async with websockets.connect(uri, max_queue=None, open_timeout=60, subprotocols=subprotocols) as ws:
+            await ws.send(_message(codec, "register", agent_id, f"{agent_id}-register", {"index": index}))
+            codec.decode(await ws.recv())
+
+            expected = args.tasks + args.controls
+            sent_at = {}
+            last_seq = {}
+            control_sent = {}
+
+            async def reader():
+                received = 0
+                while received < expected:
+                    frame = codec.decode(await ws.recv())
+                    now = time.perf_counter()
+                    if frame.get("message") == "flow":
+                        # 服务端的累计处理确认，不计入响应
+                        continue
+                    received += 1
+                    if "meta" in frame:
+                        data = frame["payload"]["data"]
+                        trace_id = frame["meta"]["trace_id"]
+                        if data["seq"] <= last_seq.get(trace_id, -1):
+                            results.order_violations += 1
+                        last_seq[trace_id] = data["seq"]
+                        results.task_rtts.append(now - sent_at.pop((trace_id, data["seq"])))
+                    else:
+                        results.control_rtts.append(now - control_sent.pop(frame["trace_id"]))
+
+            reading = asyncio.create_task(reader())
+            controls = 0
+            for i in range(args.tasks):
+                trace_id = traces[i % len(traces)]
+                seq = i // len(traces)
+                sent_at[(trace_id, seq)] = time.perf_counter()
+                await ws.send(_message(codec, "task", agent_id, trace_id, {"seq": seq, "body": "x" * args.payload}))
+                await ws.send(_message(codec, "heartbeat", agent_id, None, {"status": "alive"}))
+                if controls < args.controls and i % max(1, args.tasks // args.controls) == 0:
+                    control_id = f"{agent_id}-control-{controls}"
+                    control_sent[control_id] = time.perf_counter()
+                    await ws.send(_message(codec, "register", agent_id, control_id, {"index": index}))
+                    controls += 1
+            expected = args.tasks + controls
+
+            try:
+                await asyncio.wait_for(reading, args.timeout)
+            except asyncio.TimeoutError:
+                results.lost += len(sent_at) + len(control_sent)
+    except Exception:
+        results.failed_agents += 1
+
+
+async def _run(args) -> None:
+    server = ACPServer(
+        args.host,
+        args.port,
+        max_workers=args.workers,
+        max_inflight_per_connection=args.inflight
+    )
+
+    if args.handler_delay:
+        handle_task = server.router._handle_task
+
+        async def slow_handle_task(websocket, message):
+            await asyncio.sleep(args.handler_delay)
+            await handle_task(websocket, message)
+
+        server.router._handle_task = slow_handle_task
+
+    await server.start()
+    results = _Results()
+    began = time.perf_counter()
+    cpu_start = time.process_time()
+
+    # 分批建立连接，避免瞬间的握手风暴压垮监听队列
+    agents = []
+    for start in range(0, args.agents, 100):
+        agents.extend(
+            asyncio.create_task(_agent(i, args, results))
+            for i in range(start, min(start + 100, args.agents))
+        )
+        await asyncio.sleep(0.05)
+    await asyncio.gather(*agents)
+
+    elapsed = time.perf_counter() - began
+    cpu = time.process_time() - cpu_start
+    stats = server.get_server_stats()
+    await server.stop()
+
+    tasks = len(results.task_rtts)
+    print(f"agents {args.agents}  tasks/agent {args.tasks}  traces/agent {args.traces}  "
+          f"codec {args.codec}  workers {args.workers}  inflight {args.inflight}  handler delay {args.handler_delay * 1000:.0f}ms")
+    print(f"elapsed {elapsed:.2f}s  tasks {tasks} ({tasks / elapsed:.0f}/s)  "
+          f"messages received by server {stats['messages_received']}  cpu {cpu:.2f}s")
+    print(f"task rtt     p50 {_p(results.task_rtts, 0.5) * 1000:.1f}ms  "
+          f"p99 {_p(results.task_rtts, 0.99) * 1000:.1f}ms  max {max(results.task_rtts, default=0) * 1000:.1f}ms")
+    if results.control_rtts:
+        print(f"control rtt  p50 {_p(results.control_rtts, 0.5) * 1000:.1f}ms  "
+              f"p99 {_p(results.control_rtts, 0.99) * 1000:.1f}ms  "
+              f"mean {statistics.mean(results.control_rtts) * 1000:.1f}ms")
+    print(f"order violations {results.order_violations}  lost {results.lost}  "
+          f"failed agents {results.failed_agents}  worker failures {stats['workers']['failed']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ACPServer load test")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18765)
+    parser.add_argument('--agents', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=20)
+    parser.add_argument('--traces', type=int, default=4)
+    parser.add_argument('--controls', type=int, default=2)
+    parser.add_argument('--payload', type=int, default=256)
+    parser.add_argument('--codec', default='json', help="json or msgpack")
+    parser.add_argument('--handler-delay', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=256)
+    parser.add_argument('--inflight', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    # 每个连接占用客户端和服务端各一个文件描述符
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(soft, args.agents * 2 + 256))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+BaseAgent 任务吞吐基准
+
+用固定延迟的桩推理器替换 ReasoningEngine.reason（模拟一次 LLM 调用），
+通过 submit_task 提交任务，比较不同工作协程数下的吞吐。1 个工作协程等价于
+原来的串行处理循环：
+
+    python benchmarks/agent_worker_throughput.py --tasks 2000 --latency 0.01 --workers 1 8 64
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import structlog
+
+from src.core.agent.base_agent import AgentConfig, AgentTaskStatus, AgentType, BaseAgent
+
+
+class _BenchAgent(BaseAgent):
+    async def _on_start(self) -> None:
+        pass
+
+    async def _on_stop(self) -> None:
+        pass
+
+    async def _on_message_received(self, message) -> None:
+        pass
+
+
+def _stub_reasoner(latency: float):
+    async def reason(task, context=None, memory=None, **kwargs):
+        await asyncio.sleep(latency)
+        return {"action": {"type": "respond", "message": f"done: {task}"}}
+    return reason
+
+
+async def _run(workers: int, tasks: int, latency: float) -> None:
+    agent = _BenchAgent(AgentConfig(
+        agent_id=f"bench-{workers}",
+        agent_type=AgentType.TASK,
+        name="bench",
+        max_concurrent_tasks=workers,
+        enable_performance_monitoring=False,
+        stop_timeout=600.0,
+        task_history_size=tasks
+    ))
+    agent.reasoning_engine.reason = _stub_reasoner(latency)
+    await agent.start()
+
+    began = time.perf_counter()
+    task_ids = [await agent.submit_task(f"task {i}", priority=i % 3) for i in range(tasks)]
+    await agent.task_queue.join()
+    elapsed = time.perf_counter() - began
+
+    completed = sum(agent.get_task(task_id).status == AgentTaskStatus.COMPLETED for task_id in task_ids)
+    await agent.stop()
+    print(f"workers {workers:>3d}  tasks {tasks}  elapsed {elapsed:6.2f}s  "
+          f"{tasks / elapsed:8.0f} tasks/s  completed {completed}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="BaseAgent worker pool throughput benchmark")
+    parser.add_argument('--tasks', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.01, help="stub reasoner latency (s)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 64])
+    args = parser.parse_args()
+
+    # 每个任务都会记录日志，基准中只保留警告
+    logging.basicConfig(level=logging.WARNING)
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    print(f"stub reasoner latency {args.latency * 1000:.0f}ms")
+    for workers in args.workers:
+        asyncio.run(_run(workers, args.tasks, args.latency))
+
+
+if __name__ == '__main__':
+    main()
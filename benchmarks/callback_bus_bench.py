@@ -0,0 +1,87 @@
+"""
+回调处理开销基准
+
+模拟执行链的步骤事件：每个步骤调用一次 CallbackHandler.handle_callback(SUCCESS)，
+memory_write / trace_write 回调各带固定的 I/O 延迟（模拟写存储），status_update
+为内联的轻量回调。比较三种配置下每个步骤在执行链上的等待时间、总耗时和保留的
+回调结果数：
+
+- inline：enable_background=False，所有回调内联等待（原行为）
+- background：memory/trace 走后台通道，逐条投递
+- batched：memory/trace 走后台通道，按批调用批量回调（每批只付一次 I/O 延迟）
+
+    python benchmarks/callback_bus_bench.py --steps 2000 --io-latency 0.001
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import structlog
+
+from src.execution.callbacks.callback_handler import CallbackHandler, CallbackType
+
+
+async def _run(label: str, steps: int, latency: float, background: bool, batched: bool) -> None:
+    handler = CallbackHandler(agent_id="bench", max_results=1000)
+    handler.callback_policies["enable_background"] = background
+    writes = {"memory_write": 0, "trace_write": 0}
+
+    def _writer(name):
+        async def write(**kwargs):
+            await asyncio.sleep(latency)
+            writes[name] += 1
+
+        async def write_batch(calls):
+            await asyncio.sleep(latency)
+            writes[name] += len(calls)
+        return write, (write_batch if batched else None)
+
+    async def status_update(**kwargs):
+        pass
+
+    for name in writes:
+        write, write_batch = _writer(name)
+        await handler.register_callback(name, write, batch_func=write_batch)
+    await handler.register_callback("status_update", status_update)
+
+    began = time.perf_counter()
+    for i in range(steps):
+        await handler.handle_callback(
+            CallbackType.SUCCESS,
+            {"event": "step_completed", "step_id": f"step-{i}", "result": i},
+            "context-bench",
+            "trace-bench"
+        )
+    on_path = time.perf_counter() - began
+    await handler.close()
+    total = time.perf_counter() - began
+
+    stats = await handler.get_callback_stats()
+    print(f"{label:10s} {on_path / steps * 1e6:9.1f}us/step on path  total {total:6.2f}s  "
+          f"writes {writes['memory_write']}+{writes['trace_write']}  "
+          f"retained {stats['retained_results']}  batches {stats['background']['batches']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CallbackHandler overhead benchmark")
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--io-latency', type=float, default=0.001, help="memory/trace write latency (s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    print(f"steps {args.steps}  io latency {args.io_latency * 1000:.1f}ms")
+    asyncio.run(_run("inline", args.steps, args.io_latency, background=False, batched=False))
+    asyncio.run(_run("background", args.steps, args.io_latency, background=True, batched=False))
+    asyncio.run(_run("batched", args.steps, args.io_latency, background=True, batched=True))
+
+
+if __name__ == '__main__':
+    main()
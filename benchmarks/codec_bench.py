@@ -0,0 +1,145 @@
+"""
+ACP / MCP 编解码基准
+
+构造典型的 ACP 任务消息和 MCP tools/call 请求，比较各编解码路径的编码、解码吞吐和消息大小：
+
+- asdict+json: 旧路径，to_dict（递归 asdict）+ json.dumps / json.loads + from_dict
+- json / orjson / msgpack: to_wire + 编解码器 / 编解码器 + from_wire（只构造 meta）
+- 解码列同时给出“只路由”（读 meta）和“完整读取”（再访问 payload）两种情况
+
+    python benchmarks/codec_bench.py --seconds 1 --payload 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.communication.protocols.acp.message_schema import ACPMessage, ACPMessageBuilder, MessagePriority
+from src.communication.protocols.codec import JSONCodec, available_codecs, get_codec, orjson
+from src.communication.protocols.mcp.mcp_types import MCPMessage
+
+
+def _task_message(items: int) -> ACPMessage:
+    builder = ACPMessageBuilder("planner-agent")
+    return builder.create_task_message(
+        receiver_id="worker-agent-17",
+        task_type="call_tool",
+        task_data={
+            "tool": "web_search",
+            "arguments": {"query": "quarterly revenue by region", "top_k": 10, "lang": "zh-CN"},
+            "history": [
+                {"role": "user" if i % 2 else "assistant", "content": f"第 {i} 轮对话内容 " * 4, "tokens": 40 + i}
+                for i in range(items)
+            ],
+            "budget": {"max_tokens": 4096, "max_cost": 0.25, "deadline_ms": 30000},
+        },
+        context_id="session-42",
+        priority=MessagePriority.HIGH
+    )
+
+
+def _mcp_message(items: int) -> MCPMessage:
+    return MCPMessage(
+        id="req_1_abcd1234",
+        method="tools/call",
+        params={
+            "name": "web_search",
+            "arguments": {
+                "query": "quarterly revenue by region",
+                "filters": [{"field": f"f{i}", "op": "eq", "value": i} for i in range(items)],
+            },
+        },
+    )
+
+
+def _rate(fn, seconds: float) -> float:
+    count = 0
+    batch = 200
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for _ in range(batch):
+            fn()
+        count += batch
+        now = time.perf_counter()
+        if now >= deadline:
+            return count / (now - start)
+
+
+def _report(label, encode, decode_route, decode_full, size, seconds):
+    print(f"{label:14s} encode {_rate(encode, seconds):>10,.0f}/s   "
+          f"decode(route) {_rate(decode_route, seconds):>10,.0f}/s   "
+          f"decode(full) {_rate(decode_full, seconds):>10,.0f}/s   size {size:>6d}B")
+
+
+def run(seconds: float, items: int) -> None:
+    message = _task_message(items)
+    print(f"ACP task message ({items} history items)  codecs available: {', '.join(available_codecs())}"
+          f"  orjson: {'yes' if orjson else 'no'}")
+
+    legacy = json.dumps(message.to_dict(), ensure_ascii=False)
+    _report(
+        "asdict+json",
+        lambda: json.dumps(message.to_dict(), ensure_ascii=False),
+        lambda: ACPMessage.from_dict(json.loads(legacy)).meta.message_type,
+        lambda: ACPMessage.from_dict(json.loads(legacy)).payload.data,
+        len(legacy.encode("utf-8")),
+        seconds
+    )
+
+    codecs = [("json", JSONCodec(use_orjson=False))]
+    if orjson is not None:
+        codecs.append(("orjson", JSONCodec()))
+    if "msgpack" in available_codecs():
+        codecs.append(("msgpack", get_codec("msgpack")))
+
+    for label, codec in codecs:
+        wire = codec.encode(message.to_wire())
+        raw = wire.encode("utf-8") if isinstance(wire, str) else wire
+        _report(
+            label,
+            lambda: codec.encode(message.to_wire()),
+            lambda: ACPMessage.from_wire(codec.decode(raw)).meta.message_type,
+            lambda: ACPMessage.from_wire(codec.decode(raw)).payload.data,
+            len(raw),
+            seconds
+        )
+
+    request = _mcp_message(items)
+    print(f"\nMCP tools/call request ({items} filters)")
+    legacy = json.dumps(request.to_dict())
+    _report(
+        "json.dumps",
+        lambda: json.dumps(request.to_dict()),
+        lambda: MCPMessage.from_dict(json.loads(legacy)).method,
+        lambda: MCPMessage.from_dict(json.loads(legacy)).params,
+        len(legacy),
+        seconds
+    )
+    for label, codec in codecs:
+        wire = request.encode(codec)
+        raw = wire.encode("utf-8") if isinstance(wire, str) else wire
+        _report(
+            label,
+            lambda: request.encode(codec),
+            lambda: MCPMessage.decode(raw, codec).method,
+            lambda: MCPMessage.decode(raw, codec).params,
+            len(raw),
+            seconds
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ACP/MCP codec benchmark")
+    parser.add_argument('--seconds', type=float, default=1.0)
+    parser.add_argument('--payload', type=int, default=20, help="history items / filters per message")
+    args = parser.parse_args()
+    run(args.seconds, args.payload)
+
+
+if __name__ == '__main__':
+    main()
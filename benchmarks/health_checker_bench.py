@@ -0,0 +1,115 @@
+"""
+HealthChecker 调度基准
+
+注册大量服务实例（自定义异步探测，模拟几毫秒的网络延迟，少量实例会反复翻转状态），
+运行若干个探测间隔，统计每 100ms 发出的探测数分布、事件循环延迟和 CPU 时间：
+
+    python benchmarks/health_checker_bench.py --services 10000 --interval 5 --duration 15
+
+理想情况下每个刻度的探测数接近 services / interval / 10，且没有明显尖峰。
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import structlog
+
+from src.coordination.registry.health_checker import HealthChecker
+from src.coordination.registry.service_registry import ServiceRegistry
+
+
+def _p(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _run(args) -> None:
+    registry = ServiceRegistry()
+    checker = HealthChecker(
+        registry,
+        check_interval=args.interval,
+        timeout=1,
+        max_concurrency=args.concurrency
+    )
+
+    rng = random.Random(args.seed)
+    flapping = set()
+    buckets = {}
+    loop = asyncio.get_running_loop()
+    began = loop.time()
+
+    async def probe(service_info):
+        bucket = int((loop.time() - began) * 10)
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+        await asyncio.sleep(rng.uniform(0.001, 0.01))
+        if service_info.service_id in flapping:
+            return rng.random() < 0.5
+        return True
+
+    await checker.register_custom_health_check("bench", probe)
+    for i in range(args.services):
+        service_id = await registry.register_service(
+            "bench", "worker", f"10.0.{i // 250}.{i % 250}", 8000 + i % 1000
+        )
+        if rng.random() < args.flap_ratio:
+            flapping.add(service_id)
+
+    lags = []
+    cpu_start = time.process_time()
+    began = loop.time()
+    await checker.initialize()
+
+    end = began + args.duration
+    while loop.time() < end:
+        expected = loop.time() + 0.01
+        await asyncio.sleep(0.01)
+        lags.append(max(0.0, loop.time() - expected))
+
+    cpu = time.process_time() - cpu_start
+    await checker.close()
+
+    stats = await checker.get_health_stats()
+    # 丢弃首尾不完整的刻度
+    counts = [buckets.get(b, 0) for b in range(1, int(args.duration * 10) - 1)]
+    intervals = [checker.get_check_interval(s) for s in list(registry.services)]
+    stable = [i for s, i in zip(registry.services, intervals) if s not in flapping and i is not None]
+    flappy = [i for s, i in zip(registry.services, intervals) if s in flapping and i is not None]
+
+    print(f"services {args.services}  interval {args.interval}s  duration {args.duration}s")
+    print(f"probes {stats['total_checks']}  ({stats['total_checks'] / args.duration:.0f}/s)  "
+          f"cpu {cpu:.2f}s ({cpu / args.duration * 100:.0f}% of one core)")
+    print(f"probes per 100ms  mean {statistics.mean(counts):.1f}  p99 {_p(counts, 0.99)}  max {max(counts)}")
+    print(f"loop lag  p50 {_p(lags, 0.5) * 1000:.2f}ms  p99 {_p(lags, 0.99) * 1000:.2f}ms  "
+          f"max {max(lags) * 1000:.2f}ms")
+    if stable:
+        print(f"stable services   mean interval {statistics.mean(stable):.1f}s")
+    if flappy:
+        print(f"flapping services mean interval {statistics.mean(flappy):.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HealthChecker scheduling benchmark")
+    parser.add_argument('--services', type=int, default=10000)
+    parser.add_argument('--interval', type=float, default=5.0)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--flap-ratio', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    asyncio.run(_run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+导入耗时回归检查
+
+在独立的子进程中用 `python -X importtime` 导入各目标包，解析 stderr 的
+importtime 输出，取多次运行的最小值，检查两类预算：
+
+- 耗时预算：导入总耗时（毫秒）不超过 budget_ms * --scale
+- 禁止模块：导入目标包时不应加载的重量级依赖（langgraph、openai、NumPy 等，
+  这些依赖应在首次使用时才导入）
+
+    python benchmarks/import_time.py --repeat 5
+    python benchmarks/import_time.py --scale 2   # 较慢的机器上放宽耗时预算
+
+任一目标超出预算时退出码为 1。
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+
+
+class Target(NamedTuple):
+    name: str
+    module: str
+    # 追加到 PYTHONPATH 的目录（相对仓库根目录）
+    path: str
+    budget_ms: float
+    forbidden: Tuple[str, ...]
+
+
+TARGETS = [
+    # adk 以 src 为根导入（包内使用 from adk.xxx 的绝对导入）
+    Target("adk", "adk", "src", 60.0,
+           ("langgraph", "jinja2", "graph_engine", "openai", "numpy", "yaml")),
+    Target("core.agent", "src.core.agent", ".", 400.0,
+           ("openai", "numpy", "aiohttp", "langgraph", "jinja2")),
+    Target("communication.protocols.mcp", "src.communication.protocols.mcp", ".", 250.0,
+           ("openai", "numpy", "aiohttp", "langgraph", "jinja2")),
+]
+
+
+def _importtime(target: Target) -> Tuple[float, Dict[str, int]]:
+    """
+    导入一次目标包
+
+    Returns:
+        Tuple[float, Dict[str, int]]: 总耗时（毫秒）和各模块自身耗时（微秒）
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.join(ROOT, target.path)] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target.module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target.module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    self_us: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        self_us[name.strip()] = int(own)
+    return sum(self_us.values()) / 1000, self_us
+
+
+def _top_packages(self_us: Dict[str, int], limit: int) -> List[Tuple[str, float]]:
+    """按顶层包汇总自身耗时，返回最重的几个"""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, us in self_us.items():
+        totals[name.split(".")[0]] += us
+    return [(name, us / 1000) for name, us in sorted(totals.items(), key=lambda kv: -kv[1])[:limit]]
+
+
+def check(target: Target, repeat: int, scale: float, top: int) -> bool:
+    try:
+        runs = [_importtime(target) for _ in range(repeat)]
+    except RuntimeError as e:
+        print(f"FAIL {target.name:30s} {e}")
+        return False
+    total_ms, self_us = min(runs, key=lambda run: run[0])
+    budget = target.budget_ms * scale
+    loaded = sorted(name for name in target.forbidden if name in self_us)
+
+    ok = total_ms <= budget and not loaded
+    print(f"{'ok  ' if ok else 'FAIL'} {target.name:30s} {total_ms:8.1f}ms  (budget {budget:.0f}ms, "
+          f"{len(self_us)} modules, best of {repeat})")
+    if loaded:
+        print(f"     forbidden modules loaded: {', '.join(loaded)}")
+    print("     heaviest: " + ", ".join(f"{name} {ms:.1f}ms" for name, ms in _top_packages(self_us, top)))
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import time budget check")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplier for time budgets")
+    parser.add_argument('--top', type=int, default=5, help="heaviest top-level packages to show")
+    parser.add_argument('targets', nargs='*', help="target names (default: all)")
+    args = parser.parse_args()
+
+    targets = [t for t in TARGETS if not args.targets or t.name in args.targets]
+    results = [check(target, args.repeat, args.scale, args.top) for target in targets]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+MCP执行器并发控制基准
+
+用模拟的MCP服务器替换真实连接：服务器有固定容量 capacity，并发超过容量后延迟
+按 并发/容量 线性增长（排队），并发超过 2 倍容量时调用失败（过载）。比较：
+
+- fixed：关闭自适应并发，沿用旧的 max_concurrent=5 固定信号量
+- adaptive：每服务器自适应并发上限（AIMD）
+- 重复调用：同一批中 dup 比例的请求与其他请求完全相同，幂等调用合并后实际发往服务器的调用数
+- 总超时：批量带 timeout 时，deadline 感知的丢弃能按时返回多少个成功结果
+
+    python benchmarks/mcp_concurrency_bench.py --requests 400 --capacity 20 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import structlog
+
+from src.communication.protocols.mcp.adapters.executor_integration import MCPExecutorIntegration
+
+
+class _SimulatedServer:
+    def __init__(self, capacity: int, latency: float):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.calls = 0
+
+    async def call(self, **arguments):
+        self.in_flight += 1
+        self.calls += 1
+        try:
+            if self.in_flight > 2 * self.capacity:
+                await asyncio.sleep(self.latency / 10)
+                raise RuntimeError("server overloaded")
+            await asyncio.sleep(self.latency * max(1.0, self.in_flight / self.capacity))
+            return {"echo": arguments}
+        finally:
+            self.in_flight -= 1
+
+
+class _Tool:
+    def __init__(self, name: str, server: _SimulatedServer):
+        self.name = name
+        self.server_name = "sim"
+        self._server = server
+
+    async def execute(self, **arguments):
+        return await self._server.call(**arguments)
+
+    def get_mcp_tool(self):
+        return None
+
+
+class _Adapter:
+    def __init__(self, server: _SimulatedServer):
+        self._tool = _Tool("lookup", server)
+
+    async def get_mcp_tool(self, tool_name: str):
+        return self._tool
+
+
+async def _run(label: str, args, adaptive: bool, idempotent: bool = False, dup: float = 0.0,
+               timeout: float = None, max_concurrent: int = None) -> None:
+    server = _SimulatedServer(args.capacity, args.latency)
+    integration = MCPExecutorIntegration(_Adapter(server))
+    integration.config.update({
+        "enable_adaptive_concurrency": adaptive,
+        "default_retry_count": 0,
+        "retry_delay": 0.0
+    })
+    distinct = max(1, int(args.requests * (1 - dup)))
+    requests = [
+        {"tool_name": "lookup", "arguments": {"key": i % distinct}, "idempotent": idempotent}
+        for i in range(args.requests)
+    ]
+
+    # 两轮：第一轮让自适应上限收敛，计时第二轮
+    await integration.execute_mcp_tools_batch(requests, max_concurrent=max_concurrent)
+    server.calls = 0
+    began = time.perf_counter()
+    results = await integration.execute_mcp_tools_batch(requests, max_concurrent=max_concurrent, timeout=timeout)
+    elapsed = time.perf_counter() - began
+
+    ok = sum(result.success for result in results)
+    shed = sum(bool(result.metadata.get("shed")) for result in results)
+    stats = await integration.get_integration_stats()
+    limit = stats["servers"]["sim"]["limit"] if "sim" in stats["servers"] else max_concurrent
+    print(f"{label:24s} {elapsed:6.2f}s  ok {ok:4d}/{len(results)}  shed {shed:4d}  "
+          f"server calls {server.calls:4d}  limit {limit}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MCPExecutorIntegration concurrency benchmark")
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--capacity', type=int, default=20, help="simulated server capacity")
+    parser.add_argument('--latency', type=float, default=0.02, help="simulated unloaded latency (s)")
+    parser.add_argument('--dup', type=float, default=0.5, help="fraction of duplicate requests")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    print(f"requests {args.requests}  capacity {args.capacity}  latency {args.latency * 1000:.0f}ms")
+    asyncio.run(_run("fixed (5)", args, adaptive=False, max_concurrent=5))
+    asyncio.run(_run("adaptive", args, adaptive=True))
+    asyncio.run(_run(f"adaptive, {args.dup:.0%} dup", args, adaptive=True, dup=args.dup))
+    asyncio.run(_run(f"adaptive, {args.dup:.0%} dup, coalesced", args, adaptive=True, idempotent=True, dup=args.dup))
+
+    # 总超时只够完成约一半的请求
+    budget = args.requests / args.capacity * args.latency / 2
+    asyncio.run(_run(f"fixed (5), timeout {budget:.2f}s", args, adaptive=False, max_concurrent=5, timeout=budget))
+    asyncio.run(_run(f"adaptive, timeout {budget:.2f}s", args, adaptive=True, timeout=budget))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+提示词渲染基准
+
+比较三种方式渲染同一个带工具目录的模板：
+
+- 每次编译：原 PromptManager 的做法，每次渲染都 jinja2.Template(template_str)
+- 编译缓存：PromptManager.render_template，模板按 (name, version) 只编译一次
+- 片段复用：工具目录用 render_fragment 按目录版本记忆，只渲染随任务变化的部分
+
+    python benchmarks/prompt_render_bench.py --tools 20 --iterations 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from jinja2 import Template
+
+from adk.prompt_manager import PromptManager
+
+TOOLS_TEMPLATE = """可用工具：
+{% for tool in tools %}- {{ tool.name }}: {{ tool.description }}{% if tool.parameters %} 参数: {{ tool.parameters | join(', ') }}{% endif %}
+{% endfor %}"""
+
+TASK_TEMPLATE = """你是一个智能Agent，负责分析任务并决定下一步行动。
+{% if context %}上下文信息：
+{% for item in context %}{{ loop.index }}. {{ item.role }}: {{ item.content }}
+{% endfor %}{% endif %}
+当前任务：{{ task }}
+
+请分析任务并决定下一步行动："""
+
+FULL_TEMPLATE = TASK_TEMPLATE.replace("\n当前任务", "\n" + TOOLS_TEMPLATE + "\n当前任务")
+
+
+def _bench(label: str, render, iterations: int) -> float:
+    render(0)
+    began = time.perf_counter()
+    for i in range(iterations):
+        render(i)
+    per_call = (time.perf_counter() - began) / iterations * 1e6
+    print(f"{label:12s} {per_call:8.1f}us/render")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PromptManager render benchmark")
+    parser.add_argument('--tools', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    tools = [{"name": f"tool_{i}", "description": f"description of tool {i}", "parameters": ["a", "b"]}
+             for i in range(args.tools)]
+    context = [{"role": "user", "content": f"message {i}"} for i in range(5)]
+
+    manager = PromptManager(bytecode_cache=False)
+    manager.register_template("full", FULL_TEMPLATE)
+    manager.register_template("tools", TOOLS_TEMPLATE)
+    manager.register_template("task", TASK_TEMPLATE)
+
+    def recompile(i):
+        return Template(FULL_TEMPLATE).render(tools=tools, context=context, task=f"task {i}")
+
+    def compiled(i):
+        return manager.render_template("full", {"tools": tools, "context": context, "task": f"task {i}"})
+
+    def fragment(i):
+        task = manager.render_template("task", {"context": context, "task": f"task {i}"})
+        head, tail = task.split("\n当前任务", 1)
+        return head + "\n" + manager.render_fragment("tools", 1, {"tools": tools}) + "\n当前任务" + tail
+
+    assert recompile(1) == compiled(1) == fragment(1)
+
+    print(f"tools {args.tools}  iterations {args.iterations}")
+    baseline = _bench("recompile", recompile, args.iterations)
+    for label, render in (("compiled", compiled), ("fragment", fragment)):
+        per_call = _bench(label, render, args.iterations)
+        print(f"{'':12s} {baseline / per_call:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""
+高频记录类型内存基准
+
+分别用改造前的布局（普通类/dataclass，每个实例带 __dict__，datetime 时间戳，
+解码出的重复字符串各自一份）和当前的 slots 记录类型各构造 N 条记录，
+用 tracemalloc 统计每条记录的平均字节数：
+
+    python benchmarks/record_memory_bench.py --records 1000000
+
+两种布局使用相同的内容：每条记录独立的 ID 字符串，以及运行时拼出的
+（未 intern 的）类型名、指标名等重复字符串，模拟从线路上解码出的数据。
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.communication.protocols.acp.message_schema import ACPMessage, ACPPayload, MessageContext, MessageMeta
+from src.communication.protocols.mcp.mcp_types import MCPMessage
+from src.execution.callbacks.callback_handler import CallbackResult, CallbackStatus
+from src.monitoring.metrics.metrics_collector import Metric
+from src.monitoring.tracing.trace_writer import TraceEntry, TraceLevel, TraceType
+from src.state.memory import MemoryEntry, MemoryType
+
+try:
+    from src.execution.executor import ExecutionStep, ExecutionStatus
+except ImportError as e:
+    # executor 依赖的上下文/工具模块不可导入时跳过 ExecutionStep
+    print(f"skipping ExecutionStep: {e}")
+    ExecutionStep = ExecutionStatus = None
+
+
+def _s(*parts: str) -> str:
+    """运行时拼接的字符串，不会被编译期常量 intern"""
+    return "".join(parts)
+
+
+# ---- 改造前的布局 ----
+
+class _OldMemoryEntry:
+    def __init__(self, entry_id, content, memory_type, context_id, trace_id, metadata):
+        self.entry_id = entry_id
+        self.content = content
+        self.memory_type = memory_type
+        self.context_id = context_id
+        self.trace_id = trace_id
+        self.metadata = metadata or {}
+        self.created_at = datetime.utcnow()
+        self.last_accessed = datetime.utcnow()
+        self.access_count = 0
+
+
+@dataclass
+class _OldTraceEntry:
+    trace_id: str
+    context_id: str
+    session_id: Optional[str]
+    agent_id: Optional[str]
+    trace_type: TraceType
+    level: TraceLevel
+    timestamp: int
+    message: str
+    data: Dict[str, Any]
+    parent_trace_id: Optional[str] = None
+    duration: Optional[float] = None
+
+
+class _OldMetric:
+    def __init__(self, name, value, tags=None, unit=""):
+        self.name = name
+        self.value = value
+        self.tags = tags or {}
+        self.timestamp = datetime.now()
+        self.unit = unit
+
+
+@dataclass
+class _OldMCPMessage:
+    jsonrpc: str = "2.0"
+    id: Any = None
+    method: Optional[str] = None
+    params: Optional[Dict[str, Any]] = None
+    result: Any = None
+    error: Any = None
+
+
+@dataclass
+class _OldMessageMeta:
+    message_id: str
+    message_type: str
+    timestamp: str
+    sender_id: str
+    receiver_id: str
+    trace_id: Optional[str] = None
+    correlation_id: Optional[str] = None
+    reply_to: Optional[str] = None
+    priority: int = 2
+    ttl: Optional[int] = None
+    retry_count: int = 0
+    max_retries: int = 3
+
+
+@dataclass
+class _OldMessageContext:
+    session_id: Optional[str] = None
+    tenant_id: Optional[str] = None
+    user_id: Optional[str] = None
+    agent_capabilities: list = None
+    environment: dict = None
+    security_context: dict = None
+
+    def __post_init__(self):
+        self.agent_capabilities = self.agent_capabilities or []
+        self.environment = self.environment or {}
+        self.security_context = self.security_context or {}
+
+
+@dataclass
+class _OldACPPayload:
+    command_type: str
+    action_type: str
+    data: Dict[str, Any]
+    parameters: Dict[str, Any] = None
+    metadata: Dict[str, Any] = None
+
+    def __post_init__(self):
+        self.parameters = self.parameters or {}
+        self.metadata = self.metadata or {}
+
+
+@dataclass
+class _OldACPMessage:
+    meta: _OldMessageMeta
+    context: _OldMessageContext
+    payload: _OldACPPayload
+
+
+class _OldExecutionStep:
+    def __init__(self, step_id, tool_name, parameters):
+        self.step_id = step_id
+        self.tool_name = tool_name
+        self.parameters = parameters
+        self.dependencies = []
+        self.status = "completed"
+        self.result = None
+        self.error = None
+        self.start_time = datetime.utcnow()
+        self.end_time = datetime.utcnow()
+        self.execution_time = 0.001
+
+
+class _OldCallbackResult:
+    def __init__(self, callback_id, status, result=None):
+        self.callback_id = callback_id
+        self.status = status
+        self.result = result
+        self.error = None
+        self.metadata = {}
+        self.timestamp = datetime.utcnow()
+
+
+# ---- 记录构造：相同的内容，分别用新旧类型 ----
+
+def _memory_entry(i, old):
+    context_id = _s("ctx-", str(i % 100))
+    if old:
+        return _OldMemoryEntry(f"entry-{i}", "user asked about pricing", MemoryType.CONTEXT, context_id, None, None)
+    # Memory.add_memory 使用调用方传入的 context_id，from_dict 会 intern
+    entry = MemoryEntry("user asked about pricing", MemoryType.CONTEXT, sys.intern(context_id))
+    entry.entry_id = f"entry-{i}"
+    return entry
+
+
+def _trace_entry(i, old):
+    kwargs = dict(
+        trace_id=f"trace-{i}", context_id=_s("ctx-", str(i % 100)), session_id=None, agent_id=_s("agent-", "7"),
+        trace_type=TraceType.ACP_MESSAGE, level=TraceLevel.INFO, message=_s("router_", "routed"), data={}
+    )
+    if old:
+        return _OldTraceEntry(timestamp=int(time.time()), **kwargs)
+    # 与 TraceWriter.record_trace 一致：intern 上下文ID和消息
+    kwargs["context_id"] = sys.intern(kwargs["context_id"])
+    kwargs["message"] = sys.intern(kwargs["message"])
+    return TraceEntry(timestamp_ns=time.time_ns(), **kwargs)
+
+
+def _metric(i, old):
+    cls = _OldMetric if old else Metric
+    return cls(_s("request_", "latency_ms"), float(i % 1000), None, unit=_s("m", "s"))
+
+
+def _mcp_message(i, old):
+    cls = _OldMCPMessage if old else MCPMessage
+    method = _s("tools/", "call")
+    return cls(jsonrpc=_s("2.", "0") if old else sys.intern(_s("2.", "0")), id=i,
+               method=method if old else sys.intern(method), params=None)
+
+
+def _acp_message(i, old):
+    meta_cls, context_cls, payload_cls, message_cls = (
+        (_OldMessageMeta, _OldMessageContext, _OldACPPayload, _OldACPMessage) if old
+        else (MessageMeta, MessageContext, ACPPayload, ACPMessage)
+    )
+    return message_cls(
+        meta=meta_cls(
+            message_id=f"msg-{i}", message_type=_s("ta", "sk"), timestamp="2024-01-01T00:00:00",
+            sender_id="planner", receiver_id="worker", trace_id=f"trace-{i}"
+        ),
+        context=context_cls(session_id="session-1"),
+        payload=payload_cls(command_type=_s("call_", "tool"), action_type=_s("exec", "ution"), data={})
+    )
+
+
+def _execution_step(i, old):
+    if old:
+        return _OldExecutionStep(f"step-{i}", "web_search", {})
+    step = ExecutionStep(f"step-{i}", "web_search", {})
+    step.status = ExecutionStatus.COMPLETED
+    step.start_time_ns = step.end_time_ns = time.time_ns()
+    step.execution_time = 0.001
+    return step
+
+
+def _callback_result(i, old):
+    cls = _OldCallbackResult if old else CallbackResult
+    return cls(f"cb-{i}", CallbackStatus.COMPLETED, None)
+
+
+RECORDS = [
+    ("MemoryEntry", _memory_entry),
+    ("TraceEntry", _trace_entry),
+    ("Metric", _metric),
+    ("MCPMessage", _mcp_message),
+    ("ACPMessage", _acp_message),
+    ("ExecutionStep", _execution_step),
+    ("CallbackResult", _callback_result),
+]
+
+
+def _measure(factory, count: int, old: bool) -> float:
+    gc.collect()
+    tracemalloc.start()
+    records = [factory(i, old) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current / count
+
+
+def run(count: int) -> None:
+    print(f"{count:,} records per type (bytes per record, including per-record strings)")
+    print(f"{'type':16s}{'before':>10s}{'after':>10s}{'saved':>9s}")
+    for name, factory in RECORDS:
+        if name == "ExecutionStep" and ExecutionStep is None:
+            continue
+        before = _measure(factory, count, old=True)
+        after = _measure(factory, count, old=False)
+        print(f"{name:16s}{before:>10.0f}{after:>10.0f}{(1 - after / before) * 100:>8.0f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record type memory benchmark")
+    parser.add_argument('--records', type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.records)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,107 @@
-from .agent_base import AgentBase
-from .memory import AgentMemory
-from .callback import CallbackRegistry
-from .executor import RuntimeExecutor
-from .registry import AgentRegistry
-from .context import AgentContext
-from .logger import log
-from .config import load_config
-from .runtime import ADKRuntime
-from .types import CallbackFunc, MemoryDict
-from .bir_router import BIRRouter
-from .task_scheduler import TaskScheduler
-from .service_registry import ServiceRegistry
-from .container_manager import ContainerManager
-from .agent_governance_manager import AgentGovernanceManager
-from .prompt_manager import prompt_manager
-
-# 导入graph_engine能力，业务层可通过adk.graph_engine.*调用
-from graph_engine import node as graph_node
-from graph_engine import edge as graph_edge
-from graph_engine import state as graph_state
-from graph_engine import graph as graph_graph
-
-from . import langgraph_engine
-from .agent import Agent
-from .tool import Tool
-from .reasoner import Reasoner
-from .agent_container import agent_container
-from .agent_manager import agent_manager
+"""
+ADK（Agent Development Kit）门面
+
+导出按 PEP 562 延迟加载：导入 adk 本身不会加载 langgraph、jinja2、graph_engine
+或各管理器单例，首次访问某个导出名时才导入对应模块。
+"""
+
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .agent_base import AgentBase
+    from .memory import AgentMemory
+    from .callback import CallbackRegistry
+    from .executor import RuntimeExecutor
+    from .registry import AgentRegistry
+    from .context import AgentContext
+    from .logger import log
+    from .config import load_config
+    from .runtime import ADKRuntime
+    from .types import CallbackFunc, MemoryDict
+    from .bir_router import BIRRouter
+    from .task_scheduler import TaskScheduler
+    from .service_registry import ServiceRegistry
+    from .container_manager import ContainerManager
+    from .agent_governance_manager import AgentGovernanceManager
+    from .prompt_manager import prompt_manager
+    from graph_engine import node as graph_node
+    from graph_engine import edge as graph_edge
+    from graph_engine import state as graph_state
+    from graph_engine import graph as graph_graph
+    from . import langgraph_engine
+    from .node_tracer import NodeTracer
+    from .agent import Agent
+    from .tool import Tool
+    from .reasoner import Reasoner
+    from .agent_container import agent_container
+    from .agent_manager import agent_manager
+
+# 导出名 -> (模块, 属性)，属性为 None 时导出模块本身
+_LAZY_ATTRS = {
+    "AgentBase": (".agent_base", "AgentBase"),
+    "AgentMemory": (".memory", "AgentMemory"),
+    "CallbackRegistry": (".callback", "CallbackRegistry"),
+    "RuntimeExecutor": (".executor", "RuntimeExecutor"),
+    "AgentRegistry": (".registry", "AgentRegistry"),
+    "AgentContext": (".context", "AgentContext"),
+    "log": (".logger", "log"),
+    "load_config": (".config", "load_config"),
+    "ADKRuntime": (".runtime", "ADKRuntime"),
+    "CallbackFunc": (".types", "CallbackFunc"),
+    "MemoryDict": (".types", "MemoryDict"),
+    "BIRRouter": (".bir_router", "BIRRouter"),
+    "TaskScheduler": (".task_scheduler", "TaskScheduler"),
+    "ServiceRegistry": (".service_registry", "ServiceRegistry"),
+    "ContainerManager": (".container_manager", "ContainerManager"),
+    "AgentGovernanceManager": (".agent_governance_manager", "AgentGovernanceManager"),
+    "prompt_manager": (".prompt_manager", "prompt_manager"),
+    # graph_engine能力，业务层可通过adk.graph_*调用
+    "graph_node": ("graph_engine.node", None),
+    "graph_edge": ("graph_engine.edge", None),
+    "graph_state": ("graph_engine.state", None),
+    "graph_graph": ("graph_engine.graph", None),
+    "langgraph_engine": (".langgraph_engine", None),
+    "NodeTracer": (".node_tracer", "NodeTracer"),
+    "Agent": (".agent", "Agent"),
+    "Tool": (".tool", "Tool"),
+    "Reasoner": (".reasoner", "Reasoner"),
+    "agent_container": (".agent_container", "agent_container"),
+    "agent_manager": (".agent_manager", "agent_manager"),
+}
 
 __all__ = [
-    "AgentBase", "AgentMemory", "CallbackRegistry", "RuntimeExecutor", "AgentRegistry", "AgentContext", "log", "load_config", "ADKRuntime", "CallbackFunc", "MemoryDict", 'graph_node', 'graph_edge', 'graph_state', 'graph_graph', 'langgraph_engine', 'prompt_manager', 'Agent', 'Tool', 'Reasoner', 'agent_container', 'agent_manager',
-] 
\ No newline at end of file
+    "AgentBase", "AgentMemory", "CallbackRegistry", "RuntimeExecutor", "AgentRegistry", "AgentContext", "log", "load_config", "ADKRuntime", "CallbackFunc", "MemoryDict", 'graph_node', 'graph_edge', 'graph_state', 'graph_graph', 'langgraph_engine', 'NodeTracer', 'prompt_manager', 'Agent', 'Tool', 'Reasoner', 'agent_container', 'agent_manager',
+]
+
+
+def __getattr__(name):
+    try:
+        module_name, attr = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    module = importlib.import_module(module_name, __name__)
+    value = module if attr is None else getattr(module, attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+
+class _ADKModule(types.ModuleType):
+    """
+    导入子模块时 import 系统会把子模块绑定为包属性（如 adk.prompt_manager），
+    这会遮住同名的导出单例；与子模块同名的导出名保持指向导出对象。
+    """
+
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and _LAZY_ATTRS.get(name, (None, None))[1] == name:
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _ADKModule
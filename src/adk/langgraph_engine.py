@@ -1,47 +1,19 @@
 from langgraph.graph import StateGraph
-import time
+from .node_tracer import NodeTracer
 
 class LangGraphEngine:
     def __init__(self):
         self.graph = StateGraph()
         self.entry_node = None
         self._trace_writer = None
+        self._tracer = None
         self._node_funcs = {}
 
     def add_node(self, name, func):
         self._node_funcs[name] = func
-        if self._trace_writer:
+        if self._tracer:
             # 包裹trace逻辑
-            def traced_func(state, _name=name, _func=func):
-                start = time.time()
-                try:
-                    result = _func(state)
-                    self._trace_writer.record_event(
-                        state.get("trace_id", "unknown"),
-                        "NODE_EXEC",
-                        {
-                            "node": _name,
-                            "input": state,
-                            "output": result,
-                            "duration": round(time.time()-start, 4),
-                            "success": True
-                        }
-                    )
-                    return result
-                except Exception as e:
-                    self._trace_writer.record_event(
-                        state.get("trace_id", "unknown"),
-                        "NODE_ERROR",
-                        {
-                            "node": _name,
-                            "input": state,
-                            "error": str(e),
-                            "duration": round(time.time()-start, 4),
-                            "success": False
-                        }
-                    )
-                    raise
-            self.graph.add_node(name, traced_func)
+            self.graph.add_node(name, self._tracer.wrap(name, func))
         else:
             self.graph.add_node(name, func)
 
@@ -56,16 +28,24 @@ class LangGraphEngine:
         self.entry_node = name
         self.graph.set_entry(name)
 
-    def with_trace(self, trace_writer):
+    def with_trace(self, trace_writer, mode="light", snapshot_every=100, batch_size=64):
+        """
+        开启节点追踪，参数含义见 NodeTracer；mode="full" 时每次记录完整的 input/output
+        """
         self._trace_writer = trace_writer
+        self._tracer = NodeTracer(trace_writer, mode=mode, snapshot_every=snapshot_every, batch_size=batch_size)
         # 重新注册所有已添加节点，包裹trace
         for name, func in self._node_funcs.items():
-            self.graph.add_node(name, func)  # 会被traced_func包裹
+            self.graph.add_node(name, self._tracer.wrap(name, func))
         return self
 
     def run(self, state):
         if not self.entry_node:
             raise ValueError("Entry node not set")
-        return self.graph.run(state)
+        try:
+            return self.graph.run(state)
+        finally:
+            if self._tracer:
+                self._tracer.flush()
 
 StateGraph = LangGraphEngine 
\ No newline at end of file
@@ -0,0 +1,130 @@
+import inspect
+import time
+from datetime import datetime
+
+_MISSING = object()
+
+class NodeTracer:
+    """
+    图节点执行的轻量追踪
+
+    mode="light"（默认）时每次节点执行只记录 perf_counter_ns 计时和输出中发生变化的
+    状态键（按对象身份比较，不深拷贝、不序列化状态），完整的输入/输出快照每
+    snapshot_every 次执行采样一次（浅拷贝，0 表示不采样）；mode="full" 与旧行为一致，
+    每次都记录完整的 input/output。
+
+    事件先进入缓冲区，攒满 batch_size 条或调用 flush() 时批量交给 TraceWriter：
+    writer 提供 record_events 时一次调用，否则逐条 record_event。事件的时间戳
+    （time_ns）在节点执行结束时记录，不是写入时间。
+    """
+
+    def __init__(self, trace_writer, mode="light", snapshot_every=100, batch_size=64):
+        if mode not in ("light", "full"):
+            raise ValueError(f"Unknown trace mode: {mode}")
+        self.trace_writer = trace_writer
+        self.mode = mode
+        self.snapshot_every = snapshot_every
+        self.batch_size = batch_size
+        self._buffer = []
+        self._executions = 0
+        self._record_events = getattr(trace_writer, "record_events", None)
+        self._event_timestamp = _accepts_timestamp(getattr(trace_writer, "record_event", None))
+
+    def wrap(self, name, func):
+        """包裹节点函数，返回带追踪的版本"""
+        if self.mode == "full":
+            return self._wrap_full(name, func)
+        perf_counter_ns = time.perf_counter_ns
+        record = self._record
+
+        def traced_func(state):
+            # 首次执行及此后每 snapshot_every 次采样一次完整快照
+            snapshot = self.snapshot_every and self._executions % self.snapshot_every == 0
+            self._executions += 1
+            # 浅拷贝只保存键到值的引用，节点原地改写状态后仍能比较出变化的键
+            before = dict(state)
+            start = perf_counter_ns()
+            try:
+                result = func(state)
+            except Exception as e:
+                payload = {"node": name, "duration_ns": perf_counter_ns() - start, "success": False, "error": str(e)}
+                if snapshot:
+                    payload["input"] = before
+                record(state.get("trace_id", "unknown"), "NODE_ERROR", payload)
+                raise
+            payload = {"node": name, "duration_ns": perf_counter_ns() - start, "success": True,
+                       "changed": _changed_keys(before, result)}
+            if snapshot:
+                payload["input"] = before
+                payload["output"] = dict(result) if isinstance(result, dict) else result
+            record(state.get("trace_id", "unknown"), "NODE_EXEC", payload)
+            return result
+
+        return traced_func
+
+    def _wrap_full(self, name, func):
+        record = self._record
+
+        def traced_func(state):
+            start = time.time()
+            try:
+                result = func(state)
+                record(state.get("trace_id", "unknown"), "NODE_EXEC", {
+                    "node": name,
+                    "input": state,
+                    "output": result,
+                    "duration": round(time.time()-start, 4),
+                    "success": True
+                })
+                return result
+            except Exception as e:
+                record(state.get("trace_id", "unknown"), "NODE_ERROR", {
+                    "node": name,
+                    "input": state,
+                    "error": str(e),
+                    "duration": round(time.time()-start, 4),
+                    "success": False
+                })
+                raise
+
+        return traced_func
+
+    def _record(self, trace_id, event_type, payload):
+        self._buffer.append((trace_id, event_type, payload, time.time_ns()))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """把缓冲的事件写入 TraceWriter"""
+        events, self._buffer = self._buffer, []
+        if not events:
+            return
+        if self._record_events is not None:
+            self._record_events(events)
+        else:
+            for trace_id, event_type, payload, timestamp_ns in events:
+                if self._event_timestamp:
+                    timestamp = datetime.utcfromtimestamp(timestamp_ns / 1e9).isoformat()
+                    self.trace_writer.record_event(trace_id, event_type, payload, timestamp=timestamp)
+                else:
+                    self.trace_writer.record_event(trace_id, event_type, payload)
+
+def _accepts_timestamp(record_event):
+    """record_event 是否接受 timestamp 关键字参数"""
+    if record_event is None:
+        return False
+    try:
+        return "timestamp" in inspect.signature(record_event).parameters
+    except (TypeError, ValueError):
+        return False
+
+def _changed_keys(before, result):
+    """
+    节点输出中与执行前状态不同的键
+
+    按对象身份比较，不遍历嵌套结构：重新赋值的键会被记录，原地修改的可变值（如
+    list.append）不会。
+    """
+    if not isinstance(result, dict):
+        return None
+    return [key for key, value in result.items() if before.get(key, _MISSING) is not value]
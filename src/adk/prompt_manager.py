@@ -1,23 +1,78 @@
 from collections import defaultdict
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FunctionLoader
 
 class PromptManager:
-    def __init__(self):
-        # {name: {version: {"template": str, "meta": dict}}}
+    """
+    提示词模板管理
+
+    模板按 (name, version) 编译一次后缓存，重新注册时失效；所有模板共用一个
+    jinja2.Environment，编译结果写入字节码缓存（默认在系统临时目录），新进程
+    首次渲染时不必重新编译。静态片段（如工具目录）用 render_fragment 按片段版本记忆。
+    """
+
+    def __init__(self, bytecode_cache_dir=None, bytecode_cache=True):
+        # {name: {version: {"template": str, "meta": dict, "revision": int}}}
         self.templates = defaultdict(dict)
+        self._compiled = {}  # (name, version) -> jinja2.Template
+        self._fragments = {}  # (name, version) -> ((片段版本, 模板修订号), 渲染结果)
+        self._revision = 0
+        self.env = Environment(
+            loader=FunctionLoader(self._load_source),
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir) if bytecode_cache else None,
+            # 编译结果由 _compiled 管理，环境自身不再缓存
+            cache_size=0,
+            auto_reload=False,
+        )
+
+    def _load_source(self, loader_name):
+        name, version, _ = loader_name.split("\0")
+        entry = self.get_template(name, version)
+        if entry is None:
+            return None
+        return entry["template"], None, lambda: True
 
     def register_template(self, name, template_str, version="default", meta=None):
-        self.templates[name][version] = {"template": template_str, "meta": meta or {}}
+        # 修订号写进加载名，重新注册后不会复用旧的编译结果
+        self._revision += 1
+        self.templates[name][version] = {"template": template_str, "meta": meta or {}, "revision": self._revision}
+        self._compiled.pop((name, version), None)
 
     def get_template(self, name, version="default"):
         return self.templates.get(name, {}).get(version, None)
 
+    def get_compiled(self, name, version="default"):
+        """获取编译后的模板，首次访问时编译"""
+        compiled = self._compiled.get((name, version))
+        if compiled is None:
+            entry = self.get_template(name, version)
+            if not entry:
+                raise ValueError(f"Template '{name}' (version: {version}) not found")
+            compiled = self.env.get_template(f"{name}\0{version}\0{entry['revision']}")
+            self._compiled[(name, version)] = compiled
+        return compiled
+
     def render_template(self, name, context, version="default"):
+        return self.get_compiled(name, version).render(**context)
+
+    def render_fragment(self, name, fragment_version, context, version="default"):
+        """
+        渲染静态片段，fragment_version 不变时直接返回上次的结果
+
+        Args:
+            name: 模板名称
+            fragment_version: 片段输入的版本（如工具目录版本号），变化时重新渲染
+            context: 渲染变量，只在重新渲染时使用
+            version: 模板版本
+        """
+        key = (name, version)
         entry = self.get_template(name, version)
-        if not entry:
-            raise ValueError(f"Template '{name}' (version: {version}) not found")
-        tpl = Template(entry["template"])
-        return tpl.render(**context)
+        stamp = (fragment_version, entry["revision"] if entry else None)
+        cached = self._fragments.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        text = self.render_template(name, context, version)
+        self._fragments[key] = (stamp, text)
+        return text
 
     def list_templates(self):
         return {name: list(vers.keys()) for name, vers in self.templates.items()}
@@ -26,4 +81,4 @@ class PromptManager:
         entry = self.get_template(name, version)
         return entry["meta"] if entry else None
 
-prompt_manager = PromptManager() 
\ No newline at end of file
+prompt_manager = PromptManager()
@@ -2,14 +2,27 @@
 工作流引擎适配器模块
 
 提供与各种工作流引擎的集成接口，包括n8n、dify等。
+
+具体引擎的适配器依赖各自的客户端库（n8n 需要 aiohttp），按 PEP 562 在首次访问时才导入。
 """
 
+from typing import TYPE_CHECKING
+
 from .base_adapter import WorkflowEngineAdapter
-from .n8n_adapter import N8nAdapter
+
+if TYPE_CHECKING:
+    from .n8n_adapter import N8nAdapter
 # from .dify_adapter import DifyAdapter  # 暂时注释，文件不存在
 
 __all__ = [
     'WorkflowEngineAdapter',
     'N8nAdapter', 
     # 'DifyAdapter'  # 暂时注释
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name == 'N8nAdapter':
+        from .n8n_adapter import N8nAdapter
+        return N8nAdapter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -19,7 +19,7 @@ Agent Communication Protocol - 智能体通信协议
 
 # 核心通信组件
 from .acp_client import ACPClient, ACPClientManager
-from .acp_server import ACPServer, ACPGateway, ACPRouter, AgentContainer
+from .acp_server import ACPServer, ACPGateway, ACPRouter, AgentContainer, KeyedWorkerPool
 from .control_adapter import (
     ControlAdapter, ControlDispatcher, 
     APIControlAdapter, ToolControlAdapter, ModelControlAdapter,
@@ -68,6 +68,7 @@ __all__ = [
     "ACPGateway",
     "ACPRouter",
     "AgentContainer",
+    "KeyedWorkerPool",
     
     # 控制适配器
     "ControlAdapter",
@@ -1,19 +1,34 @@
 """
 ACP (Model Context Protocol) 客户端
 实现行为数据的封装与追踪核心，负责Client与Server之间的协议交互
+
+客户端与 ACPServer 保持一条持久 WebSocket 连接：
+- 发送走有界队列，由写任务把排队的消息合并为数组帧批量发送
+- 服务端按处理进度回送累计确认（flow ack），在途消息数超过 max_in_flight 时暂停发送
+- 响应按 trace_id（或 correlation_id）匹配到等待中的 Future / 回调
+- 连接断开后按指数退避（带抖动）自动重连，并重放注册消息
 """
 
-import json
+import asyncio
+import logging
+import random
 import time
 import uuid
-from typing import Dict, Any, Optional, List
+from collections import deque
 from dataclasses import dataclass, asdict
+from datetime import datetime
 from enum import Enum
-import asyncio
-import logging
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+import websockets
 
 from ...dispatcher.bir_router import BehaviorPackage
-from .message_schema import ACPMessage
+from ..codec import Codec, codec_for_subprotocol, subprotocols
+from .acp_server import ACP_SUBPROTOCOL
+from .message_schema import (
+    ACPMessage, ACPMessageBuilder, ACPMessageType, ACPPayload as StandardPayload,
+    MessageContext, MessageMeta
+)
 
 
 class ACPCommandType(Enum):
@@ -39,53 +54,373 @@ class ACPPayload:
     source_id: str                 # 源ID
 
 
+def _websocket_url(server_url: str) -> str:
+    """把 http(s) 地址转换为 ws(s) 地址"""
+    if server_url.startswith("http://"):
+        return "ws://" + server_url[len("http://"):]
+    if server_url.startswith("https://"):
+        return "wss://" + server_url[len("https://"):]
+    return server_url
+
+
 class ACPClient:
     """
     ACP客户端
     负责封装行为请求包，与ACP服务器进行通信
+    
+    connect() 启动后台连接任务后，异步接口（send_message/request/call_tool）在发送队列
+    满时等待；同步接口（send_acp_message/send_behavior_package）不阻塞，队列满或
+    客户端未启动时返回 False。连接断开时已发出但未被服务端确认的消息不会重发。
     """
     
-    def __init__(self, server_url: str = "http://localhost:8000", trace_writer=None):
+    def __init__(
+        self,
+        server_url: str = "ws://localhost:8765",
+        trace_writer=None,
+        agent_id: Optional[str] = None,
+        message_handler: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        max_queue_size: int = 1000,
+        max_batch: int = 64,
+        max_in_flight: int = 256,
+        request_timeout: float = 30.0,
+        reconnect_base_delay: float = 0.5,
+        reconnect_max_delay: float = 30.0,
+        history_size: int = 1000
+    ):
         """
         初始化ACP客户端
         
         Args:
-            server_url: ACP服务器URL
+            server_url: ACP服务器URL（http(s) 地址会转换为 ws(s)）
             trace_writer: 追踪写入器
+            agent_id: 本客户端的 Agent ID，默认使用会话ID
+            message_handler: 未匹配到等待者的服务端消息（如投递来的任务）的处理函数，可以是协程函数
+            max_queue_size: 发送队列容量
+            max_batch: 单个数组帧最多合并的消息数
+            max_in_flight: 已发送但未被服务端确认的消息上限，0 表示不做流量控制
+            request_timeout: request/call_tool 的默认等待超时（秒）
+            reconnect_base_delay: 重连初始退避时间（秒）
+            reconnect_max_delay: 重连最大退避时间（秒）
+            history_size: 保留的发送历史条数
         """
-        self.server_url = server_url
+        self.server_url = _websocket_url(server_url)
         self.trace_writer = trace_writer
         self.session_id = self._generate_session_id()
+        self.agent_id = agent_id or self.session_id
+        self.message_handler = message_handler
         self.logger = logging.getLogger(__name__)
+        self.builder = ACPMessageBuilder(self.agent_id, trace_writer)
+        
+        self.max_queue_size = max_queue_size
+        self.max_batch = max_batch
+        self.max_in_flight = max_in_flight
+        self.request_timeout = request_timeout
+        self.reconnect_base_delay = reconnect_base_delay
+        self.reconnect_max_delay = reconnect_max_delay
         
         # 连接状态
         self.connected = False
-        self.connection_retries = 3
+        self.codec: Optional[Codec] = None
+        self._websocket = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._closing = False
+        self._connected_event = asyncio.Event()
+        self._connect_count = 0
+        self._registration: Optional[Dict[str, Any]] = None
         
-        # 消息队列
-        self.message_queue = []
-        self.callback_handlers = {}
+        # 发送队列与流量控制；_retry 保存连接断开时未发出的批次
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue_size)
+        self._retry: List[Dict[str, Any]] = []
+        self._sent = 0
+        self._acked = 0
+        self._window = asyncio.Event()
+        self._window.set()
+        
+        # 等待响应的请求与回调
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.callback_handlers: Dict[str, Callable] = {}
+        
+        # 发送历史（只保留摘要，容量有限）
+        self.message_history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self.stats = {
+            "sent": 0,
+            "frames": 0,
+            "dropped": 0,
+            "received": 0,
+            "reconnects": 0
+        }
     
     def _generate_session_id(self) -> str:
         """生成会话ID"""
         return f"session-{uuid.uuid4().hex[:8]}"
     
-    async def connect(self) -> bool:
+    async def connect(self, timeout: float = 10.0) -> bool:
         """
         连接到ACP服务器
         
+        启动后台连接任务并等待首次连接建立；超时后后台任务继续按退避重连。
+        
+        Args:
+            timeout: 等待连接建立的时间（秒）
+        
         Returns:
-            bool: 连接是否成功
+            bool: 超时前是否已连接
         """
+        if self._runner is None or self._runner.done():
+            self._loop = asyncio.get_running_loop()
+            self._closing = False
+            self._runner = asyncio.create_task(self._run())
+        
         try:
-            # 这里应该实现实际的连接逻辑
-            # 比如WebSocket连接或HTTP长连接
-            self.connected = True
-            self.logger.info(f"Connected to ACP server: {self.server_url}")
+            await asyncio.wait_for(self._connected_event.wait(), timeout)
             return True
-        except Exception as e:
-            self.logger.error(f"Failed to connect to ACP server: {e}")
+        except asyncio.TimeoutError:
+            self.logger.error(f"Failed to connect to ACP server: {self.server_url}")
+            return False
+    
+    async def _run(self):
+        """保持连接：断开后按指数退避重连"""
+        delay = self.reconnect_base_delay
+        while not self._closing:
+            try:
+                websocket = await websockets.connect(
+                    self.server_url,
+                    subprotocols=subprotocols(ACP_SUBPROTOCOL),
+                    max_queue=None
+                )
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.InvalidHandshake) as e:
+                # 抖动避免大量客户端同时重连
+                wait = delay * (0.5 + random.random() / 2)
+                self.logger.warning(f"ACP connection failed ({e}), retrying in {wait:.1f}s")
+                await asyncio.sleep(wait)
+                delay = min(delay * 2, self.reconnect_max_delay)
+                continue
+            
+            delay = self.reconnect_base_delay
+            await self._serve(websocket)
+    
+    async def _serve(self, websocket):
+        """在一条连接上运行读写任务，直到连接断开"""
+        self._websocket = websocket
+        self.codec = codec_for_subprotocol(websocket.subprotocol, ACP_SUBPROTOCOL)
+        self._sent = self._acked = 0
+        self._window.set()
+        self._connect_count += 1
+        if self._connect_count > 1:
+            self.stats["reconnects"] += 1
+        
+        try:
+            # 重连后先重放注册，服务端才能把消息投递到新连接
+            if self._registration is not None and self._connect_count > 1:
+                await websocket.send(self.codec.encode(self._registration))
+                self._sent += 1
+        except websockets.exceptions.ConnectionClosed:
+            return
+        
+        self.connected = True
+        self._connected_event.set()
+        self.logger.info(f"Connected to ACP server: {self.server_url} (codec: {self.codec.name})")
+        
+        reader = asyncio.create_task(self._reader(websocket))
+        writer = asyncio.create_task(self._writer(websocket))
+        try:
+            await asyncio.wait({reader, writer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.connected = False
+            self._connected_event.clear()
+            for task in (reader, writer):
+                task.cancel()
+            await asyncio.gather(reader, writer, return_exceptions=True)
+            await websocket.close()
+            self._websocket = None
+            self._fail_pending(ConnectionError("ACP connection lost"))
+            if not self._closing:
+                self.logger.warning(f"Disconnected from ACP server: {self.server_url}")
+    
+    async def _writer(self, websocket):
+        """从发送队列取消息，合并为数组帧发送"""
+        while True:
+            if self._retry:
+                batch, from_queue = self._retry, len(self._retry)
+                self._retry = []
+            else:
+                while self.max_in_flight and self._sent - self._acked >= self.max_in_flight:
+                    self._window.clear()
+                    await self._window.wait()
+                
+                batch = [await self._queue.get()]
+                room = self.max_batch
+                if self.max_in_flight:
+                    room = min(room, self.max_in_flight - (self._sent - self._acked))
+                while len(batch) < room and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                from_queue = len(batch)
+            
+            try:
+                await websocket.send(self.codec.encode(batch[0] if len(batch) == 1 else batch))
+            except BaseException:
+                # 连接断开或被取消，批次留到下一条连接发送
+                self._retry = batch
+                raise
+            
+            self._sent += len(batch)
+            self.stats["sent"] += len(batch)
+            self.stats["frames"] += 1
+            for _ in range(from_queue):
+                self._queue.task_done()
+    
+    async def _reader(self, websocket):
+        """读取服务端消息"""
+        async for raw in websocket:
+            try:
+                frame = self.codec.decode(raw)
+            except ValueError as e:
+                self.logger.error(f"Invalid frame from ACP server: {e}")
+                continue
+            for message in frame if isinstance(frame, list) else (frame,):
+                if not isinstance(message, dict):
+                    continue
+                if message.get("type") == "ack" and message.get("message") == "flow":
+                    self._on_flow_ack(message.get("processed", 0))
+                else:
+                    self.stats["received"] += 1
+                    self.handle_server_response(message)
+    
+    def _on_flow_ack(self, processed: int):
+        """服务端累计确认，打开发送窗口"""
+        if processed > self._acked:
+            self._acked = processed
+            if self._sent - self._acked < self.max_in_flight:
+                self._window.set()
+    
+    def _fail_pending(self, error: Exception):
+        """连接断开时让等待响应的请求失败"""
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+    
+    def _record_send(self, wire: Dict[str, Any], status: str):
+        """记录发送历史与追踪"""
+        meta = wire["meta"]
+        context_id = wire["context"].get("session_id")
+        self.message_history.append({
+            "timestamp": time.time(),
+            "trace_id": meta["trace_id"],
+            "context_id": context_id,
+            "message_type": meta["message_type"],
+            "status": status
+        })
+        if self.trace_writer:
+            self.trace_writer.record_acp_message(
+                trace_id=meta["trace_id"],
+                context_id=context_id,
+                message_type="client_send",
+                payload=wire
+            )
+    
+    def _put_nowait(self, wire: Dict[str, Any]) -> bool:
+        """在事件循环线程内非阻塞入队"""
+        try:
+            self._queue.put_nowait(wire)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            self._record_send(wire, "dropped")
+            self.logger.warning(f"ACP send queue full, dropped message: {wire['meta']['trace_id']}")
             return False
+        self._record_send(wire, "queued")
+        return True
+    
+    def _enqueue_nowait(self, message: ACPMessage) -> bool:
+        """
+        同步接口的入队逻辑
+        
+        在客户端所在事件循环的线程里直接入队；在其他线程（如 run_in_executor）里
+        提交到事件循环执行，此时队列满导致的丢弃只记入统计和历史。
+        """
+        if self._loop is None or self._loop.is_closed():
+            self.logger.error("ACP client is not started, call connect() first")
+            return False
+        
+        wire = message.to_wire()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            return self._put_nowait(wire)
+        self._loop.call_soon_threadsafe(self._put_nowait, wire)
+        return True
+    
+    async def send_message(self, message: Union[ACPMessage, ACPPayload, StandardPayload],
+                           timeout: Optional[float] = None) -> bool:
+        """
+        发送消息，发送队列满时等待
+        
+        Args:
+            message: 标准ACP消息，或旧版载荷
+            timeout: 等待入队的超时时间（秒），为空时一直等待
+        
+        Returns:
+            bool: 是否已进入发送队列
+        """
+        wire = self._to_message(message).to_wire()
+        try:
+            if timeout is None:
+                await self._queue.put(wire)
+            else:
+                await asyncio.wait_for(self._queue.put(wire), timeout)
+        except asyncio.TimeoutError:
+            self.stats["dropped"] += 1
+            self._record_send(wire, "dropped")
+            return False
+        self._record_send(wire, "queued")
+        return True
+    
+    send = send_message
+    
+    async def request(self, message: ACPMessage, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        发送消息并等待 trace_id 相同的响应
+        
+        Args:
+            message: 标准ACP消息
+            timeout: 等待超时（秒），默认 request_timeout
+        
+        Returns:
+            Dict[str, Any]: 服务端返回的原始消息
+        
+        Raises:
+            asyncio.TimeoutError: 超时未收到响应
+            ConnectionError: 等待期间连接断开
+        """
+        trace_id = message.meta.trace_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[trace_id] = future
+        try:
+            await self.send_message(message)
+            return await asyncio.wait_for(future, timeout or self.request_timeout)
+        finally:
+            if self._pending.get(trace_id) is future:
+                del self._pending[trace_id]
+    
+    async def register(self, capabilities: List[str], metadata: Dict[str, Any] = None,
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        向服务器注册本 Agent，重连后自动重放
+        
+        Args:
+            capabilities: 能力列表
+            metadata: 元数据
+            timeout: 等待注册确认的超时（秒）
+        
+        Returns:
+            Dict[str, Any]: 服务器的注册确认
+        """
+        message = self.builder.create_register_message(self.agent_id, capabilities, metadata)
+        self._registration = message.to_wire()
+        return await self.request(message, timeout)
     
     def send_behavior_package(self, behavior_package: BehaviorPackage) -> bool:
         """
@@ -93,9 +428,9 @@ class ACPClient:
         
         Args:
             behavior_package: 行为指令包
-            
+        
         Returns:
-            bool: 发送是否成功
+            bool: 是否已进入发送队列
         """
         try:
             # 构建ACP载荷
@@ -113,7 +448,7 @@ class ACPClient:
         
         Args:
             behavior_package: 行为指令包
-            
+        
         Returns:
             ACPPayload: ACP载荷
         """
@@ -137,118 +472,120 @@ class ACPClient:
             source_id=behavior_package.from_agent
         )
     
+    def _to_message(self, payload: Union[ACPMessage, ACPPayload, StandardPayload]) -> ACPMessage:
+        """
+        把旧版载荷包装为标准任务消息
+        
+        Args:
+            payload: 标准ACP消息、本模块的 ACPPayload 或标准 ACPPayload
+        
+        Returns:
+            ACPMessage: 标准消息
+        """
+        if isinstance(payload, ACPMessage):
+            return payload
+        
+        if isinstance(payload, ACPPayload):
+            receiver_id = payload.meta.get("to_agent") or "acp_server"
+            trace_id = payload.trace_id
+            context_id = payload.context_id
+            standard = StandardPayload(
+                command_type=payload.command,
+                action_type="",
+                data=asdict(payload)
+            )
+        else:
+            receiver_id = "acp_server"
+            trace_id = payload.metadata.get("trace_id")
+            context_id = payload.metadata.get("context_id")
+            standard = payload
+        
+        return ACPMessage(
+            meta=MessageMeta(
+                message_id=str(uuid.uuid4()),
+                message_type=ACPMessageType.TASK.value,
+                timestamp=datetime.utcnow().isoformat(),
+                sender_id=self.agent_id,
+                receiver_id=receiver_id,
+                trace_id=trace_id
+            ),
+            context=MessageContext(session_id=context_id),
+            payload=standard
+        )
+    
     def send_acp_message(self, acp_message: ACPMessage) -> bool:
         """
-        发送标准ACPMessage消息
+        发送标准ACPMessage消息（非阻塞）
+        
         Args:
             acp_message: 标准化ACP消息
+        
         Returns:
-            bool: 发送是否成功
+            bool: 是否已进入发送队列
         """
         try:
-            message_dict = acp_message.to_dict()
-            message = json.dumps(message_dict, ensure_ascii=False)
-            # 记录追踪信息
-            if self.trace_writer:
-                self.trace_writer.record_acp_message(
-                    trace_id=acp_message.meta.trace_id,
-                    context_id=acp_message.context.session_id,
-                    message_type="client_send",
-                    payload=message_dict
-                )
-            self.message_queue.append({
-                "timestamp": time.time(),
-                "payload": message_dict,
-                "status": "pending"
-            })
-            self.logger.info(f"Sent ACPMessage: {acp_message.meta.trace_id}")
-            return True
+            return self._enqueue_nowait(acp_message)
         except Exception as e:
             self.logger.error(f"Failed to send ACPMessage: {e}")
             return False
-
+    
     def _send_payload(self, payload) -> bool:
         """
-        兼容老接口，支持直接发送ACPMessage或dict结构
+        兼容老接口，支持直接发送ACPMessage或旧版载荷结构
         """
-        if isinstance(payload, ACPMessage):
-            return self.send_acp_message(payload)
-        # 兼容老的ACPPayload结构
         try:
-            payload_dict = asdict(payload)
-            message = json.dumps(payload_dict, ensure_ascii=False)
-            if self.trace_writer:
-                self.trace_writer.record_acp_message(
-                    trace_id=payload_dict.get("trace_id"),
-                    context_id=payload_dict.get("context_id"),
-                    message_type="client_send",
-                    payload=payload_dict
-                )
-            self.message_queue.append({
-                "timestamp": time.time(),
-                "payload": payload_dict,
-                "status": "pending"
-            })
-            self.logger.info(f"Sent legacy payload: {payload_dict.get('trace_id')}")
-            return True
+            return self._enqueue_nowait(self._to_message(payload))
         except Exception as e:
             self.logger.error(f"Failed to send legacy payload: {e}")
             return False
     
-    async def call_tool(self, 
-                       tool_name: str, 
+    async def call_tool(self,
+                       tool_name: str,
                        parameters: Dict[str, Any],
                        context_id: str,
-                       trace_id: str) -> Dict[str, Any]:
+                       trace_id: str,
+                       receiver_id: str = "acp_server",
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
         """
-        调用工具
+        调用工具并等待结果
         
         Args:
             tool_name: 工具名称
             parameters: 参数
             context_id: 上下文ID
             trace_id: 追踪ID
-            
+            receiver_id: 执行工具的 Agent
+            timeout: 等待结果的超时（秒），默认 request_timeout
+        
         Returns:
             Dict[str, Any]: 调用结果
         """
+        message = self.builder.create_tool_call_message(
+            receiver_id=receiver_id,
+            tool_name=tool_name,
+            tool_args=parameters,
+            context_id=context_id,
+            trace_id=trace_id
+        )
         try:
-            payload = ACPPayload(
-                command=ACPCommandType.CALL.value,
-                meta={
-                    "tool_name": tool_name,
-                    "parameters": parameters
-                },
-                permissions=["execute"],
-                context={},
-                trace_id=trace_id,
-                context_id=context_id,
-                timestamp=int(time.time()),
-                source_id=self.session_id
-            )
-            
-            # 发送调用请求
-            success = self._send_payload(payload)
-            if not success:
-                return {"error": "Failed to send tool call request"}
-            
-            # 等待响应（这里应该实现异步等待）
-            # 实际实现中应该使用WebSocket或消息队列
-            await asyncio.sleep(0.1)  # 模拟等待
-            
-            return {"status": "success", "tool": tool_name}
-            
+            response = await self.request(message, timeout)
+        except asyncio.TimeoutError:
+            return {"error": f"Tool call timed out: {tool_name}"}
         except Exception as e:
             self.logger.error(f"Tool call failed: {e}")
             return {"error": str(e)}
+        
+        if "payload" in response:
+            return response["payload"].get("data", {})
+        return response
     
     def register_callback(self, trace_id: str, callback_func):
         """
-        注册回调函数
+        注册回调函数，收到该 trace_id 的响应时调用一次
         
         Args:
             trace_id: 追踪ID
-            callback_func: 回调函数
+            callback_func: 回调函数，可以是协程函数
         """
         self.callback_handlers[trace_id] = callback_func
     
@@ -256,46 +593,126 @@ class ACPClient:
         """
         处理服务器响应
         
+        依次匹配等待中的请求、注册的回调，都没有时交给 message_handler。
+        
         Args:
-            response_data: 响应数据
+            response_data: 响应数据（标准消息或服务端的扁平确认/错误消息）
         """
         try:
-            trace_id = response_data.get("trace_id")
-            if trace_id in self.callback_handlers:
-                callback = self.callback_handlers[trace_id]
-                callback(response_data)
-                del self.callback_handlers[trace_id]
+            meta = response_data.get("meta")
+            if isinstance(meta, dict):
+                keys = (meta.get("correlation_id"), meta.get("trace_id"))
+                context_id = (response_data.get("context") or {}).get("session_id")
+            else:
+                keys = (response_data.get("trace_id"),)
+                context_id = response_data.get("context_id")
+            # 优先匹配有等待者的键，否则按消息自身的 trace_id 记录
+            trace_id = next((key for key in keys if key in self._pending or key in self.callback_handlers), keys[-1])
+            
+            handled = False
+            future = self._pending.pop(trace_id, None)
+            if future is not None and not future.done():
+                future.set_result(response_data)
+                handled = True
+            
+            callback = self.callback_handlers.pop(trace_id, None)
+            if callback is not None:
+                self._invoke(callback, response_data)
+                handled = True
+            
+            if not handled:
+                if response_data.get("type") == "error":
+                    self.logger.warning(f"ACP server error: {response_data.get('message')}")
+                elif self.message_handler is not None:
+                    self._invoke(self.message_handler, response_data)
             
             # 记录追踪信息
-            if self.trace_writer:
+            if self.trace_writer and trace_id:
                 self.trace_writer.record_acp_message(
                     trace_id=trace_id,
-                    context_id=response_data.get("context_id"),
+                    context_id=context_id,
                     message_type="client_receive",
                     payload=response_data
                 )
-                
+        
         except Exception as e:
             self.logger.error(f"Failed to handle server response: {e}")
     
+    def _invoke(self, handler: Callable, data: Dict[str, Any]):
+        """调用处理函数，协程结果交给事件循环执行"""
+        result = handler(data)
+        if asyncio.iscoroutine(result):
+            asyncio.ensure_future(result)
+    
     def get_message_history(self, context_id: str = None) -> List[Dict[str, Any]]:
         """
         获取消息历史
         
         Args:
             context_id: 上下文ID（可选）
-            
+        
         Returns:
             List[Dict[str, Any]]: 消息历史
         """
         if context_id:
-            return [msg for msg in self.message_queue 
-                   if msg["payload"].get("context_id") == context_id]
-        return self.message_queue
+            return [msg for msg in self.message_history if msg["context_id"] == context_id]
+        return list(self.message_history)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取客户端统计
+        
+        Returns:
+            Dict[str, Any]: 发送/接收计数、队列长度和在途消息数
+        """
+        return {
+            **self.stats,
+            "connected": self.connected,
+            "queued": self._queue.qsize() + len(self._retry),
+            "in_flight": self._sent - self._acked,
+            "pending_requests": len(self._pending)
+        }
+    
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待发送队列中的消息全部发出
+        
+        Args:
+            timeout: 超时时间（秒）
+        
+        Returns:
+            bool: 超时前是否发送完
+        """
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def close(self, timeout: float = 5.0):
+        """
+        发送完队列中的消息后断开连接并停止重连
+        
+        Args:
+            timeout: 等待发送完成的时间（秒）
+        """
+        if self.connected:
+            await self.flush(timeout)
+        self._closing = True
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        self.connected = False
+        self._fail_pending(ConnectionError("ACP client closed"))
+        self.logger.info("Disconnected from ACP server")
     
     def disconnect(self):
-        """断开连接"""
+        """断开连接（不等待发送队列）"""
+        self._closing = True
         self.connected = False
+        if self._runner is not None and not self._runner.done() and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._runner.cancel)
         self.logger.info("Disconnected from ACP server")
 
 
@@ -303,33 +720,51 @@ class ACPClientManager:
     """
     ACP客户端管理器
     负责管理多个ACP客户端实例
+    
+    同一服务器URL的客户端共享一条连接（一个 ACPClient 实例），按名称引用计数，
+    最后一个名称移除时才断开。
     """
     
     def __init__(self):
         self.clients = {}
         self.default_client = None
+        self._pool: Dict[str, ACPClient] = {}
+        self._refs: Dict[str, int] = {}
     
-    def create_client(self, 
-                     name: str, 
-                     server_url: str, 
-                     trace_writer=None) -> ACPClient:
+    def create_client(self,
+                     name: str,
+                     server_url: str,
+                     trace_writer=None,
+                     **kwargs) -> ACPClient:
         """
-        创建ACP客户端
+        创建ACP客户端，已有同一服务器的连接时复用
         
         Args:
             name: 客户端名称
             server_url: 服务器URL
-            trace_writer: 追踪写入器
-            
+            trace_writer: 追踪写入器（仅新建连接时生效）
+            **kwargs: 传给 ACPClient 的其他参数（仅新建连接时生效）
+        
         Returns:
             ACPClient: ACP客户端实例
         """
-        client = ACPClient(server_url, trace_writer)
+        url = _websocket_url(server_url)
+        if name in self.clients:
+            if self.clients[name].server_url == url:
+                return self.clients[name]
+            self.remove_client(name)
+        
+        client = self._pool.get(url)
+        if client is None:
+            client = ACPClient(url, trace_writer, **kwargs)
+            self._pool[url] = client
+            self._refs[url] = 0
+        self._refs[url] += 1
         self.clients[name] = client
         
         if not self.default_client:
             self.default_client = client
-            
+        
         return client
     
     def get_client(self, name: str = None) -> Optional[ACPClient]:
@@ -338,7 +773,7 @@ class ACPClientManager:
         
         Args:
             name: 客户端名称（可选）
-            
+        
         Returns:
             Optional[ACPClient]: ACP客户端实例
         """
@@ -347,11 +782,28 @@ class ACPClientManager:
         return self.default_client
     
     def remove_client(self, name: str):
-        """移除客户端"""
+        """移除客户端，连接不再被引用时断开"""
         if name in self.clients:
-            client = self.clients[name]
-            client.disconnect()
-            del self.clients[name]
+            client = self.clients.pop(name)
+            self._refs[client.server_url] -= 1
+            if self._refs[client.server_url] == 0:
+                del self._refs[client.server_url]
+                del self._pool[client.server_url]
+                client.disconnect()
             
-            if self.default_client == client:
-                self.default_client = list(self.clients.values())[0] if self.clients else None 
\ No newline at end of file
+            if self.default_client is client and client not in self.clients.values():
+                self.default_client = next(iter(self.clients.values()), None)
+    
+    async def close_all(self, timeout: float = 5.0):
+        """
+        发送完各连接的队列后全部断开
+        
+        Args:
+            timeout: 每个连接等待发送完成的时间（秒）
+        """
+        clients = list(self._pool.values())
+        self.clients.clear()
+        self._pool.clear()
+        self._refs.clear()
+        self.default_client = None
+        await asyncio.gather(*(client.close(timeout) for client in clients), return_exceptions=True)
@@ -3,19 +3,21 @@ ACP Server 实现
 基于企业级架构实践的三层结构：Gateway -> Router -> Container
 """
 
-import json
 import time
 import uuid
 import asyncio
 import logging
-from typing import Dict, Any, Optional, List, Callable
-from dataclasses import dataclass, asdict
+from collections import deque
+from datetime import datetime
+from functools import partial
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+from dataclasses import dataclass
 from enum import Enum
 import websockets
 from websockets.server import WebSocketServerProtocol
 
-from .acp_client import ACPPayload
-from .message_schema import ACPMessage
+from ..codec import Codec, codec_for_subprotocol, get_codec, subprotocols
+from .message_schema import ACPMessage, ACPPayload, MessageMeta, MessageContext
 
 
 class ACPMessageType(Enum):
@@ -28,9 +30,22 @@ class ACPMessageType(Enum):
     HEARTBEAT = "heartbeat"
 
 
+# WebSocket 子协议前缀：客户端在握手时按偏好提供 acp.msgpack、acp.json 等，
+# 未提供子协议的旧客户端使用 JSON
+ACP_SUBPROTOCOL = "acp"
+
+# 在接收循环中直接处理的控制消息：开销小，且不应排在慢任务后面
+FAST_PATH_TYPES = frozenset({
+    ACPMessageType.REGISTER.value,
+    ACPMessageType.ACK.value,
+    ACPMessageType.STATE.value,
+    ACPMessageType.HEARTBEAT.value,
+})
+
+
 @dataclass
-class ACPMessage:
-    """ACP消息结构"""
+class LegacyACPMessage:
+    """旧版扁平消息结构（type/agent_id/trace_id/payload/timestamp）"""
     type: str
     agent_id: str
     trace_id: str
@@ -38,7 +53,7 @@ class ACPMessage:
     timestamp: int
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'ACPMessage':
+    def from_dict(cls, data: Dict[str, Any]) -> 'LegacyACPMessage':
         """从字典创建消息"""
         return cls(
             type=data.get("type", ""),
@@ -47,6 +62,164 @@ class ACPMessage:
             payload=data.get("payload", {}),
             timestamp=data.get("timestamp", int(time.time()))
         )
+    
+    def to_standard(self) -> ACPMessage:
+        """转换为三段式标准消息"""
+        return ACPMessage(
+            meta=MessageMeta(
+                message_id=str(uuid.uuid4()),
+                message_type=self.type,
+                timestamp=datetime.utcfromtimestamp(self.timestamp).isoformat(),
+                sender_id=self.agent_id,
+                receiver_id=self.agent_id,
+                trace_id=self.trace_id or None
+            ),
+            context=MessageContext(),
+            payload=ACPPayload(command_type=self.type, action_type="", data=self.payload)
+        )
+
+
+def connection_codec(websocket: WebSocketServerProtocol) -> Codec:
+    """获取连接握手时协商出的编解码器"""
+    return codec_for_subprotocol(getattr(websocket, "subprotocol", None), ACP_SUBPROTOCOL)
+
+
+class ConnectionFlow:
+    """
+    单个连接的流量控制
+    
+    slots 限制连接的在途消息数（满时接收循环暂停读取）；每处理完 ack_every 条
+    消息，或连接上的消息全部处理完时，向客户端发送一条累计确认
+    {"type": "ack", "message": "flow", "processed": N}，客户端据此控制发送窗口。
+    """
+    
+    def __init__(self, websocket: WebSocketServerProtocol, max_inflight: int, ack_every: int):
+        self.websocket = websocket
+        self.codec = connection_codec(websocket)
+        self.slots = asyncio.Semaphore(max_inflight)
+        self.ack_every = ack_every
+        self.pending = 0
+        self.processed = 0
+        self.acked = 0
+    
+    def done(self):
+        """一条消息处理完成"""
+        self.slots.release()
+        self.pending -= 1
+        self.processed += 1
+        if self.processed - self.acked >= self.ack_every or (self.pending == 0 and self.processed > self.acked):
+            self.acked = self.processed
+            asyncio.ensure_future(self._send_ack(self.processed))
+    
+    async def _send_ack(self, processed: int):
+        try:
+            await self.websocket.send(self.codec.encode({
+                "type": "ack",
+                "message": "flow",
+                "processed": processed,
+                "timestamp": int(time.time())
+            }))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+
+class KeyedWorkerPool:
+    """
+    按 key 串行、跨 key 并发的有界工作池
+    
+    同一个 key 的任务按提交顺序逐个执行，不同 key 的任务由最多 max_workers 个
+    worker 并发执行。一个 key 的任务执行完后若还有积压，key 重新排到就绪队列
+    末尾，避免单个繁忙的 key 占住 worker。
+    """
+    
+    def __init__(self, max_workers: int = 64):
+        """
+        初始化工作池
+        
+        Args:
+            max_workers: worker 协程数量
+        """
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+        
+        self._pending: Dict[Any, deque] = {}  # key -> 待执行任务
+        self._ready: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+    
+    def start(self):
+        """启动 worker"""
+        if self._workers:
+            return
+        self._ready = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"acp-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+    
+    async def stop(self):
+        """停止 worker，丢弃尚未执行的任务"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        
+        for jobs in self._pending.values():
+            for _, on_done in jobs:
+                if on_done:
+                    on_done()
+        self._pending.clear()
+    
+    def submit(self, key: Any, job: Callable[[], Awaitable[Any]], on_done: Optional[Callable[[], None]] = None):
+        """
+        提交任务
+        
+        Args:
+            key: 串行键，相同 key 的任务保持顺序
+            job: 无参异步函数
+            on_done: 任务结束（包括失败）后的回调
+        """
+        jobs = self._pending.get(key)
+        if jobs is None:
+            self._pending[key] = deque([(job, on_done)])
+            self._ready.put_nowait(key)
+        else:
+            jobs.append((job, on_done))
+    
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            jobs = self._pending[key]
+            job, on_done = jobs[0]
+            try:
+                await job()
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                self.logger.error(f"Worker job failed ({key}): {e}")
+            finally:
+                jobs.popleft()
+                if on_done:
+                    on_done()
+            
+            # 执行期间 key 不在就绪队列中，保证同一 key 不会被两个 worker 同时处理
+            if jobs:
+                self._ready.put_nowait(key)
+            else:
+                del self._pending[key]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取工作池统计"""
+        return {
+            "workers": len(self._workers),
+            "active_keys": len(self._pending),
+            "queued": sum(len(jobs) for jobs in self._pending.values()),
+            "completed": self.completed,
+            "failed": self.failed
+        }
 
 
 class ACPGateway:
@@ -60,6 +233,56 @@ class ACPGateway:
         self.trace_writer = trace_writer
         self.logger = logging.getLogger(__name__)
     
+    def decode(self, raw_data, codec: Optional[Codec] = None) -> ACPMessage:
+        """
+        反序列化原始消息，旧版扁平格式转换为标准消息
+        
+        标准消息只构造 meta，context 和 payload 在首次访问时才解析。
+        
+        Args:
+            raw_data: 原始消息数据（文本或二进制帧）
+            codec: 连接协商出的编解码器，默认 JSON
+            
+        Returns:
+            ACPMessage: 标准消息
+            
+        Raises:
+            ValueError: 数据无法解码或消息结构错误
+        """
+        message_data = (codec or get_codec()).decode(raw_data)
+        return self._to_message(message_data)
+    
+    def decode_frame(self, raw_data, codec: Optional[Codec] = None) -> List[ACPMessage]:
+        """
+        反序列化一个帧，客户端合并发送的批量帧（消息数组）按顺序展开
+        
+        Args:
+            raw_data: 原始帧数据
+            codec: 连接协商出的编解码器，默认 JSON
+            
+        Returns:
+            List[ACPMessage]: 帧内的消息
+            
+        Raises:
+            ValueError: 数据无法解码或消息结构错误
+        """
+        frame = (codec or get_codec()).decode(raw_data)
+        if isinstance(frame, list):
+            return [self._to_message(item) for item in frame]
+        return [self._to_message(frame)]
+    
+    def _to_message(self, message_data: Any) -> ACPMessage:
+        if not isinstance(message_data, dict):
+            raise ValueError("Message must be an object")
+        try:
+            # 优先用标准格式解析
+            if 'meta' in message_data and 'context' in message_data and 'payload' in message_data:
+                return ACPMessage.from_wire(message_data)
+            # 兼容老格式
+            return LegacyACPMessage.from_dict(message_data).to_standard()
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Malformed ACP message: {e}") from e
+    
     async def receive(self, websocket: WebSocketServerProtocol, raw_data: str):
         """
         接收并处理原始消息
@@ -69,26 +292,30 @@ class ACPGateway:
             raw_data: 原始消息数据
         """
         try:
-            message_data = json.loads(raw_data)
-            # 优先用标准格式解析
-            if 'meta' in message_data and 'context' in message_data and 'payload' in message_data:
-                message = ACPMessage.from_dict(message_data)
-            else:
-                # 兼容老格式
-                message = ACPMessage(
-                    meta=None, context=None, payload=None
-                )
-            if self.trace_writer and getattr(message, 'meta', None) and getattr(message.meta, 'trace_id', None):
+            message = self.decode(raw_data, connection_codec(websocket))
+        except ValueError as e:
+            self.logger.error(f"Invalid ACP message: {e}")
+            await self._send_error(websocket, "Invalid message format")
+            return
+        await self.process(websocket, message)
+    
+    async def process(self, websocket: WebSocketServerProtocol, message: ACPMessage):
+        """
+        记录追踪并交给路由器处理已解码的消息
+        
+        Args:
+            websocket: WebSocket连接
+            message: 标准消息
+        """
+        try:
+            if self.trace_writer and message.meta.trace_id:
                 self.trace_writer.record_acp_message(
                     trace_id=message.meta.trace_id,
-                    context_id=getattr(message.context, 'session_id', None) if message.context else None,
+                    context_id=message.context.session_id,
                     message_type="gateway_received",
-                    payload=message_data
+                    payload=message.to_wire()
                 )
             await self.router.route(websocket, message)
-        except json.JSONDecodeError as e:
-            self.logger.error(f"Invalid JSON message: {e}")
-            await self._send_error(websocket, "Invalid JSON format")
         except Exception as e:
             self.logger.error(f"Gateway error: {e}")
             await self._send_error(websocket, "Gateway processing error")
@@ -100,7 +327,10 @@ class ACPGateway:
             "message": error_msg,
             "timestamp": int(time.time())
         }
-        await websocket.send(json.dumps(error_response))
+        try:
+            await websocket.send(connection_codec(websocket).encode(error_response))
+        except websockets.exceptions.ConnectionClosed:
+            pass
 
 
 class ACPRouter:
@@ -123,17 +353,15 @@ class ACPRouter:
             message: ACP消息
         """
         try:
-            trace_id = getattr(message.meta, 'trace_id', None) if message.meta else None
-            context_id = getattr(message.context, 'session_id', None) if message.context else None
-            if self.trace_writer and trace_id:
+            msg_type = message.meta.message_type
+            if self.trace_writer and message.meta.trace_id:
                 self.trace_writer.record_acp_message(
-                    trace_id=trace_id,
-                    context_id=context_id,
+                    trace_id=message.meta.trace_id,
+                    context_id=message.context.session_id,
                     message_type="router_routed",
-                    payload={"message_type": getattr(message.meta, 'message_type', None)}
+                    payload={"message_type": msg_type}
                 )
             # 根据meta.message_type路由
-            msg_type = getattr(message.meta, 'message_type', None) if message.meta else None
             if msg_type == "register":
                 await self._handle_register(websocket, message)
             elif msg_type == "task":
@@ -144,6 +372,8 @@ class ACPRouter:
                 await self._handle_result(websocket, message)
             elif msg_type == "state":
                 await self._handle_state(websocket, message)
+            elif msg_type == "heartbeat":
+                await self._handle_heartbeat(websocket, message)
             else:
                 self.logger.warning(f"Unknown message type: {msg_type}")
         except Exception as e:
@@ -151,32 +381,41 @@ class ACPRouter:
     
     async def _handle_register(self, websocket: WebSocketServerProtocol, message: ACPMessage):
         """处理Agent注册"""
-        await self.container.register_agent(message.agent_id, websocket, message.payload)
+        agent_id = message.meta.sender_id
+        await self.container.register_agent(agent_id, websocket, message.payload.data)
         
         # 发送注册确认
         ack_message = {
             "type": "ack",
             "message": "registered",
-            "agent_id": message.agent_id,
+            "agent_id": agent_id,
+            "trace_id": message.meta.trace_id,
             "timestamp": int(time.time())
         }
-        await websocket.send(json.dumps(ack_message))
+        await websocket.send(connection_codec(websocket).encode(ack_message))
     
     async def _handle_task(self, websocket: WebSocketServerProtocol, message: ACPMessage):
         """处理任务消息"""
-        await self.container.dispatch_task(message.agent_id, message)
+        await self.container.dispatch_task(message.meta.receiver_id, message)
     
     async def _handle_ack(self, websocket: WebSocketServerProtocol, message: ACPMessage):
         """处理确认消息"""
-        self.logger.info(f"Received ACK from {message.agent_id}: {message.trace_id}")
+        self.logger.info(f"Received ACK from {message.meta.sender_id}: {message.meta.trace_id}")
     
     async def _handle_result(self, websocket: WebSocketServerProtocol, message: ACPMessage):
-        """处理结果消息"""
-        self.logger.info(f"Received RESULT from {message.agent_id}: {message.payload}")
+        """处理结果消息，接收方在线时转发给它（客户端按 trace_id 匹配等待中的请求）"""
+        if message.meta.receiver_id in self.container.agents:
+            await self.container.dispatch_task(message.meta.receiver_id, message)
+            return
+        self.logger.info(f"Received RESULT from {message.meta.sender_id}: {message.payload.data}")
     
     async def _handle_state(self, websocket: WebSocketServerProtocol, message: ACPMessage):
-        """处理状态消息（心跳）"""
-        await self.container.update_agent_state(message.agent_id, message.payload)
+        """处理状态消息"""
+        await self.container.update_agent_state(message.meta.sender_id, message.payload.data)
+    
+    async def _handle_heartbeat(self, websocket: WebSocketServerProtocol, message: ACPMessage):
+        """处理心跳消息"""
+        self.container.touch_agent(message.meta.sender_id)
 
 
 class AgentContainer:
@@ -227,7 +466,7 @@ class AgentContainer:
         websocket = agent_info["ws"]
         
         try:
-            trace_id = getattr(message.meta, 'trace_id', None) if message.meta else None
+            trace_id = message.meta.trace_id
             if self.trace_writer and trace_id:
                 self.trace_writer.record_acp_message(
                     trace_id=trace_id,
@@ -235,8 +474,8 @@ class AgentContainer:
                     message_type="container_dispatched",
                     payload={"agent_id": agent_id, "task_id": trace_id}
                 )
-            # 发送标准消息
-            await websocket.send(json.dumps(message.to_dict(), ensure_ascii=False))
+            # 按目标连接协商的编解码器发送标准消息；未读取过的载荷直接复用解码出的字典
+            await websocket.send(connection_codec(websocket).encode(message.to_wire()))
             
             self.logger.info(f"Task dispatched to {agent_id}: {trace_id}")
             
@@ -255,6 +494,27 @@ class AgentContainer:
             self.agents[agent_id]["last_seen"] = time.time()
             self.agents[agent_id]["status"] = state_data.get("status", "online")
     
+    def touch_agent(self, agent_id: str):
+        """刷新Agent的最近活跃时间"""
+        agent_info = self.agents.get(agent_id)
+        if agent_info:
+            agent_info["last_seen"] = time.time()
+    
+    def mark_disconnected(self, websocket: WebSocketServerProtocol) -> List[str]:
+        """
+        将通过指定连接注册的Agent标记为离线
+        
+        Args:
+            websocket: 已断开的WebSocket连接
+            
+        Returns:
+            List[str]: 受影响的Agent ID
+        """
+        affected = [agent_id for agent_id, info in self.agents.items() if info["ws"] is websocket]
+        for agent_id in affected:
+            self.agents[agent_id]["status"] = "offline"
+        return affected
+    
     def get_agent_info(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """获取Agent信息"""
         return self.agents.get(agent_id)
@@ -272,35 +532,59 @@ class ACPServer:
     """
     ACP服务器主类
     整合Gateway、Router、Container三层架构
+    
+    客户端通过 WebSocket 子协议（acp.msgpack / acp.json）协商编解码器，可以把多条
+    消息合并为一个数组帧发送。
+    每个连接一个接收循环：帧在循环内解码，注册/心跳/状态/确认等控制消息直接处理，
+    其余消息按 trace_id（其次 session_id，都没有时按连接）交给共享的 KeyedWorkerPool，
+    同一 trace/会话内保持顺序，不同 trace 之间并发。单个连接在途消息达到
+    max_inflight_per_connection 时暂停读取，由 websockets 的接收队列和 TCP 窗口把
+    背压传回客户端；处理进度通过累计确认（见 ConnectionFlow）通知客户端。
     """
     
-    def __init__(self, host: str = "localhost", port: int = 8765, trace_writer=None):
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8765,
+        trace_writer=None,
+        max_workers: int = 64,
+        max_inflight_per_connection: int = 32,
+        flow_ack_interval: int = 16
+    ):
         self.host = host
         self.port = port
         self.trace_writer = trace_writer
+        self.max_inflight_per_connection = max_inflight_per_connection
+        self.flow_ack_interval = flow_ack_interval
         self.logger = logging.getLogger(__name__)
         
         # 三层架构组件
         self.container = AgentContainer(trace_writer)
         self.router = ACPRouter(self.container, trace_writer)
         self.gateway = ACPGateway(self.router, trace_writer)
+        self.workers = KeyedWorkerPool(max_workers)
         
         # 服务器状态
         self.server = None
         self.running = False
+        self.connections = set()
+        self.messages_received = 0
     
     async def start(self):
         """启动ACP服务器"""
         try:
+            self.workers.start()
             self.server = await websockets.serve(
                 self._handle_connection,
                 self.host,
-                self.port
+                self.port,
+                subprotocols=subprotocols(ACP_SUBPROTOCOL)
             )
             self.running = True
             self.logger.info(f"ACP Server started on {self.host}:{self.port}")
             
         except Exception as e:
+            await self.workers.stop()
             self.logger.error(f"Failed to start ACP server: {e}")
             raise
     
@@ -309,10 +593,11 @@ class ACPServer:
         if self.server:
             self.server.close()
             await self.server.wait_closed()
+            await self.workers.stop()
             self.running = False
             self.logger.info("ACP Server stopped")
     
-    async def _handle_connection(self, websocket: WebSocketServerProtocol, path: str):
+    async def _handle_connection(self, websocket: WebSocketServerProtocol, path: str = None):
         """
         处理WebSocket连接
         
@@ -320,16 +605,52 @@ class ACPServer:
             websocket: WebSocket连接
             path: 连接路径
         """
-        self.logger.info(f"New connection from {websocket.remote_address}")
+        flow = ConnectionFlow(websocket, self.max_inflight_per_connection, self.flow_ack_interval)
+        self.logger.info(f"New connection from {websocket.remote_address} (codec: {flow.codec.name})")
+        self.connections.add(websocket)
         
         try:
-            async for message in websocket:
-                await self.gateway.receive(websocket, message)
+            while True:
+                # 在途消息已满时不再 recv，暂停读取
+                await flow.slots.acquire()
+                try:
+                    raw_data = await websocket.recv()
+                except BaseException:
+                    flow.slots.release()
+                    raise
+                
+                try:
+                    messages = self.gateway.decode_frame(raw_data, flow.codec)
+                except ValueError as e:
+                    flow.slots.release()
+                    self.logger.error(f"Invalid ACP message: {e}")
+                    await self.gateway._send_error(websocket, "Invalid message format")
+                    continue
+                self.messages_received += len(messages)
+                
+                for index, message in enumerate(messages):
+                    # 批量帧中的每条消息各占一个在途名额
+                    if index:
+                        await flow.slots.acquire()
+                    flow.pending += 1
+                    
+                    if message.meta.message_type in FAST_PATH_TYPES:
+                        try:
+                            await self.gateway.process(websocket, message)
+                        finally:
+                            flow.done()
+                        continue
+                    
+                    key = message.meta.trace_id or message.context.session_id or id(websocket)
+                    self.workers.submit(key, partial(self.gateway.process, websocket, message), flow.done)
                 
         except websockets.exceptions.ConnectionClosed:
             self.logger.info(f"Connection closed: {websocket.remote_address}")
         except Exception as e:
             self.logger.error(f"Connection error: {e}")
+        finally:
+            self.connections.discard(websocket)
+            self.container.mark_disconnected(websocket)
     
     def get_agent_info(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """获取Agent信息"""
@@ -339,6 +660,16 @@ class ACPServer:
         """获取所有Agent"""
         return self.container.get_all_agents()
     
+    def get_server_stats(self) -> Dict[str, Any]:
+        """获取服务器统计"""
+        return {
+            "running": self.running,
+            "connections": len(self.connections),
+            "agents": len(self.container.agents),
+            "messages_received": self.messages_received,
+            "workers": self.workers.get_stats()
+        }
+    
     async def send_task_to_agent(self, agent_id: str, task_data: Dict[str, Any]) -> bool:
         """
         向指定Agent发送任务
@@ -351,17 +682,18 @@ class ACPServer:
             bool: 发送是否成功
         """
         try:
-            task_message = ACPMessage(
+            task_message = LegacyACPMessage(
                 type=ACPMessageType.TASK.value,
                 agent_id=agent_id,
                 trace_id=str(uuid.uuid4()),
                 payload=task_data,
                 timestamp=int(time.time())
-            )
+            ).to_standard()
+            task_message.meta.sender_id = "acp_server"
             
             await self.container.dispatch_task(agent_id, task_message)
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to send task to {agent_id}: {e}")
-            return False 
\ No newline at end of file
+            return False 
@@ -3,6 +3,7 @@ ACP协议消息格式定义模块
 标准化消息构建工具和消息类型定义
 """
 
+import sys
 import uuid
 import time
 from datetime import datetime
@@ -61,7 +62,7 @@ class MessagePriority(Enum):
     CRITICAL = 4
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageMeta:
     """消息元数据"""
     message_id: str
@@ -80,9 +81,28 @@ class MessageMeta:
     def __post_init__(self):
         if not self.trace_id:
             self.trace_id = str(uuid.uuid4())
+        # 消息类型取值有限，intern 后同类消息共享同一个字符串
+        self.message_type = sys.intern(self.message_type)
+    
+    def to_wire(self) -> Dict[str, Any]:
+        """转换为线路字典（不做深拷贝）"""
+        return {
+            "message_id": self.message_id,
+            "message_type": self.message_type,
+            "timestamp": self.timestamp,
+            "sender_id": self.sender_id,
+            "receiver_id": self.receiver_id,
+            "trace_id": self.trace_id,
+            "correlation_id": self.correlation_id,
+            "reply_to": self.reply_to,
+            "priority": self.priority,
+            "ttl": self.ttl,
+            "retry_count": self.retry_count,
+            "max_retries": self.max_retries
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageContext:
     """消息上下文"""
     session_id: Optional[str] = None
@@ -99,9 +119,20 @@ class MessageContext:
             self.environment = {}
         if self.security_context is None:
             self.security_context = {}
+    
+    def to_wire(self) -> Dict[str, Any]:
+        """转换为线路字典（不做深拷贝）"""
+        return {
+            "session_id": self.session_id,
+            "tenant_id": self.tenant_id,
+            "user_id": self.user_id,
+            "agent_capabilities": self.agent_capabilities,
+            "environment": self.environment,
+            "security_context": self.security_context
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class ACPPayload:
     """ACP载荷"""
     command_type: str
@@ -115,9 +146,21 @@ class ACPPayload:
             self.parameters = {}
         if self.metadata is None:
             self.metadata = {}
+        self.command_type = sys.intern(self.command_type)
+        self.action_type = sys.intern(self.action_type)
+    
+    def to_wire(self) -> Dict[str, Any]:
+        """转换为线路字典（不做深拷贝）"""
+        return {
+            "command_type": self.command_type,
+            "action_type": self.action_type,
+            "data": self.data,
+            "parameters": self.parameters,
+            "metadata": self.metadata
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class ACPMessage:
     """ACP标准消息"""
     meta: MessageMeta
@@ -140,6 +183,92 @@ class ACPMessage:
             context=MessageContext(**data["context"]),
             payload=ACPPayload(**data["payload"])
         )
+    
+    def to_wire(self) -> Dict[str, Any]:
+        """
+        转换为用于编码的线路字典
+        
+        与 to_dict 不同，嵌套的字典和列表直接引用而不深拷贝，
+        结果只应交给编解码器，不要修改。
+        """
+        return {
+            "meta": self.meta.to_wire(),
+            "context": self.context.to_wire(),
+            "payload": self.payload.to_wire()
+        }
+    
+    @classmethod
+    def from_wire(cls, data: Dict[str, Any]) -> 'ACPMessage':
+        """
+        从解码后的线路字典创建延迟解析的消息
+        
+        Args:
+            data: 包含 meta、context、payload 的字典
+            
+        Returns:
+            ACPMessage: 只构造了 meta 的 LazyACPMessage
+            
+        Raises:
+            KeyError, TypeError: 消息结构错误
+        """
+        context, payload = data["context"], data["payload"]
+        if not isinstance(context, dict) or not isinstance(payload, dict):
+            raise TypeError("context and payload must be objects")
+        return LazyACPMessage(MessageMeta(**data["meta"]), context, payload)
+
+
+class LazyACPMessage(ACPMessage):
+    """
+    延迟解析的ACP消息
+    
+    解码时只构造 meta，context 和 payload 保留为原始字典，首次访问时才构造
+    对应的 dataclass。路由只读取 meta；转发时未访问过的部分在 to_wire 中
+    原样输出，不需要重建载荷。
+    """
+    
+    __slots__ = ('_raw_context', '_raw_payload', '_context', '_payload')
+    
+    def __init__(self, meta: MessageMeta, raw_context: Dict[str, Any], raw_payload: Dict[str, Any]):
+        self.meta = meta
+        self._raw_context = raw_context
+        self._raw_payload = raw_payload
+        self._context: Optional[MessageContext] = None
+        self._payload: Optional[ACPPayload] = None
+    
+    @property
+    def context(self) -> MessageContext:
+        if self._context is None:
+            self._context = MessageContext(**self._raw_context)
+        return self._context
+    
+    @context.setter
+    def context(self, value: MessageContext):
+        self._context = value
+    
+    @property
+    def payload(self) -> ACPPayload:
+        if self._payload is None:
+            self._payload = ACPPayload(**self._raw_payload)
+        return self._payload
+    
+    @payload.setter
+    def payload(self, value: ACPPayload):
+        self._payload = value
+    
+    @property
+    def session_id(self) -> Optional[str]:
+        """会话ID，不触发 context 的构造"""
+        if self._context is not None:
+            return self._context.session_id
+        return self._raw_context.get("session_id")
+    
+    def to_wire(self) -> Dict[str, Any]:
+        """转换为线路字典，未访问过的部分直接使用原始字典"""
+        return {
+            "meta": self.meta.to_wire(),
+            "context": self._context.to_wire() if self._context is not None else self._raw_context,
+            "payload": self._payload.to_wire() if self._payload is not None else self._raw_payload
+        }
 
 
 class ACPMessageBuilder:
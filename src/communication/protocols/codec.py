@@ -0,0 +1,196 @@
+"""
+线路编解码器
+
+ACP 与 MCP 共用的消息编解码层：
+- json: 安装了 orjson 时使用 orjson，否则回退到标准库 json，线路格式完全一致
+- msgpack: MessagePack 二进制格式，需要安装 msgpack，用于智能体之间的消息
+
+双方在建连/初始化时交换各自支持的编解码器名称，按发起方的偏好顺序选出
+双方都支持的第一个，协商失败时使用 json。
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+DEFAULT_CODEC = "json"
+
+
+class Codec:
+    """编解码器基类"""
+
+    name: str = ""
+    # 二进制编解码器只能用在按消息分帧的传输上（如 WebSocket 二进制帧）
+    binary: bool = False
+
+    def encode(self, obj: Any) -> Union[str, bytes]:
+        """编码为线路数据"""
+        raise NotImplementedError
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        """从线路数据解码"""
+        raise NotImplementedError
+
+
+class JSONCodec(Codec):
+    """JSON 编解码器，优先使用 orjson"""
+
+    name = "json"
+    binary = False
+
+    def __init__(self, use_orjson: bool = True):
+        """
+        Args:
+            use_orjson: orjson 可用时是否使用
+        """
+        self.backend = "orjson" if use_orjson and orjson is not None else "json"
+
+    def encode(self, obj: Any) -> str:
+        """
+        编码为 JSON 文本
+
+        Args:
+            obj: 由 dict/list/str/数字/bool/None 组成的对象
+
+        Returns:
+            str: JSON 文本（非 ASCII 字符不转义）
+        """
+        if self.backend == "orjson":
+            return orjson.dumps(obj).decode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        """
+        解码 JSON 文本
+
+        Raises:
+            ValueError: 数据不是合法的 JSON（json.JSONDecodeError 和
+                orjson.JSONDecodeError 都是 ValueError 的子类）
+        """
+        if self.backend == "orjson":
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class MsgPackCodec(Codec):
+    """MessagePack 编解码器"""
+
+    name = "msgpack"
+    binary = True
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+
+    def encode(self, obj: Any) -> bytes:
+        """编码为 MessagePack 字节串"""
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        """
+        解码 MessagePack 字节串
+
+        Raises:
+            ValueError: 数据不是合法的 MessagePack
+        """
+        if isinstance(data, str):
+            raise ValueError("MessagePack data must be bytes")
+        try:
+            return msgpack.unpackb(data, raw=False)
+        except (msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+            raise ValueError(f"Invalid MessagePack data: {e}") from e
+
+
+_codecs: Dict[str, Codec] = {"json": JSONCodec()}
+if msgpack is not None:
+    _codecs["msgpack"] = MsgPackCodec()
+
+
+def get_codec(name: Optional[str] = None) -> Codec:
+    """
+    按名称获取编解码器
+
+    Args:
+        name: 编解码器名称，为空时返回默认的 json
+
+    Returns:
+        Codec: 编解码器实例
+
+    Raises:
+        ValueError: 未知或未安装的编解码器
+    """
+    codec = _codecs.get(name or DEFAULT_CODEC)
+    if codec is None:
+        raise ValueError(f"Codec not available: {name}")
+    return codec
+
+
+def available_codecs(binary: bool = True) -> List[str]:
+    """
+    本端支持的编解码器名称，按偏好排序（二进制格式优先）
+
+    Args:
+        binary: 是否包含二进制编解码器，传输只支持文本时传 False
+
+    Returns:
+        List[str]: 编解码器名称
+    """
+    names = [name for name, codec in _codecs.items() if binary or not codec.binary]
+    return sorted(names, key=lambda name: not _codecs[name].binary)
+
+
+def negotiate(offered: Optional[Iterable[str]], binary: bool = True) -> str:
+    """
+    从对端提供的编解码器中选出第一个本端也支持的
+
+    Args:
+        offered: 对端按偏好排序的编解码器名称
+        binary: 本端传输是否支持二进制编解码器
+
+    Returns:
+        str: 选中的编解码器名称，没有交集时为 json
+    """
+    supported = set(available_codecs(binary))
+    for name in offered or ():
+        if name in supported:
+            return name
+    return DEFAULT_CODEC
+
+
+def subprotocols(prefix: str) -> List[str]:
+    """
+    以 WebSocket 子协议形式列出本端支持的编解码器，如 acp.msgpack、acp.json
+
+    Args:
+        prefix: 子协议前缀
+
+    Returns:
+        List[str]: 按偏好排序的子协议
+    """
+    return [f"{prefix}.{name}" for name in available_codecs()]
+
+
+def codec_for_subprotocol(subprotocol: Optional[str], prefix: str) -> Codec:
+    """
+    根据协商出的 WebSocket 子协议获取编解码器，未协商子协议时为 json
+
+    Args:
+        subprotocol: 连接上协商出的子协议
+        prefix: 子协议前缀
+
+    Returns:
+        Codec: 编解码器实例
+    """
+    if subprotocol and subprotocol.startswith(prefix + "."):
+        return get_codec(subprotocol[len(prefix) + 1:])
+    return get_codec(DEFAULT_CODEC)
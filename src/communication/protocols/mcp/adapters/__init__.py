@@ -7,6 +7,7 @@ MCP适配器模块
 - 外部工具注册表：MCP工具统一管理
 - 监控集成：与监控系统集成
 - 执行器集成：与执行器系统集成
+- 并发控制：每服务器自适应并发上限、幂等调用合并
 """
 
 from .mcp_adapter import MCPAdapter
@@ -14,11 +15,15 @@ from .tool_wrapper import MCPToolWrapper
 from .external_tool_registry import ExternalToolRegistry
 from .monitoring_integration import MCPMonitoringIntegration
 from .executor_integration import MCPExecutorIntegration
+from .adaptive_concurrency import AdaptiveConcurrencyLimiter, LoadShedError, SingleFlight
 
 __all__ = [
     "MCPAdapter",
     "MCPToolWrapper", 
     "ExternalToolRegistry",
     "MCPMonitoringIntegration",
-    "MCPExecutorIntegration"
+    "MCPExecutorIntegration",
+    "AdaptiveConcurrencyLimiter",
+    "LoadShedError",
+    "SingleFlight"
 ] 
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+MCP调用的并发控制
+
+- AdaptiveConcurrencyLimiter：每个MCP服务器一个的自适应并发上限（AIMD）。延迟
+  接近无负载基线时加性增加上限，延迟超过基线 latency_tolerance 倍或调用出错时
+  乘性降低；超出上限的调用在FIFO队列中等待，按截止时间估算已来不及完成的调用
+  直接丢弃（LoadShedError），不再占用服务器容量
+- SingleFlight：相同键的并发调用共享一次执行
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class LoadShedError(RuntimeError):
+    """调用在截止时间前无法完成，被并发控制丢弃"""
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    自适应并发上限
+    
+    延迟基线取观测到的最小延迟（每次采样缓慢上浮，服务器变慢后基线随之调整），
+    平均延迟为指数滑动平均；两者用于判断拥塞和估算排队调用的完成时间。
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.9,
+        error_backoff: float = 0.5,
+        max_queue_size: int = 1000
+    ):
+        """
+        初始化并发上限
+        
+        Args:
+            name: 服务器名称
+            initial_limit: 初始并发上限
+            min_limit: 并发上限下界
+            max_limit: 并发上限上界
+            latency_tolerance: 延迟超过基线的倍数，超过即视为拥塞
+            backoff: 拥塞时上限的乘性系数
+            error_backoff: 调用出错（含超时）时上限的乘性系数
+            max_queue_size: 等待队列容量，队列满时新调用直接丢弃
+        """
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.error_backoff = error_backoff
+        self.max_queue_size = max_queue_size
+        
+        self.in_flight = 0
+        self._waiters: Deque[Tuple[Optional[float], asyncio.Future]] = deque()
+        self._min_latency: Optional[float] = None
+        self._avg_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        
+        self.stats = {
+            "acquired": 0,
+            "queued": 0,
+            "shed": 0,
+            "errors": 0,
+            "decreases": 0
+        }
+    
+    @property
+    def capacity(self) -> int:
+        """当前允许的并发数"""
+        return max(self.min_limit, int(self.limit))
+    
+    def _estimated_completion(self, position: int) -> float:
+        """
+        排在等待队列第 position 位的调用预计还需多久完成（秒）
+        
+        前面每 capacity 个调用约占一个平均延迟，自身执行至少需要基线延迟。
+        """
+        if self._avg_latency is None:
+            return 0.0
+        return (position // self.capacity) * self._avg_latency + self._min_latency
+    
+    def _shed(self, reason: str) -> LoadShedError:
+        self.stats["shed"] += 1
+        logger.debug("MCP call shed", server_name=self.name, reason=reason)
+        return LoadShedError(f"Call to {self.name} shed: {reason}")
+    
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """
+        获取一个并发名额
+        
+        Args:
+            deadline: 截止时间（事件循环时间），None 表示不限
+        
+        Raises:
+            LoadShedError: 预计在截止时间前无法完成，或等待队列已满
+        """
+        if self.in_flight < self.capacity and not self._waiters:
+            self.in_flight += 1
+            self.stats["acquired"] += 1
+            return
+        
+        loop = asyncio.get_running_loop()
+        if len(self._waiters) >= self.max_queue_size:
+            raise self._shed("queue full")
+        if deadline is not None and loop.time() + self._estimated_completion(len(self._waiters)) > deadline:
+            raise self._shed("deadline cannot be met")
+        
+        future = loop.create_future()
+        entry = (deadline, future)
+        self._waiters.append(entry)
+        self.stats["queued"] += 1
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._abandon(entry)
+            raise self._shed("deadline exceeded while queued") from None
+        except asyncio.CancelledError:
+            self._abandon(entry)
+            raise
+        self.stats["acquired"] += 1
+    
+    def _abandon(self, entry: Tuple[Optional[float], asyncio.Future]) -> None:
+        """放弃等待；名额已分配给该调用时归还"""
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            pass
+        future = entry[1]
+        if future.done() and not future.cancelled() and future.exception() is None:
+            self.in_flight -= 1
+            self._wake()
+    
+    def release(self, latency: float, success: Optional[bool]) -> None:
+        """
+        归还名额并根据本次调用调整上限
+        
+        Args:
+            latency: 调用耗时（秒）
+            success: 调用是否成功；None 表示结果不反映服务器状态（如调用方取消、
+                按调用方截止时间截断的超时），只归还名额
+        """
+        saturated = self.in_flight >= self.capacity
+        self.in_flight -= 1
+        if success is not None:
+            self._update_limit(latency, success, saturated)
+        self._wake()
+    
+    def _update_limit(self, latency: float, success: bool, saturated: bool) -> None:
+        now = time.monotonic()
+        if not success:
+            self.stats["errors"] += 1
+            self.limit = max(self.min_limit, self.limit * self.error_backoff)
+            self._last_decrease = now
+            return
+        
+        if self._min_latency is None:
+            self._min_latency = self._avg_latency = latency
+        else:
+            self._min_latency = min(latency, self._min_latency * 1.0001)
+            self._avg_latency += 0.1 * (latency - self._avg_latency)
+        
+        if latency > self._min_latency * self.latency_tolerance:
+            # 每个平均延迟周期内最多降一次，避免同一波慢调用连续压低上限
+            if now - self._last_decrease >= self._avg_latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+                self.stats["decreases"] += 1
+        elif saturated:
+            # 只有上限成为瓶颈时才增加
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+    
+    def _wake(self) -> None:
+        """把空出的名额分配给等待中的调用，跳过已来不及完成的"""
+        if not self._waiters:
+            return
+        now = asyncio.get_running_loop().time()
+        while self._waiters and self.in_flight < self.capacity:
+            deadline, future = self._waiters.popleft()
+            if future.done():
+                continue
+            if deadline is not None and deadline - now < (self._min_latency or 0.0):
+                future.set_exception(self._shed("deadline cannot be met"))
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取并发控制统计信息"""
+        return {
+            **self.stats,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "min_latency": self._min_latency,
+            "avg_latency": self._avg_latency
+        }
+
+
+def call_key(tool_name: str, arguments: Dict[str, Any]) -> Tuple[str, str]:
+    """按工具名和规范化的参数生成合并键"""
+    return tool_name, json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class SingleFlight:
+    """
+    相同键的并发调用共享一次执行
+    
+    第一个调用者执行 func，执行期间到达的相同键调用等待同一个结果（包括异常）；
+    执行结束后键即释放，不缓存结果。
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"executions": 0, "coalesced": 0}
+    
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Tuple[Any, bool]:
+        """
+        执行或加入相同键的执行
+        
+        Args:
+            key: 合并键
+            func: 执行函数
+            timeout: 加入已有执行时最多等待的时间（秒）
+        
+        Returns:
+            Tuple[Any, bool]: 执行结果，以及是否复用了其他调用者的执行
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.wait_for(asyncio.shield(future), timeout), True
+        
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.stats["executions"] += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # 执行者被取消不代表等待者被取消
+            future.set_exception(RuntimeError("Shared execution cancelled"))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有等待者时不报告未取回的异常
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+    
+    def in_flight(self) -> int:
+        """正在执行的键数"""
+        return len(self._calls)
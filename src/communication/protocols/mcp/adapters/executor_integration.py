@@ -14,6 +14,7 @@ import structlog
 from .mcp_adapter import MCPAdapter
 from .tool_wrapper import MCPToolWrapper
 from .monitoring_integration import MCPMonitoringIntegration
+from .adaptive_concurrency import AdaptiveConcurrencyLimiter, LoadShedError, SingleFlight, call_key
 from ..mcp_types import MCPResult
 
 logger = structlog.get_logger(__name__)
@@ -59,7 +60,14 @@ class MCPExecutionResult:
 
 
 class MCPExecutorIntegration:
-    """MCP执行器集成"""
+    """
+    MCP执行器集成
+    
+    每个MCP服务器有独立的自适应并发上限（AdaptiveConcurrencyLimiter）；幂等工具的
+    相同调用（工具名与参数都相同）在执行期间合并为一次。幂等工具由调用参数
+    idempotent、工具 capabilities 中的 "idempotent"/"read_only" 或配置
+    idempotent_tools 指定。
+    """
     
     def __init__(
         self,
@@ -88,9 +96,23 @@ class MCPExecutorIntegration:
             "default_retry_count": 2,
             "retry_delay": 1.0,  # 重试延迟
             "enable_caching": False,  # 结果缓存（暂不启用）
-            "enable_parallel_execution": True
+            "enable_parallel_execution": True,
+            # 每个服务器的自适应并发上限
+            "enable_adaptive_concurrency": True,
+            "initial_concurrency": 5,
+            "min_concurrency": 1,
+            "max_concurrency": 64,
+            "latency_tolerance": 1.5,
+            "max_queue_size": 1000,
+            # 幂等调用合并
+            "enable_coalescing": True,
+            "idempotent_tools": set()
         }
         
+        # 并发控制
+        self._limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+        self._singleflight = SingleFlight()
+        
         # 执行状态追踪
         self._active_executions: Dict[str, Dict[str, Any]] = {}
         self._execution_history: List[MCPExecutionResult] = []
@@ -109,7 +131,9 @@ class MCPExecutorIntegration:
         arguments: Dict[str, Any],
         timeout: Optional[float] = None,
         retry_count: Optional[int] = None,
-        user_context: Optional[Dict[str, Any]] = None
+        user_context: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None,
+        deadline: Optional[float] = None
     ) -> MCPExecutionResult:
         """
         执行MCP工具
@@ -117,9 +141,11 @@ class MCPExecutorIntegration:
         Args:
             tool_name: 工具名称
             arguments: 执行参数
-            timeout: 超时时间（秒）
+            timeout: 单次尝试的超时时间（秒）
             retry_count: 重试次数
             user_context: 用户上下文
+            idempotent: 是否幂等，None 时按工具声明和配置判断；幂等调用与执行中的相同调用合并
+            deadline: 截止时间（事件循环时间），来不及完成的尝试被丢弃而不再发往服务器
             
         Returns:
             执行结果
@@ -173,10 +199,21 @@ class MCPExecutorIntegration:
             # 执行前回调
             await self._trigger_pre_execution_callbacks(execution_info)
             
-            # 执行工具（带重试机制）
-            result = await self._execute_with_retry(
-                tool_wrapper, arguments, timeout, retry_count
-            )
+            # 执行工具（带重试机制），幂等调用合并执行
+            coalesced = False
+            if self.config["enable_coalescing"] and self._is_idempotent(tool_wrapper, idempotent):
+                wait_timeout = None
+                if deadline is not None:
+                    wait_timeout = max(0.0, deadline - asyncio.get_running_loop().time())
+                result, coalesced = await self._singleflight.do(
+                    call_key(tool_name, arguments),
+                    lambda: self._execute_with_retry(tool_wrapper, arguments, timeout, retry_count, deadline),
+                    timeout=wait_timeout
+                )
+            else:
+                result = await self._execute_with_retry(
+                    tool_wrapper, arguments, timeout, retry_count, deadline
+                )
             
             # 创建成功结果
             execution_result = MCPExecutionResult(
@@ -189,7 +226,8 @@ class MCPExecutorIntegration:
                 metadata={
                     "retry_attempts": 0,  # 这里简化，实际应该记录真实重试次数
                     "timeout": timeout,
-                    "user_context": user_context
+                    "user_context": user_context,
+                    "coalesced": coalesced
                 }
             )
             
@@ -212,7 +250,8 @@ class MCPExecutorIntegration:
                 duration=time.time() - start_time,
                 metadata={
                     "timeout": timeout,
-                    "user_context": user_context
+                    "user_context": user_context,
+                    "shed": isinstance(e, LoadShedError)
                 }
             )
             
@@ -271,131 +310,178 @@ class MCPExecutorIntegration:
         Returns:
             执行结果列表
         """
+        loop = asyncio.get_running_loop()
+        # 总超时换算为截止时间：来不及完成的请求被逐个丢弃，其余请求照常返回
+        deadline = loop.time() + timeout if timeout else None
+        
         if not self.config["enable_parallel_execution"]:
             # 串行执行
             results = []
             for request in tool_requests:
-                result = await self.execute_mcp_tool(
-                    tool_name=request["tool_name"],
-                    arguments=request.get("arguments", {}),
-                    timeout=request.get("timeout", timeout),
-                    retry_count=request.get("retry_count"),
-                    user_context=request.get("user_context")
-                )
+                result = await self._execute_request(request, timeout, deadline)
                 results.append(result)
             return results
         
-        # 并行执行
-        max_concurrent = max_concurrent or 5
-        semaphore = asyncio.Semaphore(max_concurrent)
+        # 并行执行：每个服务器的并发由自适应上限控制，max_concurrent 只限制本批总并发
+        semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent else None
         
         async def execute_single(request: Dict[str, Any]) -> MCPExecutionResult:
+            if semaphore is None:
+                return await self._execute_request(request, timeout, deadline)
             async with semaphore:
-                return await self.execute_mcp_tool(
-                    tool_name=request["tool_name"],
-                    arguments=request.get("arguments", {}),
-                    timeout=request.get("timeout", timeout),
-                    retry_count=request.get("retry_count"),
-                    user_context=request.get("user_context")
-                )
+                return await self._execute_request(request, timeout, deadline)
         
         # 创建并发任务
-        tasks = [execute_single(request) for request in tool_requests]
-        
-        try:
-            if timeout:
-                # 带总超时的并发执行
-                results = await asyncio.wait_for(
-                    asyncio.gather(*tasks, return_exceptions=True),
-                    timeout=timeout
-                )
-            else:
-                # 无总超时的并发执行
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # 处理异常结果
-            processed_results = []
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    # 创建错误结果
-                    request = tool_requests[i]
-                    error_result = MCPExecutionResult(
-                        execution_id=str(uuid.uuid4()),
-                        tool_name=request["tool_name"],
-                        server_name="unknown",
-                        success=False,
-                        error=str(result),
-                        duration=0.0
-                    )
-                    processed_results.append(error_result)
-                else:
-                    processed_results.append(result)
-            
-            return processed_results
-            
-        except asyncio.TimeoutError:
-            logger.error("Batch execution timed out", timeout=timeout)
-            # 创建超时错误结果
-            return [
-                MCPExecutionResult(
+        tasks = [asyncio.ensure_future(execute_single(request)) for request in tool_requests]
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logger.error("Batch execution timed out", timeout=timeout, unfinished=len(pending))
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        # 处理异常和超时结果
+        processed_results = []
+        for request, task in zip(tool_requests, tasks):
+            if task in pending:
+                processed_results.append(MCPExecutionResult(
                     execution_id=str(uuid.uuid4()),
                     tool_name=request["tool_name"],
                     server_name="unknown",
                     success=False,
                     error="Batch execution timeout",
                     duration=timeout or 0.0
-                )
-                for request in tool_requests
-            ]
+                ))
+            elif task.exception() is not None:
+                processed_results.append(MCPExecutionResult(
+                    execution_id=str(uuid.uuid4()),
+                    tool_name=request["tool_name"],
+                    server_name="unknown",
+                    success=False,
+                    error=str(task.exception()),
+                    duration=0.0
+                ))
+            else:
+                processed_results.append(task.result())
+        
+        return processed_results
+    
+    async def _execute_request(
+        self,
+        request: Dict[str, Any],
+        timeout: Optional[float],
+        deadline: Optional[float]
+    ) -> MCPExecutionResult:
+        """执行批量请求中的一项"""
+        return await self.execute_mcp_tool(
+            tool_name=request["tool_name"],
+            arguments=request.get("arguments", {}),
+            timeout=request.get("timeout", timeout),
+            retry_count=request.get("retry_count"),
+            user_context=request.get("user_context"),
+            idempotent=request.get("idempotent"),
+            deadline=deadline
+        )
+    
+    def _is_idempotent(self, tool_wrapper: MCPToolWrapper, idempotent: Optional[bool]) -> bool:
+        """判断调用是否可以与相同的执行中调用合并"""
+        if idempotent is not None:
+            return idempotent
+        if tool_wrapper.name in self.config["idempotent_tools"]:
+            return True
+        capabilities = getattr(tool_wrapper.get_mcp_tool(), "capabilities", None) or []
+        return "idempotent" in capabilities or "read_only" in capabilities
+    
+    def _get_limiter(self, server_name: str) -> AdaptiveConcurrencyLimiter:
+        """获取服务器的并发上限，首次使用时创建"""
+        limiter = self._limiters.get(server_name)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(
+                server_name,
+                initial_limit=self.config["initial_concurrency"],
+                min_limit=self.config["min_concurrency"],
+                max_limit=self.config["max_concurrency"],
+                latency_tolerance=self.config["latency_tolerance"],
+                max_queue_size=self.config["max_queue_size"]
+            )
+            self._limiters[server_name] = limiter
+        return limiter
     
     async def _execute_with_retry(
         self,
         tool_wrapper: MCPToolWrapper,
         arguments: Dict[str, Any],
         timeout: float,
-        retry_count: int
+        retry_count: int,
+        deadline: Optional[float] = None
     ) -> Any:
         """
         带重试机制的执行
         
+        每次尝试先获取服务器的并发名额，尝试的耗时和成败反馈给并发上限；
+        有截止时间时单次超时不超过剩余时间，来不及再试时不再重试。
+        
         Args:
             tool_wrapper: 工具包装器
             arguments: 执行参数
             timeout: 超时时间
             retry_count: 重试次数
+            deadline: 截止时间（事件循环时间）
             
         Returns:
             执行结果
+            
+        Raises:
+            LoadShedError: 截止时间前无法完成
         """
+        loop = asyncio.get_running_loop()
+        limiter = None
+        if self.config["enable_adaptive_concurrency"]:
+            limiter = self._get_limiter(tool_wrapper.server_name)
         last_error = None
+        attempts = 0
         
         for attempt in range(retry_count + 1):
+            attempt_timeout = timeout if self.config["enable_timeout"] else None
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise LoadShedError(f"Deadline exceeded before attempt {attempt + 1}: {last_error}")
+                attempt_timeout = remaining if attempt_timeout is None else min(attempt_timeout, remaining)
+            
+            if limiter is not None:
+                await limiter.acquire(deadline)
+            attempts += 1
+            started = loop.time()
+            # 只有服务器造成的结果才反馈给并发上限
+            success = None
             try:
-                if self.config["enable_timeout"]:
+                if attempt_timeout is not None:
                     # 带超时的执行
                     result = await asyncio.wait_for(
                         tool_wrapper.execute(**arguments),
-                        timeout=timeout
+                        timeout=attempt_timeout
                     )
                 else:
                     # 无超时的执行
                     result = await tool_wrapper.execute(**arguments)
                 
+                success = True
                 return result
                 
             except asyncio.TimeoutError as e:
-                last_error = f"Execution timeout after {timeout}s"
+                if attempt_timeout == timeout:
+                    success = False
+                last_error = f"Execution timeout after {attempt_timeout}s"
                 logger.warning(
                     "MCP tool execution timeout",
                     tool_name=tool_wrapper.name,
                     attempt=attempt + 1,
-                    timeout=timeout
+                    timeout=attempt_timeout
                 )
                 
-                if attempt < retry_count:
-                    await asyncio.sleep(self.config["retry_delay"])
-                
             except Exception as e:
+                success = False
                 last_error = str(e)
                 logger.warning(
                     "MCP tool execution error",
@@ -403,12 +489,18 @@ class MCPExecutorIntegration:
                     attempt=attempt + 1,
                     error=str(e)
                 )
-                
-                if attempt < retry_count:
-                    await asyncio.sleep(self.config["retry_delay"])
+            
+            finally:
+                if limiter is not None:
+                    limiter.release(loop.time() - started, success)
+            
+            if attempt < retry_count:
+                if deadline is not None and loop.time() + self.config["retry_delay"] >= deadline:
+                    break
+                await asyncio.sleep(self.config["retry_delay"])
         
         # 所有重试都失败
-        raise RuntimeError(f"Execution failed after {retry_count + 1} attempts: {last_error}")
+        raise RuntimeError(f"Execution failed after {attempts} attempts: {last_error}")
     
     async def get_execution_status(self, execution_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -591,6 +683,8 @@ class MCPExecutorIntegration:
             "failed_executions": failed_executions,
             "success_rate": successful_executions / max(1, total_executions),
             "average_duration": avg_duration,
+            "servers": {name: limiter.get_stats() for name, limiter in self._limiters.items()},
+            "coalescing": {**self._singleflight.stats, "in_flight": self._singleflight.in_flight()},
             "config": self.config,
             "callbacks": {
                 "pre_execution": len(self._pre_execution_callbacks),
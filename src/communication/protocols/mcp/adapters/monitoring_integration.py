@@ -12,6 +12,7 @@ from dataclasses import dataclass
 from enum import Enum
 import structlog
 
+from src.monitoring.metrics.quantile_sketch import QuantileSketchStore
 from .mcp_adapter import MCPAdapter
 from .external_tool_registry import ExternalToolRegistry
 
@@ -137,6 +138,11 @@ class MCPMonitoringIntegration:
         self._execution_history: List[MCPExecutionEvent] = []
         self._max_history_size = 10000
         
+        # 执行耗时分位数草图（按工具/服务器/Agent维度，可跨窗口和进程合并）
+        self._duration_sketches = QuantileSketchStore(window_seconds=60, max_windows=24 * 60)
+        # 执行次数和失败次数：每次执行记一个 0 值样本，没有耗时的执行也计入
+        self._execution_counts = QuantileSketchStore(window_seconds=60, max_windows=24 * 60)
+        
         # 指标缓存
         self._metrics_cache: List[MCPMetric] = []
         self._alerts_cache: List[MCPAlert] = []
@@ -288,6 +294,8 @@ class MCPMonitoringIntegration:
         if len(self._execution_history) > self._max_history_size:
             self._execution_history = self._execution_history[-self._max_history_size:]
         
+        self._record_duration(event)
+        
         # 记录完成日志
         if self.config["collect_logs"] and self.log_manager:
             await self._log_execution_complete(event)
@@ -390,96 +398,87 @@ class MCPMonitoringIntegration:
             执行统计
         """
         current_time = time.time()
-        cutoff_time = current_time - time_window if time_window else 0
-        
-        # 过滤历史记录
-        events = [
-            event for event in self._execution_history
-            if event.start_time >= cutoff_time
-        ]
+        overall = self._execution_counts.summary("all", "*", time_window)
+        durations = self._duration_sketches.summary("all", "*", time_window)
         
-        if not events:
+        if not overall["count"]:
             return {
                 "total_executions": 0,
                 "success_rate": 0.0,
                 "average_duration": 0.0,
                 "error_rate": 0.0,
                 "tool_stats": {},
-                "server_stats": {}
+                "server_stats": {},
+                "agent_stats": {}
             }
         
-        # 基础统计
-        total_executions = len(events)
-        successful_executions = sum(1 for e in events if e.success)
-        failed_executions = total_executions - successful_executions
-        
-        success_rate = successful_executions / total_executions if total_executions > 0 else 0
-        error_rate = failed_executions / total_executions if total_executions > 0 else 0
-        
-        # 持续时间统计
-        durations = [e.duration for e in events if e.duration is not None]
-        average_duration = sum(durations) / len(durations) if durations else 0
-        
-        # 工具级别统计
-        tool_stats = {}
-        server_stats = {}
-        
-        for event in events:
-            # 工具统计
-            if event.tool_name not in tool_stats:
-                tool_stats[event.tool_name] = {
-                    "executions": 0,
-                    "successes": 0,
-                    "failures": 0,
-                    "total_duration": 0.0,
-                    "avg_duration": 0.0
-                }
-            
-            stats = tool_stats[event.tool_name]
-            stats["executions"] += 1
-            if event.success:
-                stats["successes"] += 1
-            else:
-                stats["failures"] += 1
-            
-            if event.duration:
-                stats["total_duration"] += event.duration
-                stats["avg_duration"] = stats["total_duration"] / stats["executions"]
-            
-            # 服务器统计
-            if event.server_name not in server_stats:
-                server_stats[event.server_name] = {
-                    "executions": 0,
-                    "successes": 0,
-                    "failures": 0,
-                    "total_duration": 0.0,
-                    "avg_duration": 0.0
-                }
-            
-            stats = server_stats[event.server_name]
-            stats["executions"] += 1
-            if event.success:
-                stats["successes"] += 1
-            else:
-                stats["failures"] += 1
-            
-            if event.duration:
-                stats["total_duration"] += event.duration
-                stats["avg_duration"] = stats["total_duration"] / stats["executions"]
+        total_executions = overall["count"]
+        failed_executions = overall["errors"]
+        successful_executions = total_executions - failed_executions
         
         return {
             "total_executions": total_executions,
             "successful_executions": successful_executions,
             "failed_executions": failed_executions,
-            "success_rate": success_rate,
-            "error_rate": error_rate,
-            "average_duration": average_duration,
-            "tool_stats": tool_stats,
-            "server_stats": server_stats,
+            "success_rate": successful_executions / total_executions,
+            "error_rate": failed_executions / total_executions,
+            "average_duration": durations["avg"],
+            "duration_percentiles": {
+                "p50": durations["p50"],
+                "p95": durations["p95"],
+                "p99": durations["p99"]
+            },
+            "tool_stats": self._dimension_stats("tool", time_window),
+            "server_stats": self._dimension_stats("server", time_window),
+            "agent_stats": self._dimension_stats("agent", time_window),
             "time_window": time_window,
             "generated_at": current_time
         }
     
+    def _record_duration(self, event: MCPExecutionEvent) -> None:
+        """记录执行次数，并将执行耗时写入分位数草图（没有耗时的执行不计入耗时统计）"""
+        failed = not event.success
+        timestamp = event.start_time
+        series = [("all", "*"), ("tool", event.tool_name), ("server", event.server_name)]
+        agent_id = event.user_context.get("agent_id")
+        if agent_id:
+            series.append(("agent", str(agent_id)))
+        
+        for dimension, key in series:
+            self._execution_counts.record(dimension, key, 0.0, failed, timestamp)
+            if event.duration is not None:
+                self._duration_sketches.record(dimension, key, event.duration, failed, timestamp)
+    
+    def _dimension_stats(
+        self,
+        dimension: str,
+        time_window: Optional[float]
+    ) -> Dict[str, Dict[str, Any]]:
+        """按维度汇总执行统计"""
+        stats = {}
+        for key, summary in self._execution_counts.summaries(dimension, time_window).items():
+            durations = self._duration_sketches.summary(dimension, key, time_window)
+            stats[key] = {
+                "executions": summary["count"],
+                "successes": summary["count"] - summary["errors"],
+                "failures": summary["errors"],
+                "total_duration": durations["sum"],
+                "avg_duration": durations["avg"],
+                "p50_duration": durations["p50"],
+                "p95_duration": durations["p95"],
+                "p99_duration": durations["p99"]
+            }
+        return stats
+    
+    def export_duration_sketches(self) -> Dict[str, Any]:
+        """
+        导出耗时草图，供管理API展示或跨进程合并
+        
+        Returns:
+            序列化后的草图存储
+        """
+        return self._duration_sketches.to_dict()
+    
     def add_execution_callback(self, callback: Callable) -> None:
         """添加执行回调"""
         self._execution_callbacks.append(callback)
@@ -859,6 +858,7 @@ class MCPMonitoringIntegration:
                         event = self._execution_events[execution_id]
                         event.complete(False, error="Execution timeout")
                         self._execution_history.append(event)
+                        self._record_duration(event)
                         del self._execution_events[execution_id]
                         
                         logger.warning(
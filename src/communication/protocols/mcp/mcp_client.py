@@ -14,6 +14,7 @@ from .mcp_types import (
     MCPServerConfig, MCPClientConfig, ConnectionStatus, Transport
 )
 from .protocol_handler import MCPProtocolHandler
+from ..codec import available_codecs, get_codec, negotiate
 from .transports.base_transport import BaseTransport
 from .transports.stdio_transport import StdioTransport
 
@@ -381,7 +382,11 @@ class MCPClient:
                 "protocolVersion": "2024-11-05",
                 "capabilities": {
                     "roots": {"listChanged": False},
-                    "sampling": {}
+                    "sampling": {},
+                    # 按偏好提供本端传输能承载的编解码器，服务端不认识时忽略
+                    "experimental": {
+                        "codecs": available_codecs(self.transport.supports_binary)
+                    }
                 },
                 "clientInfo": {
                     "name": "Nagent MCP Client",
@@ -390,13 +395,20 @@ class MCPClient:
             }
         )
         
+        # 服务端选定编解码器后，从初始化完成通知开始切换
+        experimental = (init_result.get("capabilities") or {}).get("experimental") or {}
+        if experimental.get("codec"):
+            codec_name = negotiate([experimental["codec"]], self.transport.supports_binary)
+            self.transport.codec = get_codec(codec_name)
+        
         # 发送初始化完成通知
         await self._send_notification("initialized")
         
         logger.debug(
             "MCP connection initialized",
             server_name=self.server_config.name,
-            server_info=init_result.get("serverInfo", {})
+            server_info=init_result.get("serverInfo", {}),
+            codec=self.transport.codec.name
         )
     
     async def _send_request(
@@ -462,6 +474,9 @@ class MCPClient:
             # 如果有响应，发送回去
             if response:
                 await self.transport.send_message(response)
+                # 初始化响应以 JSON 发出后再切换到协商出的编解码器
+                if message.method == "initialize" and self.protocol_handler.negotiated_codec:
+                    self.transport.codec = get_codec(self.protocol_handler.negotiated_codec)
                 
         except Exception as e:
             logger.error(
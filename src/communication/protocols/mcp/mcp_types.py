@@ -4,12 +4,14 @@ MCP协议类型定义
 定义MCP协议相关的数据类型和枚举
 """
 
-import json
+import sys
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Union
 from enum import Enum
 import structlog
 
+from ..codec import Codec, get_codec
+
 logger = structlog.get_logger(__name__)
 
 
@@ -46,7 +48,7 @@ class MCPErrorCode(Enum):
     SERVER_ERROR = -32000
 
 
-@dataclass
+@dataclass(slots=True)
 class MCPError:
     """MCP错误"""
     code: int
@@ -73,7 +75,7 @@ class MCPError:
         return result
 
 
-@dataclass
+@dataclass(slots=True)
 class MCPMessage:
     """MCP消息"""
     jsonrpc: str = "2.0"
@@ -89,10 +91,11 @@ class MCPMessage:
         error_data = data.get("error")
         error = MCPError.from_dict(error_data) if error_data else None
         
+        method = data.get("method")
         return cls(
-            jsonrpc=data.get("jsonrpc", "2.0"),
+            jsonrpc=sys.intern(data.get("jsonrpc", "2.0")),
             id=data.get("id"),
-            method=data.get("method"),
+            method=sys.intern(method) if method else method,
             params=data.get("params"),
             result=data.get("result"),
             error=error
@@ -117,17 +120,49 @@ class MCPMessage:
     
     def to_json(self) -> str:
         """转换为JSON字符串"""
-        return json.dumps(self.to_dict())
+        return self.encode(get_codec("json"))
     
     @classmethod
-    def from_json(cls, json_str: str) -> 'MCPMessage':
+    def from_json(cls, json_str: Union[str, bytes]) -> 'MCPMessage':
         """从JSON字符串创建"""
+        return cls.decode(json_str, get_codec("json"))
+    
+    def encode(self, codec: Optional[Codec] = None) -> Union[str, bytes]:
+        """
+        按编解码器编码
+        
+        Args:
+            codec: 初始化时协商出的编解码器，默认 JSON（有 orjson 时使用 orjson）
+            
+        Returns:
+            文本或二进制线路数据
+        """
+        return (codec or get_codec()).encode(self.to_dict())
+    
+    @classmethod
+    def decode(cls, data: Union[str, bytes], codec: Optional[Codec] = None) -> 'MCPMessage':
+        """
+        按编解码器解码
+        
+        Args:
+            data: 线路数据
+            codec: 初始化时协商出的编解码器，默认 JSON
+            
+        Returns:
+            MCPMessage: 消息
+            
+        Raises:
+            ValueError: 数据无法解码或不是消息对象
+        """
+        codec = codec or get_codec()
         try:
-            data = json.loads(json_str)
+            data = codec.decode(data)
+            if not isinstance(data, dict):
+                raise ValueError("message must be an object")
             return cls.from_dict(data)
         except Exception as e:
-            logger.warning("Failed to parse MCP message", error=str(e))
-            raise ValueError(f"Invalid MCP message JSON: {e}")
+            logger.warning("Failed to parse MCP message", codec=codec.name, error=str(e))
+            raise ValueError(f"Invalid MCP message ({codec.name}): {e}")
 
 
 @dataclass
@@ -13,6 +13,7 @@ from .mcp_types import (
     MCPMessage, MCPTool, MCPResource, MCPResult, 
     MCPError, MCPErrorCode, ConnectionStatus
 )
+from ..codec import negotiate
 
 logger = structlog.get_logger(__name__)
 
@@ -47,6 +48,9 @@ class MCPProtocolHandler:
         self.tool_handler: Optional[Callable[[str, Dict[str, Any]], Awaitable[Any]]] = None
         self.resource_handler: Optional[Callable[[str], Awaitable[Any]]] = None
         
+        # 处理 initialize 请求时与对端协商出的编解码器
+        self.negotiated_codec: Optional[str] = None
+        
     def set_tool_handler(self, handler: Callable[[str, Dict[str, Any]], Awaitable[Any]]) -> None:
         """设置工具调用处理器"""
         self.tool_handler = handler
@@ -170,16 +174,25 @@ class MCPProtocolHandler:
     
     async def _handle_initialize(self, message: MCPMessage) -> MCPMessage:
         """处理初始化请求"""
+        capabilities = {
+            "tools": {},
+            "resources": {},
+            "logging": {}
+        }
+        
+        # 对端提供了编解码器列表时选出双方都支持的第一个
+        capabilities_offered = (message.params or {}).get("capabilities") or {}
+        offered = (capabilities_offered.get("experimental") or {}).get("codecs")
+        if offered:
+            self.negotiated_codec = negotiate(offered)
+            capabilities["experimental"] = {"codec": self.negotiated_codec}
+        
         # 返回服务器能力
         return MCPMessage(
             id=message.id,
             result={
                 "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {},
-                    "resources": {},
-                    "logging": {}
-                },
+                "capabilities": capabilities,
                 "serverInfo": {
                     "name": "Nagent MCP Client",
                     "version": "1.0.0"
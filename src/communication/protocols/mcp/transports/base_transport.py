@@ -10,6 +10,7 @@ from typing import Optional, Callable, Any
 import structlog
 
 from ..mcp_types import MCPMessage, ConnectionStatus
+from ...codec import Codec, get_codec
 
 logger = structlog.get_logger(__name__)
 
@@ -17,6 +18,9 @@ logger = structlog.get_logger(__name__)
 class BaseTransport(ABC):
     """传输协议基类"""
     
+    # 是否按消息分帧、可以承载二进制编解码器；按行分隔的文本传输为 False
+    supports_binary = False
+    
     def __init__(self, timeout: int = 30):
         """
         初始化传输协议
@@ -28,6 +32,8 @@ class BaseTransport(ABC):
         self.status = ConnectionStatus.DISCONNECTED
         self.message_handler: Optional[Callable[[MCPMessage], None]] = None
         self._read_task: Optional[asyncio.Task] = None
+        # 初始化握手完成前使用 JSON，之后切换为协商出的编解码器
+        self.codec: Codec = get_codec()
         
     @abstractmethod
     async def connect(self) -> bool:
@@ -105,7 +105,7 @@ class StdioTransport(BaseTransport):
         
         try:
             # 序列化消息
-            message_json = message.to_json()
+            message_json = message.encode(self.codec)
             message_bytes = (message_json + '\n').encode('utf-8')
             
             # 发送消息
@@ -147,13 +147,13 @@ class StdioTransport(BaseTransport):
                     logger.warning("No more data from MCP server")
                     break
                 
-                line = line_bytes.decode('utf-8').strip()
+                line = line_bytes.strip()
                 if not line:
                     continue
                 
                 try:
-                    # 解析消息
-                    message = MCPMessage.from_json(line)
+                    # 解析消息（JSON 编解码器直接接受 bytes）
+                    message = MCPMessage.decode(line, self.codec)
                     
                     logger.debug(
                         "Received MCP message",
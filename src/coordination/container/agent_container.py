@@ -1,16 +1,22 @@
 """
 智能体容器
 
-实现单个智能体容器的生命周期管理
+实现单个智能体容器的生命周期管理。
+
+Agent 进程通过 asyncio 子进程启动，stdout/stderr 各由一个流读取协程收集，
+不会阻塞事件循环；日志写入每个容器固定容量的环形缓冲区，可选批量溢写到
+滚动文件。资源采样在线程池中执行，并复用 psutil 进程句柄。
 """
 
 import asyncio
 import json
+import logging
+import logging.handlers
 import os
-import subprocess
 import time
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
 import structlog
 
 from .container_manager import ContainerStatus, ContainerConfig
@@ -21,6 +27,128 @@ from src.infrastructure.registry.unified_registry import UnifiedModuleRegistry
 logger = structlog.get_logger(__name__)
 
 
+class LogRingBuffer:
+    """
+    容器日志环形缓冲区
+    
+    保留最近 capacity 行日志，写满后覆盖最旧的行。条目保存为
+    (时间戳, 流名, 文本)，读取时才格式化。配置了 spill_path 时，
+    新行同时攒批写入 RotatingFileHandler 管理的滚动文件，写文件在线程池中进行。
+    """
+    
+    def __init__(
+        self,
+        capacity: int = 1000,
+        spill_path: Optional[str] = None,
+        spill_max_bytes: int = 10 * 1024 * 1024,
+        spill_backup_count: int = 3,
+        spill_batch_size: int = 64
+    ):
+        """
+        初始化日志缓冲区
+        
+        Args:
+            capacity: 保留的日志行数
+            spill_path: 溢写文件路径，为 None 时不落盘
+            spill_max_bytes: 单个文件的最大字节数
+            spill_backup_count: 保留的滚动文件个数
+            spill_batch_size: 攒够多少行触发一次写文件
+        """
+        self._ring: Deque[Tuple[float, str, str]] = deque(maxlen=capacity)
+        self.total_lines = 0
+        
+        self._handler: Optional[logging.handlers.RotatingFileHandler] = None
+        if spill_path:
+            os.makedirs(os.path.dirname(os.path.abspath(spill_path)), exist_ok=True)
+            self._handler = logging.handlers.RotatingFileHandler(
+                spill_path, maxBytes=spill_max_bytes, backupCount=spill_backup_count, encoding='utf-8'
+            )
+            self._handler.setFormatter(logging.Formatter('%(message)s'))
+        self._spill_batch_size = spill_batch_size
+        self._pending: List[Tuple[float, str, str]] = []
+        self._flush_task: Optional[asyncio.Future] = None
+    
+    @property
+    def capacity(self) -> int:
+        return self._ring.maxlen
+    
+    def __len__(self) -> int:
+        return len(self._ring)
+    
+    def append(self, line: str, stream: str = "stdout") -> None:
+        """
+        追加一行日志
+        
+        Args:
+            line: 日志文本
+            stream: 来源流（stdout、stderr、container）
+        """
+        entry = (time.time(), stream, line)
+        self._ring.append(entry)
+        self.total_lines += 1
+        
+        if self._handler is not None:
+            self._pending.append(entry)
+            if len(self._pending) >= self._spill_batch_size and (
+                self._flush_task is None or self._flush_task.done()
+            ):
+                self._flush_task = asyncio.ensure_future(self.flush())
+    
+    def tail(self, lines: int = 100) -> List[str]:
+        """
+        获取最近的日志
+        
+        Args:
+            lines: 行数，小于等于 0 时返回全部
+        
+        Returns:
+            格式化后的日志行
+        """
+        ring = self._ring
+        if 0 < lines < len(ring):
+            start = len(ring) - lines
+            entries = [ring[i] for i in range(start, len(ring))]
+        else:
+            entries = list(ring)
+        return [self._format(entry) for entry in entries]
+    
+    async def flush(self) -> None:
+        """把待写入的行写到滚动文件"""
+        if self._handler is None:
+            return
+        
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            batch, self._pending = self._pending, []
+            await loop.run_in_executor(None, self._write, batch)
+    
+    async def close(self) -> None:
+        """写出剩余的行并关闭文件"""
+        if self._handler is None:
+            return
+        
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
+        self._handler.close()
+        self._handler = None
+    
+    def _write(self, batch: List[Tuple[float, str, str]]) -> None:
+        handler = self._handler
+        if handler is None:
+            return
+        for entry in batch:
+            handler.handle(logging.makeLogRecord({"msg": self._format(entry)}))
+    
+    @staticmethod
+    def _format(entry: Tuple[float, str, str]) -> str:
+        timestamp, stream, line = entry
+        prefix = datetime.utcfromtimestamp(timestamp).isoformat()
+        if stream == "stdout":
+            return f"[{prefix}] {line}"
+        return f"[{prefix}] [{stream}] {line}"
+
+
 class AgentContainer:
     """
     智能体容器
@@ -28,13 +156,27 @@ class AgentContainer:
     负责单个智能体容器的生命周期管理
     """
     
-    def __init__(self, container_id: str, config: ContainerConfig, unified_registry: UnifiedModuleRegistry):
+    def __init__(
+        self,
+        container_id: str,
+        config: ContainerConfig,
+        unified_registry: UnifiedModuleRegistry,
+        max_logs: int = 1000,
+        log_file: Optional[str] = None,
+        log_file_max_bytes: int = 10 * 1024 * 1024,
+        log_file_backups: int = 3
+    ):
         """
         初始化容器
         
         Args:
             container_id: 容器ID
             config: 容器配置
+            unified_registry: 统一模块注册中心
+            max_logs: 内存中保留的日志行数
+            log_file: 日志溢写文件路径，为 None 时只保留在内存中
+            log_file_max_bytes: 溢写文件滚动大小
+            log_file_backups: 保留的滚动文件个数
         """
         self.container_id = container_id
         self.config = config
@@ -46,15 +188,26 @@ class AgentContainer:
         self.stopped_at: Optional[datetime] = None
         
         # 进程管理
-        self.process: Optional[subprocess.Popen] = None
+        self.process: Optional[asyncio.subprocess.Process] = None
         self.pid: Optional[int] = None
+        self._log_readers: List[asyncio.Task] = []
+        self.environment: Dict[str, str] = {}
         
         # 日志管理
-        self.logs: List[str] = []
-        self.max_logs = 1000
+        self.max_logs = max_logs
+        self.logs = LogRingBuffer(
+            capacity=max_logs,
+            spill_path=log_file,
+            spill_max_bytes=log_file_max_bytes,
+            spill_backup_count=log_file_backups
+        )
+        self.max_log_line = 64 * 1024  # 单行日志上限（字节）
         
-        # 资源使用
+        # 资源使用（采样结果缓存 resource_poll_interval 秒）
         self.resource_usage: Dict[str, Any] = {}
+        self.resource_poll_interval = 1.0
+        self._resource_sampled_at = 0.0
+        self._ps_process = None
         
         # 健康检查
         self.health_check_interval = 30  # 秒
@@ -178,6 +331,7 @@ class AgentContainer:
             
             # 清理环境
             await self._cleanup_environment()
+            await self.logs.close()
             
             # 更新状态
             self.status = ContainerStatus.DESTROYED
@@ -197,54 +351,64 @@ class AgentContainer:
         """
         获取资源使用情况
         
+        采样在线程池中进行，psutil 进程句柄在容器生命周期内复用（cpu_percent
+        依赖同一句柄上两次调用之间的差值）。两次采样间隔小于
+        resource_poll_interval 时直接返回上次结果。
+        
         Returns:
             资源使用信息
         """
         if not self.process or not self.pid:
             return {}
         
+        now = time.monotonic()
+        if self.resource_usage and now - self._resource_sampled_at < self.resource_poll_interval:
+            return self.resource_usage
+        
         try:
-            # 获取进程信息
-            import psutil
-            
-            process = psutil.Process(self.pid)
-            
-            # CPU使用率
-            cpu_percent = process.cpu_percent()
-            
-            # 内存使用
+            loop = asyncio.get_running_loop()
+            self.resource_usage = await loop.run_in_executor(None, self._sample_resources)
+            self._resource_sampled_at = now
+        
+        except Exception as e:
+            self._ps_process = None
+            logger.warning(
+                "Failed to get resource usage",
+                container_id=self.container_id,
+                error=str(e)
+            )
+        
+        return self.resource_usage
+    
+    def _sample_resources(self) -> Dict[str, Any]:
+        """在工作线程中读取进程资源（oneshot 合并对 /proc 的读取）"""
+        import psutil
+        
+        process = self._ps_process
+        if process is None or process.pid != self.pid:
+            process = self._ps_process = psutil.Process(self.pid)
+        
+        with process.oneshot():
             memory_info = process.memory_info()
-            memory_percent = process.memory_percent()
-            
-            # 网络IO
             try:
-                net_io = process.io_counters()
-            except:
-                net_io = None
+                io = process.io_counters()
+            except (psutil.AccessDenied, AttributeError):
+                io = None
             
-            self.resource_usage = {
-                "cpu_percent": cpu_percent,
+            return {
+                "cpu_percent": process.cpu_percent(),
                 "memory_rss": memory_info.rss,
                 "memory_vms": memory_info.vms,
-                "memory_percent": memory_percent,
-                "network_io": {
-                    "bytes_sent": net_io.bytes_sent if net_io else 0,
-                    "bytes_recv": net_io.bytes_recv if net_io else 0
-                } if net_io else None,
+                "memory_percent": process.memory_percent(),
+                "io": {
+                    "read_bytes": io.read_bytes,
+                    "write_bytes": io.write_bytes
+                } if io else None,
                 "num_threads": process.num_threads(),
                 "num_fds": process.num_fds() if hasattr(process, 'num_fds') else None,
                 "create_time": process.create_time(),
                 "status": process.status()
             }
-            
-        except Exception as e:
-            logger.warning(
-                "Failed to get resource usage",
-                container_id=self.container_id,
-                error=str(e)
-            )
-        
-        return self.resource_usage
     
     async def get_logs(self, lines: int = 100) -> List[str]:
         """
@@ -252,27 +416,21 @@ class AgentContainer:
         
         Args:
             lines: 返回的日志行数
-            
+        
         Returns:
             日志列表
         """
-        return self.logs[-lines:] if lines > 0 else self.logs
+        return self.logs.tail(lines)
     
-    async def add_log(self, message: str) -> None:
+    async def add_log(self, message: str, stream: str = "container") -> None:
         """
         添加日志
         
         Args:
             message: 日志消息
+            stream: 来源流
         """
-        timestamp = datetime.utcnow().isoformat()
-        log_entry = f"[{timestamp}] {message}"
-        
-        self.logs.append(log_entry)
-        
-        # 限制日志数量
-        if len(self.logs) > self.max_logs:
-            self.logs = self.logs[-self.max_logs:]
+        self.logs.append(message, stream)
     
     async def _create_environment(self) -> None:
         """创建容器环境"""
@@ -322,33 +480,34 @@ class AgentContainer:
                 "--config-file", self.environment["CONFIG_FILE"]
             ]
             
-            # 启动进程
-            self.process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
+            # 启动进程（stdout/stderr 走 asyncio 管道）
+            self.process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
                 env=self.environment,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+                limit=self.max_log_line
             )
             
             self.pid = self.process.pid
+            self._ps_process = None
             
             # 启动日志收集
-            asyncio.create_task(self._log_collector())
-            
-            # 等待进程启动
-            await asyncio.sleep(2)
+            self._log_readers = [
+                asyncio.create_task(self._log_collector(self.process.stdout, "stdout")),
+                asyncio.create_task(self._log_collector(self.process.stderr, "stderr"))
+            ]
             
-            # 检查进程状态
-            if self.process.poll() is None:
+            # 等待进程启动：2 秒内退出视为启动失败
+            try:
+                await asyncio.wait_for(asyncio.shield(self.process.wait()), timeout=2)
+            except asyncio.TimeoutError:
                 await self.add_log(f"Agent process started with PID {self.pid}")
                 return True
-            else:
-                await self.add_log("Agent process failed to start")
-                return False
-                
+            
+            await self.add_log(f"Agent process failed to start (exit code {self.process.returncode})")
+            return False
+        
         except Exception as e:
             logger.error(
                 "Failed to start agent process",
@@ -363,7 +522,7 @@ class AgentContainer:
         
         Args:
             force: 是否强制停止
-            
+        
         Returns:
             是否停止成功
         """
@@ -371,37 +530,31 @@ class AgentContainer:
             return True
         
         try:
-            if force:
-                # 强制终止
+            if self.process.returncode is None:
                 self.process.terminate()
-                await asyncio.sleep(1)
                 
-                if self.process.poll() is None:
-                    self.process.kill()
-                    await asyncio.sleep(1)
-            else:
-                # 优雅停止
-                self.process.terminate()
-                
-                # 等待进程结束
+                # 优雅停止等待 30 秒，强制停止等待 1 秒，超时后 kill
                 try:
-                    await asyncio.wait_for(
-                        asyncio.get_event_loop().run_in_executor(None, self.process.wait),
-                        timeout=30
-                    )
+                    await asyncio.wait_for(self.process.wait(), timeout=1 if force else 30)
                 except asyncio.TimeoutError:
-                    # 超时后强制终止
                     self.process.kill()
-                    await asyncio.sleep(1)
+                    try:
+                        await asyncio.wait_for(self.process.wait(), timeout=5)
+                    except asyncio.TimeoutError:
+                        pass
+            
+            # 进程退出后管道关闭，读取协程会自行结束
+            await self._drain_log_readers()
             
             # 检查进程是否已停止
-            if self.process.poll() is not None:
+            if self.process.returncode is not None:
                 await self.add_log(f"Agent process stopped (PID: {self.pid})")
+                self._ps_process = None
                 return True
             else:
                 await self.add_log("Failed to stop agent process")
                 return False
-                
+        
         except Exception as e:
             logger.error(
                 "Error stopping agent process",
@@ -420,7 +573,7 @@ class AgentContainer:
                 shutil.rmtree(container_dir)
             
             await self.add_log("Container environment cleaned up")
-            
+        
         except Exception as e:
             logger.error(
                 "Failed to cleanup container environment",
@@ -428,33 +581,53 @@ class AgentContainer:
                 error=str(e)
             )
     
-    async def _log_collector(self) -> None:
-        """日志收集器"""
-        if not self.process:
-            return
+    async def _log_collector(self, stream: asyncio.StreamReader, name: str) -> None:
+        """
+        日志收集器：逐行读取一个输出流直到 EOF
+        
+        Args:
+            stream: 进程输出流
+            name: 流名称
+        """
+        append = self.logs.append
         
         try:
-            while self.process.poll() is None:
-                line = self.process.stdout.readline()
-                if line:
-                    await self.add_log(line.strip())
-                else:
-                    await asyncio.sleep(0.1)
-            
-            # 读取剩余日志
-            remaining_logs = self.process.stdout.read()
-            if remaining_logs:
-                for line in remaining_logs.split('\n'):
-                    if line.strip():
-                        await self.add_log(line.strip())
-                        
+            while True:
+                try:
+                    line = await stream.readline()
+                except ValueError:
+                    # 超过 max_log_line 的行已被 StreamReader 丢弃
+                    append(f"<line longer than {self.max_log_line} bytes dropped>", name)
+                    continue
+                
+                if not line:
+                    break
+                text = line.decode('utf-8', errors='replace').rstrip()
+                if text:
+                    append(text, name)
+        
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(
                 "Error in log collector",
                 container_id=self.container_id,
+                stream=name,
                 error=str(e)
             )
     
+    async def _drain_log_readers(self, timeout: float = 5) -> None:
+        """等待日志读取协程读完剩余输出，超时后取消"""
+        readers, self._log_readers = self._log_readers, []
+        if not readers:
+            return
+        
+        _, pending = await asyncio.wait(readers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
     async def _health_check_loop(self) -> None:
         """健康检查循环"""
         while self.status == ContainerStatus.RUNNING:
@@ -472,7 +645,7 @@ class AgentContainer:
     async def _perform_health_check(self) -> None:
         """执行健康检查"""
         try:
-            if not self.process or self.process.poll() is not None:
+            if not self.process or self.process.returncode is not None:
                 self.health_status = "unhealthy"
                 await self.add_log("Health check failed: process not running")
                 return
@@ -491,7 +664,7 @@ class AgentContainer:
                 container_id=self.container_id,
                 error=str(e)
             ) 
-
+    
     def get_agent_card(self) -> dict:
         """对外暴露本地Agent能力卡片"""
         return self.a2a_server.agent_card.to_dict() 
\ No newline at end of file
@@ -5,12 +5,15 @@
 """
 
 import asyncio
+import re
 import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 from enum import Enum
 import structlog
 
+from .resource_manager import ResourceLimits, ResourceManager
+
 logger = structlog.get_logger(__name__)
 
 
@@ -76,11 +79,27 @@ class ContainerManager:
     负责智能体容器的创建、启动、停止、销毁等生命周期管理
     """
     
-    def __init__(self):
-        """初始化容器管理器"""
+    def __init__(
+        self,
+        resource_manager: Optional[ResourceManager] = None,
+        allocator: Any = None,
+        node_id: str = "local",
+        allocator_units: Optional[Dict[str, float]] = None
+    ):
+        """
+        初始化容器管理器
+        
+        Args:
+            resource_manager: 资源管理器，默认新建
+            allocator: ResourceAllocator，提供时本机实测余量每轮采样后推送给它
+            node_id: 本机在分配器中的节点ID
+            allocator_units: 各资源的单位换算除数，见 ResourceManager.bind_allocator
+        """
         self.containers: Dict[str, 'AgentContainer'] = {}
         self.container_configs: Dict[str, ContainerConfig] = {}
-        self.resource_manager = None  # 将在后续实现
+        self.resource_manager = resource_manager or ResourceManager()
+        if allocator is not None:
+            self.resource_manager.bind_allocator(allocator, node_id, allocator_units)
         
         # 容器统计
         self.container_stats = {
@@ -99,9 +118,8 @@ class ContainerManager:
         try:
             logger.info("Initializing container manager")
             
-            # 初始化资源管理器
-            # self.resource_manager = ResourceManager()
-            # await self.resource_manager.initialize()
+            # 初始化资源管理器（启动资源采样循环）
+            await self.resource_manager.initialize()
             
             # 清理已存在的容器
             await self._cleanup_existing_containers()
@@ -132,12 +150,12 @@ class ContainerManager:
                 agent_type=config.agent_type
             )
             
-            # 检查资源可用性
-            if not await self._check_resources(config):
-                raise RuntimeError(f"Insufficient resources for container {container_id}")
-            
-            # 创建容器实例
+            # 创建容器实例并按配置分配资源
             container = AgentContainer(container_id, config)
+            if not await self.resource_manager.allocate_resources(
+                container_id, self._resource_limits(config)
+            ):
+                raise RuntimeError(f"Insufficient resources for container {container_id}")
             self.containers[container_id] = container
             self.container_configs[container_id] = config
             
@@ -185,6 +203,9 @@ class ContainerManager:
             
             if success:
                 self.container_stats["running_containers"] += 1
+                # 绑定容器进程，之后的资源采样使用实测数据
+                if container.pid is not None:
+                    await self.resource_manager.attach_container(container_id, pid=container.pid)
                 logger.info("Container started successfully", container_id=container_id)
             else:
                 self.container_stats["error_containers"] += 1
@@ -282,6 +303,7 @@ class ContainerManager:
                 del self.containers[container_id]
                 if container_id in self.container_configs:
                     del self.container_configs[container_id]
+                await self.resource_manager.release_resources(container_id)
                 
                 logger.info("Container destroyed successfully", container_id=container_id)
             else:
@@ -374,22 +396,44 @@ class ContainerManager:
             )
         }
     
-    async def _check_resources(self, config: ContainerConfig) -> bool:
+    @staticmethod
+    def _resource_limits(config: ContainerConfig) -> ResourceLimits:
         """
-        检查资源可用性
+        把容器配置中的资源（"cpu": "500m"、"memory": "1Gi" 等）换算为资源限制
         
         Args:
             config: 容器配置
             
         Returns:
-            资源是否足够
+            资源限制
         """
-        # 这里应该实现实际的资源检查逻辑
-        # 暂时返回True
-        return True
+        resources = config.resources
+        limits = ResourceLimits()
+        if "cpu" in resources:
+            cpu = str(resources["cpu"])
+            limits.cpu_limit = float(cpu[:-1]) / 1000 if cpu.endswith("m") else float(cpu)
+        if "memory" in resources:
+            limits.memory_limit = _parse_bytes(resources["memory"])
+        if "gpu" in resources:
+            limits.gpu_limit = int(resources["gpu"])
+        return limits
     
     async def _cleanup_existing_containers(self) -> None:
         """清理已存在的容器"""
         # 这里应该实现清理逻辑
         # 暂时为空
-        pass 
\ No newline at end of file
+        pass 
+
+
+_BYTE_UNITS = {
+    "": 1, "k": 1000, "m": 1000 ** 2, "g": 1000 ** 3, "t": 1000 ** 4,
+    "ki": 1024, "mi": 1024 ** 2, "gi": 1024 ** 3, "ti": 1024 ** 4
+}
+
+
+def _parse_bytes(value: Any) -> int:
+    """解析 "512Mi"、"1G"、1073741824 这类容量表示，返回字节数"""
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([kmgt]i?)?b?\s*", str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid memory quantity: {value}")
+    return int(float(match.group(1)) * _BYTE_UNITS[match.group(2) or ""])
@@ -1,18 +1,32 @@
 """
 资源管理器
 
-实现容器资源分配、监控和限制
+实现容器资源分配、监控和限制。
+
+容器的实际资源使用按容器采样：
+- 容器有独立的 cgroup v2 时读取 cpu.stat / memory.current / io.stat，
+  并在可写时把限制写入 cpu.max / memory.max，由内核强制执行
+- 否则每轮用一次 psutil.process_iter 建立父子关系，按进程树汇总 CPU 时间、
+  RSS 和 IO 计数
+CPU 使用率和 IO 速率由相邻两次采样的差值计算；所有容器在一次线程池调用中
+完成采样。采样后的主机实测余量可以推送给 ResourceAllocator 参与放置决策。
 """
 
 import asyncio
-import psutil
+import os
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psutil
 import structlog
 
 logger = structlog.get_logger(__name__)
 
 
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
 class ResourceLimits:
     """资源限制配置"""
     
@@ -42,9 +56,88 @@ class ResourceUsage:
         self.network_bytes_sent = 0
         self.network_bytes_recv = 0
         self.disk_used = 0
+        self.disk_read_bytes = 0
+        self.disk_write_bytes = 0
+        self.disk_read_rate = 0.0
+        self.disk_write_rate = 0.0
+        self.source = None  # cgroup / process / None（未绑定进程）
         self.timestamp = datetime.utcnow()
 
 
+def cgroup_v2_available(root: str = CGROUP_ROOT) -> bool:
+    """
+    判断是否挂载了 cgroup v2 统一层级
+    
+    Args:
+        root: cgroup 挂载点
+    
+    Returns:
+        是否可用
+    """
+    return os.path.exists(os.path.join(root, "cgroup.controllers"))
+
+
+def cgroup_path_for_pid(pid: int, root: str = CGROUP_ROOT) -> Optional[str]:
+    """
+    查找进程所在的 cgroup v2 目录
+    
+    Args:
+        pid: 进程ID
+        root: cgroup 挂载点
+    
+    Returns:
+        cgroup 目录，不是 cgroup v2 或进程在根 cgroup 时返回 None
+    """
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    relative = line[3:].strip()
+                    if relative in ("", "/"):
+                        return None
+                    return os.path.join(root, relative.lstrip("/"))
+    except OSError:
+        return None
+    return None
+
+
+def read_cgroup_stats(path: str) -> Tuple[float, int, int, int]:
+    """
+    读取 cgroup v2 的累计计数
+    
+    Args:
+        path: cgroup 目录
+    
+    Returns:
+        (CPU 秒数, 当前内存字节数, 累计读字节数, 累计写字节数)
+    """
+    cpu_seconds = 0.0
+    with open(os.path.join(path, "cpu.stat")) as f:
+        for line in f:
+            if line.startswith("usage_usec "):
+                cpu_seconds = int(line.split()[1]) / 1e6
+                break
+    
+    with open(os.path.join(path, "memory.current")) as f:
+        memory = int(f.read().strip())
+    
+    read_bytes = write_bytes = 0
+    try:
+        with open(os.path.join(path, "io.stat")) as f:
+            for line in f:
+                for field in line.split()[1:]:
+                    key, _, value = field.partition("=")
+                    if key == "rbytes":
+                        read_bytes += int(value)
+                    elif key == "wbytes":
+                        write_bytes += int(value)
+    except OSError:
+        # 未启用 io 控制器
+        pass
+    
+    return cpu_seconds, memory, read_bytes, write_bytes
+
+
 class ResourceManager:
     """
     资源管理器
@@ -52,12 +145,33 @@ class ResourceManager:
     负责系统资源监控、分配和限制
     """
     
-    def __init__(self):
-        """初始化资源管理器"""
+    def __init__(self, enforcement: str = "warn", cgroup_root: str = CGROUP_ROOT):
+        """
+        初始化资源管理器
+        
+        Args:
+            enforcement: 超限处理方式，warn（记录并通知监听器）或 terminate
+                （连续超限 violation_grace 次后终止容器进程树）
+            cgroup_root: cgroup 挂载点
+        """
+        if enforcement not in ("warn", "terminate"):
+            raise ValueError(f"Unknown enforcement mode: {enforcement}")
+        
         self.system_resources = {}
         self.container_resources: Dict[str, ResourceUsage] = {}
         self.resource_limits: Dict[str, ResourceLimits] = {}
         
+        # 容器ID -> 采样来源 {"pid", "cgroup", "prev", "violations"}
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self.cgroup_root = cgroup_root
+        self.cgroup_v2 = cgroup_v2_available(cgroup_root)
+        self.enforcement = enforcement
+        self.violation_grace = 2
+        
+        # 实测余量的订阅者：(分配器, 节点ID, 单位换算)
+        self._allocators: List[Tuple[Any, str, Dict[str, float]]] = []
+        self._listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
+        
         # 监控间隔
         self.monitor_interval = 5  # 秒
         
@@ -69,36 +183,47 @@ class ResourceManager:
             "total_memory_usage": 0,
             "total_gpu_usage": 0,
             "system_cpu_percent": 0.0,
-            "system_memory_percent": 0.0
+            "system_memory_percent": 0.0,
+            "limit_violations": 0,
+            "enforced_terminations": 0,
+            "last_sample_duration": 0.0
         }
         
-        logger.info("Resource manager initialized")
+        logger.info("Resource manager initialized", cgroup_v2=self.cgroup_v2)
     
     async def initialize(self) -> None:
         """初始化资源管理器"""
         try:
             logger.info("Initializing resource manager")
             
-            # 获取系统资源信息
+            # 获取系统资源信息（同时为 cpu_percent 建立基线）
             await self._update_system_resources()
             
             # 启动资源监控
             asyncio.create_task(self._resource_monitor_loop())
             
             logger.info("Resource manager initialized successfully")
-            
+        
         except Exception as e:
             logger.error("Failed to initialize resource manager", error=str(e))
             raise
     
-    async def allocate_resources(self, container_id: str, limits: ResourceLimits) -> bool:
+    async def allocate_resources(
+        self,
+        container_id: str,
+        limits: ResourceLimits,
+        pid: Optional[int] = None,
+        cgroup_path: Optional[str] = None
+    ) -> bool:
         """
         分配资源
         
         Args:
             container_id: 容器ID
             limits: 资源限制
-            
+            pid: 容器主进程ID，也可以之后通过 attach_container 绑定
+            cgroup_path: 容器的 cgroup v2 目录
+        
         Returns:
             是否分配成功
         """
@@ -126,13 +251,16 @@ class ResourceManager:
             self.resource_stats["total_containers"] += 1
             self.resource_stats["active_containers"] += 1
             
+            if pid is not None or cgroup_path is not None:
+                await self.attach_container(container_id, pid=pid, cgroup_path=cgroup_path)
+            
             logger.info(
                 "Resources allocated successfully",
                 container_id=container_id
             )
             
             return True
-            
+        
         except Exception as e:
             logger.error(
                 "Failed to allocate resources",
@@ -141,6 +269,83 @@ class ResourceManager:
             )
             return False
     
+    async def attach_container(
+        self,
+        container_id: str,
+        pid: Optional[int] = None,
+        cgroup_path: Optional[str] = None
+    ) -> str:
+        """
+        绑定容器的进程或 cgroup，之后的采样使用实测数据
+        
+        未指定 cgroup_path 时，若进程位于独立的 cgroup v2（不是管理器自身所在的
+        cgroup）则使用该 cgroup，否则按进程树采样。使用 cgroup 且目录可写时
+        把限制写入 cpu.max / memory.max。
+        
+        Args:
+            container_id: 容器ID
+            pid: 容器主进程ID
+            cgroup_path: 容器的 cgroup v2 目录
+        
+        Returns:
+            采样来源：cgroup 或 process
+        """
+        if pid is None and cgroup_path is None:
+            raise ValueError("pid or cgroup_path is required")
+        
+        if cgroup_path is None and pid is not None and self.cgroup_v2:
+            candidate = cgroup_path_for_pid(pid, self.cgroup_root)
+            if candidate and candidate != cgroup_path_for_pid(os.getpid(), self.cgroup_root):
+                cgroup_path = candidate
+        
+        self._sources[container_id] = {
+            "pid": pid,
+            "cgroup": cgroup_path,
+            "prev": None,
+            "violations": 0
+        }
+        self.container_resources.setdefault(container_id, ResourceUsage())
+        
+        limits = self.resource_limits.get(container_id)
+        if cgroup_path and limits:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._write_cgroup_limits, cgroup_path, limits
+            )
+        
+        source = "cgroup" if cgroup_path else "process"
+        logger.info(
+            "Container attached for resource accounting",
+            container_id=container_id,
+            pid=pid,
+            source=source
+        )
+        return source
+    
+    def add_listener(self, callback: Callable[[str, str, Dict[str, Any]], None]) -> None:
+        """
+        添加超限事件监听器
+        
+        Args:
+            callback: 回调函数 (事件, 容器ID, 信息)，事件为 limit_exceeded 或 terminated
+        """
+        self._listeners.append(callback)
+    
+    def bind_allocator(
+        self,
+        allocator: Any,
+        node_id: str,
+        units: Optional[Dict[str, float]] = None
+    ) -> None:
+        """
+        每轮采样后把本机实测余量推送给资源分配器
+        
+        Args:
+            allocator: ResourceAllocator（需要提供 update_node_headroom）
+            node_id: 本机在分配器中的节点ID
+            units: 各资源的单位换算除数，如 {"memory": 1024 ** 3} 表示分配器按 GB 计内存
+        """
+        self._allocators.append((allocator, node_id, units or {}))
+    
     async def release_resources(self, container_id: str) -> None:
         """
         释放资源
@@ -158,11 +363,13 @@ class ResourceManager:
             if container_id in self.container_resources:
                 del self.container_resources[container_id]
             
+            self._sources.pop(container_id, None)
+            
             # 更新统计
             self.resource_stats["active_containers"] -= 1
             
             logger.info("Resources released successfully", container_id=container_id)
-            
+        
         except Exception as e:
             logger.error(
                 "Failed to release resources",
@@ -176,7 +383,7 @@ class ResourceManager:
         
         Args:
             container_id: 容器ID
-            
+        
         Returns:
             资源使用信息
         """
@@ -196,6 +403,11 @@ class ResourceManager:
                 "network_bytes_sent": usage.network_bytes_sent,
                 "network_bytes_recv": usage.network_bytes_recv,
                 "disk_used": usage.disk_used,
+                "disk_read_bytes": usage.disk_read_bytes,
+                "disk_write_bytes": usage.disk_write_bytes,
+                "disk_read_rate": usage.disk_read_rate,
+                "disk_write_rate": usage.disk_write_rate,
+                "source": usage.source,
                 "timestamp": usage.timestamp.isoformat()
             },
             "limits": {
@@ -211,34 +423,27 @@ class ResourceManager:
         """
         获取系统资源信息
         
+        CPU 使用率是自上次调用以来的平均值（不阻塞等待采样窗口）。
+        
         Returns:
             系统资源信息
         """
+        return await asyncio.get_running_loop().run_in_executor(None, self._read_system_resources)
+    
+    def get_headroom(self) -> Dict[str, float]:
+        """
+        获取本机实测余量（基于最近一次采样）
+        
+        Returns:
+            {"cpu": 空闲核数, "memory": 可用内存字节数}
+        """
+        if not self.system_resources:
+            return {}
+        
+        cpu = self.system_resources["cpu"]
         return {
-            "cpu": {
-                "count": psutil.cpu_count(),
-                "percent": psutil.cpu_percent(interval=1),
-                "freq": psutil.cpu_freq()._asdict() if psutil.cpu_freq() else None
-            },
-            "memory": {
-                "total": psutil.virtual_memory().total,
-                "available": psutil.virtual_memory().available,
-                "percent": psutil.virtual_memory().percent,
-                "used": psutil.virtual_memory().used
-            },
-            "disk": {
-                "total": psutil.disk_usage('/').total,
-                "used": psutil.disk_usage('/').used,
-                "free": psutil.disk_usage('/').free,
-                "percent": psutil.disk_usage('/').percent
-            },
-            "network": {
-                "bytes_sent": psutil.net_io_counters().bytes_sent,
-                "bytes_recv": psutil.net_io_counters().bytes_recv,
-                "packets_sent": psutil.net_io_counters().packets_sent,
-                "packets_recv": psutil.net_io_counters().packets_recv
-            },
-            "timestamp": datetime.utcnow().isoformat()
+            "cpu": cpu["count"] * (1 - cpu["percent"] / 100),
+            "memory": self.system_resources["memory"]["available"]
         }
     
     async def get_resource_stats(self) -> Dict[str, Any]:
@@ -252,7 +457,8 @@ class ResourceManager:
             **self.resource_stats,
             "system_resources": await self.get_system_resources(),
             "container_count": len(self.container_resources),
-            "resource_utilization": await self._calculate_resource_utilization()
+            "resource_utilization": await self._calculate_resource_utilization(),
+            "headroom": self.get_headroom()
         }
     
     async def check_resource_limits(self, container_id: str) -> Dict[str, bool]:
@@ -261,16 +467,19 @@ class ResourceManager:
         
         Args:
             container_id: 容器ID
-            
+        
         Returns:
             各资源是否超限
         """
         if container_id not in self.container_resources or container_id not in self.resource_limits:
             return {}
         
-        usage = self.container_resources[container_id]
-        limits = self.resource_limits[container_id]
-        
+        return self._limit_violations(
+            self.container_resources[container_id], self.resource_limits[container_id]
+        )
+    
+    @staticmethod
+    def _limit_violations(usage: ResourceUsage, limits: ResourceLimits) -> Dict[str, bool]:
         return {
             "cpu_exceeded": usage.cpu_percent > limits.cpu_limit * 100,
             "memory_exceeded": usage.memory_used > limits.memory_limit,
@@ -289,24 +498,57 @@ class ResourceManager:
             # 更新统计
             self.resource_stats["system_cpu_percent"] = self.system_resources["cpu"]["percent"]
             self.resource_stats["system_memory_percent"] = self.system_resources["memory"]["percent"]
-            
+        
         except Exception as e:
             logger.error("Failed to update system resources", error=str(e))
     
     async def _update_container_resources(self) -> None:
-        """更新容器资源使用情况"""
+        """更新容器资源使用情况：一次线程池调用采样所有容器，再按差值计算速率"""
         try:
+            targets = [
+                (container_id, source["pid"], source["cgroup"])
+                for container_id, source in self._sources.items()
+            ]
+            
+            started = time.perf_counter()
+            samples = await asyncio.get_running_loop().run_in_executor(
+                None, self._collect_samples, targets
+            )
+            self.resource_stats["last_sample_duration"] = time.perf_counter() - started
+            
+            memory_total = (self.system_resources.get("memory") or {}).get("total") or 0
+            now = datetime.utcnow()
             total_cpu = 0.0
             total_memory = 0
             total_gpu = 0
             
             for container_id, usage in self.container_resources.items():
-                # 这里应该从实际的容器进程获取资源使用情况
-                # 暂时使用模拟数据
-                usage.cpu_percent = 10.0  # 模拟CPU使用率
-                usage.memory_used = 100 * 1024 * 1024  # 模拟内存使用
-                usage.memory_percent = 5.0  # 模拟内存使用率
-                usage.timestamp = datetime.utcnow()
+                source = self._sources.get(container_id)
+                sample = samples.get(container_id)
+                
+                if source is not None and sample is not None:
+                    kind, taken_at, cpu_seconds, memory, read_bytes, write_bytes = sample
+                    previous = source["prev"]
+                    if previous is not None and taken_at > previous[0]:
+                        elapsed = taken_at - previous[0]
+                        usage.cpu_percent = max(0.0, (cpu_seconds - previous[1]) / elapsed * 100)
+                        usage.disk_read_rate = max(0.0, (read_bytes - previous[2]) / elapsed)
+                        usage.disk_write_rate = max(0.0, (write_bytes - previous[3]) / elapsed)
+                    source["prev"] = (taken_at, cpu_seconds, read_bytes, write_bytes)
+                    
+                    usage.memory_used = memory
+                    usage.memory_percent = memory / memory_total * 100 if memory_total else 0.0
+                    usage.disk_read_bytes = read_bytes
+                    usage.disk_write_bytes = write_bytes
+                    usage.source = kind
+                    usage.timestamp = now
+                elif source is not None:
+                    # 进程已退出或 cgroup 已删除
+                    usage.cpu_percent = 0.0
+                    usage.memory_used = 0
+                    usage.memory_percent = 0.0
+                    usage.disk_read_rate = usage.disk_write_rate = 0.0
+                    usage.timestamp = now
                 
                 total_cpu += usage.cpu_percent
                 total_memory += usage.memory_used
@@ -317,9 +559,214 @@ class ResourceManager:
             self.resource_stats["total_memory_usage"] = total_memory
             self.resource_stats["total_gpu_usage"] = total_gpu
             
+            await self._enforce_limits()
+            self._publish_headroom()
+        
         except Exception as e:
             logger.error("Failed to update container resources", error=str(e))
     
+    def _collect_samples(
+        self,
+        targets: List[Tuple[str, Optional[int], Optional[str]]]
+    ) -> Dict[str, Tuple[str, float, float, int, int, int]]:
+        """
+        在工作线程中采样所有容器
+        
+        Args:
+            targets: (容器ID, 进程ID, cgroup 目录) 列表
+        
+        Returns:
+            容器ID -> (来源, 采样时间, CPU 秒数, 内存字节数, 累计读字节数, 累计写字节数)，
+            采样失败的容器不出现在结果中
+        """
+        samples = {}
+        children: Optional[Dict[int, List[int]]] = None
+        
+        for container_id, pid, cgroup in targets:
+            try:
+                if cgroup:
+                    stats = read_cgroup_stats(cgroup)
+                    samples[container_id] = ("cgroup", time.monotonic(), *stats)
+                    continue
+                
+                # 本轮第一次需要进程树时建立一次父子关系表
+                if children is None:
+                    children = {}
+                    for process in psutil.process_iter(['ppid']):
+                        ppid = process.info['ppid']
+                        if ppid is not None:
+                            children.setdefault(ppid, []).append(process.pid)
+                
+                stats = self._sample_process_tree(pid, children)
+                if stats is not None:
+                    samples[container_id] = ("process", time.monotonic(), *stats)
+            
+            except (OSError, ValueError, psutil.Error) as e:
+                logger.debug("Failed to sample container", container_id=container_id, error=str(e))
+        
+        return samples
+    
+    @staticmethod
+    def _sample_process_tree(
+        pid: int,
+        children: Dict[int, List[int]]
+    ) -> Optional[Tuple[float, int, int, int]]:
+        """汇总进程树的 CPU 秒数、RSS 和 IO 计数，根进程不存在时返回 None"""
+        if not psutil.pid_exists(pid):
+            return None
+        
+        cpu_seconds = 0.0
+        memory = read_bytes = write_bytes = 0
+        stack = [pid]
+        while stack:
+            current = stack.pop()
+            stack.extend(children.get(current, ()))
+            try:
+                process = psutil.Process(current)
+                with process.oneshot():
+                    cpu_times = process.cpu_times()
+                    cpu_seconds += cpu_times.user + cpu_times.system
+                    memory += process.memory_info().rss
+                    try:
+                        io = process.io_counters()
+                        read_bytes += io.read_bytes
+                        write_bytes += io.write_bytes
+                    except (psutil.AccessDenied, AttributeError):
+                        pass
+            except psutil.NoSuchProcess:
+                if current == pid:
+                    return None
+            except psutil.AccessDenied:
+                continue
+        
+        return cpu_seconds, memory, read_bytes, write_bytes
+    
+    def _write_cgroup_limits(self, path: str, limits: ResourceLimits) -> None:
+        """把限制写入 cgroup（无权限时退回为采样后检查）"""
+        period = 100000
+        values = {
+            "cpu.max": f"{max(int(limits.cpu_limit * period), 1000)} {period}",
+            "memory.max": str(int(limits.memory_limit))
+        }
+        for name, value in values.items():
+            try:
+                with open(os.path.join(path, name), "w") as f:
+                    f.write(value)
+            except OSError as e:
+                logger.debug("Cannot write cgroup limit", path=path, file=name, error=str(e))
+    
+    async def _enforce_limits(self) -> None:
+        """检查所有容器的限制，通知监听器，并在 terminate 模式下终止持续超限的容器"""
+        for container_id, usage in self.container_resources.items():
+            limits = self.resource_limits.get(container_id)
+            source = self._sources.get(container_id)
+            if limits is None or source is None:
+                continue
+            
+            violations = self._limit_violations(usage, limits)
+            exceeded = [name for name, flag in violations.items() if flag]
+            if not exceeded:
+                source["violations"] = 0
+                continue
+            
+            source["violations"] += 1
+            self.resource_stats["limit_violations"] += 1
+            info = {"exceeded": exceeded, "cpu_percent": usage.cpu_percent, "memory_used": usage.memory_used}
+            self._emit("limit_exceeded", container_id, info)
+            logger.warning("Container resource limit exceeded", container_id=container_id, exceeded=exceeded)
+            
+            if (self.enforcement == "terminate" and source["pid"] is not None
+                    and source["violations"] >= self.violation_grace):
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._terminate_tree, source["pid"]
+                )
+                source["violations"] = 0
+                self.resource_stats["enforced_terminations"] += 1
+                self._emit("terminated", container_id, info)
+                logger.warning("Container terminated for exceeding limits", container_id=container_id)
+    
+    @staticmethod
+    def _terminate_tree(pid: int, timeout: float = 5.0) -> None:
+        """向进程树发送 SIGTERM，timeout 秒后仍未退出的进程发送 SIGKILL"""
+        try:
+            root = psutil.Process(pid)
+            processes = root.children(recursive=True) + [root]
+        except psutil.NoSuchProcess:
+            return
+        for process in processes:
+            try:
+                process.terminate()
+            except psutil.NoSuchProcess:
+                pass
+        
+        _, alive = psutil.wait_procs(processes, timeout=timeout)
+        for process in alive:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        if alive:
+            psutil.wait_procs(alive, timeout=timeout)
+    
+    def _emit(self, event: str, container_id: str, info: Dict[str, Any]) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(event, container_id, info)
+            except Exception as e:
+                logger.error("Error in resource listener", event=event, error=str(e))
+    
+    def _publish_headroom(self) -> None:
+        """把实测余量推送给绑定的分配器"""
+        if not self._allocators:
+            return
+        
+        headroom = self.get_headroom()
+        if not headroom:
+            return
+        for allocator, node_id, units in self._allocators:
+            try:
+                allocator.update_node_headroom(node_id, {
+                    resource_type: amount / units.get(resource_type, 1)
+                    for resource_type, amount in headroom.items()
+                })
+            except Exception as e:
+                logger.error("Failed to publish headroom", node_id=node_id, error=str(e))
+    
+    @staticmethod
+    def _read_system_resources() -> Dict[str, Any]:
+        """读取系统资源（每项只调用一次 psutil）"""
+        cpu_freq = psutil.cpu_freq()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        network = psutil.net_io_counters()
+        
+        return {
+            "cpu": {
+                "count": psutil.cpu_count(),
+                "percent": psutil.cpu_percent(interval=None),
+                "freq": cpu_freq._asdict() if cpu_freq else None
+            },
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "percent": memory.percent,
+                "used": memory.used
+            },
+            "disk": {
+                "total": disk.total,
+                "used": disk.used,
+                "free": disk.free,
+                "percent": disk.percent
+            },
+            "network": {
+                "bytes_sent": network.bytes_sent,
+                "bytes_recv": network.bytes_recv,
+                "packets_sent": network.packets_sent,
+                "packets_recv": network.packets_recv
+            },
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
     async def _resource_monitor_loop(self) -> None:
         """资源监控循环"""
         while True:
@@ -335,15 +782,17 @@ class ResourceManager:
         """
         检查资源可用性
         
+        同时检查账面余量（总量减去已分配的限制）和实测余量。
+        
         Args:
             limits: 资源限制
-            
+        
         Returns:
             资源是否足够
         """
         try:
-            # 获取当前系统资源
-            system_resources = await self.get_system_resources()
+            # 优先使用监控循环的最近一次采样
+            system_resources = self.system_resources or await self.get_system_resources()
             
             # 计算已分配资源
             allocated_cpu = sum(
@@ -354,17 +803,20 @@ class ResourceManager:
             )
             
             # 检查CPU
-            available_cpu = psutil.cpu_count() - allocated_cpu
-            if limits.cpu_limit > available_cpu:
+            total_cpu = system_resources["cpu"]["count"]
+            available_cpu = total_cpu - allocated_cpu
+            measured_cpu = total_cpu * (1 - system_resources["cpu"]["percent"] / 100)
+            if limits.cpu_limit > min(available_cpu, measured_cpu):
                 return False
             
             # 检查内存
-            available_memory = system_resources["memory"]["available"] - allocated_memory
-            if limits.memory_limit > available_memory:
+            available_memory = system_resources["memory"]["total"] - allocated_memory
+            measured_memory = system_resources["memory"]["available"]
+            if limits.memory_limit > min(available_memory, measured_memory):
                 return False
             
             return True
-            
+        
         except Exception as e:
             logger.error("Error checking resource availability", error=str(e))
             return False
@@ -377,7 +829,7 @@ class ResourceManager:
             各资源利用率
         """
         try:
-            system_resources = await self.get_system_resources()
+            system_resources = self.system_resources or await self.get_system_resources()
             
             # 计算已分配资源
             allocated_cpu = sum(
@@ -387,15 +839,17 @@ class ResourceManager:
                 limit.memory_limit for limit in self.resource_limits.values()
             )
             
-            total_cpu = psutil.cpu_count()
+            total_cpu = system_resources["cpu"]["count"]
             total_memory = system_resources["memory"]["total"]
             
             return {
                 "cpu_utilization": (allocated_cpu / total_cpu) * 100 if total_cpu > 0 else 0,
                 "memory_utilization": (allocated_memory / total_memory) * 100 if total_memory > 0 else 0,
-                "disk_utilization": system_resources["disk"]["percent"]
+                "disk_utilization": system_resources["disk"]["percent"],
+                "measured_cpu_utilization": system_resources["cpu"]["percent"],
+                "measured_memory_utilization": system_resources["memory"]["percent"]
             }
-            
+        
         except Exception as e:
             logger.error("Error calculating resource utilization", error=str(e))
-            return {} 
\ No newline at end of file
+            return {}
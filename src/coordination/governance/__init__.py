@@ -14,6 +14,7 @@ from .agent_governance import (
     CompliancePolicy,
     ComplianceLevel
 )
+from .metrics_window import MetricsWindow
 
 __all__ = [
     "AgentGovernanceManager",
@@ -23,5 +24,6 @@ __all__ = [
     "SLAMetrics",
     "CostMetrics",
     "CompliancePolicy",
-    "ComplianceLevel"
+    "ComplianceLevel",
+    "MetricsWindow"
 ] 
\ No newline at end of file
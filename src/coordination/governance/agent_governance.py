@@ -1,17 +1,23 @@
 """
 智能体治理层
 
-实现统一管理内部和外部智能体，提供SLA、成本、合规管控
+实现统一管理内部和外部智能体，提供SLA、成本、合规管控。
+
+智能体ID到治理信息有直接索引；每个智能体的延迟、成功率和成本记录在
+时间分桶的滑动窗口中，SLA 与花费速率都按窗口精确计算。
 """
 
 import asyncio
+import heapq
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Enum
+from typing import Any, Dict, List, Optional
 from dataclasses import dataclass, field
 from enum import Enum
 import structlog
 
+from .metrics_window import MetricsWindow
+
 logger = structlog.get_logger(__name__)
 
 
@@ -47,14 +53,16 @@ class SLAMetrics:
     throughput_target: int = 1000          # 吞吐量目标 (requests/min)
     error_rate_target: float = 1.0         # 错误率目标 (%)
     
-    # 当前指标
+    # 当前指标（均为测量窗口内的值）
     current_availability: float = 0.0
-    current_response_time: float = 0.0
-    current_throughput: int = 0
+    current_response_time: float = 0.0    # 平均响应时间 (ms)
+    current_p95_response_time: float = 0.0  # P95 响应时间 (ms)，与 response_time_target 比较
+    current_throughput: float = 0.0
     current_error_rate: float = 0.0
     
     # 统计窗口
     measurement_window: int = 3600  # 测量窗口 (秒)
+    window_buckets: int = 60        # 窗口分桶数
     last_updated: datetime = field(default_factory=datetime.utcnow)
 
 
@@ -73,6 +81,7 @@ class CostMetrics:
     total_requests: int = 0
     total_tokens: int = 0
     total_minutes: int = 0
+    current_spend_rate: float = 0.0        # 测量窗口内的花费速率 (每小时)
     
     # 成本控制
     budget_alert_threshold: float = 80.0   # 预算警告阈值 (%)
@@ -121,6 +130,9 @@ class AgentGovernanceInfo:
     last_activity: datetime = field(default_factory=datetime.utcnow)
     total_invocations: int = 0
     
+    # 滑动窗口（注册时按 sla_metrics 的窗口配置创建）
+    metrics_window: Optional[MetricsWindow] = field(default=None, repr=False, compare=False)
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
@@ -132,11 +144,15 @@ class AgentGovernanceInfo:
                 "response_time_target": self.sla_metrics.response_time_target,
                 "current_availability": self.sla_metrics.current_availability,
                 "current_response_time": self.sla_metrics.current_response_time,
+                "current_p95_response_time": self.sla_metrics.current_p95_response_time,
+                "current_error_rate": self.sla_metrics.current_error_rate,
+                "current_throughput": self.sla_metrics.current_throughput,
             },
             "sla_status": self.sla_status.value,
             "cost_metrics": {
                 "monthly_budget": self.cost_metrics.monthly_budget,
                 "current_monthly_cost": self.cost_metrics.current_monthly_cost,
+                "current_spend_rate": self.cost_metrics.current_spend_rate,
                 "total_requests": self.cost_metrics.total_requests,
             },
             "cost_status": self.cost_status,
@@ -177,6 +193,8 @@ class AgentGovernanceManager:
         
         # 治理数据存储
         self.governance_info: Dict[str, AgentGovernanceInfo] = {}
+        self._governance_by_agent: Dict[str, AgentGovernanceInfo] = {}
+        self._governance_id_by_agent: Dict[str, str] = {}
         
         # 全局治理策略
         self.global_sla_policy = SLAMetrics()
@@ -270,8 +288,18 @@ class AgentGovernanceManager:
             if compliance_config:
                 governance_info.compliance_policy = CompliancePolicy(**compliance_config)
             
+            governance_info.metrics_window = MetricsWindow(
+                window_seconds=governance_info.sla_metrics.measurement_window,
+                buckets=governance_info.sla_metrics.window_buckets
+            )
+            
+            # 同一智能体重复注册时替换之前的治理信息
+            self._remove_agent(agent_id)
+            
             # 存储治理信息
             self.governance_info[governance_id] = governance_info
+            self._governance_by_agent[agent_id] = governance_info
+            self._governance_id_by_agent[agent_id] = governance_id
             
             # 更新统计
             self.governance_stats["total_agents"] += 1
@@ -309,7 +337,7 @@ class AgentGovernanceManager:
         
         Args:
             agent_id: 智能体ID
-            response_time: 响应时间
+            response_time: 响应时间 (ms)
             success: 是否成功
             cost: 成本
             tokens: Token数量
@@ -319,11 +347,14 @@ class AgentGovernanceManager:
             return
         
         try:
+            governance_info.metrics_window.record(response_time, success, cost, tokens)
+            window = governance_info.metrics_window.snapshot()
+            
             # 更新SLA指标
-            await self._update_sla_metrics(governance_info, response_time, success)
+            await self._update_sla_metrics(governance_info, window)
             
             # 更新成本指标
-            await self._update_cost_metrics(governance_info, cost, tokens)
+            await self._update_cost_metrics(governance_info, cost, tokens, window)
             
             # 更新活动时间
             governance_info.last_activity = datetime.utcnow()
@@ -380,37 +411,49 @@ class AgentGovernanceManager:
         
         return dashboard_data
     
+    def _remove_agent(self, agent_id: str) -> None:
+        """移除智能体已有的治理信息并回退注册统计"""
+        governance_id = self._governance_id_by_agent.pop(agent_id, None)
+        if governance_id is None:
+            return
+        
+        previous = self.governance_info.pop(governance_id, None)
+        self._governance_by_agent.pop(agent_id, None)
+        if previous is None:
+            return
+        
+        self.governance_stats["total_agents"] -= 1
+        if previous.agent_type == AgentType.INTERNAL:
+            self.governance_stats["internal_agents"] -= 1
+        else:
+            self.governance_stats["external_agents"] -= 1
+    
     async def _find_governance_info_by_agent_id(
         self,
         agent_id: str
     ) -> Optional[AgentGovernanceInfo]:
         """根据智能体ID查找治理信息"""
-        for governance_info in self.governance_info.values():
-            if governance_info.agent_id == agent_id:
-                return governance_info
-        return None
+        return self._governance_by_agent.get(agent_id)
     
     async def _update_sla_metrics(
         self,
         governance_info: AgentGovernanceInfo,
-        response_time: float,
-        success: bool
+        window: Dict[str, float]
     ) -> None:
-        """更新SLA指标"""
-        sla = governance_info.sla_metrics
+        """
+        用滑动窗口的汇总更新SLA指标
         
-        # 更新响应时间（移动平均）
-        if sla.current_response_time == 0:
-            sla.current_response_time = response_time
-        else:
-            sla.current_response_time = (sla.current_response_time * 0.9 + response_time * 0.1)
+        Args:
+            governance_info: 治理信息
+            window: MetricsWindow.snapshot() 的结果
+        """
+        sla = governance_info.sla_metrics
         
-        # 更新错误率（需要维护窗口内的统计）
-        # 这里简化为基于成功率的计算
-        if success:
-            sla.current_error_rate = max(0, sla.current_error_rate - 0.1)
-        else:
-            sla.current_error_rate = min(100, sla.current_error_rate + 1.0)
+        sla.current_response_time = window["avg_latency"]
+        sla.current_p95_response_time = window["p_latency"]
+        sla.current_error_rate = window["error_rate"]
+        sla.current_availability = window["availability"]
+        sla.current_throughput = window["throughput"]
         
         sla.last_updated = datetime.utcnow()
     
@@ -418,7 +461,8 @@ class AgentGovernanceManager:
         self,
         governance_info: AgentGovernanceInfo,
         cost: float,
-        tokens: int
+        tokens: int,
+        window: Dict[str, float]
     ) -> None:
         """更新成本指标"""
         cost_metrics = governance_info.cost_metrics
@@ -428,6 +472,7 @@ class AgentGovernanceManager:
         cost_metrics.total_tokens += tokens
         cost_metrics.current_daily_cost += cost
         cost_metrics.current_monthly_cost += cost
+        cost_metrics.current_spend_rate = window["spend_rate"]
         
         # 更新统计
         cost_metrics.last_updated = datetime.utcnow()
@@ -442,8 +487,8 @@ class AgentGovernanceManager:
         """检查SLA合规性"""
         sla = governance_info.sla_metrics
         
-        # 检查响应时间
-        response_time_ok = sla.current_response_time <= sla.response_time_target
+        # 检查响应时间（P95）
+        response_time_ok = sla.current_p95_response_time <= sla.response_time_target
         
         # 检查错误率
         error_rate_ok = sla.current_error_rate <= sla.error_rate_target
@@ -451,7 +496,7 @@ class AgentGovernanceManager:
         # 确定SLA状态
         if response_time_ok and error_rate_ok:
             governance_info.sla_status = SLAStatus.HEALTHY
-        elif sla.current_response_time > sla.response_time_target * 1.5 or sla.current_error_rate > sla.error_rate_target * 2:
+        elif sla.current_p95_response_time > sla.response_time_target * 1.5 or sla.current_error_rate > sla.error_rate_target * 2:
             governance_info.sla_status = SLAStatus.CRITICAL
         else:
             governance_info.sla_status = SLAStatus.WARNING
@@ -480,9 +525,14 @@ class AgentGovernanceManager:
             try:
                 await asyncio.sleep(60)  # 每分钟检查一次
                 
-                # 更新SLA统计
+                # 重新汇总窗口，使没有新请求的智能体的旧数据也会滑出窗口
                 sla_compliant_count = 0
                 for governance_info in self.governance_info.values():
+                    if governance_info.metrics_window is not None:
+                        window = governance_info.metrics_window.snapshot()
+                        await self._update_sla_metrics(governance_info, window)
+                        governance_info.cost_metrics.current_spend_rate = window["spend_rate"]
+                        await self._check_sla_compliance(governance_info)
                     if governance_info.sla_status == SLAStatus.HEALTHY:
                         sla_compliant_count += 1
                 
@@ -608,54 +658,68 @@ class AgentGovernanceManager:
         }
     
     async def _get_top_cost_agents(self, limit: int = 5) -> List[Dict[str, Any]]:
-        """获取成本最高的智能体"""
-        agents = []
-        for governance_info in self.governance_info.values():
-            agents.append({
+        """获取成本最高的智能体（堆选 top-k，不对全部智能体排序）"""
+        top = heapq.nlargest(
+            limit,
+            self.governance_info.values(),
+            key=lambda info: info.cost_metrics.current_monthly_cost
+        )
+        return [
+            {
                 "agent_id": governance_info.agent_id,
                 "agent_name": governance_info.agent_name,
                 "monthly_cost": governance_info.cost_metrics.current_monthly_cost,
-                "budget_usage": (governance_info.cost_metrics.current_monthly_cost / 
+                "spend_rate": governance_info.cost_metrics.current_spend_rate,
+                "budget_usage": (governance_info.cost_metrics.current_monthly_cost /
                                governance_info.cost_metrics.monthly_budget * 100)
-            })
-        
-        # 按成本排序
-        agents.sort(key=lambda x: x["monthly_cost"], reverse=True)
-        return agents[:limit]
+            }
+            for governance_info in top
+        ]
     
     async def _get_sla_violations(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """获取SLA违规记录"""
+        """获取SLA违规记录（当前不健康的智能体，按严重程度和错误率取前 limit 个）"""
         # 这里应该从trace_writer中查询SLA违规记录
         # 简化实现，返回当前状态不健康的智能体
-        violations = []
-        for governance_info in self.governance_info.values():
-            if governance_info.sla_status != SLAStatus.HEALTHY:
-                violations.append({
-                    "agent_id": governance_info.agent_id,
-                    "agent_name": governance_info.agent_name,
-                    "sla_status": governance_info.sla_status.value,
-                    "response_time": governance_info.sla_metrics.current_response_time,
-                    "error_rate": governance_info.sla_metrics.current_error_rate
-                })
-        
-        return violations[:limit]
+        severity = {SLAStatus.WARNING: 1, SLAStatus.CRITICAL: 2, SLAStatus.BREACHED: 3}
+        top = heapq.nlargest(
+            limit,
+            (info for info in self.governance_info.values() if info.sla_status != SLAStatus.HEALTHY),
+            key=lambda info: (
+                severity.get(info.sla_status, 0),
+                info.sla_metrics.current_error_rate,
+                info.sla_metrics.current_p95_response_time
+            )
+        )
+        return [
+            {
+                "agent_id": governance_info.agent_id,
+                "agent_name": governance_info.agent_name,
+                "sla_status": governance_info.sla_status.value,
+                "response_time": governance_info.sla_metrics.current_response_time,
+                "p95_response_time": governance_info.sla_metrics.current_p95_response_time,
+                "error_rate": governance_info.sla_metrics.current_error_rate
+            }
+            for governance_info in top
+        ]
     
     async def _get_compliance_violations(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """获取合规违规记录"""
-        violations = []
-        for governance_info in self.governance_info.values():
-            for violation in governance_info.compliance_policy.compliance_violations:
-                violations.append({
-                    "agent_id": governance_info.agent_id,
-                    "agent_name": governance_info.agent_name,
-                    "violation_type": violation.get("type", "unknown"),
-                    "description": violation.get("description", ""),
-                    "timestamp": violation.get("timestamp", "")
-                })
-        
-        # 按时间排序
-        violations.sort(key=lambda x: x["timestamp"], reverse=True)
-        return violations[:limit]
+        """获取合规违规记录（最近的 limit 条，堆选而不排序全部记录）"""
+        violations = (
+            (governance_info, violation)
+            for governance_info in self.governance_info.values()
+            for violation in governance_info.compliance_policy.compliance_violations
+        )
+        latest = heapq.nlargest(limit, violations, key=lambda item: item[1].get("timestamp", ""))
+        return [
+            {
+                "agent_id": governance_info.agent_id,
+                "agent_name": governance_info.agent_name,
+                "violation_type": violation.get("type", "unknown"),
+                "description": violation.get("description", ""),
+                "timestamp": violation.get("timestamp", "")
+            }
+            for governance_info, violation in latest
+        ]
     
     async def _generate_daily_governance_report(self) -> None:
         """生成每日治理报告"""
@@ -0,0 +1,157 @@
+"""
+滑动窗口指标
+
+按时间分桶的定长环形缓冲区，记录请求数、失败数、成本、Token 和延迟直方图，
+用于计算窗口内的精确错误率、P95 延迟和花费速率。
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class MetricsWindow:
+    """
+    时间分桶的滑动窗口
+    
+    窗口被切成 buckets 个等宽的桶，环形存放在 NumPy 数组中。写入时按时间戳
+    定位桶，遇到上一轮遗留的旧桶先清零再复用；查询时只合并仍在窗口内的桶，
+    复杂度为 O(buckets)。延迟按对数刻度分箱（相邻箱宽比 latency_growth），
+    分位数返回所在箱的上边界，相对误差不超过一个箱宽；默认配置下约 165 个箱，
+    每个智能体占用约 40KB。
+    """
+    
+    def __init__(
+        self,
+        window_seconds: float = 3600,
+        buckets: int = 60,
+        latency_min: float = 1.0,
+        latency_max: float = 300000.0,
+        latency_growth: float = 1.08
+    ):
+        """
+        初始化滑动窗口
+        
+        Args:
+            window_seconds: 窗口长度（秒）
+            buckets: 桶数
+            latency_min: 直方图最小延迟（毫秒），更小的值计入第一个箱
+            latency_max: 直方图最大延迟（毫秒），更大的值计入最后一个箱
+            latency_growth: 相邻延迟箱的宽度比
+        """
+        self.window_seconds = float(window_seconds)
+        self.buckets = int(buckets)
+        self.bucket_width = self.window_seconds / self.buckets
+        
+        self._latency_min = latency_min
+        self._log_growth = math.log(latency_growth)
+        self.latency_bins = int(math.ceil(math.log(latency_max / latency_min) / self._log_growth)) + 1
+        # 每个箱的上边界，用于从分位数所在的箱还原延迟
+        self._bin_upper = latency_min * np.exp(self._log_growth * np.arange(1, self.latency_bins + 1))
+        
+        self._epochs = np.full(self.buckets, -1, dtype=np.int64)
+        self._requests = np.zeros(self.buckets, dtype=np.int64)
+        self._errors = np.zeros(self.buckets, dtype=np.int64)
+        self._cost = np.zeros(self.buckets)
+        self._tokens = np.zeros(self.buckets, dtype=np.int64)
+        self._latency_sum = np.zeros(self.buckets)
+        self._histogram = np.zeros((self.buckets, self.latency_bins), dtype=np.uint32)
+        self._first_record: Optional[float] = None
+    
+    def record(
+        self,
+        latency: float,
+        success: bool,
+        cost: float = 0.0,
+        tokens: int = 0,
+        now: Optional[float] = None
+    ) -> None:
+        """
+        记录一次请求
+        
+        Args:
+            latency: 延迟（毫秒）
+            success: 是否成功
+            cost: 成本
+            tokens: Token 数量
+            now: 时间戳（秒），默认为当前时间
+        """
+        now = time.time() if now is None else now
+        epoch = int(now // self.bucket_width)
+        slot = epoch % self.buckets
+        if self._epochs[slot] != epoch:
+            self._reset_slot(slot, epoch)
+        if self._first_record is None:
+            self._first_record = now
+        
+        self._requests[slot] += 1
+        if not success:
+            self._errors[slot] += 1
+        self._cost[slot] += cost
+        self._tokens[slot] += tokens
+        self._latency_sum[slot] += latency
+        self._histogram[slot, self._latency_bin(latency)] += 1
+    
+    def snapshot(self, now: Optional[float] = None, quantile: float = 0.95) -> Dict[str, float]:
+        """
+        汇总窗口内的指标
+        
+        Args:
+            now: 时间戳（秒），默认为当前时间
+            quantile: 延迟分位数
+        
+        Returns:
+            requests、errors、error_rate（%）、availability（%）、avg_latency、
+            p_latency（quantile 分位延迟）、throughput（次/分钟）、cost、tokens、
+            spend_rate（成本/小时）
+        """
+        now = time.time() if now is None else now
+        epoch = int(now // self.bucket_width)
+        live = (self._epochs > epoch - self.buckets) & (self._epochs <= epoch)
+        
+        requests = int(self._requests[live].sum())
+        errors = int(self._errors[live].sum())
+        cost = float(self._cost[live].sum())
+        tokens = int(self._tokens[live].sum())
+        
+        # 窗口刚开始记录时按实际覆盖的时长计算速率
+        covered = self.window_seconds
+        if self._first_record is not None:
+            covered = min(covered, max(now - self._first_record, self.bucket_width))
+        minutes = covered / 60
+        
+        return {
+            "requests": requests,
+            "errors": errors,
+            "error_rate": errors / requests * 100 if requests else 0.0,
+            "availability": (requests - errors) / requests * 100 if requests else 100.0,
+            "avg_latency": float(self._latency_sum[live].sum()) / requests if requests else 0.0,
+            "p_latency": self._quantile(live, quantile) if requests else 0.0,
+            "throughput": requests / minutes if minutes else 0.0,
+            "cost": cost,
+            "tokens": tokens,
+            "spend_rate": cost / minutes * 60 if minutes else 0.0
+        }
+    
+    def _quantile(self, live: np.ndarray, quantile: float) -> float:
+        counts = self._histogram[live].sum(axis=0).cumsum()
+        target = quantile * counts[-1]
+        index = int(np.searchsorted(counts, target, side='left'))
+        return float(self._bin_upper[min(index, self.latency_bins - 1)])
+    
+    def _latency_bin(self, latency: float) -> int:
+        if latency <= self._latency_min:
+            return 0
+        index = int(math.log(latency / self._latency_min) / self._log_growth)
+        return index if index < self.latency_bins else self.latency_bins - 1
+    
+    def _reset_slot(self, slot: int, epoch: int) -> None:
+        self._epochs[slot] = epoch
+        self._requests[slot] = 0
+        self._errors[slot] = 0
+        self._cost[slot] = 0.0
+        self._tokens[slot] = 0
+        self._latency_sum[slot] = 0.0
+        self._histogram[slot] = 0
@@ -5,7 +5,8 @@
 """
 
 from .service_registry import ServiceRegistry, ServiceInfo, ServiceStatus
-from .discovery import ServiceDiscovery
+from .discovery import ServiceDiscovery, LoadBalancingStrategy
+from .load_balancer import SmoothWeightedRoundRobin, ConsistentHashRing
 from .health_checker import HealthChecker
 
 __all__ = [
@@ -13,5 +14,8 @@ __all__ = [
     "ServiceInfo",
     "ServiceStatus",
     "ServiceDiscovery",
+    "LoadBalancingStrategy",
+    "SmoothWeightedRoundRobin",
+    "ConsistentHashRing",
     "HealthChecker"
 ] 
\ No newline at end of file
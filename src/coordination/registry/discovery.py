@@ -6,11 +6,14 @@
 
 import asyncio
 import random
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, Hashable, List, Optional, Callable
 from enum import Enum
 import structlog
 
 from .service_registry import ServiceRegistry, ServiceInfo, ServiceStatus
+from .load_balancer import (
+    SmoothWeightedRoundRobin, ConsistentHashRing, power_of_two_choices, membership_key
+)
 
 logger = structlog.get_logger(__name__)
 
@@ -22,6 +25,9 @@ class LoadBalancingStrategy(Enum):
     LEAST_CONNECTIONS = "least_connections"
     WEIGHTED_ROUND_ROBIN = "weighted_round_robin"
     IP_HASH = "ip_hash"
+    CONSISTENT_HASH = "consistent_hash"
+    BOUNDED_CONSISTENT_HASH = "bounded_consistent_hash"
+    EWMA = "ewma"
 
 
 class ServiceDiscovery:
@@ -43,10 +49,16 @@ class ServiceDiscovery:
         # 负载均衡状态
         self.round_robin_index = {}  # 服务名 -> 当前索引
         self.connection_counts = {}  # 服务ID -> 连接数
+        self.connection_totals = {}  # 服务名 -> 连接数之和（有界负载一致性哈希使用）
+        # 均衡器状态按查询（"服务名:类型"，与成员签名一致）区分，见 _balancer_key
+        self._weighted_rr: Dict[str, SmoothWeightedRoundRobin] = {}  # 查询 -> 平滑加权轮询状态
+        self._hash_rings: Dict[str, tuple] = {}  # 查询 -> (成员签名, 哈希环)
+        self.virtual_nodes = 160
+        self.hash_load_factor = 1.25
         
         # 缓存
-        self.service_cache = {}  # 服务名 -> 服务列表
-        self.cache_ttl = 30  # 秒
+        self.service_cache = {}  # "服务名:类型" -> 缓存条目（服务列表、健康子集、版本）
+        self.cache_ttl = 30  # 秒，注册中心推送失效事件，TTL 只作兜底
         
         # 故障转移配置
         self.max_retries = 3
@@ -55,6 +67,10 @@ class ServiceDiscovery:
         # 健康检查回调
         self.health_check_callbacks: Dict[str, Callable] = {}
         
+        # 订阅注册中心变更事件，成员或健康状态变化时立即失效缓存
+        if service_registry is not None and hasattr(service_registry, "subscribe"):
+            service_registry.subscribe(self._on_registry_change)
+        
         logger.info("Service discovery initialized")
     
     async def discover_service(
@@ -73,7 +89,7 @@ class ServiceDiscovery:
             service_type: 服务类型
             strategy: 负载均衡策略
             client_ip: 客户端IP（用于IP哈希策略）
-            **kwargs: 其他参数
+            **kwargs: 其他参数，hash_key 为一致性哈希的路由键（默认使用 client_ip）
             
         Returns:
             选中的服务信息
@@ -86,8 +102,9 @@ class ServiceDiscovery:
                 strategy=strategy.value
             )
             
-            # 获取服务列表
-            services = await self._get_services(service_name, service_type)
+            # 获取服务列表（缓存条目中已包含健康子集）
+            cache_entry = await self._get_cache_entry(service_name, service_type)
+            services = cache_entry["services"]
             
             if not services:
                 logger.warning(
@@ -97,11 +114,7 @@ class ServiceDiscovery:
                 )
                 return None
             
-            # 过滤健康服务
-            healthy_services = [
-                service for service in services
-                if service.status == ServiceStatus.HEALTHY
-            ]
+            healthy_services = cache_entry["healthy"]
             
             if not healthy_services:
                 logger.warning(
@@ -113,7 +126,8 @@ class ServiceDiscovery:
             
             # 应用负载均衡策略
             selected_service = await self._apply_load_balancing(
-                healthy_services, strategy, client_ip
+                healthy_services, strategy, kwargs.get("hash_key") or client_ip,
+                member_key=cache_entry["member_key"]
             )
             
             if selected_service:
@@ -233,12 +247,21 @@ class ServiceDiscovery:
             service_id: 服务ID
             increment: 是否增加连接数
         """
+        service_info = await self.service_registry.get_service(service_id) if self.service_registry else None
+        service_name = service_info.service_name if service_info else None
+        
         if increment:
             self.connection_counts[service_id] = self.connection_counts.get(service_id, 0) + 1
+            delta = 1
         else:
             current_count = self.connection_counts.get(service_id, 0)
-            if current_count > 0:
-                self.connection_counts[service_id] = current_count - 1
+            if current_count <= 0:
+                return
+            self.connection_counts[service_id] = current_count - 1
+            delta = -1
+        
+        if service_name is not None:
+            self.connection_totals[service_name] = self.connection_totals.get(service_name, 0) + delta
     
     async def get_service_stats(self, service_name: str) -> Dict[str, Any]:
         """
@@ -285,30 +308,65 @@ class ServiceDiscovery:
         Returns:
             服务列表
         """
+        return (await self._get_cache_entry(service_name, service_type))["services"]
+    
+    async def _get_cache_entry(self, service_name: str, service_type: str = None) -> Dict[str, Any]:
+        """
+        获取服务缓存条目，不存在或过期时从注册中心加载
+        
+        Args:
+            service_name: 服务名称
+            service_type: 服务类型
+            
+        Returns:
+            缓存条目：services、healthy、member_key、expires_at
+        """
         cache_key = f"{service_name}:{service_type or 'all'}"
+        now = asyncio.get_event_loop().time()
         
         # 检查缓存
-        if cache_key in self.service_cache:
-            cache_entry = self.service_cache[cache_key]
-            if cache_entry["expires_at"] > asyncio.get_event_loop().time():
-                return cache_entry["services"]
+        cache_entry = self.service_cache.get(cache_key)
+        if cache_entry is not None and cache_entry["expires_at"] > now:
+            return cache_entry
         
         # 从注册中心获取服务
         services = await self.service_registry.find_services(service_name, service_type)
+        healthy = [service for service in services if service.status == ServiceStatus.HEALTHY]
+        
+        get_version = getattr(self.service_registry, "get_version", None)
+        version = get_version(service_name) if get_version else None
         
-        # 更新缓存
-        self.service_cache[cache_key] = {
+        # 更新缓存；版本号可用时作为负载均衡器的成员签名，避免每次选择都计算签名
+        cache_entry = {
+            "service_name": service_name,
             "services": services,
-            "expires_at": asyncio.get_event_loop().time() + self.cache_ttl
+            "healthy": healthy,
+            "member_key": (cache_key, version) if version is not None else None,
+            "expires_at": now + self.cache_ttl
         }
+        self.service_cache[cache_key] = cache_entry
         
-        return services
+        return cache_entry
+    
+    def _on_registry_change(self, change: Dict[str, Any]) -> None:
+        """注册中心变更回调：丢弃该服务名的缓存条目"""
+        if change["event"] == "heartbeat":
+            return
+        
+        service_name = change["service_name"]
+        stale = [
+            key for key, entry in self.service_cache.items()
+            if entry.get("service_name") in (service_name, None)
+        ]
+        for key in stale:
+            del self.service_cache[key]
     
     async def _apply_load_balancing(
         self,
         services: List[ServiceInfo],
         strategy: LoadBalancingStrategy,
-        client_ip: str = None
+        client_ip: str = None,
+        member_key: Hashable = None
     ) -> Optional[ServiceInfo]:
         """
         应用负载均衡策略
@@ -316,7 +374,8 @@ class ServiceDiscovery:
         Args:
             services: 服务列表
             strategy: 负载均衡策略
-            client_ip: 客户端IP
+            client_ip: 客户端IP（或其他路由键）
+            member_key: 服务列表的成员签名，None 时按服务列表计算
             
         Returns:
             选中的服务
@@ -334,10 +393,16 @@ class ServiceDiscovery:
             return await self._least_connections_select(services)
         
         elif strategy == LoadBalancingStrategy.WEIGHTED_ROUND_ROBIN:
-            return await self._weighted_round_robin_select(services)
+            return await self._weighted_round_robin_select(services, member_key)
+        
+        elif strategy in (LoadBalancingStrategy.IP_HASH, LoadBalancingStrategy.CONSISTENT_HASH):
+            return await self._ip_hash_select(services, client_ip, member_key)
+        
+        elif strategy == LoadBalancingStrategy.BOUNDED_CONSISTENT_HASH:
+            return await self._bounded_hash_select(services, client_ip, member_key)
         
-        elif strategy == LoadBalancingStrategy.IP_HASH:
-            return await self._ip_hash_select(services, client_ip)
+        elif strategy == LoadBalancingStrategy.EWMA:
+            return await self._ewma_select(services)
         
         else:
             # 默认使用轮询
@@ -345,8 +410,7 @@ class ServiceDiscovery:
     
     async def _round_robin_select(self, services: List[ServiceInfo]) -> ServiceInfo:
         """轮询选择"""
-        service_names = [s.service_name for s in services]
-        service_name = service_names[0]  # 假设所有服务名称相同
+        service_name = services[0].service_name  # 假设所有服务名称相同
         
         if service_name not in self.round_robin_index:
             self.round_robin_index[service_name] = 0
@@ -357,34 +421,101 @@ class ServiceDiscovery:
         return services[index]
     
     async def _least_connections_select(self, services: List[ServiceInfo]) -> ServiceInfo:
-        """最少连接数选择"""
-        min_connections = float('inf')
-        selected_service = services[0]
-        
-        for service in services:
-            connections = self.connection_counts.get(service.service_id, 0)
-            if connections < min_connections:
-                min_connections = connections
-                selected_service = service
+        """最少连接数选择（两次随机选择，连接数相同时偏向权重高的服务）"""
+        counts = self.connection_counts
+        return power_of_two_choices(
+            services,
+            lambda service: counts.get(service.service_id, 0) / (service.weight or 1)
+        )
+    
+    async def _ewma_select(self, services: List[ServiceInfo]) -> ServiceInfo:
+        """
+        EWMA 延迟选择
         
-        return selected_service
+        两次随机选择，打分为 延迟EWMA x (在途连接数 + 1) / 权重；
+        延迟由 ServiceInfo.update_stats 更新，尚无延迟数据的服务打分为 0，会优先被探测。
+        """
+        counts = self.connection_counts
+        return power_of_two_choices(
+            services,
+            lambda service: (
+                service.latency_ewma * (counts.get(service.service_id, 0) + 1) / (service.weight or 1)
+            )
+        )
     
-    async def _weighted_round_robin_select(self, services: List[ServiceInfo]) -> ServiceInfo:
-        """加权轮询选择"""
-        # 这里可以根据服务的权重进行选择
-        # 暂时使用简单的轮询
-        return await self._round_robin_select(services)
+    async def _weighted_round_robin_select(
+        self,
+        services: List[ServiceInfo],
+        member_key: Hashable = None
+    ) -> ServiceInfo:
+        """加权轮询选择（平滑加权轮询，权重取自 ServiceInfo.weight）"""
+        key = self._balancer_key(services, member_key)
+        balancer = self._weighted_rr.get(key)
+        if balancer is None:
+            balancer = self._weighted_rr[key] = SmoothWeightedRoundRobin()
+        
+        return balancer.select(services, member_key)
     
-    async def _ip_hash_select(self, services: List[ServiceInfo], client_ip: str) -> ServiceInfo:
-        """IP哈希选择"""
+    async def _ip_hash_select(
+        self,
+        services: List[ServiceInfo],
+        client_ip: str,
+        member_key: Hashable = None
+    ) -> ServiceInfo:
+        """IP哈希选择（一致性哈希环，服务增减时只有少量键迁移）"""
         if not client_ip:
             return random.choice(services)
         
-        # 简单的IP哈希算法
-        hash_value = hash(client_ip)
-        index = hash_value % len(services)
+        return self._get_hash_ring(services, member_key).get(client_ip)
+    
+    async def _bounded_hash_select(
+        self,
+        services: List[ServiceInfo],
+        client_ip: str,
+        member_key: Hashable = None
+    ) -> ServiceInfo:
+        """有界负载一致性哈希选择，负载为服务的连接数"""
+        if not client_ip:
+            return await self._least_connections_select(services)
         
-        return services[index]
+        counts = self.connection_counts
+        total_load = self.connection_totals.get(services[0].service_name)
+        if total_load is None:
+            total_load = sum(counts.get(service.service_id, 0) for service in services)
+        return self._get_hash_ring(services, member_key).get_bounded(
+            client_ip,
+            lambda service: counts.get(service.service_id, 0),
+            total_load,
+            self.hash_load_factor
+        )
+    
+    def _get_hash_ring(
+        self,
+        services: List[ServiceInfo],
+        member_key: Hashable = None
+    ) -> ConsistentHashRing:
+        """获取服务对应的哈希环，服务集合或权重变化时重建"""
+        key = self._balancer_key(services, member_key)
+        signature = member_key if member_key is not None else membership_key(services)
+        cached = self._hash_rings.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        
+        ring = ConsistentHashRing(services, self.virtual_nodes)
+        self._hash_rings[key] = (signature, ring)
+        return ring
+    
+    @staticmethod
+    def _balancer_key(services: List[ServiceInfo], member_key: Hashable = None) -> Hashable:
+        """
+        均衡器状态的键
+        
+        成员签名 (缓存键, 版本) 可用时取其中的缓存键"服务名:类型"，同名不同类型的
+        查询各自保留状态，不会互相触发重建；否则取服务名。
+        """
+        if isinstance(member_key, tuple) and len(member_key) == 2:
+            return member_key[0]
+        return services[0].service_name
     
     async def _clear_cache(self) -> None:
         """清理缓存"""
@@ -1,15 +1,25 @@
 """
 健康检查模块
 
-实现服务健康检查和监控
+实现服务健康检查和监控。
+
+探测由哈希时间轮调度：每个服务按自己的探测间隔（带随机抖动）挂在轮上，
+首次探测在一个间隔内均匀错开，不会在同一时刻集中发出。
+间隔随结果自适应：持续健康的服务逐步放宽到 max_interval，状态翻转的服务
+立即收紧到 min_interval。HTTP 探测共享一个带连接池的 ClientSession，
+并发由信号量限制，历史记录保存在固定长度的环形缓冲区中。
 """
 
 import asyncio
-import aiohttp
-import socket
+import inspect
+import random
+import time
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Deque, Dict, List, Optional, Callable
 from enum import Enum
+
+import aiohttp
 import structlog
 
 from .service_registry import ServiceRegistry, ServiceInfo, ServiceStatus
@@ -45,6 +55,63 @@ class HealthCheckResult:
         }
 
 
+class _TimeWheel:
+    """
+    哈希时间轮
+    
+    size 个槽位，每个槽位 tick 秒。条目放入 (当前位置 + 延迟刻数) 所在的槽，
+    延迟超过一圈时记录剩余圈数，每次经过该槽减一，为 0 时到期。
+    调度和推进都是 O(1)（推进时只扫描当前槽）。
+    """
+    
+    def __init__(self, tick: float, size: int):
+        self.tick = tick
+        self.size = size
+        self._slots: List[List[list]] = [[] for _ in range(size)]
+        self._cursor = 0
+        self._count = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def schedule(self, item: Any, delay: float) -> None:
+        """
+        在 delay 秒后到期
+        
+        Args:
+            item: 条目
+            delay: 延迟（秒），不足一个刻度按一个刻度计
+        """
+        ticks = max(1, int(round(delay / self.tick)))
+        slot = (self._cursor + ticks) % self.size
+        self._slots[slot].append([(ticks - 1) // self.size, item])
+        self._count += 1
+    
+    def advance(self) -> List[Any]:
+        """
+        推进一个刻度
+        
+        Returns:
+            本刻度到期的条目
+        """
+        self._cursor = (self._cursor + 1) % self.size
+        slot = self._slots[self._cursor]
+        if not slot:
+            return []
+        
+        due = []
+        pending = []
+        for entry in slot:
+            if entry[0] == 0:
+                due.append(entry[1])
+            else:
+                entry[0] -= 1
+                pending.append(entry)
+        self._slots[self._cursor] = pending
+        self._count -= len(due)
+        return due
+
+
 class HealthChecker:
     """
     健康检查器
@@ -52,33 +119,71 @@ class HealthChecker:
     实现服务健康检查和监控
     """
     
-    def __init__(self, service_registry: ServiceRegistry):
+    def __init__(
+        self,
+        service_registry: ServiceRegistry,
+        check_interval: float = 30,
+        timeout: float = 10,
+        max_concurrency: int = 256,
+        jitter: float = 0.1,
+        min_interval: float = None,
+        max_interval: float = None,
+        tick: float = 0.1,
+        wheel_size: int = 1024
+    ):
         """
         初始化健康检查器
         
         Args:
             service_registry: 服务注册中心
+            check_interval: 基准探测间隔（秒）
+            timeout: 单次探测超时（秒）
+            max_concurrency: 同时进行的探测数上限，也是 HTTP 连接池大小
+            jitter: 每次间隔的随机抖动比例
+            min_interval: 状态翻转后的探测间隔，默认为 check_interval / 4
+            max_interval: 持续健康时放宽到的最大间隔，默认为 check_interval * 4
+            tick: 时间轮刻度（秒）
+            wheel_size: 时间轮槽位数
         """
         self.service_registry = service_registry
         
         # 健康检查配置
-        self.check_interval = 30  # 秒
-        self.timeout = 10  # 秒
+        self.check_interval = check_interval
+        self.timeout = timeout
         self.max_retries = 3
+        self.max_concurrency = max_concurrency
+        self.jitter = jitter
+        self.min_interval = min_interval if min_interval is not None else check_interval / 4
+        self.max_interval = max_interval if max_interval is not None else check_interval * 4
+        self.stable_threshold = 3  # 连续多少次结果不变后放宽间隔
+        self.backoff_factor = 2.0
         
         # 自定义健康检查回调
         self.custom_health_checks: Dict[str, Callable] = {}
         
-        # 健康检查历史
-        self.health_history: Dict[str, List[HealthCheckResult]] = {}
+        # 健康检查历史（每个服务一个定长环形缓冲区）
+        self.health_history: Dict[str, Deque[HealthCheckResult]] = {}
         self.max_history_size = 100
         
+        # 调度状态：service_id -> {token, interval, healthy, streak}
+        self._wheel = _TimeWheel(tick, wheel_size)
+        self._schedule_state: Dict[str, Dict[str, Any]] = {}
+        self._token = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._probes: set = set()
+        self._running = False
+        self._rng = random.Random()
+        
         # 统计
         self.health_stats = {
             "total_checks": 0,
             "successful_checks": 0,
             "failed_checks": 0,
-            "avg_response_time": 0.0
+            "avg_response_time": 0.0,
+            "in_flight": 0,
+            "interval_changes": 0
         }
         
         logger.info("Health checker initialized")
@@ -88,15 +193,50 @@ class HealthChecker:
         try:
             logger.info("Initializing health checker")
             
-            # 启动健康检查循环
-            asyncio.create_task(self._health_check_loop())
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._running = True
+            
+            # 跟随注册中心的成员变化，并把已有服务错开挂到时间轮上
+            subscribe = getattr(self.service_registry, "subscribe", None)
+            if subscribe is not None:
+                subscribe(self._on_registry_change)
+            await self._sync_services()
             
-            logger.info("Health checker initialized successfully")
+            # 启动健康检查循环
+            self._loop_task = asyncio.create_task(self._health_check_loop())
             
+            logger.info(
+                "Health checker initialized successfully",
+                services=len(self._schedule_state)
+            )
+        
         except Exception as e:
             logger.error("Failed to initialize health checker", error=str(e))
             raise
     
+    async def close(self) -> None:
+        """停止探测循环并关闭共享的 HTTP 会话"""
+        self._running = False
+        
+        unsubscribe = getattr(self.service_registry, "unsubscribe", None)
+        if unsubscribe is not None:
+            unsubscribe(self._on_registry_change)
+        
+        tasks = list(self._probes)
+        if self._loop_task is not None:
+            tasks.append(self._loop_task)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        
+        logger.info("Health checker closed")
+    
     async def register_custom_health_check(
         self,
         service_name: str,
@@ -107,7 +247,7 @@ class HealthChecker:
         
         Args:
             service_name: 服务名称
-            check_function: 健康检查函数
+            check_function: 健康检查函数，可以是同步函数或协程函数
         """
         self.custom_health_checks[service_name] = check_function
         logger.info(
@@ -121,19 +261,13 @@ class HealthChecker:
         
         Args:
             service_info: 服务信息
-            
+        
         Returns:
             健康检查结果
         """
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
         
         try:
-            logger.debug(
-                "Checking service health",
-                service_id=service_info.service_id,
-                service_name=service_info.service_name
-            )
-            
             # 确定健康检查类型
             check_type = await self._determine_check_type(service_info)
             
@@ -152,55 +286,32 @@ class HealthChecker:
                 )
             
             # 计算响应时间
-            response_time = (datetime.utcnow() - start_time).total_seconds()
-            result.response_time = response_time
-            
-            # 更新统计
-            self._update_stats(result)
-            
-            # 保存历史
-            await self._save_health_history(result)
-            
-            # 更新服务状态
-            status = ServiceStatus.HEALTHY if result.is_healthy else ServiceStatus.UNHEALTHY
-            await self.service_registry.update_service_health(service_info.service_id, status)
-            
-            logger.debug(
-                "Health check completed",
-                service_id=service_info.service_id,
-                is_healthy=result.is_healthy,
-                response_time=response_time
-            )
-            
-            return result
-            
+            result.response_time = time.perf_counter() - start_time
+        
         except Exception as e:
-            response_time = (datetime.utcnow() - start_time).total_seconds()
             result = HealthCheckResult(
                 service_info.service_id,
                 False,
-                response_time,
+                time.perf_counter() - start_time,
                 str(e)
             )
-            
-            # 更新统计
-            self._update_stats(result)
-            
-            # 保存历史
-            await self._save_health_history(result)
-            
-            # 更新服务状态
-            await self.service_registry.update_service_health(
-                service_info.service_id, ServiceStatus.UNHEALTHY
-            )
-            
             logger.error(
                 "Health check failed",
                 service_id=service_info.service_id,
                 error=str(e)
             )
-            
-            return result
+        
+        # 更新统计
+        self._update_stats(result)
+        
+        # 保存历史
+        await self._save_health_history(result)
+        
+        # 更新服务状态（状态未变化时注册中心不会发布事件）
+        status = ServiceStatus.HEALTHY if result.is_healthy else ServiceStatus.UNHEALTHY
+        await self.service_registry.update_service_health(service_info.service_id, status)
+        
+        return result
     
     async def get_health_history(self, service_id: str, limit: int = 50) -> List[HealthCheckResult]:
         """
@@ -209,13 +320,26 @@ class HealthChecker:
         Args:
             service_id: 服务ID
             limit: 返回结果数量限制
-            
+        
         Returns:
             健康检查历史
         """
-        history = self.health_history.get(service_id, [])
+        history = list(self.health_history.get(service_id, ()))
         return history[-limit:] if limit > 0 else history
     
+    def get_check_interval(self, service_id: str) -> Optional[float]:
+        """
+        获取服务当前的探测间隔
+        
+        Args:
+            service_id: 服务ID
+        
+        Returns:
+            探测间隔（秒），服务未被监控时为 None
+        """
+        state = self._schedule_state.get(service_id)
+        return state["interval"] if state else None
+    
     async def get_health_stats(self) -> Dict[str, Any]:
         """
         获取健康检查统计信息
@@ -229,30 +353,159 @@ class HealthChecker:
                 self.health_stats["successful_checks"] / self.health_stats["total_checks"]
                 if self.health_stats["total_checks"] > 0 else 0
             ),
-            "services_monitored": len(self.health_history)
+            "services_monitored": len(self._schedule_state),
+            "scheduled_probes": len(self._wheel)
         }
     
     async def _health_check_loop(self) -> None:
-        """健康检查循环"""
-        while True:
+        """健康检查循环：按刻度推进时间轮，启动到期的探测"""
+        loop = asyncio.get_running_loop()
+        wheel = self._wheel
+        next_tick = loop.time()
+        next_sync = next_tick + self.check_interval
+        poll_registry = getattr(self.service_registry, "subscribe", None) is None
+        
+        while self._running:
             try:
-                # 获取所有服务
-                services = await self.service_registry.find_services()
-                
-                # 并发执行健康检查
-                tasks = [
-                    self.check_service_health(service_info)
-                    for service_info in services
-                ]
+                next_tick += wheel.tick
+                delay = next_tick - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif delay < -wheel.tick * wheel.size:
+                    # 事件循环被长时间阻塞，放弃追赶以免一次性触发整圈探测
+                    next_tick = loop.time()
                 
-                if tasks:
-                    await asyncio.gather(*tasks, return_exceptions=True)
-                
-                await asyncio.sleep(self.check_interval)
+                for service_id, token in wheel.advance():
+                    state = self._schedule_state.get(service_id)
+                    if state is None or state["token"] != token:
+                        continue
+                    task = asyncio.create_task(self._probe(service_id, token))
+                    self._probes.add(task)
+                    task.add_done_callback(self._probes.discard)
                 
+                # 注册中心不支持订阅时定期对账成员
+                if poll_registry and next_tick >= next_sync:
+                    next_sync = next_tick + self.check_interval
+                    await self._sync_services()
+            
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error("Error in health check loop", error=str(e))
                 await asyncio.sleep(5)
+                next_tick = loop.time()
+    
+    async def _probe(self, service_id: str, token: int) -> None:
+        """
+        执行一次调度的探测并按结果重新挂到时间轮上
+        
+        Args:
+            service_id: 服务ID
+            token: 调度令牌，服务被移除或重新调度后旧令牌失效
+        """
+        async with self._semaphore:
+            state = self._schedule_state.get(service_id)
+            if state is None or state["token"] != token:
+                return
+            
+            try:
+                service_info = await self.service_registry.get_service(service_id)
+            except Exception as e:
+                # 注册中心暂时不可用时保持当前间隔，下次照常探测
+                logger.error(
+                    "Failed to look up service for health check",
+                    service_id=service_id,
+                    error=str(e)
+                )
+                self._schedule(service_id, state, state["interval"])
+                return
+            if service_info is None:
+                self._untrack(service_id)
+                return
+            
+            self.health_stats["in_flight"] += 1
+            try:
+                result = await self.check_service_health(service_info)
+            finally:
+                self.health_stats["in_flight"] -= 1
+        
+        # 探测期间服务可能已被移除
+        if self._schedule_state.get(service_id) is state:
+            self._adapt_interval(state, result.is_healthy)
+            self._schedule(service_id, state, state["interval"])
+    
+    def _adapt_interval(self, state: Dict[str, Any], is_healthy: bool) -> None:
+        """
+        根据探测结果调整探测间隔
+        
+        状态翻转时收紧到 min_interval；结果连续 stable_threshold 次不变时，
+        健康服务的间隔乘以 backoff_factor（不超过 max_interval），
+        不健康服务回到 check_interval。
+        
+        Args:
+            state: 服务调度状态
+            is_healthy: 本次探测结果
+        """
+        previous = state["healthy"]
+        interval = state["interval"]
+        
+        if previous is not None and previous != is_healthy:
+            state["streak"] = 0
+            interval = self.min_interval
+        else:
+            state["streak"] += 1
+            if state["streak"] >= self.stable_threshold:
+                state["streak"] = 0
+                if is_healthy:
+                    interval = min(interval * self.backoff_factor, self.max_interval)
+                else:
+                    interval = self.check_interval
+        
+        state["healthy"] = is_healthy
+        if interval != state["interval"]:
+            state["interval"] = interval
+            self.health_stats["interval_changes"] += 1
+    
+    def _schedule(self, service_id: str, state: Dict[str, Any], delay: float) -> None:
+        """按 delay（加抖动）把服务挂到时间轮上，并使之前的调度失效"""
+        self._token += 1
+        state["token"] = self._token
+        if self.jitter:
+            delay *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        self._wheel.schedule((service_id, self._token), delay)
+    
+    def _track(self, service_id: str) -> None:
+        """开始监控服务，首次探测在一个基准间隔内随机错开"""
+        if service_id in self._schedule_state:
+            return
+        state = {"token": 0, "interval": self.check_interval, "healthy": None, "streak": 0}
+        self._schedule_state[service_id] = state
+        self._schedule(service_id, state, self._rng.uniform(0, self.check_interval))
+    
+    def _untrack(self, service_id: str) -> None:
+        """停止监控服务（时间轮上的条目到期时按令牌丢弃）"""
+        self._schedule_state.pop(service_id, None)
+        self.health_history.pop(service_id, None)
+    
+    def _on_registry_change(self, change: Dict[str, Any]) -> None:
+        """注册中心变更回调：新注册的服务加入时间轮，注销的服务移出"""
+        if not self._running:
+            return
+        if change["event"] == "registered":
+            self._track(change["service_id"])
+        elif change["event"] == "deregistered":
+            self._untrack(change["service_id"])
+    
+    async def _sync_services(self) -> None:
+        """与注册中心对账：补充未监控的服务，移除已注销的服务"""
+        services = await self.service_registry.find_services()
+        current = {service_info.service_id for service_info in services}
+        
+        for service_id in current:
+            self._track(service_id)
+        for service_id in list(self._schedule_state):
+            if service_id not in current:
+                self._untrack(service_id)
     
     async def _determine_check_type(self, service_info: ServiceInfo) -> HealthCheckType:
         """
@@ -260,7 +513,7 @@ class HealthChecker:
         
         Args:
             service_info: 服务信息
-            
+        
         Returns:
             健康检查类型
         """
@@ -275,13 +528,27 @@ class HealthChecker:
         # 默认使用TCP检查
         return HealthCheckType.TCP
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的 HTTP 会话（首次使用时创建，连接池大小与并发上限一致）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                ttl_dns_cache=300,
+                keepalive_timeout=max(self.max_interval, 30)
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
     async def _http_health_check(self, service_info: ServiceInfo) -> HealthCheckResult:
         """
         HTTP健康检查
         
         Args:
             service_info: 服务信息
-            
+        
         Returns:
             健康检查结果
         """
@@ -293,19 +560,18 @@ class HealthChecker:
             )
         
         try:
-            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            session = self._get_session()
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(service_info.health_check_url) as response:
-                    if response.status == 200:
-                        return HealthCheckResult(service_info.service_id, True)
-                    else:
-                        return HealthCheckResult(
-                            service_info.service_id,
-                            False,
-                            error=f"HTTP {response.status}"
-                        )
-                        
+            async with session.get(service_info.health_check_url) as response:
+                if response.status == 200:
+                    return HealthCheckResult(service_info.service_id, True)
+                else:
+                    return HealthCheckResult(
+                        service_info.service_id,
+                        False,
+                        error=f"HTTP {response.status}"
+                    )
+        
         except asyncio.TimeoutError:
             return HealthCheckResult(
                 service_info.service_id,
@@ -321,36 +587,38 @@ class HealthChecker:
     
     async def _tcp_health_check(self, service_info: ServiceInfo) -> HealthCheckResult:
         """
-        TCP健康检查
+        TCP健康检查（非阻塞连接）
         
         Args:
             service_info: 服务信息
-            
+        
         Returns:
             健康检查结果
         """
         try:
-            # 创建socket连接
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
-            
-            result = sock.connect_ex((service_info.host, service_info.port))
-            sock.close()
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(service_info.host, service_info.port),
+                timeout=self.timeout
+            )
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
             
-            if result == 0:
-                return HealthCheckResult(service_info.service_id, True)
-            else:
-                return HealthCheckResult(
-                    service_info.service_id,
-                    False,
-                    error=f"TCP connection failed: {result}"
-                )
-                
+            return HealthCheckResult(service_info.service_id, True)
+        
+        except asyncio.TimeoutError:
+            return HealthCheckResult(
+                service_info.service_id,
+                False,
+                error="Timeout"
+            )
         except Exception as e:
             return HealthCheckResult(
                 service_info.service_id,
                 False,
-                error=str(e)
+                error=f"TCP connection failed: {e}"
             )
     
     async def _custom_health_check(self, service_info: ServiceInfo) -> HealthCheckResult:
@@ -359,7 +627,7 @@ class HealthChecker:
         
         Args:
             service_info: 服务信息
-            
+        
         Returns:
             健康检查结果
         """
@@ -374,9 +642,17 @@ class HealthChecker:
             
             # 执行自定义检查
             is_healthy = check_function(service_info)
+            if inspect.isawaitable(is_healthy):
+                is_healthy = await asyncio.wait_for(is_healthy, timeout=self.timeout)
             
-            return HealthCheckResult(service_info.service_id, is_healthy)
-            
+            return HealthCheckResult(service_info.service_id, bool(is_healthy))
+        
+        except asyncio.TimeoutError:
+            return HealthCheckResult(
+                service_info.service_id,
+                False,
+                error="Timeout"
+            )
         except Exception as e:
             return HealthCheckResult(
                 service_info.service_id,
@@ -416,13 +692,7 @@ class HealthChecker:
         Args:
             result: 健康检查结果
         """
-        service_id = result.service_id
-        
-        if service_id not in self.health_history:
-            self.health_history[service_id] = []
-        
-        self.health_history[service_id].append(result)
-        
-        # 限制历史记录数量
-        if len(self.health_history[service_id]) > self.max_history_size:
-            self.health_history[service_id] = self.health_history[service_id][-self.max_history_size:] 
\ No newline at end of file
+        history = self.health_history.get(result.service_id)
+        if history is None:
+            history = self.health_history[result.service_id] = deque(maxlen=self.max_history_size)
+        history.append(result)
@@ -0,0 +1,227 @@
+"""
+负载均衡算法
+
+为服务发现提供的选择算法：
+- 平滑加权轮询（SWRR）
+- 带虚拟节点的一致性哈希环，以及有界负载变体
+- 两次随机选择（P2C）
+以上算法都只依赖 ServiceInfo 的 service_id / weight / latency_ewma，
+哈希使用 blake2b，跨进程、跨重启保持稳定。
+"""
+
+import hashlib
+import random
+import struct
+from operator import attrgetter
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .service_registry import ServiceInfo
+
+
+def stable_hash(key: str) -> int:
+    """
+    稳定的 64 位哈希（不受 PYTHONHASHSEED 影响）
+    
+    Args:
+        key: 键
+    
+    Returns:
+        64 位无符号整数
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+_MEMBER = attrgetter("service_id", "weight")
+_POINTS = struct.Struct(">8Q")
+
+
+def membership_key(services: Sequence[ServiceInfo]) -> Tuple:
+    """服务列表及其权重的签名，用于判断缓存的均衡器状态是否需要重建"""
+    return tuple(map(_MEMBER, services))
+
+
+class SmoothWeightedRoundRobin:
+    """
+    平滑加权轮询（nginx 算法）
+    
+    每次选择时所有节点的当前权重加上各自的有效权重，选出当前权重最大的节点，
+    再从它的当前权重中减去总权重。权重 5:1:1 的选择序列为 a a b a c a a，
+    而不是 a a a a a b c。当前权重保存在 NumPy 数组中，每次选择是两次向量运算；
+    成员变化时按 service_id 保留已有的当前权重。
+    """
+    
+    def __init__(self):
+        self._key = None
+        self._services: List[ServiceInfo] = []
+        self._weights = np.zeros(0)
+        self._current = np.zeros(0)
+        self._total = 0.0
+    
+    def __len__(self) -> int:
+        return len(self._services)
+    
+    def select(self, services: Sequence[ServiceInfo], key: Hashable = None) -> Optional[ServiceInfo]:
+        """
+        选择服务
+        
+        Args:
+            services: 候选服务列表
+            key: 成员签名，相同签名表示成员与权重未变化；None 时由 membership_key 计算
+        
+        Returns:
+            选中的服务
+        """
+        if not services:
+            return None
+        
+        if key is None:
+            key = membership_key(services)
+        if key != self._key:
+            self._rebuild(services, key)
+        
+        current = self._current
+        current += self._weights
+        index = int(current.argmax())
+        current[index] -= self._total
+        return self._services[index]
+    
+    def _rebuild(self, services: Sequence[ServiceInfo], key: Hashable) -> None:
+        previous = dict(zip((s.service_id for s in self._services), self._current.tolist()))
+        self._services = list(services)
+        self._weights = np.array([max(s.weight, 0) for s in services], dtype=float)
+        self._current = np.array([previous.get(s.service_id, 0.0) for s in services], dtype=float)
+        self._total = float(self._weights.sum())
+        self._key = key
+
+
+class ConsistentHashRing:
+    """
+    一致性哈希环
+    
+    每个服务按权重放置 virtual_nodes * weight 个虚拟节点，位置保存在有序的
+    uint64 数组中，查找为一次二分。
+    服务增减时只有相邻区间的键会迁移。
+    """
+    
+    def __init__(self, services: Sequence[ServiceInfo], virtual_nodes: int = 160):
+        """
+        初始化哈希环
+        
+        Args:
+            services: 服务列表
+            virtual_nodes: 权重为 1 的服务的虚拟节点数
+        """
+        hashes = []
+        owners = []
+        for position, service in enumerate(services):
+            replicas = max(1, int(round(virtual_nodes * max(service.weight, 0))))
+            # 一次 64 字节摘要切出 8 个虚拟节点位置
+            for block in range((replicas + 7) // 8):
+                digest = hashlib.blake2b(
+                    f"{service.service_id}#{block}".encode('utf-8'), digest_size=64
+                ).digest()
+                hashes.extend(_POINTS.unpack(digest)[:replicas - block * 8])
+            owners.extend([position] * replicas)
+        
+        order = np.argsort(np.array(hashes, dtype=np.uint64), kind='stable')
+        self._hashes = np.array(hashes, dtype=np.uint64)[order]
+        self._services: List[ServiceInfo] = [services[owners[i]] for i in order.tolist()]
+        self.size = len(services)
+        self.total_weight = sum(max(s.weight, 0) for s in services)
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def get(self, key: str) -> Optional[ServiceInfo]:
+        """
+        查找键所属的服务
+        
+        Args:
+            key: 路由键（会话ID、客户端IP 等）
+        
+        Returns:
+            服务
+        """
+        if not self._services:
+            return None
+        index = int(self._hashes.searchsorted(np.uint64(stable_hash(key))))
+        if index == len(self._services):
+            index = 0
+        return self._services[index]
+    
+    def get_bounded(
+        self,
+        key: str,
+        load_of: Callable[[ServiceInfo], float],
+        total_load: float,
+        load_factor: float = 1.25
+    ) -> Optional[ServiceInfo]:
+        """
+        有界负载的一致性哈希
+        
+        从键的位置顺时针查找第一个负载未超过
+        ceil(load_factor * (total_load + 1) * 权重 / 总权重) 的服务，
+        保持粘性的同时限制热点节点的负载。
+        
+        Args:
+            key: 路由键
+            load_of: 获取服务当前负载的函数
+            total_load: 所有服务的负载之和
+            load_factor: 允许超出平均负载的倍数（大于 1）
+        
+        Returns:
+            服务
+        """
+        if not self._services:
+            return None
+        
+        count = len(self._services)
+        start = int(self._hashes.searchsorted(np.uint64(stable_hash(key))))
+        average = (total_load + 1) / (self.total_weight or 1)
+        seen = set()
+        
+        for step in range(count):
+            service = self._services[(start + step) % count]
+            if service.service_id in seen:
+                continue
+            seen.add(service.service_id)
+            limit = -(-load_factor * average * max(service.weight, 0) // 1)
+            if load_of(service) < limit:
+                return service
+            if len(seen) == self.size:
+                break
+        
+        # 所有服务都达到上限时退回普通一致性哈希
+        return self._services[start % count]
+
+
+def power_of_two_choices(
+    services: Sequence[ServiceInfo],
+    score: Callable[[ServiceInfo], float],
+    rng: random.Random = random
+) -> Optional[ServiceInfo]:
+    """
+    两次随机选择：随机取两个不同的服务，返回打分较低者
+    
+    Args:
+        services: 候选服务列表
+        score: 打分函数，越小越好
+        rng: 随机数生成器
+    
+    Returns:
+        选中的服务
+    """
+    count = len(services)
+    if count == 0:
+        return None
+    if count == 1:
+        return services[0]
+    
+    i = rng.randrange(count)
+    j = rng.randrange(count - 1)
+    if j >= i:
+        j += 1
+    first, second = services[i], services[j]
+    return first if score(first) <= score(second) else second
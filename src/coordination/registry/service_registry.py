@@ -6,9 +6,11 @@
 
 import asyncio
 import json
+import math
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set
 from enum import Enum
 import structlog
 
@@ -35,7 +37,8 @@ class ServiceInfo:
         port: int,
         version: str = "1.0.0",
         metadata: Dict[str, Any] = None,
-        health_check_url: str = None
+        health_check_url: str = None,
+        weight: float = 1
     ):
         self.service_id = service_id
         self.service_name = service_name
@@ -45,6 +48,7 @@ class ServiceInfo:
         self.version = version
         self.metadata = metadata or {}
         self.health_check_url = health_check_url
+        self.weight = weight  # 负载均衡权重
         
         # 时间戳
         self.registered_at = datetime.utcnow()
@@ -60,6 +64,11 @@ class ServiceInfo:
         self.request_count = 0
         self.error_count = 0
         self.response_time_avg = 0.0
+        
+        # 按时间衰减的延迟 EWMA（峰值敏感），供负载均衡使用
+        self.latency_ewma = 0.0
+        self.latency_decay = 10.0  # 秒，衰减时间常数
+        self._latency_updated_at: Optional[float] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -72,6 +81,7 @@ class ServiceInfo:
             "version": self.version,
             "metadata": self.metadata,
             "health_check_url": self.health_check_url,
+            "weight": self.weight,
             "registered_at": self.registered_at.isoformat(),
             "last_heartbeat": self.last_heartbeat.isoformat(),
             "last_health_check": self.last_health_check.isoformat() if self.last_health_check else None,
@@ -80,7 +90,8 @@ class ServiceInfo:
             "timeout": self.timeout,
             "request_count": self.request_count,
             "error_count": self.error_count,
-            "response_time_avg": self.response_time_avg
+            "response_time_avg": self.response_time_avg,
+            "latency_ewma": self.latency_ewma
         }
     
     def update_heartbeat(self) -> None:
@@ -111,13 +122,24 @@ class ServiceInfo:
             self.response_time_avg = response_time
         else:
             self.response_time_avg = (self.response_time_avg + response_time) / 2
+        
+        # 更新延迟 EWMA：权重随距上次更新的时间指数衰减，出现更高延迟时直接取峰值
+        now = time.monotonic()
+        if self._latency_updated_at is None or response_time > self.latency_ewma:
+            self.latency_ewma = response_time
+        else:
+            w = math.exp(-(now - self._latency_updated_at) / self.latency_decay)
+            self.latency_ewma = self.latency_ewma * w + response_time * (1 - w)
+        self._latency_updated_at = now
 
 
 class ServiceRegistry:
     """
     服务注册中心
     
-    负责服务的注册、注销、查询和状态管理
+    负责服务的注册、注销、查询和状态管理。
+    按名称、类型、组和状态维护索引，find_services 的结果按注册顺序返回并按查询
+    条件缓存，以服务名的版本号判断是否失效；所有变更同步发布带版本号的变更事件。
     """
     
     def __init__(self):
@@ -125,6 +147,22 @@ class ServiceRegistry:
         self.services: Dict[str, ServiceInfo] = {}
         self.service_groups: Dict[str, Set[str]] = {}  # 服务组 -> 服务ID集合
         
+        # 索引：键 -> 服务ID集合
+        self._by_name: Dict[str, Set[str]] = {}
+        self._by_type: Dict[str, Set[str]] = {}
+        self._by_status: Dict[ServiceStatus, Set[str]] = {status: set() for status in ServiceStatus}
+        
+        # 版本：全局版本在每次变更时递增，服务名版本在该名称下成员或状态变化时更新
+        self.version = 0
+        self._name_versions: Dict[str, int] = {}
+        self._query_cache: Dict[tuple, tuple] = {}  # 查询条件 -> (版本, 服务元组)
+        self.query_cache_size = 1024
+        self._order: Dict[str, int] = {}  # 服务ID -> 注册序号
+        self._registrations = 0
+        
+        # 变更事件订阅者
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+        
         # 配置
         self.cleanup_interval = 60  # 秒
         self.health_check_interval = 30  # 秒
@@ -167,7 +205,8 @@ class ServiceRegistry:
         version: str = "1.0.0",
         metadata: Dict[str, Any] = None,
         health_check_url: str = None,
-        service_group: str = None
+        service_group: str = None,
+        weight: float = 1
     ) -> str:
         """
         注册服务
@@ -181,6 +220,7 @@ class ServiceRegistry:
             metadata: 元数据
             health_check_url: 健康检查URL
             service_group: 服务组
+            weight: 负载均衡权重
             
         Returns:
             服务ID
@@ -206,11 +246,17 @@ class ServiceRegistry:
                 port=port,
                 version=version,
                 metadata=metadata,
-                health_check_url=health_check_url
+                health_check_url=health_check_url,
+                weight=weight
             )
             
             # 注册服务
             self.services[service_id] = service_info
+            self._registrations += 1
+            self._order[service_id] = self._registrations
+            self._by_name.setdefault(service_name, set()).add(service_id)
+            self._by_type.setdefault(service_type, set()).add(service_id)
+            self._by_status[service_info.status].add(service_id)
             
             # 添加到服务组
             if service_group:
@@ -218,6 +264,8 @@ class ServiceRegistry:
                     self.service_groups[service_group] = set()
                 self.service_groups[service_group].add(service_id)
             
+            self._publish("registered", service_info, None)
+            
             # 更新统计
             self.registry_stats["total_services"] += 1
             self.registry_stats["total_registrations"] += 1
@@ -267,6 +315,12 @@ class ServiceRegistry:
             
             # 移除服务
             del self.services[service_id]
+            self._order.pop(service_id, None)
+            self._discard_index(self._by_name, service_info.service_name, service_id)
+            self._discard_index(self._by_type, service_info.service_type, service_id)
+            self._by_status[service_info.status].discard(service_id)
+            
+            self._publish("deregistered", service_info, service_info.status)
             
             # 更新统计
             self.registry_stats["total_services"] -= 1
@@ -305,6 +359,9 @@ class ServiceRegistry:
         """
         查找服务
         
+        结果按注册顺序排列。查询结果按条件缓存，未发生变更时复制缓存的结果返回；
+        缓存超过 query_cache_size 条时先丢弃已失效的条目，再丢弃最早的条目。
+        
         Args:
             service_name: 服务名称
             service_type: 服务类型
@@ -314,33 +371,88 @@ class ServiceRegistry:
         Returns:
             服务列表
         """
-        services = []
+        key = (service_name, service_type, status, service_group)
+        version = self.get_version(service_name)
+        cached = self._query_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return list(cached[1])
         
-        # 确定要搜索的服务ID集合
+        services = self._query(service_name, service_type, status, service_group)
+        if key not in self._query_cache and len(self._query_cache) >= self.query_cache_size:
+            self._evict_queries()
+        self._query_cache[key] = (version, tuple(services))
+        return services
+    
+    def _evict_queries(self) -> None:
+        """丢弃版本已过期的缓存条目，仍然满时丢弃最早写入的条目"""
+        self._query_cache = {
+            key: entry for key, entry in self._query_cache.items()
+            if entry[0] == self.get_version(key[0])
+        }
+        while len(self._query_cache) >= self.query_cache_size:
+            del self._query_cache[next(iter(self._query_cache))]
+    
+    def _query(
+        self,
+        service_name: Optional[str],
+        service_type: Optional[str],
+        status: Optional[ServiceStatus],
+        service_group: Optional[str]
+    ) -> List[ServiceInfo]:
+        """在索引上求交集：从最小的候选集合出发，逐个检查其余条件，结果按注册顺序排列"""
+        candidates = []
+        if service_name:
+            candidates.append(self._by_name.get(service_name, set()))
+        if service_type:
+            candidates.append(self._by_type.get(service_type, set()))
+        if status:
+            candidates.append(self._by_status[status])
         if service_group and service_group in self.service_groups:
-            service_ids = self.service_groups[service_group]
-        else:
-            service_ids = set(self.services.keys())
+            candidates.append(self.service_groups[service_group])
         
-        for service_id in service_ids:
-            if service_id not in self.services:
-                continue
-            
-            service_info = self.services[service_id]
-            
-            # 应用过滤条件
-            if service_name and service_info.service_name != service_name:
-                continue
-            
-            if service_type and service_info.service_type != service_type:
-                continue
-            
-            if status and service_info.status != status:
-                continue
+        if not candidates:
+            return list(self.services.values())
+        
+        smallest = min(candidates, key=len)
+        others = [c for c in candidates if c is not smallest]
+        matched = sorted(
+            (service_id for service_id in smallest
+             if service_id in self.services and all(service_id in c for c in others)),
+            key=self._order.__getitem__
+        )
+        return [self.services[service_id] for service_id in matched]
+    
+    def get_version(self, service_name: str = None) -> int:
+        """
+        获取版本号
+        
+        Args:
+            service_name: 服务名称，为 None 时返回全局版本
             
-            services.append(service_info)
+        Returns:
+            版本号，服务名下有成员、状态或权重变化时改变
+        """
+        if service_name:
+            return self._name_versions.get(service_name, 0)
+        return self.version
+    
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        订阅变更事件
         
-        return services
+        回调在变更发生时同步调用，参数为事件字典：version、event（registered、
+        deregistered、status_changed、weight_changed、heartbeat）、service_id、
+        service_name、service_type、old_status、new_status。
+        
+        Args:
+            callback: 回调函数
+        """
+        self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """取消订阅变更事件"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
     
     async def update_heartbeat(self, service_id: str) -> bool:
         """
@@ -361,7 +473,9 @@ class ServiceRegistry:
             
             # 如果服务之前是离线状态，现在恢复为未知状态
             if service_info.status == ServiceStatus.OFFLINE:
-                service_info.status = ServiceStatus.UNKNOWN
+                self._set_status(service_info, ServiceStatus.UNKNOWN)
+            else:
+                self._publish("heartbeat", service_info, service_info.status)
             
             return True
             
@@ -389,7 +503,7 @@ class ServiceRegistry:
         
         try:
             service_info = self.services[service_id]
-            service_info.update_health_check(status)
+            self._set_status(service_info, status)
             
             return True
             
@@ -401,6 +515,26 @@ class ServiceRegistry:
             )
             return False
     
+    async def update_service_weight(self, service_id: str, weight: float) -> bool:
+        """
+        更新服务的负载均衡权重
+        
+        Args:
+            service_id: 服务ID
+            weight: 权重
+            
+        Returns:
+            是否更新成功
+        """
+        service_info = self.services.get(service_id)
+        if service_info is None:
+            return False
+        
+        if service_info.weight != weight:
+            service_info.weight = weight
+            self._publish("weight_changed", service_info, service_info.status)
+        return True
+    
     async def get_service_stats(self, service_id: str) -> Optional[Dict[str, Any]]:
         """
         获取服务统计信息
@@ -437,18 +571,10 @@ class ServiceRegistry:
         Returns:
             统计信息
         """
-        # 计算当前状态统计
-        healthy_count = 0
-        unhealthy_count = 0
-        offline_count = 0
-        
-        for service_info in self.services.values():
-            if service_info.status == ServiceStatus.HEALTHY:
-                healthy_count += 1
-            elif service_info.status == ServiceStatus.UNHEALTHY:
-                unhealthy_count += 1
-            elif service_info.status == ServiceStatus.OFFLINE:
-                offline_count += 1
+        # 当前状态统计直接取自状态索引
+        healthy_count = len(self._by_status[ServiceStatus.HEALTHY])
+        unhealthy_count = len(self._by_status[ServiceStatus.UNHEALTHY])
+        offline_count = len(self._by_status[ServiceStatus.OFFLINE])
         
         return {
             **self.registry_stats,
@@ -484,9 +610,9 @@ class ServiceRegistry:
         """清理离线服务"""
         offline_services = []
         
-        for service_id, service_info in self.services.items():
+        for service_id, service_info in list(self.services.items()):
             if not service_info.is_alive():
-                service_info.status = ServiceStatus.OFFLINE
+                self._set_status(service_info, ServiceStatus.OFFLINE)
                 offline_services.append(service_id)
         
         # 记录离线服务
@@ -501,17 +627,56 @@ class ServiceRegistry:
         """检查服务健康状态"""
         # 这里应该实现实际的健康检查逻辑
         # 暂时只更新心跳状态
-        for service_info in self.services.values():
+        for service_info in list(self.services.values()):
             if not service_info.is_alive():
-                service_info.status = ServiceStatus.OFFLINE
+                self._set_status(service_info, ServiceStatus.OFFLINE)
+    
+    def _set_status(self, service_info: ServiceInfo, status: ServiceStatus) -> None:
+        """更新服务状态，同步维护状态索引并在状态变化时发布事件"""
+        old_status = service_info.status
+        service_info.update_health_check(status)
+        if old_status == status:
+            return
+        
+        self._by_status[old_status].discard(service_info.service_id)
+        self._by_status[status].add(service_info.service_id)
+        self._publish("status_changed", service_info, old_status)
+    
+    def _publish(self, event: str, service_info: ServiceInfo, old_status: Optional[ServiceStatus]) -> None:
+        """递增版本并同步通知订阅者（心跳事件不改变服务名版本）"""
+        self.version += 1
+        if event != "heartbeat":
+            self._name_versions[service_info.service_name] = self.version
+        
+        if not self._subscribers:
+            return
+        
+        change = {
+            "version": self.version,
+            "event": event,
+            "service_id": service_info.service_id,
+            "service_name": service_info.service_name,
+            "service_type": service_info.service_type,
+            "old_status": old_status,
+            "new_status": service_info.status
+        }
+        for callback in list(self._subscribers):
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error("Error in registry subscriber", event=event, error=str(e))
+    
+    @staticmethod
+    def _discard_index(index: Dict[str, Set[str]], key: str, service_id: str) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(service_id)
+            if not ids:
+                del index[key]
     
     def _count_services_by_type(self) -> Dict[str, int]:
         """按类型统计服务数量"""
-        type_count = {}
-        for service_info in self.services.values():
-            service_type = service_info.service_type
-            type_count[service_type] = type_count.get(service_type, 0) + 1
-        return type_count
+        return {service_type: len(ids) for service_type, ids in self._by_type.items()}
     
     def _count_services_by_group(self) -> Dict[str, int]:
         """按组统计服务数量"""
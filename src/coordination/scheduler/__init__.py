@@ -6,7 +6,7 @@
 
 from .task_scheduler import TaskScheduler, TaskInfo, TaskStatus, SchedulingStrategy
 from .resource_allocator import ResourceAllocator
-from .scheduling_policy import SchedulingPolicy
+from .scheduling_policy import SchedulingPolicy, PolicyType, WorkerTable
 
 __all__ = [
     "TaskScheduler",
@@ -14,5 +14,7 @@ __all__ = [
     "TaskStatus",
     "SchedulingStrategy",
     "ResourceAllocator",
-    "SchedulingPolicy"
+    "SchedulingPolicy",
+    "PolicyType",
+    "WorkerTable"
 ] 
\ No newline at end of file
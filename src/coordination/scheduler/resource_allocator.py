@@ -1,26 +1,56 @@
 """
 资源分配器
 
-实现资源分配、优化和监控
+实现资源分配、优化和监控：
+- 多节点、多维（CPU/内存/GPU 等）最佳适配放置
+- 带优先级和截止时间的等待队列，资源释放时按序唤醒
+- 可选的主导资源公平（DRF）排队
+- 抢占低优先级分配
+- 分配租约到期自动回收
+- 可选的节点实测余量（由 ResourceManager 推送）参与放置
 """
 
 import asyncio
-from typing import Any, Dict, List, Optional, Tuple
+import heapq
+import itertools
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 import structlog
 
 logger = structlog.get_logger(__name__)
 
 
+DEFAULT_NODE = "default"
+
+
 class ResourceAllocator:
     """
     资源分配器
     
-    实现资源分配、优化和监控
+    实现资源分配、优化和监控。available_resources / allocated_resources
+    是所有节点的汇总值，与单资源池时的语义保持一致。
     """
     
-    def __init__(self):
-        """初始化资源分配器"""
+    def __init__(
+        self,
+        fairness: str = "priority",
+        allow_preemption: bool = False,
+        backfill_depth: int = 16,
+        max_allocation_history: int = 1000
+    ):
+        """
+        初始化资源分配器
+        
+        Args:
+            fairness: 等待队列排序方式，priority（全局优先级）或 drf（按属主的主导资源份额）
+            allow_preemption: 是否默认允许抢占低优先级分配
+            backfill_depth: 队首请求放不下时，最多向后查看多少个请求做回填
+            max_allocation_history: 保留的分配历史条数
+        """
+        if fairness not in ("priority", "drf"):
+            raise ValueError(f"Unknown fairness mode: {fairness}")
+        
         self.available_resources = {
             "cpu": 0,
             "memory": 0,
@@ -37,43 +67,133 @@ class ResourceAllocator:
             "network": 0
         }
         
+        # 节点ID -> {"capacity": {...}, "free": {...}, "allocations": set()}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        
+        # 只保存已分配和排队中的请求，结束的请求记录在 allocation_history 中
         self.resource_requests: Dict[str, Dict[str, Any]] = {}
-        self.allocation_history: List[Dict[str, Any]] = []
+        self.allocation_history: deque = deque(maxlen=max_allocation_history)
+        
+        # 等待队列：分桶（priority 模式只有一个桶，drf 模式按属主分桶）的
+        # (-优先级, 序号, 请求ID) 小顶堆，出队时惰性跳过失效条目
+        self._waiting: Dict[str, List[Tuple]] = {}
+        self._waiting_count = 0
+        # 排队请求的截止时间堆: (截止时间, 序号, 请求ID)，同样惰性删除
+        self._deadlines: List[Tuple] = []
+        self._seq = itertools.count()
+        
+        # 属主 -> 已分配资源，用于计算主导资源份额
+        self._owner_usage: Dict[str, Dict[str, float]] = {}
+        self._listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
         
         # 配置
-        self.max_allocation_history = 1000
+        self.fairness = fairness
+        self.allow_preemption = allow_preemption
+        self.backfill_depth = backfill_depth
+        self.max_allocation_history = max_allocation_history
         self.optimization_interval = 60  # 秒
         
+        # 统计
+        self.allocator_stats = {
+            "granted": 0,
+            "granted_after_wait": 0,
+            "rejected": 0,
+            "wait_timeouts": 0,
+            "preempted": 0,
+            "expired": 0,
+            "total_wait_time": 0.0
+        }
+        
         logger.info("Resource allocator initialized")
     
-    async def initialize(self, total_resources: Dict[str, Any]) -> None:
+    async def initialize(
+        self,
+        total_resources: Dict[str, Any],
+        nodes: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> None:
         """
         初始化资源分配器
         
         Args:
-            total_resources: 总资源
+            total_resources: 总资源（未提供 nodes 时作为单个节点的容量）
+            nodes: 节点ID到节点容量的映射
         """
         try:
             logger.info("Initializing resource allocator")
             
-            # 设置总资源
-            self.available_resources.update(total_resources)
+            # 设置节点容量
+            if nodes:
+                for node_id, capacity in nodes.items():
+                    self.add_node(node_id, capacity)
+            else:
+                self.add_node(DEFAULT_NODE, total_resources)
             
             # 启动优化任务
             asyncio.create_task(self._optimization_loop())
             
             logger.info("Resource allocator initialized successfully")
-            
+        
         except Exception as e:
             logger.error("Failed to initialize resource allocator", error=str(e))
             raise
     
+    def add_node(self, node_id: str, capacity: Dict[str, Any]) -> None:
+        """
+        添加节点（已存在时增加其容量）
+        
+        Args:
+            node_id: 节点ID
+            capacity: 节点各维度容量
+        """
+        node = self.nodes.setdefault(node_id, {"capacity": {}, "free": {}, "allocations": set()})
+        for resource_type, amount in capacity.items():
+            node["capacity"][resource_type] = node["capacity"].get(resource_type, 0) + amount
+            node["free"][resource_type] = node["free"].get(resource_type, 0) + amount
+            self.available_resources[resource_type] = (
+                self.available_resources.get(resource_type, 0) + amount
+            )
+            self.allocated_resources.setdefault(resource_type, 0)
+        
+        self._dispatch()
+    
+    def update_node_headroom(self, node_id: str, headroom: Dict[str, float]) -> None:
+        """
+        更新节点的实测余量
+        
+        放置时每个维度取账面空闲量与实测余量的较小值，避免把请求放到账面有空闲、
+        实际已被占满的节点上。实测余量在两次更新之间随分配扣减。
+        
+        Args:
+            node_id: 节点ID
+            headroom: 各维度实测余量（单位与节点容量一致）
+        """
+        node = self.nodes.get(node_id)
+        if node is None:
+            return
+        node["headroom"] = dict(headroom)
+        self._dispatch()
+    
+    def add_listener(self, callback: Callable[[str, str, Dict[str, Any]], None]) -> None:
+        """
+        添加分配事件监听器
+        
+        Args:
+            callback: 回调函数 (事件, 请求ID, 请求信息)，事件为 granted、preempted、
+                expired、timeout 之一
+        """
+        self._listeners.append(callback)
+    
     async def request_resources(
         self,
         request_id: str,
         resources: Dict[str, Any],
         priority: int = 0,
-        timeout: int = 300
+        timeout: int = 300,
+        wait: bool = False,
+        owner: str = "default",
+        lease: Optional[float] = None,
+        preempt: Optional[bool] = None,
+        preemptible: bool = True
     ) -> bool:
         """
         请求资源
@@ -82,8 +202,13 @@ class ResourceAllocator:
             request_id: 请求ID
             resources: 资源需求
             priority: 优先级
-            timeout: 超时时间
-            
+            timeout: 超时时间（秒），wait 为 True 时是在队列中等待的最长时间
+            wait: 资源不足时是否排队等待
+            owner: 请求属主，drf 模式下按属主公平排队
+            lease: 分配租约（秒），到期自动释放；None 表示不过期
+            preempt: 是否允许抢占更低优先级的分配，None 使用分配器配置
+            preemptible: 本分配是否可被抢占
+        
         Returns:
             是否分配成功
         """
@@ -95,8 +220,41 @@ class ResourceAllocator:
                 priority=priority
             )
             
-            # 检查资源可用性
-            if not await self._check_resource_availability(resources):
+            existing = self.resource_requests.get(request_id)
+            if existing and existing["status"] in ("allocated", "waiting"):
+                logger.warning("Resource request already active", request_id=request_id)
+                return existing["status"] == "allocated"
+            
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            request_info = {
+                "resources": resources,
+                "priority": priority,
+                "timeout": timeout,
+                "owner": owner,
+                "lease": lease,
+                "preempt": self.allow_preemption if preempt is None else preempt,
+                "preemptible": preemptible,
+                "requested_at": datetime.utcnow(),
+                "submitted": now,
+                # 排队截止时间，被抢占后重新排队时沿用
+                "deadline": now + timeout,
+                "status": "pending",
+                "node": None,
+                "waiter": None
+            }
+            self.resource_requests[request_id] = request_info
+            
+            # 已有请求排队时，要排队的新请求不直接放置，避免插队
+            if not self._waiting_count or not wait:
+                if self._try_place(request_id, request_info):
+                    logger.info("Resources allocated successfully", request_id=request_id)
+                    return True
+            
+            if not wait:
+                request_info["status"] = "rejected"
+                self.resource_requests.pop(request_id, None)
+                self.allocator_stats["rejected"] += 1
                 logger.warning(
                     "Insufficient resources for request",
                     request_id=request_id,
@@ -104,31 +262,20 @@ class ResourceAllocator:
                 )
                 return False
             
-            # 分配资源
-            success = await self._allocate_resources(request_id, resources)
-            
-            if success:
-                # 记录请求
-                self.resource_requests[request_id] = {
-                    "resources": resources,
-                    "priority": priority,
-                    "timeout": timeout,
-                    "allocated_at": datetime.utcnow(),
-                    "status": "allocated"
-                }
-                
-                logger.info(
-                    "Resources allocated successfully",
-                    request_id=request_id
-                )
-            else:
-                logger.error(
-                    "Failed to allocate resources",
-                    request_id=request_id
-                )
-            
-            return success
+            # 排队等待
+            waiter = loop.create_future()
+            request_info["waiter"] = waiter
+            self._enqueue(request_id, request_info, deadline=request_info["deadline"])
+            self._dispatch()
             
+            try:
+                return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            except asyncio.TimeoutError:
+                if waiter.done():
+                    return waiter.result()
+                self._drop_waiting(request_id, request_info, "timeout")
+                return False
+        
         except Exception as e:
             logger.error(
                 "Error requesting resources",
@@ -139,40 +286,35 @@ class ResourceAllocator:
     
     async def release_resources(self, request_id: str) -> bool:
         """
-        释放资源
+        释放资源（对仍在排队的请求则取消排队）
         
         Args:
             request_id: 请求ID
-            
+        
         Returns:
             是否释放成功
         """
         try:
             logger.info("Releasing resources", request_id=request_id)
             
-            if request_id not in self.resource_requests:
+            request_info = self.resource_requests.get(request_id)
+            if request_info is None:
                 logger.warning("Resource request not found", request_id=request_id)
                 return False
             
-            request_info = self.resource_requests[request_id]
-            resources = request_info["resources"]
-            
-            # 释放资源
-            for resource_type, amount in resources.items():
-                if resource_type in self.allocated_resources:
-                    self.allocated_resources[resource_type] -= amount
-                    self.available_resources[resource_type] += amount
+            if request_info["status"] == "waiting":
+                self._drop_waiting(request_id, request_info, "cancelled")
+                return True
             
-            # 更新请求状态
-            request_info["status"] = "released"
-            request_info["released_at"] = datetime.utcnow()
+            if request_info["status"] != "allocated":
+                return False
             
-            # 记录历史
-            await self._record_allocation_history(request_id, "released", resources)
+            self._free(request_id, request_info, "released")
+            self._dispatch()
             
             logger.info("Resources released successfully", request_id=request_id)
             return True
-            
+        
         except Exception as e:
             logger.error(
                 "Error releasing resources",
@@ -181,6 +323,26 @@ class ResourceAllocator:
             )
             return False
     
+    async def renew_lease(self, request_id: str, lease: Optional[float] = None) -> bool:
+        """
+        续约分配租约
+        
+        Args:
+            request_id: 请求ID
+            lease: 新的租约时长（秒），None 沿用原租约时长
+        
+        Returns:
+            是否续约成功
+        """
+        request_info = self.resource_requests.get(request_id)
+        if request_info is None or request_info["status"] != "allocated":
+            return False
+        
+        if lease is not None:
+            request_info["lease"] = lease
+        self._arm_lease(request_id, request_info)
+        return True
+    
     async def get_resource_status(self) -> Dict[str, Any]:
         """
         获取资源状态
@@ -198,63 +360,55 @@ class ResourceAllocator:
             total_resources[resource_type] = total
             utilization[resource_type] = (allocated / total * 100) if total > 0 else 0
         
+        granted_after_wait = self.allocator_stats["granted_after_wait"]
         return {
             "available_resources": self.available_resources,
             "allocated_resources": self.allocated_resources,
             "total_resources": total_resources,
             "utilization": utilization,
-            "active_requests": len([r for r in self.resource_requests.values() if r["status"] == "allocated"])
+            "active_requests": sum(len(node["allocations"]) for node in self.nodes.values()),
+            "waiting_requests": self._waiting_count,
+            "nodes": {
+                node_id: {"capacity": node["capacity"], "free": node["free"],
+                          "headroom": node.get("headroom"),
+                          "allocations": len(node["allocations"])}
+                for node_id, node in self.nodes.items()
+            },
+            "allocator_stats": {
+                **self.allocator_stats,
+                "avg_wait_time": (
+                    self.allocator_stats["total_wait_time"] / granted_after_wait
+                    if granted_after_wait else 0.0
+                )
+            }
         }
     
     async def optimize_allocations(self) -> Dict[str, Any]:
         """
         优化资源分配
         
+        清理过期的排队请求并尝试为剩余排队请求分配资源。已分配的资源不会被
+        整体释放重排，抢占只在高优先级请求放不下时按需发生。
+        
         Returns:
             优化结果
         """
         try:
             logger.info("Starting resource allocation optimization")
             
+            before = dict(self.allocator_stats)
+            expired = self._expire_waiting()
+            granted = self._dispatch()
+            
             optimization_results = {
-                "optimizations_applied": 0,
+                "optimizations_applied": granted + expired,
                 "resources_freed": {},
-                "requests_reorganized": 0
+                "requests_reorganized": granted,
+                "requests_expired": expired,
+                "requests_preempted": self.allocator_stats["preempted"] - before["preempted"],
+                "waiting_requests": self._waiting_count
             }
             
-            # 按优先级重新组织请求
-            sorted_requests = sorted(
-                self.resource_requests.items(),
-                key=lambda x: x[1]["priority"],
-                reverse=True
-            )
-            
-            # 释放所有资源
-            for request_id, request_info in sorted_requests:
-                if request_info["status"] == "allocated":
-                    resources = request_info["resources"]
-                    for resource_type, amount in resources.items():
-                        if resource_type in self.allocated_resources:
-                            self.allocated_resources[resource_type] -= amount
-                            self.available_resources[resource_type] += amount
-            
-            # 重新分配资源
-            for request_id, request_info in sorted_requests:
-                if request_info["status"] == "allocated":
-                    resources = request_info["resources"]
-                    
-                    if await self._check_resource_availability(resources):
-                        # 重新分配
-                        for resource_type, amount in resources.items():
-                            if resource_type in self.available_resources:
-                                self.available_resources[resource_type] -= amount
-                                self.allocated_resources[resource_type] += amount
-                        optimization_results["requests_reorganized"] += 1
-                    else:
-                        # 无法重新分配，标记为等待
-                        request_info["status"] = "waiting"
-                        optimization_results["optimizations_applied"] += 1
-            
             logger.info(
                 "Resource allocation optimization completed",
                 optimizations_applied=optimization_results["optimizations_applied"],
@@ -262,7 +416,7 @@ class ResourceAllocator:
             )
             
             return optimization_results
-            
+        
         except Exception as e:
             logger.error("Error optimizing allocations", error=str(e))
             return {"error": str(e)}
@@ -273,18 +427,11 @@ class ResourceAllocator:
         
         Args:
             resources: 资源需求
-            
+        
         Returns:
-            资源是否足够
+            是否有节点能容纳该需求
         """
-        for resource_type, amount in resources.items():
-            if resource_type not in self.available_resources:
-                return False
-            
-            if self.available_resources[resource_type] < amount:
-                return False
-        
-        return True
+        return self._best_fit(resources) is not None
     
     async def _allocate_resources(self, request_id: str, resources: Dict[str, Any]) -> bool:
         """
@@ -293,25 +440,22 @@ class ResourceAllocator:
         Args:
             request_id: 请求ID
             resources: 资源需求
-            
+        
         Returns:
             是否分配成功
         """
         try:
-            # 检查资源可用性
-            if not await self._check_resource_availability(resources):
+            node_id = self._best_fit(resources)
+            if node_id is None:
                 return False
             
-            # 分配资源
-            for resource_type, amount in resources.items():
-                self.available_resources[resource_type] -= amount
-                self.allocated_resources[resource_type] += amount
-            
-            # 记录历史
-            await self._record_allocation_history(request_id, "allocated", resources)
-            
+            request_info = self.resource_requests.setdefault(request_id, {
+                "resources": resources, "priority": 0, "owner": "default", "lease": None,
+                "preemptible": True, "status": "pending", "node": None, "waiter": None
+            })
+            self._grant(request_id, request_info, node_id)
             return True
-            
+        
         except Exception as e:
             logger.error(
                 "Error allocating resources",
@@ -320,6 +464,352 @@ class ResourceAllocator:
             )
             return False
     
+    # ------------------------------------------------------------------
+    # 放置
+    # ------------------------------------------------------------------
+    
+    def _best_fit(self, resources: Dict[str, Any]) -> Optional[str]:
+        """
+        多维最佳适配：在放得下的节点中选择放置后各维度归一化剩余量之和最小的节点
+        
+        Args:
+            resources: 资源需求
+        
+        Returns:
+            节点ID，放不下时返回 None
+        """
+        best_node = None
+        best_score = None
+        for node_id, node in self.nodes.items():
+            free = node["free"]
+            capacity = node["capacity"]
+            headroom = node.get("headroom")
+            score = 0.0
+            for resource_type, amount in resources.items():
+                remaining = free.get(resource_type, 0) - amount
+                if headroom and resource_type in headroom:
+                    remaining = min(remaining, headroom[resource_type] - amount)
+                if remaining < 0:
+                    break
+                total = capacity.get(resource_type, 0)
+                if total > 0:
+                    score += remaining / total
+            else:
+                if best_score is None or score < best_score:
+                    best_node, best_score = node_id, score
+        return best_node
+    
+    def _try_place(self, request_id: str, request_info: Dict[str, Any]) -> bool:
+        """尝试放置请求，放不下且允许抢占时抢占低优先级分配"""
+        resources = request_info["resources"]
+        node_id = self._best_fit(resources)
+        if node_id is None and request_info.get("preempt"):
+            node_id = self._preempt_for(request_info)
+        if node_id is None:
+            return False
+        
+        self._grant(request_id, request_info, node_id)
+        return True
+    
+    def _preempt_for(self, request_info: Dict[str, Any]) -> Optional[str]:
+        """
+        为请求挑选被抢占的分配
+        
+        在每个节点上按优先级从低到高（同优先级先抢最近分配的）累加可抢占分配，
+        直到能放下请求；选择被抢占分配数最少、优先级之和最小的节点。
+        
+        Returns:
+            抢占后可放置的节点ID，无法通过抢占满足时返回 None
+        """
+        resources = request_info["resources"]
+        priority = request_info["priority"]
+        best = None
+        
+        for node_id, node in self.nodes.items():
+            capacity = node["capacity"]
+            if any(capacity.get(r, 0) < amount for r, amount in resources.items()):
+                continue
+            
+            candidates = sorted(
+                (
+                    (info["priority"], -info["granted"], rid)
+                    for rid in node["allocations"]
+                    for info in (self.resource_requests[rid],)
+                    if info["preemptible"] and info["priority"] < priority
+                )
+            )
+            free = dict(node["free"])
+            victims = []
+            for victim_priority, _, rid in candidates:
+                if all(free.get(r, 0) >= amount for r, amount in resources.items()):
+                    break
+                victims.append((rid, victim_priority))
+                for r, amount in self.resource_requests[rid]["resources"].items():
+                    free[r] = free.get(r, 0) + amount
+            if not all(free.get(r, 0) >= amount for r, amount in resources.items()):
+                continue
+            
+            cost = (len(victims), sum(p for _, p in victims))
+            if best is None or cost < best[0]:
+                best = (cost, node_id, victims)
+        
+        if best is None:
+            return None
+        
+        _, node_id, victims = best
+        for rid, _ in victims:
+            victim = self.resource_requests[rid]
+            self._free(rid, victim, "preempted")
+            self.allocator_stats["preempted"] += 1
+            self._emit("preempted", rid, victim)
+            # 被抢占的请求按原截止时间重新排队，资源释放后再次分配
+            self._enqueue(rid, victim, deadline=victim.get("deadline"))
+        return node_id
+    
+    def _grant(self, request_id: str, request_info: Dict[str, Any], node_id: str) -> None:
+        node = self.nodes[node_id]
+        resources = request_info["resources"]
+        headroom = node.get("headroom")
+        for resource_type, amount in resources.items():
+            node["free"][resource_type] -= amount
+            self.available_resources[resource_type] -= amount
+            self.allocated_resources[resource_type] += amount
+            if headroom and resource_type in headroom:
+                headroom[resource_type] -= amount
+        node["allocations"].add(request_id)
+        
+        usage = self._owner_usage.setdefault(request_info.get("owner", "default"), {})
+        for resource_type, amount in resources.items():
+            usage[resource_type] = usage.get(resource_type, 0) + amount
+        
+        loop = self._loop()
+        request_info["status"] = "allocated"
+        request_info["node"] = node_id
+        request_info["allocated_at"] = datetime.utcnow()
+        request_info["granted"] = loop.time() if loop else 0.0
+        self.allocator_stats["granted"] += 1
+        
+        self._arm_lease(request_id, request_info)
+        self._record_history(request_id, "allocated", resources)
+    
+    def _free(self, request_id: str, request_info: Dict[str, Any], status: str) -> None:
+        node = self.nodes[request_info["node"]]
+        resources = request_info["resources"]
+        for resource_type, amount in resources.items():
+            node["free"][resource_type] += amount
+            self.available_resources[resource_type] += amount
+            self.allocated_resources[resource_type] -= amount
+        node["allocations"].discard(request_id)
+        
+        usage = self._owner_usage.get(request_info.get("owner", "default"), {})
+        for resource_type, amount in resources.items():
+            usage[resource_type] = usage.get(resource_type, 0) - amount
+        
+        handle = request_info.pop("lease_handle", None)
+        if handle is not None:
+            handle.cancel()
+        
+        request_info["status"] = status
+        request_info["released_at"] = datetime.utcnow()
+        self._record_history(request_id, status, resources)
+        if status != "preempted":
+            self.resource_requests.pop(request_id, None)
+    
+    # ------------------------------------------------------------------
+    # 等待队列
+    # ------------------------------------------------------------------
+    
+    def _enqueue(self, request_id: str, request_info: Dict[str, Any],
+                 deadline: Optional[float]) -> None:
+        bucket = request_info.get("owner", "default") if self.fairness == "drf" else ""
+        seq = next(self._seq)
+        request_info["status"] = "waiting"
+        request_info["queue_seq"] = seq
+        loop = self._loop()
+        if loop is not None:
+            request_info["submitted"] = loop.time()
+        request_info["deadline"] = deadline
+        heapq.heappush(
+            self._waiting.setdefault(bucket, []),
+            (-request_info["priority"], seq, request_id)
+        )
+        if deadline is not None:
+            heapq.heappush(self._deadlines, (deadline, seq, request_id))
+        self._waiting_count += 1
+    
+    def _drop_waiting(self, request_id: str, request_info: Dict[str, Any], status: str) -> None:
+        """把请求移出等待队列和 resource_requests（堆中的条目惰性删除）"""
+        request_info["status"] = status
+        request_info["queue_seq"] = None
+        self._waiting_count -= 1
+        self.resource_requests.pop(request_id, None)
+        if status == "timeout":
+            self.allocator_stats["wait_timeouts"] += 1
+            self._emit("timeout", request_id, request_info)
+        waiter = request_info.get("waiter")
+        if waiter is not None and not waiter.done():
+            waiter.set_result(False)
+    
+    def _is_live(self, entry: Tuple) -> bool:
+        """等待队列或截止时间堆中的条目是否仍有效（两种条目的第 2、3 项都是序号和请求ID）"""
+        info = self.resource_requests.get(entry[2])
+        return (info is not None and info["status"] == "waiting"
+                and info.get("queue_seq") == entry[1])
+    
+    def _dominant_share(self, owner: str) -> float:
+        usage = self._owner_usage.get(owner)
+        if not usage:
+            return 0.0
+        share = 0.0
+        for resource_type, amount in usage.items():
+            total = self.available_resources.get(resource_type, 0) + self.allocated_resources.get(resource_type, 0)
+            if total > 0:
+                share = max(share, amount / total)
+        return share
+    
+    def _dispatch(self) -> int:
+        """
+        尝试为等待中的请求分配资源
+        
+        按桶顺序（drf 模式按属主主导资源份额从低到高）处理，每个桶从堆顶开始，
+        队首放不下时先尝试抢占，再向后最多查看 backfill_depth 个请求做回填。
+        
+        Returns:
+            本次分配成功的请求数
+        """
+        if not self._waiting_count:
+            return 0
+        
+        granted = 0
+        progress = True
+        while progress and self._waiting_count:
+            progress = False
+            buckets = [b for b, heap in self._waiting.items() if heap]
+            if self.fairness == "drf":
+                buckets.sort(key=self._dominant_share)
+            
+            for bucket in buckets:
+                heap = self._waiting[bucket]
+                blocked = []
+                head = True
+                while heap and len(blocked) <= self.backfill_depth:
+                    entry = heapq.heappop(heap)
+                    if not self._is_live(entry):
+                        continue
+                    request_id = entry[2]
+                    request_info = self.resource_requests[request_id]
+                    
+                    placed = self._best_fit(request_info["resources"])
+                    if placed is None and head and request_info.get("preempt"):
+                        placed = self._preempt_for(request_info)
+                    head = False
+                    if placed is None:
+                        blocked.append(entry)
+                        continue
+                    
+                    self._waiting_count -= 1
+                    request_info["queue_seq"] = None
+                    self._grant(request_id, request_info, placed)
+                    self._on_granted_after_wait(request_id, request_info)
+                    granted += 1
+                    progress = True
+                    if self.fairness == "drf":
+                        # 份额已变化，重新排序属主
+                        break
+                
+                for entry in blocked:
+                    heapq.heappush(heap, entry)
+                if progress and self.fairness == "drf":
+                    break
+        
+        return granted
+    
+    def _on_granted_after_wait(self, request_id: str, request_info: Dict[str, Any]) -> None:
+        loop = self._loop()
+        if loop is not None and "submitted" in request_info:
+            self.allocator_stats["total_wait_time"] += loop.time() - request_info["submitted"]
+        self.allocator_stats["granted_after_wait"] += 1
+        
+        waiter = request_info.get("waiter")
+        if waiter is not None and not waiter.done():
+            waiter.set_result(True)
+        self._emit("granted", request_id, request_info)
+    
+    def _expire_waiting(self) -> int:
+        """从截止时间堆弹出已到期的排队请求并移出队列，失效条目过多时压缩各堆"""
+        loop = self._loop()
+        if loop is None:
+            return 0
+        
+        now = loop.time()
+        expired = 0
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            entry = heapq.heappop(deadlines)
+            if not self._is_live(entry):
+                continue
+            request_id = entry[2]
+            self._drop_waiting(request_id, self.resource_requests[request_id], "timeout")
+            expired += 1
+        
+        threshold = 2 * self._waiting_count + 64
+        for bucket, heap in self._waiting.items():
+            if len(heap) > threshold:
+                self._waiting[bucket] = [e for e in heap if self._is_live(e)]
+                heapq.heapify(self._waiting[bucket])
+        if len(deadlines) > threshold:
+            self._deadlines = [e for e in deadlines if self._is_live(e)]
+            heapq.heapify(self._deadlines)
+        return expired
+    
+    # ------------------------------------------------------------------
+    # 租约
+    # ------------------------------------------------------------------
+    
+    def _arm_lease(self, request_id: str, request_info: Dict[str, Any]) -> None:
+        handle = request_info.pop("lease_handle", None)
+        if handle is not None:
+            handle.cancel()
+        
+        lease = request_info.get("lease")
+        loop = self._loop()
+        if lease is None or loop is None:
+            return
+        request_info["lease_handle"] = loop.call_later(
+            lease, self._expire_lease, request_id, request_info["granted"]
+        )
+    
+    def _expire_lease(self, request_id: str, granted: float) -> None:
+        request_info = self.resource_requests.get(request_id)
+        if (request_info is None or request_info["status"] != "allocated"
+                or request_info.get("granted") != granted):
+            return
+        
+        request_info.pop("lease_handle", None)
+        self._free(request_id, request_info, "expired")
+        self.allocator_stats["expired"] += 1
+        logger.info("Resource lease expired", request_id=request_id)
+        self._emit("expired", request_id, request_info)
+        self._dispatch()
+    
+    # ------------------------------------------------------------------
+    # 其他
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _loop() -> Optional[asyncio.AbstractEventLoop]:
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+    
+    def _emit(self, event: str, request_id: str, request_info: Dict[str, Any]) -> None:
+        for callback in self._listeners:
+            try:
+                callback(event, request_id, request_info)
+            except Exception as e:
+                logger.error("Error in allocation listener", event=event, error=str(e))
+    
     async def _record_allocation_history(
         self,
         request_id: str,
@@ -334,20 +824,18 @@ class ResourceAllocator:
             action: 操作类型
             resources: 资源信息
         """
-        history_entry = {
+        self._record_history(request_id, action, resources)
+    
+    def _record_history(self, request_id: str, action: str, resources: Dict[str, Any]) -> None:
+        # 超出 max_allocation_history 的旧记录由 deque 自动丢弃
+        self.allocation_history.append({
             "request_id": request_id,
             "action": action,
             "resources": resources,
             "timestamp": datetime.utcnow().isoformat(),
             "available_resources": self.available_resources.copy(),
             "allocated_resources": self.allocated_resources.copy()
-        }
-        
-        self.allocation_history.append(history_entry)
-        
-        # 限制历史记录数量
-        if len(self.allocation_history) > self.max_allocation_history:
-            self.allocation_history = self.allocation_history[-self.max_allocation_history:]
+        })
     
     async def _optimization_loop(self) -> None:
         """优化循环"""
@@ -357,4 +845,4 @@ class ResourceAllocator:
                 await asyncio.sleep(self.optimization_interval)
             except Exception as e:
                 logger.error("Error in optimization loop", error=str(e))
-                await asyncio.sleep(5) 
\ No newline at end of file
+                await asyncio.sleep(5)
@@ -4,8 +4,10 @@
 实现不同的调度策略和优化算法
 """
 
-from typing import Any, Dict, List, Optional, Callable
+import heapq
+from typing import Any, Dict, List, Optional, Callable, Tuple
 from enum import Enum
+import numpy as np
 import structlog
 
 logger = structlog.get_logger(__name__)
@@ -23,11 +25,202 @@ class PolicyType(Enum):
     COST_AWARE = "cost_aware"
 
 
+class WorkerTable:
+    """
+    列式工作节点表
+    
+    每列是一个 NumPy 数组，行号通过 worker_id 索引；更新负载时原地修改数组，
+    删除时与最后一行交换，因此所有策略的打分都可以整列向量化计算。
+    """
+    
+    def __init__(self, initial_capacity: int = 64):
+        """
+        初始化工作节点表
+        
+        Args:
+            initial_capacity: 初始行容量，不足时按倍数扩容
+        """
+        self.ids: List[str] = []
+        self.workers: List[Dict[str, Any]] = []
+        self._index: Dict[str, int] = {}
+        self._allocate(max(int(initial_capacity), 1))
+    
+    def _allocate(self, capacity: int) -> None:
+        size = len(self.ids)
+        columns = {
+            "load": np.zeros(capacity),
+            "capacity": np.full(capacity, np.inf),
+            "cost": np.ones(capacity),
+            "performance": np.ones(capacity),
+            "usage": np.zeros(capacity),
+            "available": np.zeros(capacity, dtype=bool),
+        }
+        if size:
+            for name, column in columns.items():
+                column[:size] = getattr(self, "_" + name)[:size]
+        for name, column in columns.items():
+            setattr(self, "_" + name, column)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __contains__(self, worker_id: str) -> bool:
+        return worker_id in self._index
+    
+    # 以下属性返回当前有效行的视图，写入会直接修改表
+    @property
+    def load(self) -> np.ndarray:
+        return self._load[:len(self.ids)]
+    
+    @property
+    def capacity(self) -> np.ndarray:
+        return self._capacity[:len(self.ids)]
+    
+    @property
+    def cost(self) -> np.ndarray:
+        return self._cost[:len(self.ids)]
+    
+    @property
+    def performance(self) -> np.ndarray:
+        return self._performance[:len(self.ids)]
+    
+    @property
+    def usage(self) -> np.ndarray:
+        return self._usage[:len(self.ids)]
+    
+    @property
+    def available(self) -> np.ndarray:
+        return self._available[:len(self.ids)]
+    
+    def row(self, worker_id: str) -> Optional[int]:
+        """获取工作节点所在行号"""
+        return self._index.get(worker_id)
+    
+    def upsert(self, worker: Dict[str, Any]) -> int:
+        """
+        添加或更新工作节点
+        
+        Args:
+            worker: 工作节点信息，读取 worker_id、current_load、max_load、
+                cost_per_hour、performance、total_usage、available
+                
+        Returns:
+            行号
+        """
+        worker_id = worker.get("worker_id")
+        row = self._index.get(worker_id)
+        if row is None:
+            row = len(self.ids)
+            if row >= len(self._load):
+                self._allocate(len(self._load) * 2)
+            self._index[worker_id] = row
+            self.ids.append(worker_id)
+            self.workers.append(worker)
+        else:
+            self.workers[row] = worker
+        
+        self._load[row] = worker.get("current_load", 0)
+        self._capacity[row] = worker.get("max_load", np.inf)
+        self._cost[row] = worker.get("cost_per_hour", 1.0)
+        self._performance[row] = worker.get("performance", 1.0)
+        self._usage[row] = worker.get("total_usage", 0)
+        self._available[row] = worker.get("available", True)
+        return row
+    
+    def remove(self, worker_id: str) -> bool:
+        """
+        删除工作节点（与最后一行交换后截断）
+        
+        Args:
+            worker_id: 工作节点ID
+            
+        Returns:
+            是否删除
+        """
+        row = self._index.pop(worker_id, None)
+        if row is None:
+            return False
+        
+        last = len(self.ids) - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.workers[row] = self.workers[last]
+            self._index[moved_id] = row
+            for column in (self._load, self._capacity, self._cost,
+                           self._performance, self._usage, self._available):
+                column[row] = column[last]
+        self.ids.pop()
+        self.workers.pop()
+        self._available[last] = False
+        return True
+    
+    def set_load(self, worker_id: str, load: float) -> None:
+        row = self._index.get(worker_id)
+        if row is not None:
+            self._load[row] = load
+    
+    def set_available(self, worker_id: str, available: bool) -> None:
+        row = self._index.get(worker_id)
+        if row is not None:
+            self._available[row] = available
+
+
+def _hungarian(cost: np.ndarray) -> np.ndarray:
+    """
+    匈牙利算法（势函数 + 最短增广路，O(n²m)），要求行数不大于列数
+    
+    Args:
+        cost: n x m 代价矩阵
+        
+    Returns:
+        长度为 n 的数组，第 i 行分配到的列号
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)    # p[j]: 列 j 匹配的行（1 起始，0 表示未匹配）
+    way = np.zeros(m + 1, dtype=np.int64)
+    
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    
+    assignment = np.empty(n, dtype=np.int64)
+    matched = np.nonzero(p[1:])[0]
+    assignment[p[1:][matched] - 1] = matched
+    return assignment
+
+
 class SchedulingPolicy:
     """
     调度策略
     
-    实现不同的调度策略和优化算法
+    实现不同的调度策略和优化算法。工作节点可以注册到列式的 WorkerTable 中，
+    节点选择和批量分配在表上做向量化打分。
     """
     
     def __init__(self, policy_type: PolicyType = PolicyType.FIFO):
@@ -42,7 +235,7 @@ class SchedulingPolicy:
         
         # 策略特定的状态
         self.round_robin_index = 0
-        self.worker_loads = {}
+        self.worker_table = WorkerTable()
         self.task_priorities = {}
         
         logger.info(f"Scheduling policy initialized: {policy_type.value}")
@@ -108,7 +301,7 @@ class SchedulingPolicy:
     def select_worker(
         self,
         task: Dict[str, Any],
-        available_workers: List[Dict[str, Any]],
+        available_workers: Optional[List[Dict[str, Any]]] = None,
         **kwargs
     ) -> Optional[Dict[str, Any]]:
         """
@@ -116,57 +309,329 @@ class SchedulingPolicy:
         
         Args:
             task: 任务信息
-            available_workers: 可用工作节点列表
+            available_workers: 可用工作节点列表；为 None 时在已注册的工作节点表中
+                选择可用且容量足够的节点
             **kwargs: 其他参数
             
         Returns:
             选中的工作节点
         """
-        if not available_workers:
-            return None
+        if available_workers is None:
+            table = self.worker_table
+            rows = np.flatnonzero(table.available & self._fits(task))
+            if not len(rows):
+                return None
+            scores = self._worker_scores(
+                table.load[rows], table.usage[rows], table.cost[rows], table.performance[rows]
+            )
+            workers = table.workers
+        else:
+            if not available_workers:
+                return None
+            rows = None
+            scores = self._worker_scores(*self._columns(available_workers))
+            workers = available_workers
+        
+        count = len(workers) if rows is None else len(rows)
+        if scores is None:
+            if self.policy_type == PolicyType.ROUND_ROBIN:
+                position = self.round_robin_index % count
+                self.round_robin_index += 1
+            else:
+                # 默认选择第一个可用节点
+                position = 0
+        else:
+            position = int(np.argmin(scores))
         
-        if self.policy_type == PolicyType.LEAST_LOADED:
-            return self._select_least_loaded_worker(available_workers)
+        return workers[position if rows is None else rows[position]]
+    
+    def assign_tasks(
+        self,
+        tasks: List[Dict[str, Any]],
+        available_workers: Optional[List[Dict[str, Any]]] = None,
+        method: str = "greedy",
+        commit: bool = True
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        批量为任务分配工作节点
         
-        elif self.policy_type == PolicyType.ROUND_ROBIN:
-            return self._select_round_robin_worker(available_workers)
+        任务先按当前策略排序。greedy 每次把任务交给打分最低的节点并累加其负载，
+        只在打分最低的 K 个节点（K 为任务数）中用小顶堆选择；hungarian 按
+        “任务权重 x 节点打分”构造代价矩阵求最小代价匹配，每轮每个节点最多分到一个任务。
         
-        elif self.policy_type == PolicyType.FAIR_SHARE:
-            return self._select_fair_share_worker(available_workers)
+        Args:
+            tasks: 任务列表，resource_usage 为资源需求（默认 1），
+                estimated_duration 为成本感知策略下的任务权重（默认 1）
+            available_workers: 可用工作节点列表，为 None 时使用已注册的工作节点表
+            method: 匹配方式，greedy 或 hungarian
+            commit: 是否把分配后的负载写回工作节点表
+            
+        Returns:
+            (任务, 工作节点) 列表，无法分配的任务不出现在结果中
+        """
+        if method not in ("greedy", "hungarian"):
+            raise ValueError(f"Unknown assignment method: {method}")
+        if not tasks:
+            return []
+        
+        table = self.worker_table
+        if available_workers is None:
+            rows = np.flatnonzero(table.available)
+            workers = [table.workers[r] for r in rows]
+            load, usage = table.load[rows].copy(), table.usage[rows].copy()
+            cost, performance = table.cost[rows], table.performance[rows]
+            capacity = table.capacity[rows]
+        else:
+            rows = None
+            workers = available_workers
+            load, usage, cost, performance = self._columns(available_workers)
+            capacity = np.fromiter(
+                (w.get("max_load", np.inf) for w in available_workers), float, len(available_workers)
+            )
+        if not workers:
+            return []
+        
+        ordered = self.rank_tasks(tasks)
+        demands = np.fromiter((t.get("resource_usage", 1) for t in ordered), float, len(ordered))
+        
+        if self._worker_scores(load, usage, cost, performance) is None:
+            pairs = self._assign_positional(ordered, demands, load, capacity)
+        elif method == "greedy":
+            pairs = self._assign_greedy(ordered, demands, load, usage, cost, performance, capacity)
+        else:
+            pairs = self._assign_hungarian(ordered, demands, load, usage, cost, performance, capacity)
+        
+        if commit:
+            for task_index, position in pairs:
+                demand = demands[task_index]
+                if rows is None:
+                    worker = workers[position]
+                    worker["current_load"] = worker.get("current_load", 0) + demand
+                    row = table.row(worker.get("worker_id"))
+                else:
+                    row = rows[position]
+                if row is not None:
+                    table.load[row] += demand
+                    table.usage[row] += demand
+        
+        return [(ordered[task_index], workers[position]) for task_index, position in pairs]
+    
+    def rank_tasks(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        按当前策略对任务排序（稳定排序）
         
-        elif self.policy_type == PolicyType.COST_AWARE:
-            return self._select_cost_aware_worker(task, available_workers)
+        Args:
+            tasks: 任务列表
+            
+        Returns:
+            排序后的任务列表
+        """
+        if self.policy_type == PolicyType.FIFO:
+            return sorted(tasks, key=lambda task: task.get("created_at", 0))
+        if self.policy_type == PolicyType.PRIORITY:
+            return sorted(tasks, key=lambda task: task.get("priority", 0), reverse=True)
+        if self.policy_type == PolicyType.DEADLINE_AWARE:
+            current_time = self.policy_config.get("current_time", 0)
+            # 未超期的任务按截止时间在前，已超期的排在最后
+            return sorted(tasks, key=lambda task: (
+                task.get("deadline", float('inf')) <= current_time,
+                task.get("deadline", float('inf'))
+            ))
+        return list(tasks)
+    
+    def _worker_scores(
+        self,
+        load: np.ndarray,
+        usage: np.ndarray,
+        cost: np.ndarray,
+        performance: np.ndarray
+    ) -> Optional[np.ndarray]:
+        """按策略计算工作节点打分（越小越好），不按打分选择的策略返回 None"""
+        if self.policy_type == PolicyType.LEAST_LOADED:
+            return load
+        if self.policy_type == PolicyType.FAIR_SHARE:
+            return usage
+        if self.policy_type == PolicyType.COST_AWARE:
+            return cost / performance
+        return None
+    
+    def _fits(self, task: Dict[str, Any]) -> np.ndarray:
+        """工作节点表中容量足够承载该任务的行"""
+        table = self.worker_table
+        demand = task.get("resource_usage", 1) if task else 0
+        return table.load + demand <= table.capacity
+    
+    @staticmethod
+    def _columns(workers: List[Dict[str, Any]]) -> Tuple[np.ndarray, ...]:
+        """从工作节点字典列表中抽取打分所需的列"""
+        count = len(workers)
+        return (
+            np.fromiter((w.get("current_load", 0) for w in workers), float, count),
+            np.fromiter((w.get("total_usage", 0) for w in workers), float, count),
+            np.fromiter((w.get("cost_per_hour", 1.0) for w in workers), float, count),
+            np.fromiter((w.get("performance", 1.0) for w in workers), float, count),
+        )
+    
+    def _assign_positional(
+        self,
+        tasks: List[Dict[str, Any]],
+        demands: np.ndarray,
+        load: np.ndarray,
+        capacity: np.ndarray
+    ) -> List[Tuple[int, int]]:
+        """轮询（或顺序）分配，跳过容量不足的节点"""
+        count = len(load)
+        load = load.copy()
+        start = self.round_robin_index if self.policy_type == PolicyType.ROUND_ROBIN else 0
+        pairs = []
+        for task_index in range(len(tasks)):
+            for step in range(count):
+                position = (start + step) % count
+                if load[position] + demands[task_index] <= capacity[position]:
+                    load[position] += demands[task_index]
+                    pairs.append((task_index, position))
+                    if self.policy_type == PolicyType.ROUND_ROBIN:
+                        start = position + 1
+                    break
+        if self.policy_type == PolicyType.ROUND_ROBIN:
+            self.round_robin_index = start
+        return pairs
+    
+    def _assign_greedy(
+        self,
+        tasks: List[Dict[str, Any]],
+        demands: np.ndarray,
+        load: np.ndarray,
+        usage: np.ndarray,
+        cost: np.ndarray,
+        performance: np.ndarray,
+        capacity: np.ndarray
+    ) -> List[Tuple[int, int]]:
+        """
+        贪心分配：每个任务交给当前打分最低且容量足够的候选节点
         
+        候选为连最小需求都放不下的节点之外打分最低的 K 个；候选都放不下某个任务时，
+        再从全部节点中找容量足够且打分最低的节点。
+        """
+        scores = np.array(self._worker_scores(load, usage, cost, performance), dtype=float)
+        # 每个任务只改变一个节点的打分，所以打分最低的 K 个节点之外的节点通常不会被选中
+        eligible = np.where(load + demands.min() <= capacity, scores, np.inf)
+        k = min(len(tasks), len(scores))
+        candidates = np.argpartition(eligible, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        
+        load = load.copy()
+        usage = usage.copy()
+        heap = [(float(scores[c]), int(c)) for c in candidates if np.isfinite(eligible[c])]
+        heapq.heapify(heap)
+        
+        pairs = []
+        for task_index in range(len(tasks)):
+            demand = demands[task_index]
+            skipped = []
+            while heap:
+                score, position = heapq.heappop(heap)
+                if load[position] + demand <= capacity[position]:
+                    break
+                skipped.append((score, position))
+            else:
+                # 候选都已放不下：退回到全部节点中容量足够的（不在堆中的）节点
+                feasible = np.where(load + demand <= capacity, scores, np.inf)
+                position = int(np.argmin(feasible))
+                if not np.isfinite(feasible[position]):
+                    position = None
+            
+            if position is not None:
+                load[position] += demand
+                usage[position] += demand
+                pairs.append((task_index, position))
+                scores[position] = self._worker_scores(
+                    load[position], usage[position], cost[position], performance[position]
+                )
+                heapq.heappush(heap, (float(scores[position]), position))
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+        return pairs
+    
+    def _assign_hungarian(
+        self,
+        tasks: List[Dict[str, Any]],
+        demands: np.ndarray,
+        load: np.ndarray,
+        usage: np.ndarray,
+        cost: np.ndarray,
+        performance: np.ndarray,
+        capacity: np.ndarray
+    ) -> List[Tuple[int, int]]:
+        """最小代价匹配：按轮求解，每轮每个节点最多分到一个任务"""
+        if self.policy_type == PolicyType.COST_AWARE:
+            weights = np.fromiter(
+                (t.get("estimated_duration", 1) for t in tasks), float, len(tasks)
+            )
         else:
-            # 默认选择第一个可用节点
-            return available_workers[0]
+            weights = demands
+        
+        load = load.copy()
+        usage = usage.copy()
+        pending = np.arange(len(tasks))
+        pairs = []
+        while len(pending):
+            scores = self._worker_scores(load, usage, cost, performance)
+            batch = pending[:len(scores)]
+            k = len(batch)
+            
+            # 代价只依赖节点打分的单调函数，打分最低的 k 个节点足以构成最优匹配；
+            # 连本轮最小需求都放不下的节点不参与选择
+            eligible = np.where(load + demands[batch].min() <= capacity, scores, np.inf)
+            columns = np.argpartition(eligible, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            matrix = np.outer(weights[batch], scores[columns])
+            infeasible = load[columns][None, :] + demands[batch][:, None] > capacity[columns][None, :]
+            if infeasible.all():
+                break
+            penalty = (np.abs(matrix[~infeasible]).max() + 1.0) * (k + 1)
+            matrix[infeasible] = penalty
+            
+            assigned = _hungarian(matrix)
+            progressed = False
+            for row, column in enumerate(assigned):
+                if infeasible[row, column]:
+                    continue
+                position = int(columns[column])
+                task_index = int(batch[row])
+                load[position] += demands[task_index]
+                usage[position] += demands[task_index]
+                pairs.append((task_index, position))
+                progressed = True
+            
+            if not progressed:
+                break
+            done = {task_index for task_index, _ in pairs}
+            pending = np.array([i for i in pending if i not in done], dtype=np.int64)
+        
+        # 候选列都放不下的任务按贪心在全部节点中找容量足够的节点
+        if len(pending):
+            leftover = self._assign_greedy(
+                [tasks[i] for i in pending], demands[pending], load, usage, cost, performance, capacity
+            )
+            pairs.extend((int(pending[row]), position) for row, position in leftover)
+        
+        pairs.sort()
+        return pairs
     
     def _fifo_select(self, available_tasks: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """FIFO选择"""
         if not available_tasks:
             return None
         
-        # 按创建时间排序
-        sorted_tasks = sorted(
-            available_tasks,
-            key=lambda task: task.get("created_at", 0)
-        )
-        
-        return sorted_tasks[0]
+        # 最早创建的任务
+        return min(available_tasks, key=lambda task: task.get("created_at", 0))
     
     def _priority_select(self, available_tasks: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """优先级选择"""
         if not available_tasks:
             return None
         
-        # 按优先级排序
-        sorted_tasks = sorted(
-            available_tasks,
-            key=lambda task: task.get("priority", 0),
-            reverse=True
-        )
-        
-        return sorted_tasks[0]
+        # 优先级最高的任务（相同优先级取靠前的）
+        return max(available_tasks, key=lambda task: task.get("priority", 0))
     
     def _round_robin_select(self, available_tasks: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """轮询选择"""
@@ -311,90 +776,50 @@ class SchedulingPolicy:
         
         return selected_task or available_tasks[0]
     
-    def _select_least_loaded_worker(self, available_workers: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        """选择负载最少的工作节点"""
-        if not available_workers:
-            return None
-        
-        min_load = float('inf')
-        selected_worker = None
-        
-        for worker in available_workers:
-            load = worker.get("current_load", 0)
-            if load < min_load:
-                min_load = load
-                selected_worker = worker
-        
-        return selected_worker
-    
-    def _select_round_robin_worker(self, available_workers: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        """轮询选择工作节点"""
-        if not available_workers:
-            return None
-        
-        selected_worker = available_workers[self.round_robin_index % len(available_workers)]
-        self.round_robin_index += 1
-        
-        return selected_worker
-    
-    def _select_fair_share_worker(self, available_workers: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        """公平分享选择工作节点"""
-        if not available_workers:
-            return None
-        
-        # 计算每个工作节点的使用情况
-        worker_usage = {}
-        for worker in available_workers:
-            worker_id = worker.get("worker_id")
-            usage = worker.get("total_usage", 0)
-            worker_usage[worker_id] = usage
-        
-        # 选择使用最少的工作节点
-        min_usage = float('inf')
-        selected_worker = None
-        
-        for worker in available_workers:
-            worker_id = worker.get("worker_id")
-            usage = worker_usage.get(worker_id, 0)
-            if usage < min_usage:
-                min_usage = usage
-                selected_worker = worker
+    def register_worker(self, worker: Dict[str, Any]) -> None:
+        """
+        注册或更新工作节点
         
-        return selected_worker
+        Args:
+            worker: 工作节点信息
+        """
+        self.worker_table.upsert(worker)
     
-    def _select_cost_aware_worker(
-        self,
-        task: Dict[str, Any],
-        available_workers: List[Dict[str, Any]]
-    ) -> Optional[Dict[str, Any]]:
-        """成本感知选择工作节点"""
-        if not available_workers:
-            return None
-        
-        # 计算每个工作节点的成本效益
-        min_cost_benefit = float('inf')
-        selected_worker = None
+    def remove_worker(self, worker_id: str) -> bool:
+        """
+        移除工作节点
         
-        for worker in available_workers:
-            cost_per_hour = worker.get("cost_per_hour", 1.0)
-            performance = worker.get("performance", 1.0)
-            cost_benefit = cost_per_hour / performance
+        Args:
+            worker_id: 工作节点ID
             
-            if cost_benefit < min_cost_benefit:
-                min_cost_benefit = cost_benefit
-                selected_worker = worker
-        
-        return selected_worker
+        Returns:
+            是否移除
+        """
+        return self.worker_table.remove(worker_id)
     
     def update_worker_load(self, worker_id: str, load: float) -> None:
         """
-        更新工作节点负载
+        更新工作节点负载（原地修改工作节点表，未注册的节点会被注册）
         
         Args:
             worker_id: 工作节点ID
             load: 负载值
         """
-        self.worker_loads[worker_id] = load
+        if worker_id in self.worker_table:
+            self.worker_table.set_load(worker_id, load)
+        else:
+            self.worker_table.upsert({"worker_id": worker_id, "current_load": load})
+    
+    @property
+    def worker_loads(self) -> Dict[str, float]:
+        """
+        工作节点负载（由工作节点表生成的只读副本，更新请使用 update_worker_load）
+        
+        Returns:
+            工作节点ID到负载的映射
+        """
+        table = self.worker_table
+        return dict(zip(table.ids, table.load.tolist()))
     
     def update_task_priority(self, task_id: str, priority: int) -> None:
         """
@@ -419,4 +844,4 @@ class SchedulingPolicy:
             "round_robin_index": self.round_robin_index,
             "worker_loads": self.worker_loads,
             "task_priorities": self.task_priorities
-        } 
\ No newline at end of file
+        }
\ No newline at end of file
@@ -5,7 +5,10 @@
 """
 
 import asyncio
+import heapq
+import time
 import uuid
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Callable
 from enum import Enum
@@ -118,8 +121,8 @@ class TaskInfo:
         self.status = TaskStatus.CANCELLED
         self.completed_at = datetime.utcnow()
     
-    def timeout(self) -> None:
-        """任务超时"""
+    def mark_timeout(self) -> None:
+        """任务超时（timeout 属性是超时秒数，会遮蔽同名方法）"""
         self.status = TaskStatus.TIMEOUT
         self.completed_at = datetime.utcnow()
         self.error_message = "Task timeout"
@@ -143,23 +146,106 @@ class TaskInfo:
         self.execution_time = None
 
 
+class _TaskQueue:
+    """
+    单个任务类型的待调度队列
+    
+    同时维护 FIFO 队列和优先级堆，出队和取消均为惰性删除：
+    条目携带入队序号，只有与 _live 中记录一致的条目才有效。
+    失效条目过多时整体压缩。
+    """
+    
+    def __init__(self):
+        self._fifo: deque = deque()
+        self._heap: List[tuple] = []
+        self._live: Dict[str, int] = {}
+        self._seq = 0
+    
+    def __len__(self) -> int:
+        return len(self._live)
+    
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._live
+    
+    def push(self, task_id: str, priority: int) -> None:
+        self._seq += 1
+        self._live[task_id] = self._seq
+        self._fifo.append((self._seq, task_id))
+        heapq.heappush(self._heap, (-priority, self._seq, task_id))
+    
+    def remove(self, task_id: str) -> bool:
+        if self._live.pop(task_id, None) is None:
+            return False
+        self._maybe_compact()
+        return True
+    
+    def pop_fifo(self) -> Optional[str]:
+        fifo, live = self._fifo, self._live
+        while fifo:
+            seq, task_id = fifo.popleft()
+            if live.get(task_id) == seq:
+                del live[task_id]
+                self._maybe_compact()
+                return task_id
+        return None
+    
+    def pop_priority(self) -> Optional[str]:
+        heap, live = self._heap, self._live
+        while heap:
+            _, seq, task_id = heapq.heappop(heap)
+            if live.get(task_id) == seq:
+                del live[task_id]
+                self._maybe_compact()
+                return task_id
+        return None
+    
+    def _maybe_compact(self) -> None:
+        live = self._live
+        threshold = 2 * len(live) + 64
+        if len(self._fifo) > threshold:
+            self._fifo = deque(e for e in self._fifo if live.get(e[1]) == e[0])
+        if len(self._heap) > threshold:
+            self._heap = [e for e in self._heap if live.get(e[2]) == e[1]]
+            heapq.heapify(self._heap)
+
+
 class TaskScheduler:
     """
     任务调度器
     
-    负责任务调度、状态管理和调度策略
+    负责任务调度、状态管理和调度策略。
+    每个任务类型一个 _TaskQueue，出队 O(log n)；运行中任务的超时由截止时间堆管理；
+    已结束的任务从 tasks 移入 finished_tasks，只保留最近 max_finished_tasks 个。
     """
     
-    def __init__(self):
-        """初始化任务调度器"""
+    def __init__(self, max_finished_tasks: int = 10000):
+        """
+        初始化任务调度器
+        
+        Args:
+            max_finished_tasks: 保留的已结束任务数量
+        """
         self.tasks: Dict[str, TaskInfo] = {}
-        self.task_queues: Dict[str, List[str]] = {}  # 任务类型 -> 任务ID队列
+        self.task_queues: Dict[str, _TaskQueue] = {}  # 任务类型 -> 待调度队列
         self.workers: Dict[str, Dict[str, Any]] = {}  # 工作节点信息
         
         # 调度配置
         self.default_strategy = SchedulingStrategy.FIFO
         self.max_concurrent_tasks = 100
         self.task_timeout_check_interval = 30  # 秒
+        self.max_finished_tasks = max_finished_tasks
+        
+        # 超时截止时间堆: (截止时间, 运行序号, 任务ID)，按运行序号惰性删除，失效条目过多时压缩
+        self._deadlines: List[tuple] = []
+        self._run_tokens: Dict[str, int] = {}
+        self._run_seq = 0
+        
+        # 已结束任务（按结束顺序），tasks 中只保留待调度和运行中的任务
+        self.finished_tasks: "OrderedDict[str, TaskInfo]" = OrderedDict()
+        
+        # 空闲工作节点按任务类型在各自的条件上等待新任务（键 None 为不限类型的等待者）
+        self._task_available: Dict[Optional[str], asyncio.Condition] = {}
+        self._rr_cursor = 0
         
         # 统计
         self.scheduler_stats = {
@@ -216,7 +302,7 @@ class TaskScheduler:
         task_id = str(uuid.uuid4())
         
         try:
-            logger.info(
+            logger.debug(
                 "Submitting task",
                 task_id=task_id,
                 task_name=task_name,
@@ -237,21 +323,13 @@ class TaskScheduler:
             
             # 添加任务
             self.tasks[task_id] = task_info
-            
-            # 添加到队列
-            if task_type not in self.task_queues:
-                self.task_queues[task_type] = []
-            self.task_queues[task_type].append(task_id)
+            self._enqueue(task_info)
             
             # 更新统计
             self.scheduler_stats["total_tasks"] += 1
             self.scheduler_stats["pending_tasks"] += 1
             
-            logger.info(
-                "Task submitted successfully",
-                task_id=task_id,
-                task_name=task_name
-            )
+            await self._notify_task_available(task_info.task_type)
             
             return task_id
             
@@ -268,7 +346,9 @@ class TaskScheduler:
         self,
         worker_id: str,
         task_type: str = None,
-        strategy: SchedulingStrategy = None
+        strategy: SchedulingStrategy = None,
+        wait: bool = False,
+        timeout: Optional[float] = None
     ) -> Optional[TaskInfo]:
         """
         获取下一个任务
@@ -277,47 +357,36 @@ class TaskScheduler:
             worker_id: 工作节点ID
             task_type: 任务类型
             strategy: 调度策略
+            wait: 没有任务时是否挂起等待，替代轮询
+            timeout: 等待超时时间（秒），None 表示一直等待
             
         Returns:
-            任务信息
+            任务信息，不等待或等待超时时返回 None
         """
         try:
-            # 确定要调度的任务类型
-            task_types = [task_type] if task_type else list(self.task_queues.keys())
-            
-            for t_type in task_types:
-                if t_type not in self.task_queues or not self.task_queues[t_type]:
-                    continue
-                
-                # 应用调度策略
-                task_id = await self._apply_scheduling_strategy(
-                    self.task_queues[t_type], strategy or self.default_strategy
-                )
-                
-                if task_id and task_id in self.tasks:
-                    task_info = self.tasks[task_id]
-                    
-                    # 分配任务给工作节点
-                    task_info.start(worker_id)
-                    
-                    # 从队列中移除
-                    self.task_queues[t_type].remove(task_id)
-                    
-                    # 更新统计
-                    self.scheduler_stats["pending_tasks"] -= 1
-                    self.scheduler_stats["running_tasks"] += 1
-                    
-                    logger.info(
-                        "Task assigned to worker",
-                        task_id=task_id,
-                        worker_id=worker_id,
-                        strategy=strategy.value if strategy else self.default_strategy.value
+            task_info = self._dequeue(worker_id, task_type, strategy)
+            if task_info is not None or not wait:
+                return task_info
+            
+            loop = asyncio.get_running_loop()
+            deadline = None if timeout is None else loop.time() + timeout
+            condition = self._get_condition(task_type)
+            async with condition:
+                # 唤醒后任务可能已被其他消费者取走，此时继续等待直到超时
+                while True:
+                    remaining = None if deadline is None else deadline - loop.time()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    await asyncio.wait_for(
+                        condition.wait_for(lambda: self._has_pending(task_type)),
+                        remaining
                     )
-                    
-                    return task_info
+                    task_info = self._dequeue(worker_id, task_type, strategy)
+                    if task_info is not None:
+                        return task_info
             
+        except asyncio.TimeoutError:
             return None
-            
         except Exception as e:
             logger.error(
                 "Error getting next task",
@@ -326,6 +395,110 @@ class TaskScheduler:
             )
             return None
     
+    def _dequeue(
+        self,
+        worker_id: str,
+        task_type: Optional[str],
+        strategy: Optional[SchedulingStrategy]
+    ) -> Optional[TaskInfo]:
+        """按策略从队列中取出一个任务并分配给工作节点"""
+        strategy = strategy or self.default_strategy
+        
+        if task_type:
+            task_types = [task_type]
+        else:
+            task_types = list(self.task_queues.keys())
+            if strategy == SchedulingStrategy.ROUND_ROBIN and task_types:
+                # 轮询：在各任务类型之间轮流出队
+                start = self._rr_cursor % len(task_types)
+                task_types = task_types[start:] + task_types[:start]
+                self._rr_cursor += 1
+        
+        for t_type in task_types:
+            queue = self.task_queues.get(t_type)
+            if not queue:
+                continue
+            
+            if strategy == SchedulingStrategy.PRIORITY:
+                task_id = queue.pop_priority()
+            else:
+                task_id = queue.pop_fifo()
+            
+            if task_id is None or task_id not in self.tasks:
+                continue
+            
+            task_info = self.tasks[task_id]
+            
+            # 分配任务给工作节点
+            task_info.start(worker_id)
+            self._track_deadline(task_info)
+            
+            # 更新统计
+            self.scheduler_stats["pending_tasks"] -= 1
+            self.scheduler_stats["running_tasks"] += 1
+            
+            logger.debug(
+                "Task assigned to worker",
+                task_id=task_id,
+                worker_id=worker_id,
+                strategy=strategy.value
+            )
+            
+            return task_info
+        
+        return None
+    
+    def _has_pending(self, task_type: Optional[str]) -> bool:
+        if task_type:
+            return bool(self.task_queues.get(task_type))
+        return any(self.task_queues.values())
+    
+    def _get_condition(self, task_type: Optional[str]) -> asyncio.Condition:
+        condition = self._task_available.get(task_type)
+        if condition is None:
+            condition = self._task_available[task_type] = asyncio.Condition()
+        return condition
+    
+    async def _notify_task_available(self, task_type: str) -> None:
+        """唤醒一个等待该类型任务的工作节点和一个不限类型的工作节点"""
+        for key in (task_type, None):
+            condition = self._task_available.get(key)
+            if condition is not None:
+                async with condition:
+                    condition.notify()
+    
+    def _enqueue(self, task_info: TaskInfo) -> None:
+        queue = self.task_queues.get(task_info.task_type)
+        if queue is None:
+            queue = self.task_queues[task_info.task_type] = _TaskQueue()
+        queue.push(task_info.task_id, task_info.priority)
+    
+    def _track_deadline(self, task_info: TaskInfo) -> None:
+        self._run_seq += 1
+        self._run_tokens[task_info.task_id] = self._run_seq
+        heapq.heappush(
+            self._deadlines,
+            (time.monotonic() + task_info.timeout, self._run_seq, task_info.task_id)
+        )
+    
+    def _untrack_deadline(self, task_id: str) -> None:
+        """使任务的截止时间条目失效，失效条目超过一半时压缩堆"""
+        self._run_tokens.pop(task_id, None)
+        tokens = self._run_tokens
+        if len(self._deadlines) > 2 * len(tokens) + 64:
+            self._deadlines = [e for e in self._deadlines if tokens.get(e[2]) == e[1]]
+            heapq.heapify(self._deadlines)
+    
+    def _retire(self, task_id: str) -> None:
+        """将已结束任务移入 finished_tasks，超出保留数量时淘汰最早结束的任务"""
+        self._untrack_deadline(task_id)
+        task_info = self.tasks.pop(task_id, None)
+        if task_info is None:
+            return
+        self.finished_tasks[task_id] = task_info
+        while len(self.finished_tasks) > self.max_finished_tasks:
+            self.finished_tasks.popitem(last=False)
+    
     async def complete_task(self, task_id: str, execution_time: float = None) -> bool:
         """
         完成任务
@@ -352,7 +525,9 @@ class TaskScheduler:
                 self.scheduler_stats["total_execution_time"] += execution_time
                 self._update_avg_execution_time()
             
-            logger.info(
+            self._retire(task_id)
+            
+            logger.debug(
                 "Task completed",
                 task_id=task_id,
                 execution_time=execution_time
@@ -384,21 +559,21 @@ class TaskScheduler:
         
         try:
             task_info = self.tasks[task_id]
+            self._untrack_deadline(task_id)
             
             # 检查是否可以重试
             if task_info.can_retry():
                 task_info.increment_retry()
                 
                 # 重新加入队列
-                task_type = task_info.task_type
-                if task_type not in self.task_queues:
-                    self.task_queues[task_type] = []
-                self.task_queues[task_type].append(task_id)
+                self._enqueue(task_info)
                 
                 # 更新统计
                 self.scheduler_stats["running_tasks"] -= 1
                 self.scheduler_stats["pending_tasks"] += 1
                 
+                await self._notify_task_available(task_info.task_type)
+                
                 logger.info(
                     "Task retry scheduled",
                     task_id=task_id,
@@ -411,6 +586,8 @@ class TaskScheduler:
                 self.scheduler_stats["running_tasks"] -= 1
                 self.scheduler_stats["failed_tasks"] += 1
                 
+                self._retire(task_id)
+                
                 logger.error(
                     "Task failed permanently",
                     task_id=task_id,
@@ -444,16 +621,16 @@ class TaskScheduler:
             task_info = self.tasks[task_id]
             
             if task_info.status == TaskStatus.PENDING:
-                # 从队列中移除
-                task_type = task_info.task_type
-                if task_type in self.task_queues and task_id in self.task_queues[task_type]:
-                    self.task_queues[task_type].remove(task_id)
+                # 从队列中移除（惰性删除）
+                queue = self.task_queues.get(task_info.task_type)
+                if queue is not None and queue.remove(task_id):
                     self.scheduler_stats["pending_tasks"] -= 1
             elif task_info.status == TaskStatus.RUNNING:
                 self.scheduler_stats["running_tasks"] -= 1
             
             task_info.cancel()
             self.scheduler_stats["cancelled_tasks"] += 1
+            self._retire(task_id)
             
             logger.info("Task cancelled", task_id=task_id)
             return True
@@ -468,18 +645,18 @@ class TaskScheduler:
     
     async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """
-        获取任务状态
+        获取任务状态（待调度、运行中或最近结束的）
         
         Args:
             task_id: 任务ID
             
         Returns:
-            任务状态信息
+            任务状态信息，不存在或已被淘汰时为 None
         """
-        if task_id not in self.tasks:
+        task_info = self.tasks.get(task_id) or self.finished_tasks.get(task_id)
+        if task_info is None:
             return None
         
-        task_info = self.tasks[task_id]
         return task_info.to_dict()
     
     async def get_scheduler_stats(self) -> Dict[str, Any]:
@@ -501,50 +678,6 @@ class TaskScheduler:
             )
         }
     
-    async def _apply_scheduling_strategy(
-        self,
-        task_queue: List[str],
-        strategy: SchedulingStrategy
-    ) -> Optional[str]:
-        """
-        应用调度策略
-        
-        Args:
-            task_queue: 任务队列
-            strategy: 调度策略
-            
-        Returns:
-            选中的任务ID
-        """
-        if not task_queue:
-            return None
-        
-        if strategy == SchedulingStrategy.FIFO:
-            return task_queue[0]
-        
-        elif strategy == SchedulingStrategy.PRIORITY:
-            # 按优先级排序
-            sorted_tasks = sorted(
-                task_queue,
-                key=lambda task_id: self.tasks[task_id].priority,
-                reverse=True
-            )
-            return sorted_tasks[0]
-        
-        elif strategy == SchedulingStrategy.ROUND_ROBIN:
-            # 轮询
-            task_id = task_queue.pop(0)
-            task_queue.append(task_id)
-            return task_id
-        
-        elif strategy == SchedulingStrategy.LEAST_LOADED:
-            # 最少负载（这里简化处理，实际应该考虑工作节点负载）
-            return task_queue[0]
-        
-        else:
-            # 默认FIFO
-            return task_queue[0]
-    
     async def _timeout_check_loop(self) -> None:
         """超时检查循环"""
         while True:
@@ -556,21 +689,35 @@ class TaskScheduler:
                 await asyncio.sleep(5)
     
     async def _check_task_timeouts(self) -> None:
-        """检查任务超时"""
-        current_time = datetime.utcnow()
-        timeout_tasks = []
-        
-        for task_id, task_info in self.tasks.items():
-            if task_info.status == TaskStatus.RUNNING and task_info.started_at:
-                elapsed_time = (current_time - task_info.started_at).total_seconds()
-                if elapsed_time > task_info.timeout:
-                    timeout_tasks.append(task_id)
+        """检查任务超时（只弹出已到期的截止时间）"""
+        now = time.monotonic()
         
-        # 处理超时任务
-        for task_id in timeout_tasks:
-            await self.fail_task(task_id, "Task timeout")
-            self.tasks[task_id].timeout()
+        # 处理过程中堆可能被压缩替换，每次都从 self._deadlines 读取
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, token, task_id = heapq.heappop(self._deadlines)
+            if self._run_tokens.get(task_id) != token:
+                continue
+            
+            task_info = self.tasks.get(task_id)
+            if task_info is None or task_info.status != TaskStatus.RUNNING:
+                self._untrack_deadline(task_id)
+                continue
+            
+            task_info.mark_timeout()
+            self.scheduler_stats["running_tasks"] -= 1
             self.scheduler_stats["timeout_tasks"] += 1
+            self._untrack_deadline(task_id)
+            
+            if task_info.can_retry():
+                task_info.increment_retry()
+                self._enqueue(task_info)
+                self.scheduler_stats["pending_tasks"] += 1
+                await self._notify_task_available(task_info.task_type)
+            else:
+                self.scheduler_stats["failed_tasks"] += 1
+                self._retire(task_id)
+            
+            logger.warning("Task timeout", task_id=task_id, retry_count=task_info.retry_count)
     
     def _update_avg_execution_time(self) -> None:
         """更新平均执行时间"""
@@ -10,8 +10,11 @@ Agent基类
 """
 
 import asyncio
+import itertools
+import time
 import uuid
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional, Union
@@ -21,7 +24,7 @@ from pydantic import BaseModel, Field
 import structlog
 
 from src.state.context import Context
-from src.state.memory import Memory
+from src.state.memory import Memory, MemoryType
 from src.core.reasoning.reasoning_engine import ReasoningEngine
 from src.core.tools.tool_registry import LocalToolRegistry
 from src.monitoring.tracing.trace_writer import TraceWriter
@@ -41,6 +44,15 @@ class AgentStatus(Enum):
     STOPPING = "stopping"
 
 
+class AgentTaskStatus(Enum):
+    """Agent任务状态枚举"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
 class AgentType(Enum):
     """Agent类型枚举"""
     TASK = "task_agent"
@@ -70,6 +82,8 @@ class AgentConfig:
     enable_auto_recovery: bool = True
     enable_performance_monitoring: bool = True
     session_timeout: int = 3600  # 会话超时时间（秒）
+    stop_timeout: float = 30.0  # 停止时等待队列中任务完成的时间（秒）
+    task_history_size: int = 1000  # 保留的已结束任务数
 
 
 class AgentMessage(BaseModel):
@@ -97,6 +111,12 @@ class AgentTask(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     timeout: Optional[int] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    # 任务自身的状态，Agent 不再用共享的 BUSY/IDLE 表示单个任务
+    status: AgentTaskStatus = AgentTaskStatus.QUEUED
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
 
 
 class BaseAgent(ABC):
@@ -109,6 +129,10 @@ class BaseAgent(ABC):
     - 推理决策
     - 工具调用
     - 错误处理
+    
+    submit_task 提交的任务进入优先级队列（priority 越大越先执行，同优先级按提交顺序），
+    由 max_concurrent_tasks 个工作协程并发执行；stop() 先等待队列中的任务执行完
+    （最多 stop_timeout 秒），超时未执行的任务标记为取消。
     """
     
     def __init__(self, config: AgentConfig):
@@ -130,10 +154,16 @@ class BaseAgent(ABC):
         self.last_active = datetime.utcnow()
         self.session_id = str(uuid.uuid4())
         
-        # 任务管理
+        # 任务管理：队列条目为 (-priority, 提交序号, 任务)，序号保证同优先级 FIFO 且不比较任务对象
         self.active_tasks: Dict[str, AgentTask] = {}
-        self.task_queue: asyncio.Queue = asyncio.Queue()
+        self.queued_tasks: Dict[str, AgentTask] = {}
+        self.finished_tasks: "OrderedDict[str, AgentTask]" = OrderedDict()
+        self.task_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
         self.max_concurrent_tasks = config.max_concurrent_tasks
+        self._task_seq = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        # 工作协程与直接调用的 execute_task 共享的并发名额
+        self._task_slots = asyncio.Semaphore(self.max_concurrent_tasks)
         
         # 核心组件
         self.context = Context(agent_id=self.agent_id)
@@ -234,6 +264,9 @@ class BaseAgent(ABC):
         """
         执行任务
         
+        直接调用时不经过任务队列，但与队列中的任务共享 max_concurrent_tasks 个并发名额，
+        名额用完时等待。
+        
         Args:
             task: 任务描述
             **kwargs: 额外参数
@@ -241,77 +274,85 @@ class BaseAgent(ABC):
         Returns:
             执行结果
         """
-        task_id = str(uuid.uuid4())
-        trace_id = str(uuid.uuid4())
-        
-        # 创建任务对象
         agent_task = AgentTask(
-            task_id=task_id,
             agent_id=self.agent_id,
             task_type="execute",
             task_data={"task": task, **kwargs}
         )
+        return await self._run_task(agent_task)
+    
+    async def _run_task(self, agent_task: AgentTask) -> Dict[str, Any]:
+        """
+        取得并发名额后执行单个任务并更新任务状态
         
-        try:
-            # 检查并发限制
-            if len(self.active_tasks) >= self.max_concurrent_tasks:
-                raise RuntimeError(f"Agent {self.agent_id} has reached maximum concurrent tasks limit")
-            
-            self.status = AgentStatus.BUSY
-            self.last_active = datetime.utcnow()
-            
-            # 添加到活动任务
-            self.active_tasks[task_id] = agent_task
-            
-            # 开始追踪
-            await self.trace_manager.start_trace(trace_id, task)
-            
-            # 更新上下文
-            await self.context.add_message("user", task)
-            
-            # 推理决策
-            reasoning_result = await self._reason(task, **kwargs)
-            
-            # 执行动作
-            execution_result = await self._execute(reasoning_result, **kwargs)
-            
-            # 更新状态
-            await self._update_state(execution_result)
-            
-            # 记录统计
-            self._update_stats(execution_result)
-            
-            # 结束追踪
-            await self.trace_manager.end_trace(trace_id, execution_result)
-            
-            # 从活动任务中移除
-            del self.active_tasks[task_id]
-            
-            self.status = AgentStatus.IDLE
-            
-            logger.info(
-                "Task executed successfully",
-                agent_id=self.agent_id,
-                task_id=task_id,
-                trace_id=trace_id,
-                task=task
-            )
+        Args:
+            agent_task: 任务对象
             
-            return {
-                "task_id": task_id,
-                "trace_id": trace_id,
-                "status": "success",
-                "result": execution_result,
-                "reasoning": reasoning_result
-            }
+        Returns:
+            执行结果
+        """
+        task_id = agent_task.task_id
+        trace_id = str(uuid.uuid4())
+        kwargs = dict(agent_task.task_data)
+        task = kwargs.pop("task")
+        
+        try:
+            async with self._task_slots:
+                started = time.perf_counter()
+                agent_task.status = AgentTaskStatus.RUNNING
+                agent_task.started_at = datetime.utcnow()
+                self.last_active = agent_task.started_at
+                
+                # 添加到活动任务
+                self.active_tasks[task_id] = agent_task
+                
+                # 开始追踪
+                await self.trace_manager.start_trace(trace_id, task)
+                
+                # 更新上下文
+                await self.context.add_message("user", task)
+                
+                # 推理决策
+                reasoning_result = await self._reason(task, **kwargs)
+                
+                # 执行动作
+                execution_result = await self._execute(reasoning_result, **kwargs)
+                
+                # 更新状态
+                await self._update_state(execution_result)
+                
+                # 记录统计
+                self._update_stats(execution_result, time.perf_counter() - started)
+                
+                # 结束追踪
+                await self.trace_manager.end_trace(trace_id, execution_result)
+                
+                logger.info(
+                    "Task executed successfully",
+                    agent_id=self.agent_id,
+                    task_id=task_id,
+                    trace_id=trace_id,
+                    task=task
+                )
+                
+                result = {
+                    "task_id": task_id,
+                    "trace_id": trace_id,
+                    "status": "success",
+                    "result": execution_result,
+                    "reasoning": reasoning_result
+                }
+                self._finish_task(agent_task, AgentTaskStatus.COMPLETED, result=result)
+                return result
+            
+        except asyncio.CancelledError:
+            self._finish_task(agent_task, AgentTaskStatus.CANCELLED)
+            raise
             
         except Exception as e:
-            # 从活动任务中移除
-            if task_id in self.active_tasks:
-                del self.active_tasks[task_id]
-            
+            self.stats["tasks_failed"] += 1
+            self._finish_task(agent_task, AgentTaskStatus.FAILED, error=str(e))
             await self._handle_error("execute_task", e, task_id=task_id)
-            self.status = AgentStatus.ERROR
             
             return {
                 "task_id": task_id,
@@ -320,18 +361,67 @@ class BaseAgent(ABC):
                 "error": str(e)
             }
     
+    def _finish_task(
+        self,
+        agent_task: AgentTask,
+        status: AgentTaskStatus,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """
+        记录任务结束状态，已结束的任务只保留最近 task_history_size 个
+        
+        Args:
+            agent_task: 任务对象
+            status: 结束状态
+            result: 执行结果
+            error: 错误信息
+        """
+        self.active_tasks.pop(agent_task.task_id, None)
+        self.queued_tasks.pop(agent_task.task_id, None)
+        agent_task.status = status
+        agent_task.completed_at = datetime.utcnow()
+        agent_task.result = result
+        agent_task.error = error
+        
+        self.finished_tasks[agent_task.task_id] = agent_task
+        while len(self.finished_tasks) > self.config.task_history_size:
+            self.finished_tasks.popitem(last=False)
+    
+    def get_task(self, task_id: str) -> Optional[AgentTask]:
+        """
+        获取任务（排队中、执行中或最近结束的）
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            任务对象，不存在时为 None
+        """
+        return (
+            self.active_tasks.get(task_id)
+            or self.queued_tasks.get(task_id)
+            or self.finished_tasks.get(task_id)
+        )
+    
     async def submit_task(self, task: str, priority: int = 0, **kwargs) -> str:
         """
         提交任务到队列
         
         Args:
             task: 任务描述
-            priority: 任务优先级
+            priority: 任务优先级，越大越先执行
             **kwargs: 额外参数
             
         Returns:
             任务ID
+            
+        Raises:
+            RuntimeError: Agent 正在停止或已停止
         """
+        if self.status in (AgentStatus.STOPPING, AgentStatus.TERMINATED):
+            raise RuntimeError(f"Agent {self.agent_id} is not accepting tasks")
+        
         task_id = str(uuid.uuid4())
         agent_task = AgentTask(
             task_id=task_id,
@@ -341,7 +431,8 @@ class BaseAgent(ABC):
             priority=priority
         )
         
-        await self.task_queue.put((priority, agent_task))
+        self.queued_tasks[task_id] = agent_task
+        await self.task_queue.put((-priority, next(self._task_seq), agent_task))
         logger.info("Task submitted to queue", agent_id=self.agent_id, task_id=task_id)
         
         return task_id
@@ -385,16 +476,22 @@ class BaseAgent(ABC):
         Returns:
             状态信息
         """
+        # 运行中的 Agent 有任务在执行时报告为 BUSY
+        status = self.status
+        if status == AgentStatus.IDLE and self.active_tasks:
+            status = AgentStatus.BUSY
+        
         return {
             "agent_id": self.agent_id,
             "agent_type": self.agent_type.value,
             "name": self.name,
-            "status": self.status.value,
+            "status": status.value,
             "created_at": self.created_at.isoformat(),
             "last_active": self.last_active.isoformat(),
             "session_id": self.session_id,
             "active_tasks_count": len(self.active_tasks),
             "queue_size": self.task_queue.qsize(),
+            "workers": len(self._workers),
             "stats": self.stats,
             "performance_metrics": self.performance_metrics,
             "error_count": len(self.error_history)
@@ -510,7 +607,7 @@ class BaseAgent(ABC):
             # 更新内存
             await self.memory.add_memory(
                 content=str(execution_result),
-                memory_type="execution_result",
+                memory_type=MemoryType.AGENT_OUTPUT,
                 context_id=context_id,
                 metadata={"timestamp": datetime.utcnow().isoformat()}
             )
@@ -520,17 +617,15 @@ class BaseAgent(ABC):
             logger.error("State update failed", agent_id=self.agent_id, error=str(e))
             raise
     
-    def _update_stats(self, execution_result: Dict[str, Any]) -> None:
+    def _update_stats(self, execution_result: Dict[str, Any], execution_time: float = 0.0) -> None:
         """
         更新统计信息
         
         Args:
             execution_result: 执行结果
+            execution_time: 任务执行耗时（秒）
         """
         self.stats["tasks_completed"] += 1
-        
-        # 计算执行时间（这里简化处理）
-        execution_time = 1.0  # 实际应该从开始时间计算
         self.stats["total_execution_time"] += execution_time
         
         # 更新平均响应时间
@@ -584,34 +679,51 @@ class BaseAgent(ABC):
             raise
     
     async def _start_task_processor(self) -> None:
-        """启动任务处理器"""
-        # 创建任务处理任务
-        asyncio.create_task(self._task_processor_loop())
-        logger.info("Task processor started", agent_id=self.agent_id)
+        """启动任务处理器：max_concurrent_tasks 个工作协程"""
+        self._workers = [
+            asyncio.create_task(self._task_worker())
+            for _ in range(self.max_concurrent_tasks)
+        ]
+        logger.info("Task processor started", agent_id=self.agent_id, workers=len(self._workers))
     
     async def _stop_task_processor(self) -> None:
-        """停止任务处理器"""
-        # 这里应该实现优雅停止逻辑
+        """停止任务处理器：等待队列排空，超时后取消剩余任务"""
+        try:
+            await asyncio.wait_for(self.task_queue.join(), self.config.stop_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Task queue drain timed out",
+                agent_id=self.agent_id,
+                queued=self.task_queue.qsize(),
+                running=len(self.active_tasks)
+            )
+        
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        
+        # 未执行的任务标记为取消
+        while not self.task_queue.empty():
+            _, _, agent_task = self.task_queue.get_nowait()
+            self._finish_task(agent_task, AgentTaskStatus.CANCELLED)
+            self.task_queue.task_done()
+        
         logger.info("Task processor stopped", agent_id=self.agent_id)
     
-    async def _task_processor_loop(self) -> None:
-        """任务处理循环"""
-        while self.status != AgentStatus.TERMINATED:
+    async def _task_worker(self) -> None:
+        """工作协程：按优先级从队列取任务执行"""
+        while True:
+            _, _, agent_task = await self.task_queue.get()
             try:
-                # 从队列获取任务
-                priority, task = await asyncio.wait_for(
-                    self.task_queue.get(), 
-                    timeout=1.0
-                )
-                
-                # 执行任务
-                await self.execute_task(task.task_data["task"], **task.task_data)
-                
-            except asyncio.TimeoutError:
-                continue
+                await self._run_task(agent_task)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error("Task processing error", agent_id=self.agent_id, error=str(e))
                 await self._handle_error("task_processor", e)
+            finally:
+                self.task_queue.task_done()
     
     async def _start_performance_monitoring(self) -> None:
         """启动性能监控"""
@@ -2,10 +2,23 @@
 工作流生成模块
 
 提供自然语言生成工作流的功能。
+
+WorkflowGenerationAgent 依赖工作流适配器（n8n 适配器需要 aiohttp），
+按 PEP 562 在首次访问时才导入，导入推理器子模块不受影响。
 """
 
-from .workflow_generation_agent import WorkflowGenerationAgent
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .workflow_generation_agent import WorkflowGenerationAgent
 
 __all__ = [
     'WorkflowGenerationAgent'
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name == 'WorkflowGenerationAgent':
+        from .workflow_generation_agent import WorkflowGenerationAgent
+        return WorkflowGenerationAgent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
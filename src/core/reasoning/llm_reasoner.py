@@ -10,13 +10,44 @@ LLM推理器
 import json
 import re
 from typing import Any, Dict, List, Optional
-import openai
 import structlog
 from src.infrastructure.config.unified_config import UnifiedConfigManager
 import asyncio
 
+from .prompt_fragments import FragmentCache, catalog_version
+
 logger = structlog.get_logger(__name__)
 
+_SYSTEM_PROMPT = """你是一个智能Agent，负责分析任务并决定下一步行动。
+
+你的主要职责是：
+1. 理解用户的任务需求
+2. 分析当前上下文
+3. 选择合适的行动方案
+4. 提供清晰的推理过程
+
+可用的行动类型：
+- tool_call: 调用工具执行特定功能
+- delegate: 将任务委托给其他Agent
+- respond: 直接响应用户
+- skip: 跳过当前任务
+
+请以JSON格式返回你的决策，包含以下字段：
+{
+    "action": "行动类型",
+    "parameters": {
+        // 行动的具体参数
+    },
+    "confidence": 0.0-1.0的置信度,
+    "reasoning": "推理过程说明"
+}"""
+
+
+def _openai():
+    """按需导入 openai：导入开销较大，只在实际调用 LLM 或配置凭据时加载"""
+    import openai
+    return openai
+
 
 class LLMReasoner:
     """
@@ -56,9 +87,12 @@ class LLMReasoner:
                 api_key = None
                 logger.warning("自动获取oneapi.api_key失败", error=str(e))
         if api_key:
-            openai.api_key = api_key
+            _openai().api_key = api_key
         if base_url:
-            openai.base_url = base_url
+            _openai().base_url = base_url
+        
+        # 工具目录等静态提示词片段
+        self.prompt_fragments = FragmentCache()
         
         # 统计信息
         self.stats = {
@@ -172,45 +206,25 @@ class LLMReasoner:
         prompt_parts = []
         
         # 系统提示
-        system_prompt = """你是一个智能Agent，负责分析任务并决定下一步行动。
-
-你的主要职责是：
-1. 理解用户的任务需求
-2. 分析当前上下文
-3. 选择合适的行动方案
-4. 提供清晰的推理过程
-
-可用的行动类型：
-- tool_call: 调用工具执行特定功能
-- delegate: 将任务委托给其他Agent
-- respond: 直接响应用户
-- skip: 跳过当前任务
-
-请以JSON格式返回你的决策，包含以下字段：
-{
-    "action": "行动类型",
-    "parameters": {
-        // 行动的具体参数
-    },
-    "confidence": 0.0-1.0的置信度,
-    "reasoning": "推理过程说明"
-}"""
-        
-        prompt_parts.append(system_prompt)
+        prompt_parts.append(_SYSTEM_PROMPT)
         
         # 添加上下文
         if context:
-            context_text = "上下文信息：\n"
-            for i, ctx in enumerate(context[-5:], 1):  # 只取最近5条
-                context_text += f"{i}. {ctx.get('role', 'unknown')}: {ctx.get('content', '')}\n"
-            prompt_parts.append(context_text)
+            prompt_parts.append("上下文信息：\n" + "".join(
+                f"{i}. {ctx.get('role', 'unknown')}: {ctx.get('content', '')}\n"
+                for i, ctx in enumerate(context[-5:], 1)  # 只取最近5条
+            ))
         
-        # 添加可用工具
+        # 添加可用工具（按工具目录版本复用）
         if available_tools:
-            tools_text = "可用工具：\n"
-            for tool in available_tools:
-                tools_text += f"- {tool.get('name', 'unknown')}: {tool.get('description', '')}\n"
-            prompt_parts.append(tools_text)
+            prompt_parts.append(self.prompt_fragments.get(
+                "tools",
+                catalog_version(available_tools),
+                lambda: "可用工具：\n" + "".join(
+                    f"- {tool.get('name', 'unknown')}: {tool.get('description', '')}\n"
+                    for tool in available_tools
+                )
+            ))
         
         # 添加任务
         task_text = f"当前任务：{task}\n\n请分析任务并决定下一步行动："
@@ -224,7 +238,7 @@ class LLMReasoner:
         """
         try:
             # 优先用异步acreate，若无则降级为同步create
-            chat_completions = getattr(getattr(openai, "chat", None), "completions", None)
+            chat_completions = getattr(getattr(_openai(), "chat", None), "completions", None)
             if hasattr(chat_completions, "acreate"):
                 response = await chat_completions.acreate(
                     model=self.model,
@@ -0,0 +1,62 @@
+"""
+提示词静态片段缓存
+
+工具目录等片段只依赖很少变化的输入，按输入版本记忆渲染结果，
+每次构建提示词时只拼接随任务变化的部分。
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+def catalog_version(tools: List[Dict[str, Any]]) -> Hashable:
+    """
+    工具目录的版本
+    
+    LocalToolRegistry.get_available_tools 返回的 ToolCatalog 自带版本号；
+    调用方自行构造的列表按名称和描述计算指纹。
+    
+    Args:
+        tools: 工具列表
+    
+    Returns:
+        Hashable: 版本标识，工具名称或描述变化时随之变化
+    """
+    version = getattr(tools, "version", None)
+    if version is not None:
+        return version
+    return tuple((tool.get("name"), tool.get("description")) for tool in tools)
+
+
+class FragmentCache:
+    """按版本记忆的提示词片段"""
+    
+    def __init__(self, max_entries: int = 32):
+        """
+        Args:
+            max_entries: 最多保留的片段数，超出时淘汰最早写入的
+        """
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[Hashable, str]] = {}
+    
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], str]) -> str:
+        """
+        获取片段，版本变化时重新构建
+        
+        Args:
+            key: 片段名称
+            version: 片段输入的版本
+            build: 构建片段的函数
+        
+        Returns:
+            str: 片段文本
+        """
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        text = build()
+        self._entries.pop(key, None)
+        self._entries[key] = (version, text)
+        if len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        return text
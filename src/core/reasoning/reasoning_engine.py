@@ -19,6 +19,7 @@ from pydantic import BaseModel
 from .llm_reasoner import LLMReasoner
 from .rule_reasoner import RuleReasoner
 from .rl_reasoner import RLReasoner
+from .prompt_fragments import FragmentCache, catalog_version
 
 
 logger = structlog.get_logger(__name__)
@@ -82,6 +83,9 @@ class ReasoningEngine:
         self.rule_reasoner = RuleReasoner()
         self.rl_reasoner = RLReasoner()
         
+        # 工具目录等静态提示词片段
+        self.prompt_fragments = FragmentCache()
+        
         # 统计信息
         self.stats = {
             "total_reasoning_calls": 0,
@@ -240,13 +244,16 @@ class ReasoningEngine:
             for mem in memory:
                 prompt_parts.append(f"- {mem.get('content', str(mem))}")
         
-        # 添加可用工具
+        # 添加可用工具（按工具目录版本复用）
         if available_tools:
-            prompt_parts.append("\n可用工具:")
-            for tool in available_tools:
-                tool_name = tool.get('name', 'unknown')
-                tool_desc = tool.get('description', '')
-                prompt_parts.append(f"- {tool_name}: {tool_desc}")
+            prompt_parts.append(self.prompt_fragments.get(
+                "tools",
+                catalog_version(available_tools),
+                lambda: "\n可用工具:\n" + "\n".join(
+                    f"- {tool.get('name', 'unknown')}: {tool.get('description', '')}"
+                    for tool in available_tools
+                )
+            ))
         
         # 添加推理指令
         prompt_parts.append("\n请根据上述信息进行推理，并选择最合适的行动。")
@@ -8,13 +8,21 @@
 - 在线学习
 """
 
-import numpy as np
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 import structlog
 
+if TYPE_CHECKING:
+    import numpy as np
+
 logger = structlog.get_logger(__name__)
 
 
+def _numpy():
+    """按需导入 NumPy，只有实际使用 RL 推理时才加载"""
+    import numpy
+    return numpy
+
+
 class RLReasoner:
     """
     强化学习推理器
@@ -125,7 +133,7 @@ class RLReasoner:
         task: str,
         context: List[Dict[str, Any]] = None,
         available_tools: List[Dict[str, Any]] = None
-    ) -> np.ndarray:
+    ) -> "np.ndarray":
         """
         构建状态向量
         
@@ -137,6 +145,7 @@ class RLReasoner:
         Returns:
             状态向量
         """
+        np = _numpy()
         # 简化的状态构建
         state = np.zeros(self.state_dim)
         
@@ -158,8 +167,9 @@ class RLReasoner:
         
         return state
     
-    def _extract_task_features(self, task: str) -> np.ndarray:
+    def _extract_task_features(self, task: str) -> "np.ndarray":
         """提取任务特征"""
+        np = _numpy()
         features = np.zeros(20)
         
         # 简单的关键词特征
@@ -183,8 +193,9 @@ class RLReasoner:
         
         return features
     
-    def _extract_context_features(self, context: List[Dict[str, Any]] = None) -> np.ndarray:
+    def _extract_context_features(self, context: List[Dict[str, Any]] = None) -> "np.ndarray":
         """提取上下文特征"""
+        np = _numpy()
         features = np.zeros(20)
         
         if not context:
@@ -204,8 +215,9 @@ class RLReasoner:
         
         return features
     
-    def _extract_tool_features(self, available_tools: List[Dict[str, Any]] = None) -> np.ndarray:
+    def _extract_tool_features(self, available_tools: List[Dict[str, Any]] = None) -> "np.ndarray":
         """提取工具特征"""
+        np = _numpy()
         features = np.zeros(20)
         
         if not available_tools:
@@ -231,8 +243,9 @@ class RLReasoner:
         
         return features
     
-    def _extract_history_features(self) -> np.ndarray:
+    def _extract_history_features(self) -> "np.ndarray":
         """提取历史特征"""
+        np = _numpy()
         features = np.zeros(4)
         
         # 成功率
@@ -247,7 +260,7 @@ class RLReasoner:
         
         return features
     
-    def _select_action(self, state: np.ndarray) -> str:
+    def _select_action(self, state: "np.ndarray") -> str:
         """
         选择动作
         
@@ -257,6 +270,7 @@ class RLReasoner:
         Returns:
             选择的动作
         """
+        np = _numpy()
         if not self.is_trained or self.model is None:
             # 未训练时使用随机策略
             return np.random.choice(self.action_space)
@@ -271,7 +285,7 @@ class RLReasoner:
             # 回退到随机选择
             return np.random.choice(self.action_space)
     
-    def _heuristic_action_selection(self, state: np.ndarray) -> np.ndarray:
+    def _heuristic_action_selection(self, state: "np.ndarray") -> "np.ndarray":
         """
         启发式动作选择
         
@@ -281,6 +295,7 @@ class RLReasoner:
         Returns:
             动作概率分布
         """
+        np = _numpy()
         # 基于任务特征的启发式规则
         task_features = state[:10]
         
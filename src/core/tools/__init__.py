@@ -8,10 +8,11 @@
 - 工具扩展
 """
 
-from .tool_registry import LocalToolRegistry
+from .tool_registry import LocalToolRegistry, ToolCatalog
 from .base_tool import BaseTool
 
 __all__ = [
     "LocalToolRegistry",
+    "ToolCatalog",
     "BaseTool",
 ] 
\ No newline at end of file
@@ -2,6 +2,7 @@
 # 避免与 infrastructure/registry/tool_registry.py 的全局ToolRegistry混淆
 
 import asyncio
+import itertools
 from typing import Any, Dict, List, Optional, Callable
 from enum import Enum
 import structlog
@@ -25,6 +26,22 @@ class ToolStatus(Enum):
     LOADING = "loading"
 
 
+_registry_ids = itertools.count(1)
+
+
+class ToolCatalog(list):
+    """
+    工具列表快照
+    
+    version 为 (注册表编号, 目录版本号)，工具注册/注销时目录版本号递增，
+    提示词构建据此复用已渲染的工具目录片段。
+    """
+    
+    def __init__(self, tools: List[Dict[str, Any]], version: tuple):
+        super().__init__(tools)
+        self.version = version
+
+
 class LocalToolRegistry:
     """
     工具注册表
@@ -40,6 +57,10 @@ class LocalToolRegistry:
         self.tool_status = {}
         self.tool_stats = {}
         
+        # 目录版本：工具名称/描述变化时递增
+        self.registry_id = next(_registry_ids)
+        self.catalog_version = 0
+        
         # 注册默认工具
         self._register_default_tools()
         
@@ -80,6 +101,7 @@ class LocalToolRegistry:
             "errors": 0,
             "total_time": 0.0
         }
+        self.catalog_version += 1
         
         logger.info("Tool registered", name=name, description=description)
     
@@ -100,6 +122,7 @@ class LocalToolRegistry:
             del self.tool_status[name]
         if name in self.tool_stats:
             del self.tool_stats[name]
+        self.catalog_version += 1
         
         logger.info("Tool unregistered", name=name)
     
@@ -143,19 +166,19 @@ class LocalToolRegistry:
             "timeout": metadata.get("timeout", 30)
         }
     
-    def get_available_tools(self) -> List[Dict[str, Any]]:
+    def get_available_tools(self) -> ToolCatalog:
         """
         获取可用工具列表
         
         Returns:
-            工具列表
+            工具列表（带目录版本号）
         """
         tools = []
         for name in self.tools:
             tool_info = self.get_tool_info(name)
             if tool_info:
                 tools.append(tool_info)
-        return tools
+        return ToolCatalog(tools, (self.registry_id, self.catalog_version))
     
     def discover_tools(self, pattern: str = None) -> List[Dict[str, Any]]:
         """
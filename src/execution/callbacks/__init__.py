@@ -10,9 +10,12 @@
 """
 
 from .callback_handler import CallbackHandler, CallbackType, CallbackStatus, CallbackResult
+from .callback_bus import CallbackBus, CallbackLane
 
 __all__ = [
     "CallbackHandler",
+    "CallbackBus",
+    "CallbackLane",
     "CallbackType", 
     "CallbackStatus",
     "CallbackResult"
@@ -0,0 +1,217 @@
+"""
+回调总线
+
+按通道分发已注册的回调：
+- CRITICAL：在调用方协程中内联等待（状态更新、fallback 等决定执行链走向的回调）
+- BACKGROUND：放入有界队列后立即返回，由后台工作协程按入队顺序执行
+  （审计 trace、memory 写入等不影响执行链的回调）
+
+后台工作协程每次最多取出 max_batch 条，注册了批量回调的名称合并为一次调用，
+高频的步骤事件不再逐条调用下游。
+"""
+
+import asyncio
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+def _snapshot(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """浅拷贝参数中的字典值"""
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in kwargs.items()}
+
+
+class CallbackLane(Enum):
+    """回调通道枚举"""
+    CRITICAL = "critical"
+    BACKGROUND = "background"
+
+
+class CallbackBus:
+    """
+    回调总线
+    
+    未指定通道的回调按 default_lanes 取通道，都没有时为 CRITICAL。
+    后台回调的异常只记录日志和计数，不会传回调用方。
+    """
+    
+    def __init__(
+        self,
+        default_lanes: Optional[Dict[str, CallbackLane]] = None,
+        max_queue_size: int = 10000,
+        max_batch: int = 64
+    ):
+        """
+        初始化回调总线
+        
+        Args:
+            default_lanes: 回调名称到默认通道的映射
+            max_queue_size: 后台队列容量，队列满时 dispatch 等待（背压）
+            max_batch: 后台工作协程单次最多处理的回调数
+        """
+        self.callbacks: Dict[str, Callable] = {}
+        self.batch_callbacks: Dict[str, Callable] = {}
+        self.lanes: Dict[str, CallbackLane] = {}
+        self.default_lanes = dict(default_lanes or {})
+        self.max_queue_size = max_queue_size
+        self.max_batch = max_batch
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        self.stats = {
+            "inline_calls": 0,
+            "enqueued": 0,
+            "delivered": 0,
+            "batches": 0,
+            "batched_calls": 0,
+            "failed": 0
+        }
+    
+    def register(
+        self,
+        name: str,
+        callback_func: Callable,
+        lane: Optional[CallbackLane] = None,
+        batch_func: Optional[Callable] = None
+    ) -> None:
+        """
+        注册回调
+        
+        Args:
+            name: 回调名称
+            callback_func: 回调函数，以关键字参数调用
+            lane: 回调通道，None 时使用默认通道
+            batch_func: 批量回调，参数为同一批的关键字参数字典列表；只对后台通道生效
+        """
+        self.callbacks[name] = callback_func
+        if lane is not None:
+            self.lanes[name] = lane
+        if batch_func is not None:
+            self.batch_callbacks[name] = batch_func
+        else:
+            self.batch_callbacks.pop(name, None)
+    
+    def lane_of(self, name: str) -> CallbackLane:
+        """获取回调所在的通道"""
+        lane = self.lanes.get(name)
+        if lane is None:
+            lane = self.default_lanes.get(name, CallbackLane.CRITICAL)
+        return lane
+    
+    async def dispatch(self, name: str, **kwargs) -> Any:
+        """
+        分发回调
+        
+        CRITICAL 回调内联执行并返回结果；BACKGROUND 回调入队后返回 None。
+        入队时对字典参数做浅拷贝，调用方之后修改原字典不影响已入队的回调。
+        
+        Args:
+            name: 回调名称
+            **kwargs: 回调参数
+        
+        Returns:
+            CRITICAL 回调的返回值
+        """
+        if self.lane_of(name) is CallbackLane.CRITICAL:
+            self.stats["inline_calls"] += 1
+            return await self.callbacks[name](**kwargs)
+        
+        queue = self._ensure_worker()
+        item = (name, _snapshot(kwargs))
+        self.stats["enqueued"] += 1
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            await queue.put(item)
+        return None
+    
+    def _ensure_worker(self) -> asyncio.Queue:
+        """在当前事件循环上启动后台工作协程"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            if self._queue is not None and self._loop is not loop and not self._queue.empty():
+                logger.warning("Dropping callbacks queued on a closed event loop", count=self._queue.qsize())
+            if self._queue is None or self._loop is not loop:
+                self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._loop = loop
+            self._worker = loop.create_task(self._run())
+        return self._queue
+    
+    async def _run(self) -> None:
+        """后台工作协程：按批取出并投递回调"""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._deliver(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def _deliver(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        投递一批回调
+        
+        没有批量回调的名称逐条调用，有批量回调的名称在其后各合并为一次调用；
+        同一名称内保持入队顺序。
+        """
+        self.stats["batches"] += 1
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for name, kwargs in batch:
+            if name in self.batch_callbacks:
+                grouped.setdefault(name, []).append(kwargs)
+            else:
+                await self._call(name, self.callbacks.get(name), kwargs)
+        
+        for name, calls in grouped.items():
+            try:
+                await self.batch_callbacks[name](calls)
+                self.stats["delivered"] += len(calls)
+                self.stats["batched_calls"] += 1
+            except Exception as e:
+                self.stats["failed"] += len(calls)
+                logger.error("Background batch callback failed", name=name, size=len(calls), error=str(e))
+    
+    async def _call(self, name: str, callback_func: Optional[Callable], kwargs: Dict[str, Any]) -> None:
+        """执行一条后台回调"""
+        try:
+            if callback_func is None:
+                raise KeyError(f"Callback {name} is not registered")
+            await callback_func(**kwargs)
+            self.stats["delivered"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error("Background callback failed", name=name, error=str(e))
+    
+    async def flush(self) -> None:
+        """等待已入队的后台回调全部执行完"""
+        if self._queue is not None and self._worker is not None and not self._worker.done():
+            await self._queue.join()
+    
+    async def close(self) -> None:
+        """执行完已入队的回调后停止后台工作协程"""
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取总线统计信息"""
+        return {
+            **self.stats,
+            "pending": self._queue.qsize() if self._queue is not None else 0
+        }
@@ -10,7 +10,9 @@
 """
 
 import asyncio
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Callable
 from enum import Enum
@@ -19,6 +21,8 @@ import structlog
 from .tool_result import ToolResult
 from .callback_policy import CallbackPolicy
 from .callback_context import CallbackContext
+from .callback_bus import CallbackBus, CallbackLane
+from ...utils.timestamps import ns_to_utc
 
 logger = structlog.get_logger(__name__)
 
@@ -42,7 +46,14 @@ class CallbackStatus(Enum):
 
 
 class CallbackResult:
-    """回调结果结构"""
+    """
+    回调结果结构
+    
+    创建时间记为纪元纳秒（timestamp_ns），timestamp 属性为 naive UTC datetime
+    （见 utils.timestamps）。
+    """
+    
+    __slots__ = ('callback_id', 'status', 'result', 'error', 'metadata', 'timestamp_ns')
     
     def __init__(
         self,
@@ -67,7 +78,12 @@ class CallbackResult:
         self.result = result
         self.error = error
         self.metadata = metadata or {}
-        self.timestamp = datetime.utcnow()
+        self.timestamp_ns = time.time_ns()
+    
+    @property
+    def timestamp(self) -> datetime:
+        """创建时间（naive UTC）"""
+        return ns_to_utc(self.timestamp_ns)
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -81,26 +97,50 @@ class CallbackResult:
         }
 
 
+# 不影响执行链走向的回调默认走后台通道
+DEFAULT_CALLBACK_LANES = {
+    "memory_write": CallbackLane.BACKGROUND,
+    "trace_write": CallbackLane.BACKGROUND,
+}
+
+
 class CallbackHandler:
     """
     回调处理器
     
-    实现企业级架构的回调控制机制
+    实现企业级架构的回调控制机制。回调经 CallbackBus 分发：memory_write、
+    trace_write 默认走后台通道，入队后立即返回；status_update、fallback_handler
+    等仍内联等待。回调结果按 LRU 最多保留 max_results 条，统计信息持续累计。
     """
     
-    def __init__(self, agent_id: str):
+    def __init__(
+        self,
+        agent_id: str,
+        max_results: int = 1000,
+        max_queue_size: int = 10000,
+        max_batch: int = 64
+    ):
         """
         初始化回调处理器
         
         Args:
             agent_id: Agent ID
+            max_results: 最多保留的回调结果数
+            max_queue_size: 后台回调队列容量
+            max_batch: 后台回调单批最多处理的条数
         """
         self.agent_id = agent_id
         self.callback_id = str(uuid.uuid4())
         
-        # 回调注册表
-        self.callbacks: Dict[str, Callable] = {}
-        self.callback_results: Dict[str, CallbackResult] = {}
+        # 回调注册表（与回调总线共用）
+        self.bus = CallbackBus(
+            default_lanes=DEFAULT_CALLBACK_LANES,
+            max_queue_size=max_queue_size,
+            max_batch=max_batch
+        )
+        self.callbacks: Dict[str, Callable] = self.bus.callbacks
+        self.max_results = max_results
+        self.callback_results: "OrderedDict[str, CallbackResult]" = OrderedDict()
         
         # 回调策略
         self.callback_policies = {
@@ -108,7 +148,9 @@ class CallbackHandler:
             "retry_delay": 1.0,
             "timeout": 30.0,
             "enable_fallback": True,
-            "enable_audit": True
+            "enable_audit": True,
+            # 关闭后所有回调都内联执行
+            "enable_background": True
         }
         
         # 回调统计
@@ -117,7 +159,9 @@ class CallbackHandler:
             "successful_callbacks": 0,
             "failed_callbacks": 0,
             "fallback_callbacks": 0,
-            "total_execution_time": 0.0
+            "evicted_results": 0,
+            "total_execution_time": 0.0,
+            "by_type": {callback_type.value: 0 for callback_type in CallbackType}
         }
         
         logger.info("Callback handler initialized", agent_id=agent_id, callback_id=self.callback_id)
@@ -155,17 +199,38 @@ class CallbackHandler:
             logger.error("Health check failed", error=str(e))
             return False
     
-    async def register_callback(self, name: str, callback_func: Callable) -> None:
+    async def register_callback(
+        self,
+        name: str,
+        callback_func: Callable,
+        lane: Optional[CallbackLane] = None,
+        batch_func: Optional[Callable] = None
+    ) -> None:
         """
         注册回调函数
         
         Args:
             name: 回调名称
             callback_func: 回调函数
+            lane: 回调通道，None 时使用默认通道（见 DEFAULT_CALLBACK_LANES）
+            batch_func: 批量回调，后台通道按批投递时使用，参数为关键字参数字典列表
         """
-        self.callbacks[name] = callback_func
+        self.bus.register(name, callback_func, lane=lane, batch_func=batch_func)
         logger.debug("Callback registered", name=name, agent_id=self.agent_id)
     
+    async def _dispatch(self, name: str, **kwargs) -> Any:
+        """经回调总线分发已注册的回调"""
+        if not self.callback_policies["enable_background"]:
+            return await self.callbacks[name](**kwargs)
+        return await self.bus.dispatch(name, **kwargs)
+    
+    def _store_result(self, result: CallbackResult) -> None:
+        """保存回调结果，超出 max_results 时淘汰最久未访问的"""
+        self.callback_results[result.callback_id] = result
+        if len(self.callback_results) > self.max_results:
+            self.callback_results.popitem(last=False)
+            self.callback_stats["evicted_results"] += 1
+    
     async def handle_callback(
         self,
         callback_type: CallbackType,
@@ -192,13 +257,14 @@ class CallbackHandler:
         
         try:
             self.callback_stats["total_callbacks"] += 1
+            self.callback_stats["by_type"][callback_type.value] += 1
             
             # 创建回调结果
             result = CallbackResult(
                 callback_id=callback_id,
                 status=CallbackStatus.EXECUTING
             )
-            self.callback_results[callback_id] = result
+            self._store_result(result)
             
             logger.debug(
                 "Callback started",
@@ -229,7 +295,7 @@ class CallbackHandler:
             execution_time = asyncio.get_event_loop().time() - start_time
             self.callback_stats["total_execution_time"] += execution_time
             
-            logger.info(
+            logger.debug(
                 "Callback completed successfully",
                 callback_id=callback_id,
                 callback_type=callback_type.value,
@@ -269,11 +335,12 @@ class CallbackHandler:
                 callback_id=callback_id,
                 status=CallbackStatus.EXECUTING
             )
-            self.callback_results[callback_id] = cb_result
-
+            self._store_result(cb_result)
+            
             # 1. 状态锚点：写入memory
             if policy.write_memory and "memory_write" in self.callbacks:
-                await self.callbacks["memory_write"](
+                await self._dispatch(
+                    "memory_write",
                     content=result.to_memory_entry(),
                     memory_type="tool_result",
                     context_id=context.context_id,
@@ -282,7 +349,8 @@ class CallbackHandler:
                 )
             # 2. 审计锚点：写入trace
             if policy.record_trace and "trace_write" in self.callbacks:
-                await self.callbacks["trace_write"](
+                await self._dispatch(
+                    "trace_write",
                     event_type="callback_result",
                     data=result.to_trace_event(),
                     context_id=context.context_id,
@@ -290,7 +358,8 @@ class CallbackHandler:
                 )
             # 3. 链路锚点：状态更新
             if "status_update" in self.callbacks:
-                await self.callbacks["status_update"](
+                await self._dispatch(
+                    "status_update",
                     status="completed" if result.success else "failed",
                     data=result.to_trace_event(),
                     context_id=context.context_id
@@ -323,7 +392,8 @@ class CallbackHandler:
         """处理成功回调"""
         # 状态锚点：写入memory
         if "memory_write" in self.callbacks:
-            await self.callbacks["memory_write"](
+            await self._dispatch(
+                "memory_write",
                 content=str(data.get("result", "")),
                 memory_type="tool_result",
                 context_id=context_id,
@@ -333,7 +403,8 @@ class CallbackHandler:
         
         # 审计锚点：写入trace
         if "trace_write" in self.callbacks and self.callback_policies["enable_audit"]:
-            await self.callbacks["trace_write"](
+            await self._dispatch(
+                "trace_write",
                 event_type="callback_success",
                 data=data,
                 context_id=context_id,
@@ -342,7 +413,8 @@ class CallbackHandler:
         
         # 链路锚点：状态更新
         if "status_update" in self.callbacks:
-            await self.callbacks["status_update"](
+            await self._dispatch(
+                "status_update",
                 status="completed",
                 data=data,
                 context_id=context_id
@@ -360,7 +432,8 @@ class CallbackHandler:
         
         # 状态锚点：记录错误到memory
         if "memory_write" in self.callbacks:
-            await self.callbacks["memory_write"](
+            await self._dispatch(
+                "memory_write",
                 content=f"Error: {error_info}",
                 memory_type="error",
                 context_id=context_id,
@@ -370,7 +443,8 @@ class CallbackHandler:
         
         # 审计锚点：记录错误trace
         if "trace_write" in self.callbacks and self.callback_policies["enable_audit"]:
-            await self.callbacks["trace_write"](
+            await self._dispatch(
+                "trace_write",
                 event_type="callback_error",
                 data={"error": error_info, **data},
                 context_id=context_id,
@@ -379,7 +453,8 @@ class CallbackHandler:
         
         # 链路锚点：错误状态更新
         if "status_update" in self.callbacks:
-            await self.callbacks["status_update"](
+            await self._dispatch(
+                "status_update",
                 status="error",
                 data={"error": error_info, **data},
                 context_id=context_id
@@ -398,7 +473,8 @@ class CallbackHandler:
         
         # 记录fallback到memory
         if "memory_write" in self.callbacks:
-            await self.callbacks["memory_write"](
+            await self._dispatch(
+                "memory_write",
                 content=f"Fallback triggered: {error}",
                 memory_type="fallback",
                 context_id=context_id,
@@ -408,7 +484,8 @@ class CallbackHandler:
         
         # 记录fallback trace
         if "trace_write" in self.callbacks and self.callback_policies["enable_audit"]:
-            await self.callbacks["trace_write"](
+            await self._dispatch(
+                "trace_write",
                 event_type="callback_fallback",
                 data={"error": str(error) if error else "Unknown", **data},
                 context_id=context_id,
@@ -436,7 +513,8 @@ class CallbackHandler:
         """处理中断回调"""
         # 记录中断到memory
         if "memory_write" in self.callbacks:
-            await self.callbacks["memory_write"](
+            await self._dispatch(
+                "memory_write",
                 content="Task interrupted",
                 memory_type="interrupt",
                 context_id=context_id,
@@ -446,7 +524,8 @@ class CallbackHandler:
         
         # 记录中断trace
         if "trace_write" in self.callbacks and self.callback_policies["enable_audit"]:
-            await self.callbacks["trace_write"](
+            await self._dispatch(
+                "trace_write",
                 event_type="callback_interrupt",
                 data=data,
                 context_id=context_id,
@@ -455,7 +534,8 @@ class CallbackHandler:
         
         # 更新状态为中断
         if "status_update" in self.callbacks:
-            await self.callbacks["status_update"](
+            await self._dispatch(
+                "status_update",
                 status="interrupted",
                 data=data,
                 context_id=context_id
@@ -471,7 +551,8 @@ class CallbackHandler:
         """处理恢复回调"""
         # 记录恢复到memory
         if "memory_write" in self.callbacks:
-            await self.callbacks["memory_write"](
+            await self._dispatch(
+                "memory_write",
                 content="Task resumed",
                 memory_type="resume",
                 context_id=context_id,
@@ -481,7 +562,8 @@ class CallbackHandler:
         
         # 记录恢复trace
         if "trace_write" in self.callbacks and self.callback_policies["enable_audit"]:
-            await self.callbacks["trace_write"](
+            await self._dispatch(
+                "trace_write",
                 event_type="callback_resume",
                 data=data,
                 context_id=context_id,
@@ -490,7 +572,8 @@ class CallbackHandler:
         
         # 更新状态为恢复
         if "status_update" in self.callbacks:
-            await self.callbacks["status_update"](
+            await self._dispatch(
+                "status_update",
                 status="resumed",
                 data=data,
                 context_id=context_id
@@ -525,8 +608,8 @@ class CallbackHandler:
         """注册默认回调"""
         # 这些回调函数应该由外部注入
         # 这里只是占位符
-        self.callbacks["memory_write"] = self._default_memory_write
-        self.callbacks["trace_write"] = self._default_trace_write
+        self.bus.register("memory_write", self._default_memory_write, batch_func=self._default_batch_write)
+        self.bus.register("trace_write", self._default_trace_write, batch_func=self._default_batch_write)
         self.callbacks["status_update"] = self._default_status_update
         self.callbacks["fallback_handler"] = self._default_fallback_handler
         
@@ -540,6 +623,10 @@ class CallbackHandler:
         """默认trace写入回调"""
         logger.debug("Default trace write callback", args=args, kwargs=kwargs)
     
+    async def _default_batch_write(self, calls: List[Dict[str, Any]]) -> None:
+        """默认批量写入回调（memory/trace 后台按批投递）"""
+        logger.debug("Default batch write callback", size=len(calls))
+    
     async def _default_status_update(self, *args, **kwargs) -> None:
         """默认状态更新回调"""
         logger.debug("Default status update callback", args=args, kwargs=kwargs)
@@ -557,9 +644,12 @@ class CallbackHandler:
             callback_id: 回调ID
             
         Returns:
-            回调结果
+            回调结果，已被淘汰时为 None
         """
-        return self.callback_results.get(callback_id)
+        result = self.callback_results.get(callback_id)
+        if result is not None:
+            self.callback_results.move_to_end(callback_id)
+        return result
     
     async def get_callback_stats(self) -> Dict[str, Any]:
         """
@@ -581,6 +671,10 @@ class CallbackHandler:
             "successful_callbacks": self.callback_stats["successful_callbacks"],
             "failed_callbacks": self.callback_stats["failed_callbacks"],
             "fallback_callbacks": self.callback_stats["fallback_callbacks"],
+            "by_type": dict(self.callback_stats["by_type"]),
+            "retained_results": len(self.callback_results),
+            "evicted_results": self.callback_stats["evicted_results"],
+            "background": self.bus.get_stats(),
             "success_rate": success_rate,
             "total_execution_time": self.callback_stats["total_execution_time"],
             "average_execution_time": (
@@ -589,6 +683,14 @@ class CallbackHandler:
             )
         }
     
+    async def flush(self) -> None:
+        """等待后台回调全部执行完"""
+        await self.bus.flush()
+    
+    async def close(self) -> None:
+        """执行完后台回调并停止后台工作协程"""
+        await self.bus.close()
+    
     async def clear_results(self) -> None:
         """清理回调结果"""
         self.callback_results.clear()
@@ -9,6 +9,7 @@
 """
 
 import asyncio
+import time
 import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Callable
@@ -18,6 +19,7 @@ import structlog
 from ..state.context import ContextManager
 from ..state.memory import MemoryManager
 from ..core.tools import LocalToolRegistry
+from ..utils.timestamps import ns_to_utc, utc_to_ns
 from .callbacks import CallbackHandler, CallbackType, CallbackResult
 
 logger = structlog.get_logger(__name__)
@@ -34,7 +36,17 @@ class ExecutionStatus(Enum):
 
 
 class ExecutionStep:
-    """执行步骤"""
+    """
+    执行步骤
+    
+    开始/结束时间以纪元纳秒保存（start_time_ns / end_time_ns），
+    start_time / end_time 属性返回 naive UTC datetime（见 utils.timestamps）。
+    """
+    
+    __slots__ = (
+        'step_id', 'tool_name', 'parameters', 'dependencies', 'status',
+        'result', 'error', 'start_time_ns', 'end_time_ns', 'execution_time'
+    )
     
     def __init__(
         self,
@@ -50,10 +62,26 @@ class ExecutionStep:
         self.status = ExecutionStatus.PENDING
         self.result = None
         self.error = None
-        self.start_time = None
-        self.end_time = None
+        self.start_time_ns: Optional[int] = None
+        self.end_time_ns: Optional[int] = None
         self.execution_time = None
     
+    @property
+    def start_time(self) -> Optional[datetime]:
+        return ns_to_utc(self.start_time_ns)
+    
+    @start_time.setter
+    def start_time(self, value: Optional[datetime]) -> None:
+        self.start_time_ns = utc_to_ns(value)
+    
+    @property
+    def end_time(self) -> Optional[datetime]:
+        return ns_to_utc(self.end_time_ns)
+    
+    @end_time.setter
+    def end_time(self, value: Optional[datetime]) -> None:
+        self.end_time_ns = utc_to_ns(value)
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
@@ -421,7 +449,7 @@ class Executor:
     async def _execute_step(self, step: ExecutionStep, chain: ExecutionChain) -> None:
         """执行单个步骤"""
         step.status = ExecutionStatus.RUNNING
-        step.start_time = datetime.utcnow()
+        step.start_time_ns = time.time_ns()
         
         try:
             logger.debug(
@@ -498,9 +526,9 @@ class Executor:
             )
         
         finally:
-            step.end_time = datetime.utcnow()
-            if step.start_time and step.end_time:
-                step.execution_time = (step.end_time - step.start_time).total_seconds()
+            step.end_time_ns = time.time_ns()
+            if step.start_time_ns is not None:
+                step.execution_time = (step.end_time_ns - step.start_time_ns) / 1_000_000_000
     
     def _has_deadlock(self, chain: ExecutionChain) -> bool:
         """检查是否有死锁"""
@@ -566,6 +594,14 @@ class Executor:
         
         return True
     
+    async def close(self) -> None:
+        """关闭执行器：取消仍在运行的执行链，等待后台回调执行完后停止回调总线"""
+        for chain_id in list(self.active_chains):
+            await self.cancel_chain(chain_id)
+        
+        await self.callback_handler.close()
+        logger.info("Executor closed", agent_id=self.agent_id)
+    
     async def get_execution_stats(self) -> Dict[str, Any]:
         """获取执行统计信息"""
         return {
@@ -0,0 +1,44 @@
+import copy
+import os
+import pickle
+
+
+class MemoryCheckpointer:
+    """在内存中保存最近一次快照（深拷贝）"""
+
+    def __init__(self):
+        self.snapshot = None
+
+    def save(self, snapshot):
+        self.snapshot = copy.deepcopy(snapshot)
+
+    def load(self):
+        return copy.deepcopy(self.snapshot)
+
+    def clear(self):
+        self.snapshot = None
+
+
+class FileCheckpointer:
+    """把快照 pickle 到文件，先写临时文件再原子替换，进程崩溃后可从文件恢复"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def save(self, snapshot):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            return pickle.load(f)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
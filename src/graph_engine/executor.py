@@ -0,0 +1,172 @@
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from .state import State
+
+
+class AsyncGraphExecutor:
+    """
+    Graph 的异步就绪集执行器
+
+    - 节点完成后沿所有激活的出边扇出，每个分支拿到状态的浅拷贝
+    - join 节点等待全部前驱到达后合并各分支状态（按加边顺序 update）再执行；
+      没有其他可执行节点时，只到达了部分前驱的 join 节点也会放行（未选中的条件分支不会到达）
+    - 同步节点在有界线程池中执行，async 节点直接 await，并发总数不超过 max_workers
+    - 每个节点完成后可把待执行节点、join 到达情况和已结束分支的状态保存到 checkpointer，
+      resume=True 时从快照继续
+
+    节点把 state['finished'] 置为 True 时整个图结束，其余运行中的节点被取消。
+    并行分支共享嵌套对象，建议各分支写入不同的键。
+    """
+
+    def __init__(self, graph, max_workers=8, node_timeout=None, checkpointer=None, max_steps=None):
+        """
+        Args:
+            graph: Graph
+            max_workers: 同时执行的节点数上限（同时也是线程池大小）
+            node_timeout: 默认单节点超时（秒），节点的 timeout 属性优先
+            checkpointer: 提供 save(snapshot) / load() / clear() 的对象
+            max_steps: 最多执行的节点次数，防止回环失控
+        """
+        self.graph = graph
+        self.max_workers = max_workers
+        self.node_timeout = node_timeout
+        self.checkpointer = checkpointer
+        self.max_steps = max_steps
+
+        self.steps = 0
+        self._running = {}    # task -> (节点名, 输入状态的拷贝)
+        self._arrivals = {}   # join 节点名 -> {前驱名: 状态}
+        self._terminals = []  # 没有后继的分支的最终状态
+        self._semaphore = None
+        self._pool = None
+
+    async def run(self, start_node_name, state, resume=False):
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="graph-node")
+
+        snapshot = self.checkpointer.load() if resume and self.checkpointer else None
+        if snapshot:
+            self.steps = snapshot["steps"]
+            self._arrivals = snapshot["joins"]
+            self._terminals = snapshot["terminals"]
+            pending = snapshot["pending"]
+        else:
+            pending = [(start_node_name, State(state))]
+
+        try:
+            for name, node_state in pending:
+                self._launch(name, node_state)
+
+            while True:
+                if not self._running:
+                    # 空闲时放行只到达了部分前驱的 join 节点
+                    if not self._release_partial_joins():
+                        break
+                    continue
+
+                done, _ = await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name, _ = self._running.pop(task)
+                    output = task.result()
+                    if output.get('finished'):
+                        result = self._merge(self._terminals + [output])
+                        self._finish()
+                        return result
+                    self._route(name, output)
+
+                if self.checkpointer:
+                    self.checkpointer.save(self._snapshot())
+
+            result = self._merge(self._terminals)
+            self._finish()
+            return result
+
+        finally:
+            for task in self._running:
+                task.cancel()
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+            self._running = {}
+            self._pool.shutdown(wait=False)
+
+    def _route(self, name, output):
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise RuntimeError(f"Graph exceeded max_steps={self.max_steps}")
+
+        # next_node 只对当前节点生效，不随状态传给后继
+        next_node = output.pop('next_node', None)
+        targets = [next_node] if next_node else self.graph.get_next_nodes(name, output)
+        if not targets:
+            self._terminals.append(output)
+            return
+
+        for target in targets:
+            branch_state = output if len(targets) == 1 else State(output)
+            self._activate(target, name, branch_state)
+
+    def _activate(self, target, source, state):
+        node = self.graph.nodes[target]
+        if not getattr(node, 'join', False):
+            self._launch(target, state)
+            return
+
+        arrivals = self._arrivals.setdefault(target, {})
+        arrivals[source] = state
+        if all(p in arrivals for p in self.graph.get_predecessors(target)):
+            self._fire_join(target)
+
+    def _fire_join(self, target):
+        arrivals = self._arrivals.pop(target)
+        order = self.graph.get_predecessors(target)
+        states = [arrivals[p] for p in order if p in arrivals]
+        states.extend(s for p, s in arrivals.items() if p not in order)
+        self._launch(target, self._merge(states))
+
+    def _release_partial_joins(self):
+        ready = [name for name, arrivals in self._arrivals.items() if arrivals]
+        for name in ready:
+            self._fire_join(name)
+        return len(ready)
+
+    def _launch(self, name, state):
+        task = asyncio.ensure_future(self._execute(self.graph.nodes[name], state))
+        self._running[task] = (name, State(state))
+
+    async def _execute(self, node, state):
+        async with self._semaphore:
+            timeout = node.timeout if node.timeout is not None else self.node_timeout
+            if inspect.iscoroutinefunction(node.execute):
+                pending = node.execute(state)
+            else:
+                pending = asyncio.get_running_loop().run_in_executor(self._pool, node.execute, state)
+
+            try:
+                result = await asyncio.wait_for(pending, timeout) if timeout else await pending
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Node '{node.name}' timed out after {timeout}s") from None
+
+        return state if result is None else result
+
+    def _snapshot(self):
+        return {
+            "steps": self.steps,
+            "pending": list(self._running.values()),
+            "joins": {name: dict(arrivals) for name, arrivals in self._arrivals.items()},
+            "terminals": list(self._terminals),
+        }
+
+    def _finish(self):
+        if self.checkpointer:
+            self.checkpointer.clear()
+
+    @staticmethod
+    def _merge(states):
+        if len(states) == 1:
+            return states[0]
+        merged = State()
+        for state in states:
+            merged.update(state)
+        return merged
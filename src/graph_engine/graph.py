@@ -6,19 +6,32 @@ class Graph:
     def __init__(self):
         self.nodes = {}
         self.edges = []
+        # 邻接索引：source -> [Edge]，target -> [Edge]，在 add_edge 时维护
+        self._out_edges = {}
+        self._in_edges = {}
 
     def add_node(self, node: BaseNode):
         self.nodes[node.name] = node
 
     def add_edge(self, edge: Edge):
         self.edges.append(edge)
+        self._out_edges.setdefault(edge.source, []).append(edge)
+        self._in_edges.setdefault(edge.target, []).append(edge)
 
     def get_next_node(self, current_node, state):
-        for edge in self.edges:
-            if edge.source == current_node and edge.is_active(state):
+        for edge in self._out_edges.get(current_node, ()):
+            if edge.is_active(state):
                 return edge.target
         return None
 
+    def get_next_nodes(self, current_node, state):
+        """返回所有激活的出边的目标节点"""
+        return [edge.target for edge in self._out_edges.get(current_node, ()) if edge.is_active(state)]
+
+    def get_predecessors(self, node_name):
+        """返回节点的前驱节点名（去重，保持加边顺序）"""
+        return list(dict.fromkeys(edge.source for edge in self._in_edges.get(node_name, ())))
+
     def run(self, start_node_name, state: State):
         current_node = self.nodes[start_node_name]
         while True:
@@ -29,4 +42,21 @@ class Graph:
             if not next_node_name:
                 break
             current_node = self.nodes[next_node_name]
-        return state 
\ No newline at end of file
+        return state
+
+    async def arun(self, start_node_name, state: State, max_workers=8, node_timeout=None,
+                   checkpointer=None, resume=False, max_steps=None):
+        """
+        异步并行执行：沿所有激活的出边扇出，JoinNode 等待前驱汇合。
+        参数见 AsyncGraphExecutor。
+        """
+        from .executor import AsyncGraphExecutor
+
+        executor = AsyncGraphExecutor(
+            self,
+            max_workers=max_workers,
+            node_timeout=node_timeout,
+            checkpointer=checkpointer,
+            max_steps=max_steps,
+        )
+        return await executor.run(start_node_name, state, resume=resume)
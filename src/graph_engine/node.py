@@ -1,4 +1,8 @@
 class BaseNode:
+    # 异步执行时：join 为 True 的节点等待所有前驱；timeout 为单节点超时（秒）
+    join = False
+    timeout = None
+
     def __init__(self, name):
         self.name = name
 
@@ -40,4 +44,11 @@ class CallbackNode(BaseNode):
 class EndNode(BaseNode):
     def execute(self, state):
         state['finished'] = True
-        return state 
\ No newline at end of file
+        return state 
+
+class JoinNode(BaseNode):
+    """汇合节点：异步执行时等待所有前驱到达后，合并各分支的状态再继续"""
+    join = True
+
+    def execute(self, state):
+        return state
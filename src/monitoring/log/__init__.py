@@ -8,10 +8,15 @@ from .log_manager import LogManager
 from .log_formatter import LogFormatter
 from .log_handler import LogHandler
 from .log_aggregator import LogAggregator
+from .log_index import LogIndex
+from .segment_log import SegmentLogWriter, SegmentLogReader
 
 __all__ = [
     'LogManager',
     'LogFormatter', 
     'LogHandler',
-    'LogAggregator'
+    'LogAggregator',
+    'LogIndex',
+    'SegmentLogWriter',
+    'SegmentLogReader'
 ] 
\ No newline at end of file
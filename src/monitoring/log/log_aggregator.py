@@ -13,6 +13,8 @@ from typing import Dict, List, Any, Optional
 from collections import defaultdict, Counter
 import threading
 
+from ..metrics.quantile_sketch import QuantileSketchStore
+
 
 class LogAggregator:
     """
@@ -48,6 +50,12 @@ class LogAggregator:
             'alert_history': []
         }
         
+        # 响应时间分位数草图（按端点）
+        self.latency_sketches = QuantileSketchStore(
+            window_seconds=self.config.get('sketch_window', 60),
+            max_windows=self.config.get('sketch_max_windows', 24 * 60)
+        )
+        
         # 线程锁
         self._lock = threading.Lock()
         
@@ -155,6 +163,8 @@ class LogAggregator:
                     'endpoint': context.get('endpoint', 'unknown')
                 }
                 self.aggregated_data['performance_metrics'].append(metric)
+                self._record_response_time(log.get('timestamp'), metric['endpoint'],
+                                           context['response_time'])
             
             # 提取内存使用
             if 'memory_usage' in context:
@@ -176,6 +186,23 @@ class LogAggregator:
                 }
                 self.aggregated_data['performance_metrics'].append(metric)
     
+    def _record_response_time(self, timestamp: Optional[str], endpoint: str, value: Any) -> None:
+        """
+        将响应时间写入分位数草图
+        
+        Args:
+            timestamp: 日志时间戳(ISO格式)
+            endpoint: 端点
+            value: 响应时间
+        """
+        try:
+            ts = datetime.fromisoformat(timestamp).timestamp() if timestamp else None
+            value = float(value)
+        except (TypeError, ValueError):
+            return
+        self.latency_sketches.record('endpoint', endpoint, value, timestamp=ts)
+        self.latency_sketches.record('global', 'all', value, timestamp=ts)
+    
     def _check_alerts(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         检查告警条件
@@ -252,21 +279,19 @@ class LogAggregator:
                     if datetime.fromisoformat(metric['timestamp']) >= cutoff_time
                 ]
             
-            # 计算响应时间统计
-            response_times = [
-                metric['value'] for metric in performance_metrics
-                if metric['type'] == 'response_time'
-            ]
-            
+            # 响应时间统计直接读取分位数草图，无需排序原始数据
+            window = time_range.total_seconds() if time_range else None
             response_time_stats = {}
-            if response_times:
+            summary = self.latency_sketches.summary('global', 'all', window)
+            if summary['count']:
                 response_time_stats = {
-                    'count': len(response_times),
-                    'min': min(response_times),
-                    'max': max(response_times),
-                    'avg': sum(response_times) / len(response_times),
-                    'p95': self._percentile(response_times, 95),
-                    'p99': self._percentile(response_times, 99)
+                    'count': summary['count'],
+                    'min': summary['min'],
+                    'max': summary['max'],
+                    'avg': summary['avg'],
+                    'p50': summary['p50'],
+                    'p95': summary['p95'],
+                    'p99': summary['p99']
                 }
             
             return {
@@ -282,23 +307,18 @@ class LogAggregator:
                 }
             }
     
-    def _percentile(self, values: List[float], percentile: int) -> float:
+    def get_latency_percentiles(self, time_range: Optional[timedelta] = None) -> Dict[str, Dict[str, float]]:
         """
-        计算百分位数
+        获取各端点的响应时间分位数
         
         Args:
-            values: 数值列表
-            percentile: 百分位数
+            time_range: 时间范围
             
         Returns:
-            百分位数值
+            端点到统计摘要(count/avg/p50/p95/p99等)的映射
         """
-        if not values:
-            return 0.0
-        
-        sorted_values = sorted(values)
-        index = int(len(sorted_values) * percentile / 100)
-        return sorted_values[min(index, len(sorted_values) - 1)]
+        window = time_range.total_seconds() if time_range else None
+        return self.latency_sketches.summaries('endpoint', window)
     
     def get_top_error_patterns(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -341,6 +361,7 @@ class LogAggregator:
                 'performance_metrics': [],
                 'alert_history': []
             }
+            self.latency_sketches.clear()
     
     def _start_cleanup_task(self) -> None:
         """启动清理任务"""
@@ -58,8 +58,7 @@ class LogHandler(logging.Handler):
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         ))
         
-        # 添加处理器到根日志记录器
-        logging.getLogger().addHandler(self.rotating_handler)
+        # 轮转处理器只由本处理器驱动，不挂到根日志记录器上，避免同一记录被写入两次
     
     def emit(self, record: logging.LogRecord) -> None:
         """
@@ -70,10 +69,50 @@ class LogHandler(logging.Handler):
         """
         try:
             # 使用轮转处理器发送记录
-            self.rotating_handler.emit(record)
+            self.rotating_handler.acquire()
+            try:
+                self.rotating_handler.emit(record)
+            finally:
+                self.rotating_handler.release()
         except Exception:
             self.handleError(record)
     
+    def ensure_open(self) -> None:
+        """确保日志文件流已打开（首次写入前或关闭后再次写入时打开）"""
+        handler = self.rotating_handler
+        handler.acquire()
+        try:
+            if handler.stream is None:
+                handler.setStream(open(handler.baseFilename, handler.mode, encoding=handler.encoding))
+        finally:
+            handler.release()
+    
+    def write_batch(self, lines: List[str]) -> None:
+        """
+        批量写入已格式化的日志行
+        
+        整批数据一次写入并只刷新一次，写入前检查是否需要轮转。
+        
+        Args:
+            lines: 已格式化的日志行
+        """
+        if not lines:
+            return
+        
+        data = '\n'.join(lines) + '\n'
+        handler = self.rotating_handler
+        handler.acquire()
+        try:
+            self.ensure_open()
+            if handler.maxBytes > 0:
+                handler.stream.seek(0, 2)
+                if handler.stream.tell() + len(data) >= handler.maxBytes and handler.stream.tell() > 0:
+                    handler.doRollover()
+            handler.stream.write(data)
+            handler.stream.flush()
+        finally:
+            handler.release()
+    
     def close(self) -> None:
         """关闭处理器"""
         self.rotating_handler.close()
@@ -0,0 +1,320 @@
+"""
+日志索引
+
+为内存日志缓存提供按时间有序的存储和索引查询：
+- 数值时间戳 + bisect 的时间范围定位
+- 按级别的倒排序列
+- 消息和上下文的词元倒排索引
+查询结果以生成器流式返回。
+"""
+
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterator, Tuple, Union
+
+
+_WORD_RE = re.compile(r'[0-9a-z_]+|[^\W0-9a-z_]', re.UNICODE)
+_ALNUM_RE = re.compile(r'[0-9a-z_]')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分词元
+
+    英文数字按单词切分，中日韩等其他文字按单字切分，统一小写。
+
+    Args:
+        text: 文本
+
+    Returns:
+        词元列表
+    """
+    return _WORD_RE.findall(text.lower())
+
+
+def whole_tokens(keyword: str) -> List[str]:
+    """
+    关键词中一定以完整词元出现在匹配文本里的词元
+
+    英文数字词元位于关键词开头或结尾时，可能只是文本中更长单词的一部分
+    （"err" 是 "error" 的子串），不能用于倒排索引查找；单字词元和两侧都有
+    分隔符的词元总是完整的。
+
+    Args:
+        keyword: 小写关键词
+
+    Returns:
+        词元列表
+    """
+    tokens = []
+    for match in _WORD_RE.finditer(keyword):
+        start, end = match.span()
+        if end - start == 1 and not _ALNUM_RE.match(keyword[start]):
+            tokens.append(match.group())
+        elif (start > 0 and not _ALNUM_RE.match(keyword[start - 1])
+              and end < len(keyword) and not _ALNUM_RE.match(keyword[end])):
+            tokens.append(match.group())
+    return tokens
+
+
+def to_epoch(value: Union[str, datetime, float, int]) -> float:
+    """将 ISO 字符串、datetime 或数值统一转换为秒级时间戳"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+class LogIndex:
+    """
+    日志索引
+
+    条目按写入顺序获得递增序号，序号顺序即时间顺序。容量满后逻辑淘汰最旧条目，
+    淘汰积累到一定数量时才整体压缩，压缩总是生成新列表，因此正在运行的查询
+    生成器持有的快照不受影响。
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        初始化日志索引
+
+        Args:
+            capacity: 最大保留条目数
+        """
+        self.capacity = capacity
+
+        self._entries: List[Dict[str, Any]] = []
+        self._timestamps: List[float] = []
+        self._base_seq = 0      # _entries[0] 的序号
+        self._first_seq = 0     # 最旧的有效序号
+        self._next_seq = 0
+
+        self._level_index: Dict[str, List[int]] = {}
+        self._message_index: Dict[str, List[int]] = {}
+        self._context_index: Dict[str, List[int]] = {}
+
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._next_seq - self._first_seq
+
+    @property
+    def last_seq(self) -> int:
+        """下一个写入条目的序号"""
+        return self._next_seq
+
+    def add(self, entry: Dict[str, Any], timestamp: float) -> None:
+        """
+        添加日志条目
+
+        Args:
+            entry: 日志条目
+            timestamp: 条目的秒级时间戳
+        """
+        with self._lock:
+            self._add(entry, timestamp)
+
+    def extend(self, items: List[Tuple[Dict[str, Any], float]]) -> None:
+        """
+        批量添加日志条目
+
+        Args:
+            items: (日志条目, 时间戳) 列表
+        """
+        with self._lock:
+            for entry, timestamp in items:
+                self._add(entry, timestamp)
+
+    def _add(self, entry: Dict[str, Any], timestamp: float) -> None:
+        seq = self._next_seq
+        self._next_seq += 1
+
+        # 写入顺序与时间顺序不一致时夹紧时间戳，保证 bisect 可用
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            timestamp = self._timestamps[-1]
+        self._entries.append(entry)
+        self._timestamps.append(timestamp)
+
+        self._level_index.setdefault(entry.get('level', 'INFO'), []).append(seq)
+        for token in set(tokenize(entry.get('message', ''))):
+            self._message_index.setdefault(token, []).append(seq)
+        context = entry.get('context')
+        if context:
+            tokens = set()
+            for value in context.values():
+                tokens.update(tokenize(str(value)))
+            for token in tokens:
+                self._context_index.setdefault(token, []).append(seq)
+
+        if self._next_seq - self._first_seq > self.capacity:
+            self._first_seq = self._next_seq - self.capacity
+            if self._first_seq - self._base_seq >= max(self.capacity // 2, 1024):
+                self._compact()
+
+    def _compact(self) -> None:
+        """丢弃已淘汰条目并重建倒排序列（生成新列表）"""
+        first = self._first_seq
+        offset = first - self._base_seq
+        self._entries = self._entries[offset:]
+        self._timestamps = self._timestamps[offset:]
+        self._base_seq = first
+
+        for index in (self._level_index, self._message_index, self._context_index):
+            for key in list(index):
+                postings = index[key]
+                pos = bisect_left(postings, first)
+                if pos >= len(postings):
+                    del index[key]
+                elif pos:
+                    index[key] = postings[pos:]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+            self._timestamps = []
+            self._base_seq = self._first_seq = self._next_seq
+            self._level_index = {}
+            self._message_index = {}
+            self._context_index = {}
+
+    def _snapshot(self) -> Tuple:
+        # 级别索引会被 count_by_level 遍历，写入和压缩会增删其中的键，因此在锁内
+        # 复制（级别只有几个）；词元索引只按键查找，直接共享
+        with self._lock:
+            return (self._entries, self._timestamps, self._base_seq,
+                    self._first_seq, self._next_seq, dict(self._level_index),
+                    self._message_index, self._context_index)
+
+    def query(self, level: Optional[str] = None,
+              start_time: Optional[Union[str, datetime, float]] = None,
+              end_time: Optional[Union[str, datetime, float]] = None,
+              message: Optional[str] = None,
+              context: Optional[str] = None,
+              reverse: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        查询日志
+
+        关键词按子串匹配（与逐条扫描的结果一致）：关键词中一定完整出现的词元
+        （见 whole_tokens）先在倒排索引中求交集缩小候选范围，再在候选条目上做
+        子串校验；没有这样的词元时在时间范围内逐条校验。
+
+        Args:
+            level: 日志级别
+            start_time: 开始时间（包含）
+            end_time: 结束时间（包含）
+            message: 消息关键词
+            context: 上下文关键词
+            reverse: 是否按时间倒序返回
+
+        Returns:
+            日志条目生成器
+        """
+        (entries, timestamps, base, first, end_seq,
+         level_index, message_index, context_index) = self._snapshot()
+
+        # 时间范围 -> 序号区间 [lo, hi)
+        lo = first
+        hi = end_seq
+        count = end_seq - base
+        if start_time is not None:
+            lo = max(lo, base + bisect_left(timestamps, to_epoch(start_time), 0, count))
+        if end_time is not None:
+            hi = min(hi, base + bisect_right(timestamps, to_epoch(end_time), 0, count))
+        if lo >= hi:
+            return
+
+        postings: List[List[int]] = []
+        if level is not None:
+            postings.append(level_index.get(level.upper(), []))
+        message_kw = message.lower() if message else None
+        context_kw = context.lower() if context else None
+        for keyword, index in ((message_kw, message_index), (context_kw, context_index)):
+            if keyword is None:
+                continue
+            for token in set(whole_tokens(keyword)):
+                postings.append(index.get(token, []))
+
+        if postings:
+            candidates = self._intersect(postings, lo, hi, reverse)
+        else:
+            candidates = range(hi - 1, lo - 1, -1) if reverse else range(lo, hi)
+
+        for seq in candidates:
+            entry = entries[seq - base]
+            if message_kw and message_kw not in entry.get('message', '').lower():
+                continue
+            if context_kw and not any(context_kw in str(v).lower()
+                                      for v in entry.get('context', {}).values()):
+                continue
+            yield entry
+
+    @staticmethod
+    def _intersect(postings: List[List[int]], lo: int, hi: int,
+                   reverse: bool) -> Iterator[int]:
+        """在 [lo, hi) 内对多个有序序号列表求交集，以最短列表驱动"""
+        bounded = []
+        for p in postings:
+            start = bisect_left(p, lo)
+            stop = bisect_left(p, hi, start)
+            if start >= stop:
+                return
+            bounded.append((p, start, stop))
+        bounded.sort(key=lambda item: item[2] - item[1])
+
+        driver, start, stop = bounded[0]
+        others = bounded[1:]
+        positions = range(stop - 1, start - 1, -1) if reverse else range(start, stop)
+        for i in positions:
+            seq = driver[i]
+            for p, o_start, o_stop in others:
+                j = bisect_left(p, seq, o_start, o_stop)
+                if j >= o_stop or p[j] != seq:
+                    break
+            else:
+                yield seq
+
+    def count_by_level(self, start_time: Optional[Union[str, datetime, float]] = None,
+                       end_time: Optional[Union[str, datetime, float]] = None) -> Dict[str, int]:
+        """
+        统计时间范围内各级别的条目数（只做二分，不遍历条目）
+
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
+
+        Returns:
+            级别到数量的映射
+        """
+        entries, timestamps, base, first, end_seq, level_index, _, _ = self._snapshot()
+        lo, hi = first, end_seq
+        count = end_seq - base
+        if start_time is not None:
+            lo = max(lo, base + bisect_left(timestamps, to_epoch(start_time), 0, count))
+        if end_time is not None:
+            hi = min(hi, base + bisect_right(timestamps, to_epoch(end_time), 0, count))
+
+        counts = {}
+        if lo >= hi:
+            return counts
+        for level, postings in level_index.items():
+            n = bisect_left(postings, hi) - bisect_left(postings, lo)
+            if n:
+                counts[level] = n
+        return counts
+
+    def since(self, seq: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        获取指定序号之后新写入的条目，用于增量消费
+
+        Args:
+            seq: 上次消费到的序号
+
+        Returns:
+            (新条目列表, 新的消费序号)
+        """
+        entries, _, base, first, end_seq, _, _, _ = self._snapshot()
+        start = max(seq, first)
+        return entries[start - base:end_seq - base], end_seq
@@ -8,16 +8,21 @@
 
 import logging
 import json
+import os
 import time
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from enum import Enum
 import threading
+from itertools import islice
 from pathlib import Path
 
 from .log_formatter import LogFormatter
 from .log_handler import LogHandler
 from .log_aggregator import LogAggregator
+from .log_index import LogIndex
+from .segment_log import SegmentLogWriter
 
 
 class LogLevel(Enum):
@@ -53,6 +58,9 @@ class LogManager:
                 - backup_count: 备份文件数量
                 - format: 日志格式
                 - handlers: 处理器配置
+                - segment_dir: 二进制分段日志目录，配置后额外写入分段日志
+                - segment_size: 单个分段大小(MB)
+                - max_segments: 最多保留的分段数量
         """
         self.config = config or {}
         self.log_level = LogLevel(self.config.get('log_level', LogLevel.INFO.value))
@@ -64,7 +72,7 @@ class LogManager:
         Path(self.log_file).parent.mkdir(parents=True, exist_ok=True)
         
         # 初始化组件
-        self.formatter = LogFormatter(self.config.get('format'))
+        self.formatter = LogFormatter(self.config.get('format', 'json'))
         self.handler = LogHandler(
             log_file=self.log_file,
             max_file_size=self.max_file_size,
@@ -72,18 +80,47 @@ class LogManager:
         )
         self.aggregator = LogAggregator()
         
-        # 设置日志记录器
+        # 可选的二进制分段日志
+        self.segment_writer: Optional[SegmentLogWriter] = None
+        if self.config.get('segment_dir'):
+            self.segment_writer = SegmentLogWriter(
+                self.config['segment_dir'],
+                segment_size=self.config.get('segment_size', 64) * 1024 * 1024,
+                max_segments=self.config.get('max_segments', 0)
+            )
+        
+        # 设置日志记录器（供直接使用 logging 的代码写入同一文件）
         self.logger = logging.getLogger('agent_system')
         self.logger.setLevel(self.log_level.value)
         self.logger.addHandler(self.handler)
-        self.handler.setFormatter(self.formatter)
-        
-        # 线程锁
-        self._lock = threading.Lock()
+        self.logger.propagate = False
         
-        # 内存日志缓存
-        self._log_cache: List[Dict[str, Any]] = []
+        # 内存日志缓存（按时间有序并建立级别/关键词索引）
         self._cache_size = self.config.get('cache_size', 1000)
+        self._index = LogIndex(self._cache_size)
+        self._aggregated_seq = 0
+        
+        # 写入管道：热路径只向有界环形队列追加原始记录，
+        # 格式化、缓存和批量写文件由后台写线程完成
+        self._queue_size = self.config.get('queue_size', 10000)
+        self._batch_size = self.config.get('batch_size', 256)
+        self._flush_interval = self.config.get('flush_interval', 0.05)
+        self._drop_level = LogLevel[self.config.get('drop_level', 'INFO').upper()]
+        self._ring: deque = deque()
+        self._wakeup = threading.Event()
+        self._drain_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._running = True
+        self._pid = os.getpid()
+        self._stats = {
+            'written': 0,
+            'batches': 0,
+            'write_errors': 0,
+            'dropped': {level.name: 0 for level in LogLevel}
+        }
+        
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
         
         # 启动日志聚合任务
         self._start_aggregation_task()
@@ -93,6 +130,11 @@ class LogManager:
         """
         记录日志
         
+        只做级别判断并把原始记录追加到环形队列，不加锁、不格式化。
+        context 在入队时浅拷贝，调用方之后修改原字典不影响已记录的日志。
+        队列积压超过 queue_size 时丢弃 drop_level 及以下级别的记录，
+        超过两倍 queue_size 时丢弃所有记录，并计入丢弃计数。
+        
         Args:
             level: 日志级别
             message: 日志消息
@@ -101,23 +143,106 @@ class LogManager:
         if isinstance(level, str):
             level = LogLevel[level.upper()]
         
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'level': level.name,
-            'message': message,
-            'context': context or {},
-            'thread_id': threading.get_ident(),
-            'process_id': threading.current_thread().ident
-        }
+        if level.value < self.log_level.value:
+            return
+        
+        ring = self._ring
+        pending = len(ring)
+        if pending >= self._queue_size:
+            if level.value <= self._drop_level.value or pending >= self._queue_size * 2:
+                with self._stats_lock:
+                    self._stats['dropped'][level.name] += 1
+                self._wakeup.set()
+                return
+        
+        ring.append((time.time(), level, message, dict(context) if context else None, threading.get_ident()))
+        if pending + 1 >= self._batch_size:
+            self._wakeup.set()
+    
+    def flush(self) -> None:
+        """将队列中尚未处理的记录立即写入缓存和文件"""
+        self._drain()
+    
+    def close(self) -> None:
+        """停止后台写线程并写出剩余记录"""
+        self._running = False
+        self._wakeup.set()
+        if self._writer_thread.is_alive():
+            self._writer_thread.join(timeout=5)
+        self._drain()
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+        if self.segment_writer is not None:
+            self.segment_writer.close()
+    
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """
+        获取写入管道计数器
         
-        with self._lock:
-            # 添加到缓存
-            self._log_cache.append(log_entry)
-            if len(self._log_cache) > self._cache_size:
-                self._log_cache.pop(0)
-            
-            # 记录到文件
-            self.logger.log(level.value, self.formatter.format_log(log_entry))
+        Returns:
+            已写入数、批次数、积压数、写入错误数和按级别的丢弃数
+        """
+        with self._stats_lock:
+            dropped = dict(self._stats['dropped'])
+        return {
+            'written': self._stats['written'],
+            'batches': self._stats['batches'],
+            'write_errors': self._stats['write_errors'],
+            'pending': len(self._ring),
+            'dropped': dropped,
+            'dropped_total': sum(dropped.values())
+        }
+    
+    def _writer_loop(self) -> None:
+        """后台写线程：定时或积压达到批大小时批量处理记录"""
+        while self._running:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                self._drain()
+            except Exception:
+                self._stats['write_errors'] += 1
+    
+    def _drain(self) -> None:
+        """取出队列中的记录，构建日志条目，写入缓存并批量写入文件"""
+        with self._drain_lock:
+            ring = self._ring
+            while ring:
+                batch = []
+                while ring and len(batch) < self._batch_size:
+                    batch.append(ring.popleft())
+                
+                items = [({
+                    'timestamp': datetime.fromtimestamp(created).isoformat(),
+                    'level': level.name,
+                    'message': message,
+                    'context': context or {},
+                    'thread_id': thread_id,
+                    'process_id': self._pid
+                }, created) for created, level, message, context, thread_id in batch]
+                self._index.extend(items)
+                entries = [entry for entry, _ in items]
+                
+                # 文本文件和分段日志互不影响，任一写入成功即计入已写入
+                written = False
+                try:
+                    self.handler.write_batch([self.formatter.format_log(e) for e in entries])
+                    written = True
+                except Exception:
+                    self._stats['write_errors'] += 1
+                
+                if self.segment_writer is not None:
+                    try:
+                        for entry, created in items:
+                            self.segment_writer.write_entry(entry, created)
+                        self.segment_writer.flush()
+                        written = True
+                    except Exception:
+                        self._stats['write_errors'] += 1
+                
+                if written:
+                    self._stats['written'] += len(entries)
+                    self._stats['batches'] += 1
     
     def debug(self, message: str, context: Optional[Dict[str, Any]] = None) -> None:
         """记录调试日志"""
@@ -170,63 +295,56 @@ class LogManager:
         Returns:
             日志列表
         """
-        filters = filters or {}
-        
-        with self._lock:
-            logs = self._log_cache.copy()
-        
-        # 应用过滤条件
-        if 'level' in filters:
-            level = filters['level']
-            if isinstance(level, str):
-                level = level.upper()
-            logs = [log for log in logs if log['level'] == level]
-        
-        if 'start_time' in filters:
-            start_time = datetime.fromisoformat(filters['start_time'])
-            logs = [log for log in logs 
-                   if datetime.fromisoformat(log['timestamp']) >= start_time]
-        
-        if 'end_time' in filters:
-            end_time = datetime.fromisoformat(filters['end_time'])
-            logs = [log for log in logs 
-                   if datetime.fromisoformat(log['timestamp']) <= end_time]
-        
-        if 'message' in filters:
-            keyword = filters['message'].lower()
-            logs = [log for log in logs if keyword in log['message'].lower()]
-        
-        if 'context' in filters:
-            keyword = filters['context'].lower()
-            logs = [log for log in logs 
-                   if any(keyword in str(v).lower() for v in log['context'].values())]
-        
-        # 按时间倒序排列
-        logs.sort(key=lambda x: x['timestamp'], reverse=True)
+        return list(islice(self.iter_logs(filters), limit))
+    
+    def iter_logs(self, filters: Optional[Dict[str, Any]] = None):
+        """
+        按时间倒序流式获取日志
         
-        return logs[:limit]
+        Args:
+            filters: 过滤条件，同 get_logs
+            
+        Returns:
+            日志条目生成器
+        """
+        filters = filters or {}
+        level = filters.get('level')
+        if isinstance(level, LogLevel):
+            level = level.name
+        
+        self.flush()
+        return self._index.query(
+            level=level,
+            start_time=filters.get('start_time'),
+            end_time=filters.get('end_time'),
+            message=filters.get('message'),
+            context=filters.get('context')
+        )
     
     def export_logs(self, format: str = 'json', 
-                   filters: Optional[Dict[str, Any]] = None) -> str:
+                   filters: Optional[Dict[str, Any]] = None,
+                   limit: Optional[int] = None) -> str:
         """
         导出日志
         
         Args:
             format: 导出格式 (json, csv, txt)
             filters: 过滤条件
+            limit: 导出数量限制，None 表示全部
             
         Returns:
             导出的日志内容
         """
-        logs = self.get_logs(filters)
+        logs = self.iter_logs(filters)
+        if limit is not None:
+            logs = islice(logs, limit)
+        if format.lower() == 'json':
+            logs = list(logs)
         
         if format.lower() == 'json':
             return json.dumps(logs, indent=2, ensure_ascii=False)
         
         elif format.lower() == 'csv':
-            if not logs:
-                return ""
-            
             headers = ['timestamp', 'level', 'message', 'context']
             lines = [','.join(headers)]
             
@@ -240,7 +358,7 @@ class LogManager:
                 ]
                 lines.append(','.join(line))
             
-            return '\n'.join(lines)
+            return '\n'.join(lines) if len(lines) > 1 else ""
         
         elif format.lower() == 'txt':
             lines = []
@@ -264,24 +382,13 @@ class LogManager:
         Returns:
             统计信息
         """
-        with self._lock:
-            logs = self._log_cache.copy()
-        
-        if time_range:
-            cutoff_time = datetime.now() - time_range
-            logs = [log for log in logs 
-                   if datetime.fromisoformat(log['timestamp']) >= cutoff_time]
-        
-        # 统计各级别日志数量
-        level_counts = {}
-        for log in logs:
-            level = log['level']
-            level_counts[level] = level_counts.get(level, 0) + 1
+        self.flush()
+        start_time = datetime.now() - time_range if time_range else None
+        level_counts = self._index.count_by_level(start_time=start_time)
         
         # 统计错误率
-        total_logs = len(logs)
-        error_logs = len([log for log in logs 
-                         if log['level'] in ['ERROR', 'CRITICAL']])
+        total_logs = sum(level_counts.values())
+        error_logs = level_counts.get('ERROR', 0) + level_counts.get('CRITICAL', 0)
         error_rate = error_logs / total_logs if total_logs > 0 else 0
         
         return {
@@ -293,8 +400,8 @@ class LogManager:
     
     def clear_cache(self) -> None:
         """清空日志缓存"""
-        with self._lock:
-            self._log_cache.clear()
+        self.flush()
+        self._index.clear()
     
     def _start_aggregation_task(self) -> None:
         """启动日志聚合任务"""
@@ -302,11 +409,12 @@ class LogManager:
             while True:
                 try:
                     time.sleep(60)  # 每分钟聚合一次
-                    with self._lock:
-                        logs = self._log_cache.copy()
+                    # 只聚合上次之后新写入的日志
+                    logs, self._aggregated_seq = self._index.since(self._aggregated_seq)
                     
                     # 执行聚合分析
-                    self.aggregator.aggregate(logs)
+                    if logs:
+                        self.aggregator.aggregate(logs)
                     
                 except Exception as e:
                     self.error(f"Log aggregation error: {e}")
@@ -0,0 +1,512 @@
+"""
+二进制分段日志
+
+可选的结构化日志落盘方式：记录以长度前缀的二进制格式写入固定大小的段文件，
+段封存时在文件尾部写入稀疏时间戳索引。读取端通过 mmap 打开段文件，
+二分定位时间窗口、从尾部反向读取，并可在不解码负载的情况下按级别过滤。
+
+记录格式（小端）：
+    [u32 负载长度][f64 时间戳][u8 级别][负载 JSON][u32 记录总长度]
+记录尾部的总长度用于反向遍历。
+
+封存段的尾部：
+    [稀疏索引 (f64 时间戳, u64 偏移) * N][f64 最小时间][f64 最大时间][u64 索引偏移][u32 N][b'NIDX']
+
+命令行读取：
+    python -m src.monitoring.log.segment_log logs/segments --since 2024-01-01T10:00:00 --level ERROR
+    python -m src.monitoring.log.segment_log logs/segments --tail 100 --follow
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, Union
+
+
+SEGMENT_MAGIC = b'NLSG'
+INDEX_MAGIC = b'NIDX'
+SEGMENT_VERSION = 1
+SEGMENT_SUFFIX = '.nlog'
+
+_FILE_HEADER = struct.Struct('<4sBd')        # 魔数、版本、创建时间
+_RECORD_HEADER = struct.Struct('<IdB')       # 负载长度、时间戳、级别
+_RECORD_TRAILER = struct.Struct('<I')        # 记录总长度
+_INDEX_ENTRY = struct.Struct('<dQ')          # 时间戳、偏移
+_FOOTER = struct.Struct('<ddQI4s')           # 最小时间、最大时间、索引偏移、索引数、魔数
+
+_RECORD_OVERHEAD = _RECORD_HEADER.size + _RECORD_TRAILER.size
+
+
+def _level_value(level: Union[str, int]) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(level.upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return value
+
+
+def _to_epoch(value: Union[str, datetime, float, int, None]) -> Optional[float]:
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+class SegmentLogWriter:
+    """
+    分段日志写入器
+
+    当前段写满（达到 segment_size）后写入稀疏索引尾部并封存，随后滚动到新段。
+    启动时若发现上次未封存的段，会截断到最后一条完整记录后补写索引。
+    """
+
+    def __init__(self, directory: str, segment_size: int = 64 * 1024 * 1024,
+                 index_interval: int = 64, max_segments: int = 0):
+        """
+        初始化写入器
+
+        Args:
+            directory: 段文件目录
+            segment_size: 单个段文件的目标大小(字节)
+            index_interval: 每隔多少条记录写一个稀疏索引项
+            max_segments: 最多保留的段数量，0 表示不限制
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.index_interval = index_interval
+        self.max_segments = max_segments
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[Path] = None
+        self._offset = 0
+        self._record_count = 0
+        self._index: List[tuple] = []
+        self._min_ts = 0.0
+        self._max_ts = 0.0
+
+        existing = list_segments(self.directory)
+        for path in existing:
+            if not _is_sealed(path):
+                _recover_segment(path, index_interval)
+        self._next_id = (int(existing[-1].stem) + 1) if existing else 0
+
+    def write(self, timestamp: float, level: Union[str, int], message: str,
+              context: Optional[Dict[str, Any]] = None, **fields: Any) -> None:
+        """
+        写入一条日志
+
+        Args:
+            timestamp: 秒级时间戳
+            level: 日志级别
+            message: 日志消息
+            context: 上下文信息
+            fields: 其他附加字段
+        """
+        payload = {'message': message, 'context': context or {}}
+        if fields:
+            payload.update(fields)
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'),
+                          default=str).encode('utf-8')
+        self._append(timestamp, _level_value(level), data)
+
+    def write_entry(self, entry: Dict[str, Any], timestamp: float) -> None:
+        """
+        写入 LogManager 格式的日志条目
+
+        Args:
+            entry: 日志条目
+            timestamp: 秒级时间戳
+        """
+        fields = {k: v for k, v in entry.items()
+                  if k not in ('timestamp', 'level', 'message', 'context')}
+        self.write(timestamp, entry.get('level', 'INFO'), entry.get('message', ''),
+                   entry.get('context'), **fields)
+
+    def _append(self, timestamp: float, level: int, data: bytes) -> None:
+        record_len = _RECORD_OVERHEAD + len(data)
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            elif self._offset + record_len > self.segment_size and self._record_count:
+                self._seal()
+                self._open_segment()
+
+            if self._record_count % self.index_interval == 0:
+                self._index.append((timestamp, self._offset))
+            if self._record_count == 0:
+                self._min_ts = timestamp
+            self._max_ts = max(self._max_ts, timestamp)
+
+            self._file.write(_RECORD_HEADER.pack(len(data), timestamp, level))
+            self._file.write(data)
+            self._file.write(_RECORD_TRAILER.pack(record_len))
+            self._offset += record_len
+            self._record_count += 1
+
+    def _open_segment(self) -> None:
+        self._path = self.directory / f"{self._next_id:012d}{SEGMENT_SUFFIX}"
+        self._next_id += 1
+        self._file = open(self._path, 'wb')
+        self._file.write(_FILE_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, time.time()))
+        self._offset = _FILE_HEADER.size
+        self._record_count = 0
+        self._index = []
+        self._min_ts = 0.0
+        self._max_ts = 0.0
+        self._enforce_retention()
+
+    def _seal(self) -> None:
+        _write_footer(self._file, self._index, self._min_ts, self._max_ts, self._offset)
+        self._file.close()
+        self._file = None
+
+    def _enforce_retention(self) -> None:
+        if not self.max_segments:
+            return
+        segments = list_segments(self.directory)
+        for path in segments[:-self.max_segments]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def flush(self) -> None:
+        """将缓冲数据刷到磁盘，读取端可立即看到"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        """封存当前段"""
+        with self._lock:
+            if self._file is not None:
+                self._seal()
+
+
+def list_segments(directory: Union[str, Path]) -> List[Path]:
+    """按顺序列出目录下的段文件"""
+    return sorted(Path(directory).glob(f"*{SEGMENT_SUFFIX}"))
+
+
+def _write_footer(file, index: List[tuple], min_ts: float, max_ts: float,
+                  index_offset: int) -> None:
+    for ts, offset in index:
+        file.write(_INDEX_ENTRY.pack(ts, offset))
+    file.write(_FOOTER.pack(min_ts, max_ts, index_offset, len(index), INDEX_MAGIC))
+
+
+def _is_sealed(path: Path) -> bool:
+    size = path.stat().st_size
+    if size < _FILE_HEADER.size + _FOOTER.size:
+        return False
+    with open(path, 'rb') as f:
+        f.seek(size - _FOOTER.size)
+        return f.read(_FOOTER.size)[-4:] == INDEX_MAGIC
+
+
+def _recover_segment(path: Path, index_interval: int) -> None:
+    """截断未封存段中不完整的尾部记录并补写稀疏索引"""
+    with open(path, 'r+b') as f:
+        data = f.read()
+        if len(data) < _FILE_HEADER.size or data[:4] != SEGMENT_MAGIC:
+            return
+
+        offset = _FILE_HEADER.size
+        index, count = [], 0
+        min_ts = max_ts = 0.0
+        while offset + _RECORD_OVERHEAD <= len(data):
+            length, ts, _ = _RECORD_HEADER.unpack_from(data, offset)
+            end = offset + _RECORD_OVERHEAD + length
+            if end > len(data) or _RECORD_TRAILER.unpack_from(data, end - 4)[0] != end - offset:
+                break
+            if count % index_interval == 0:
+                index.append((ts, offset))
+            if count == 0:
+                min_ts = ts
+            max_ts = max(max_ts, ts)
+            count += 1
+            offset = end
+
+        f.seek(offset)
+        f.truncate()
+        _write_footer(f, index, min_ts, max_ts, offset)
+
+
+class _Segment:
+    """mmap 打开的单个段文件"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self.mm = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else b''
+        self.size = size
+
+        self.data_start = _FILE_HEADER.size
+        self.sealed = False
+        self.index_ts: List[float] = []
+        self.index_offsets: List[int] = []
+        self.data_end = size
+        self.min_ts: Optional[float] = None
+        self.max_ts: Optional[float] = None
+
+        if size >= _FILE_HEADER.size + _FOOTER.size and self.mm[size - 4:size] == INDEX_MAGIC:
+            min_ts, max_ts, index_offset, count, _ = _FOOTER.unpack_from(self.mm, size - _FOOTER.size)
+            self.sealed = True
+            self.data_end = index_offset
+            self.min_ts, self.max_ts = min_ts, max_ts
+            pos = index_offset
+            for _ in range(count):
+                ts, offset = _INDEX_ENTRY.unpack_from(self.mm, pos)
+                self.index_ts.append(ts)
+                self.index_offsets.append(offset)
+                pos += _INDEX_ENTRY.size
+        else:
+            # 活动段：只读到最后一条完整记录，时间范围从首尾记录获取
+            self.data_end = self._last_complete_offset()
+            if self.data_end > self.data_start:
+                self.min_ts = _RECORD_HEADER.unpack_from(self.mm, self.data_start)[1]
+                last = self.data_end - _RECORD_TRAILER.unpack_from(self.mm, self.data_end - 4)[0]
+                self.max_ts = _RECORD_HEADER.unpack_from(self.mm, last)[1]
+
+    def _last_complete_offset(self) -> int:
+        size = self.size
+        # 快速路径：文件末尾恰好是一条完整记录
+        if size >= self.data_start + _RECORD_OVERHEAD:
+            total = _RECORD_TRAILER.unpack_from(self.mm, size - 4)[0]
+            start = size - total
+            if (total >= _RECORD_OVERHEAD and start >= self.data_start
+                    and _RECORD_HEADER.unpack_from(self.mm, start)[0] + _RECORD_OVERHEAD == total):
+                return size
+
+        offset = self.data_start
+        while offset + _RECORD_OVERHEAD <= size:
+            length = _RECORD_HEADER.unpack_from(self.mm, offset)[0]
+            end = offset + _RECORD_OVERHEAD + length
+            if end > size:
+                break
+            offset = end
+        return offset
+
+    def close(self) -> None:
+        if self.size:
+            self.mm.close()
+        self._file.close()
+
+    def seek(self, start_ts: Optional[float]) -> int:
+        """返回不晚于 start_ts 的第一条记录之前最近的索引偏移"""
+        if start_ts is None or not self.index_ts:
+            return self.data_start
+        pos = bisect_right(self.index_ts, start_ts) - 1
+        return self.index_offsets[pos] if pos >= 0 else self.data_start
+
+    def decode(self, offset: int) -> Dict[str, Any]:
+        length, ts, level = _RECORD_HEADER.unpack_from(self.mm, offset)
+        start = offset + _RECORD_HEADER.size
+        entry = json.loads(self.mm[start:start + length])
+        entry['timestamp'] = datetime.fromtimestamp(ts).isoformat()
+        entry['level'] = logging.getLevelName(level)
+        return entry
+
+    def scan(self, start_ts: Optional[float], end_ts: Optional[float],
+             min_level: int) -> Iterator[Dict[str, Any]]:
+        offset = self.seek(start_ts)
+        mm, data_end = self.mm, self.data_end
+        while offset < data_end:
+            length, ts, level = _RECORD_HEADER.unpack_from(mm, offset)
+            next_offset = offset + _RECORD_OVERHEAD + length
+            if end_ts is not None and ts > end_ts:
+                return
+            if level >= min_level and (start_ts is None or ts >= start_ts):
+                yield self.decode(offset)
+            offset = next_offset
+
+    def scan_backward(self, min_level: int) -> Iterator[Dict[str, Any]]:
+        mm, offset = self.mm, self.data_end
+        while offset > self.data_start:
+            offset -= _RECORD_TRAILER.unpack_from(mm, offset - 4)[0]
+            if _RECORD_HEADER.unpack_from(mm, offset)[2] >= min_level:
+                yield self.decode(offset)
+
+
+class SegmentLogReader:
+    """
+    分段日志读取器
+
+    时间窗口查询先用各段的时间范围跳过无关段，再在段内二分稀疏索引定位起点；
+    级别过滤只读取记录头，不解码负载。
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        初始化读取器
+
+        Args:
+            directory: 段文件目录
+        """
+        self.directory = Path(directory)
+
+    def read(self, start_time: Union[str, datetime, float, None] = None,
+             end_time: Union[str, datetime, float, None] = None,
+             min_level: Union[str, int] = 0) -> Iterator[Dict[str, Any]]:
+        """
+        按时间正序读取时间窗口内的日志
+
+        Args:
+            start_time: 开始时间（包含）
+            end_time: 结束时间（包含）
+            min_level: 最低日志级别
+
+        Returns:
+            日志条目生成器
+        """
+        start_ts, end_ts = _to_epoch(start_time), _to_epoch(end_time)
+        level = _level_value(min_level)
+        for path in list_segments(self.directory):
+            segment = _Segment(path)
+            try:
+                if segment.min_ts is None:
+                    continue
+                if start_ts is not None and segment.max_ts < start_ts:
+                    continue
+                if end_ts is not None and segment.min_ts > end_ts:
+                    break
+                yield from segment.scan(start_ts, end_ts, level)
+            finally:
+                segment.close()
+
+    def tail(self, n: int, min_level: Union[str, int] = 0) -> List[Dict[str, Any]]:
+        """
+        读取最后 n 条日志（按时间正序返回）
+
+        Args:
+            n: 条数
+            min_level: 最低日志级别
+
+        Returns:
+            日志条目列表
+        """
+        level = _level_value(min_level)
+        result: List[Dict[str, Any]] = []
+        for path in reversed(list_segments(self.directory)):
+            segment = _Segment(path)
+            try:
+                for entry in segment.scan_backward(level):
+                    result.append(entry)
+                    if len(result) >= n:
+                        break
+            finally:
+                segment.close()
+            if len(result) >= n:
+                break
+        result.reverse()
+        return result
+
+    def follow(self, min_level: Union[str, int] = 0,
+               poll_interval: float = 0.5) -> Iterator[Dict[str, Any]]:
+        """
+        持续读取新写入的日志（类似 tail -f）
+
+        Args:
+            min_level: 最低日志级别
+            poll_interval: 轮询间隔(秒)
+
+        Returns:
+            日志条目生成器
+        """
+        level = _level_value(min_level)
+        segments = list_segments(self.directory)
+        current = segments[-1] if segments else None
+        offset = 0
+        if current is not None:
+            segment = _Segment(current)
+            offset = segment.data_end
+            segment.close()
+
+        while True:
+            segments = list_segments(self.directory)
+            if not segments:
+                time.sleep(poll_interval)
+                continue
+            if current is None or current not in segments:
+                current, offset = segments[0], _FILE_HEADER.size
+
+            segment = _Segment(current)
+            try:
+                data_end = segment.data_end
+                while offset < data_end:
+                    length, _, record_level = _RECORD_HEADER.unpack_from(segment.mm, offset)
+                    if record_level >= level:
+                        yield segment.decode(offset)
+                    offset += _RECORD_OVERHEAD + length
+                sealed = segment.sealed
+            finally:
+                segment.close()
+
+            later = [p for p in segments if p > current]
+            if sealed and later:
+                current, offset = later[0], _FILE_HEADER.size
+                continue
+            time.sleep(poll_interval)
+
+
+def _format_entry(entry: Dict[str, Any], as_json: bool) -> str:
+    if as_json:
+        return json.dumps(entry, ensure_ascii=False)
+    context = entry.get('context')
+    context_str = f" {json.dumps(context, ensure_ascii=False)}" if context else ""
+    return f"[{entry['timestamp']}] {entry['level']}: {entry.get('message', '')}{context_str}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """分段日志命令行读取工具"""
+    parser = argparse.ArgumentParser(description='Read binary segmented agent logs')
+    parser.add_argument('directory', help='segment directory')
+    parser.add_argument('--since', help='start time (ISO format or epoch seconds)')
+    parser.add_argument('--until', help='end time (ISO format or epoch seconds)')
+    parser.add_argument('--level', default='DEBUG', help='minimum level')
+    parser.add_argument('--tail', type=int, help='print the last N records')
+    parser.add_argument('--follow', '-f', action='store_true', help='keep printing new records')
+    parser.add_argument('--json', action='store_true', help='print records as JSON lines')
+    args = parser.parse_args(argv)
+
+    def parse_time(value: Optional[str]) -> Optional[float]:
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return _to_epoch(value)
+
+    reader = SegmentLogReader(args.directory)
+    try:
+        if args.tail is not None:
+            for entry in reader.tail(args.tail, args.level):
+                print(_format_entry(entry, args.json))
+        elif not args.follow:
+            for entry in reader.read(parse_time(args.since), parse_time(args.until), args.level):
+                print(_format_entry(entry, args.json))
+
+        if args.follow:
+            for entry in reader.follow(args.level):
+                print(_format_entry(entry, args.json), flush=True)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,20 @@ class TraceWriter:
         }
         self._events.setdefault(trace_id, []).append(event)
 
+    def record_events(self, events):
+        """
+        批量记录事件
+        Args:
+            events: (trace_id, event_type, payload, timestamp_ns) 序列；与 record_event
+                一致，事件不保存时间戳
+        """
+        for trace_id, event_type, payload, _ in events:
+            self._events.setdefault(trace_id, []).append({
+                "trace_id": trace_id,
+                "event_type": event_type,
+                "payload": payload
+            })
+
     def get_events(self, trace_id):
         return self._events.get(trace_id, [])
 
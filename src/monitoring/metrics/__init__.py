@@ -6,12 +6,11 @@
 
 from .metrics_collector import MetricsCollector
 from .alert_manager import AlertManager
-from .metrics_exporter import MetricsExporter
-from .metrics_aggregator import MetricsAggregator
+from .quantile_sketch import DDSketch, QuantileSketchStore
 
 __all__ = [
     'MetricsCollector',
     'AlertManager',
-    'MetricsExporter',
-    'MetricsAggregator'
+    'DDSketch',
+    'QuantileSketchStore'
 ] 
\ No newline at end of file
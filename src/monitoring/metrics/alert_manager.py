@@ -4,13 +4,19 @@
 提供告警规则管理、告警触发和通知功能。
 """
 
+import logging
 import time
 import threading
-from datetime import datetime, timedelta
+import operator
+import queue
+from collections import defaultdict, deque
+from datetime import datetime
 from typing import Dict, List, Any, Optional, Callable
 from enum import Enum
 import json
 
+logger = logging.getLogger(__name__)
+
 
 class AlertSeverity(Enum):
     """告警严重程度"""
@@ -21,11 +27,21 @@ class AlertSeverity(Enum):
 
 
 class AlertRule:
-    """告警规则"""
+    """
+    告警规则
+    
+    - condition/threshold: 比较条件和阈值
+    - aggregation: 窗口聚合方式 latest/avg/min/max/sum/count/rate
+    - window: 聚合窗口(秒)
+    - duration: 条件需持续满足的时间(秒)，即 for 持续时长
+    - hysteresis: 恢复回差，值需越过 threshold ∓ hysteresis 才解除告警
+    """
     
     def __init__(self, name: str, metric_name: str, condition: str, 
                  threshold: float, severity: AlertSeverity = AlertSeverity.WARNING,
-                 duration: int = 0, tags: Optional[Dict[str, str]] = None):
+                 duration: int = 0, tags: Optional[Dict[str, str]] = None,
+                 aggregation: str = 'latest', window: int = 300,
+                 hysteresis: float = 0.0):
         self.name = name
         self.metric_name = metric_name
         self.condition = condition
@@ -33,6 +49,9 @@ class AlertRule:
         self.severity = severity
         self.duration = duration
         self.tags = tags or {}
+        self.aggregation = aggregation
+        self.window = window
+        self.hysteresis = hysteresis
         self.created_at = datetime.now()
     
     def to_dict(self) -> Dict[str, Any]:
@@ -44,6 +63,9 @@ class AlertRule:
             'severity': self.severity.value,
             'duration': self.duration,
             'tags': self.tags,
+            'aggregation': self.aggregation,
+            'window': self.window,
+            'hysteresis': self.hysteresis,
             'created_at': self.created_at.isoformat()
         }
     
@@ -56,7 +78,10 @@ class AlertRule:
             threshold=data['threshold'],
             severity=AlertSeverity(data['severity']),
             duration=data.get('duration', 0),
-            tags=data.get('tags', {})
+            tags=data.get('tags', {}),
+            aggregation=data.get('aggregation', 'latest'),
+            window=data.get('window', 300),
+            hysteresis=data.get('hysteresis', 0.0)
         )
 
 
@@ -89,8 +114,118 @@ class Alert:
         self.resolved_at = datetime.now()
 
 
+_OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+
+class _SeriesWindow:
+    """
+    单个指标序列的滑动窗口
+    
+    维护窗口内样本的累计和以及单调队列，avg/min/max/sum/count/rate/latest
+    均可 O(1) 读取，样本过期时 O(1) 摊还淘汰。
+    """
+    
+    def __init__(self, metric_name: str, tags: Dict[str, str], window: float):
+        self.metric_name = metric_name
+        self.tags = tags
+        self.window = window
+        self.samples: deque = deque()
+        self.total = 0.0
+        self._min_q: deque = deque()
+        self._max_q: deque = deque()
+        self._seq = 0
+    
+    def matches(self, tags: Dict[str, str]) -> bool:
+        return all(tags.get(k) == v for k, v in self.tags.items())
+    
+    def add(self, timestamp: float, value: float) -> None:
+        self._seq += 1
+        sample = (timestamp, value, self._seq)
+        self.samples.append(sample)
+        self.total += value
+        while self._min_q and self._min_q[-1][1] >= value:
+            self._min_q.pop()
+        self._min_q.append(sample)
+        while self._max_q and self._max_q[-1][1] <= value:
+            self._max_q.pop()
+        self._max_q.append(sample)
+    
+    def evict(self, now: float) -> None:
+        cutoff = now - self.window
+        samples = self.samples
+        while samples and samples[0][0] < cutoff:
+            sample = samples.popleft()
+            self.total -= sample[1]
+            if self._min_q and self._min_q[0][2] == sample[2]:
+                self._min_q.popleft()
+            if self._max_q and self._max_q[0][2] == sample[2]:
+                self._max_q.popleft()
+    
+    def value(self, aggregation: str) -> Optional[float]:
+        samples = self.samples
+        if not samples:
+            return None
+        if aggregation == 'avg':
+            return self.total / len(samples)
+        if aggregation == 'min':
+            return self._min_q[0][1]
+        if aggregation == 'max':
+            return self._max_q[0][1]
+        if aggregation == 'sum':
+            return self.total
+        if aggregation == 'count':
+            return float(len(samples))
+        if aggregation == 'rate':
+            first, last = samples[0], samples[-1]
+            elapsed = last[0] - first[0]
+            return (last[1] - first[1]) / elapsed if elapsed > 0 else 0.0
+        return samples[-1][1]
+
+
+class _CompiledRule:
+    """编译后的告警规则：条件在添加规则时编译为闭包"""
+    
+    __slots__ = ('rule', 'series', 'alert_key', 'fires', 'clears', 'pending_since')
+    
+    def __init__(self, rule: AlertRule, series: _SeriesWindow):
+        self.rule = rule
+        self.series = series
+        self.alert_key = f"{rule.name}:{rule.metric_name}"
+        self.pending_since: Optional[float] = None
+        
+        op = _OPERATORS.get(rule.condition)
+        threshold = rule.threshold
+        if op is None:
+            self.fires = self.clears = lambda value: False
+            return
+        
+        self.fires = lambda value: op(value, threshold)
+        
+        # 回差：大于类条件需降到 threshold - hysteresis 以下才恢复，小于类反之
+        if rule.condition in ('>', '>='):
+            clear_threshold = threshold - rule.hysteresis
+        elif rule.condition in ('<', '<='):
+            clear_threshold = threshold + rule.hysteresis
+        else:
+            clear_threshold = threshold
+        self.clears = lambda value: not op(value, clear_threshold)
+
+
 class AlertManager:
-    """告警管理器"""
+    """
+    告警管理器
+    
+    规则在添加时编译，按 (指标名, 标签, 窗口) 分组到共享的滑动窗口序列上。
+    新样本到达时只更新对应序列并评估挂在该序列上的规则；后台线程定期推进
+    时间，处理窗口过期和 for 持续时长。通知由独立线程异步发送。
+    """
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or {}
@@ -99,95 +234,209 @@ class AlertManager:
         
         self.rules: Dict[str, AlertRule] = {}
         self.active_alerts: Dict[str, Alert] = {}
-        self.alert_history: List[Alert] = []
+        self.alert_history: deque = deque(maxlen=self.max_alerts)
         self.notification_handlers: List[Callable] = []
         self._lock = threading.Lock()
         self.metrics_collector = None
         
+        # 编译后的规则和按指标名索引的序列
+        self._compiled: Dict[str, _CompiledRule] = {}
+        self._series: Dict[tuple, _SeriesWindow] = {}
+        self._series_by_metric: Dict[str, List[_SeriesWindow]] = defaultdict(list)
+        self._rules_by_series: Dict[int, List[_CompiledRule]] = defaultdict(list)
+        
+        # 异步通知队列
+        self._notification_queue: queue.Queue = queue.Queue(
+            maxsize=self.config.get('notification_queue_size', 10000)
+        )
+        self._notification_thread = threading.Thread(target=self._notification_worker, daemon=True)
+        self._notification_thread.start()
+        
         self._start_alert_check_task()
     
     def add_rule(self, rule: AlertRule) -> None:
         with self._lock:
+            if rule.name in self.rules:
+                self._detach_rule(rule.name)
             self.rules[rule.name] = rule
+            
+            series_key = (rule.metric_name, tuple(sorted(rule.tags.items())), rule.window)
+            series = self._series.get(series_key)
+            if series is None:
+                series = _SeriesWindow(rule.metric_name, dict(rule.tags), rule.window)
+                self._series[series_key] = series
+                self._series_by_metric[rule.metric_name].append(series)
+            
+            compiled = _CompiledRule(rule, series)
+            self._compiled[rule.name] = compiled
+            self._rules_by_series[id(series)].append(compiled)
     
     def remove_rule(self, rule_name: str) -> None:
         with self._lock:
             if rule_name in self.rules:
+                self._detach_rule(rule_name)
                 del self.rules[rule_name]
     
+    def _detach_rule(self, rule_name: str) -> None:
+        compiled = self._compiled.pop(rule_name, None)
+        if compiled is None:
+            return
+        series = compiled.series
+        attached = self._rules_by_series[id(series)]
+        attached.remove(compiled)
+        if not attached:
+            del self._rules_by_series[id(series)]
+            self._series_by_metric[series.metric_name].remove(series)
+            if not self._series_by_metric[series.metric_name]:
+                del self._series_by_metric[series.metric_name]
+            self._series = {k: v for k, v in self._series.items() if v is not series}
+    
     def get_rules(self) -> List[AlertRule]:
         with self._lock:
             return list(self.rules.values())
     
     def set_metrics_collector(self, collector) -> None:
         self.metrics_collector = collector
+        if hasattr(collector, 'add_listener'):
+            collector.add_listener(self.observe_metric)
     
     def add_notification_handler(self, handler: Callable) -> None:
         self.notification_handlers.append(handler)
     
-    def check_alerts(self, metrics_data: Optional[Dict[str, Any]] = None) -> List[Alert]:
-        if not self.metrics_collector and not metrics_data:
+    def observe_metric(self, metric) -> List[Alert]:
+        """
+        接收新的指标样本并增量评估相关规则
+        
+        Args:
+            metric: Metric 对象（带 name/value/tags/timestamp）
+            
+        Returns:
+            本次新触发的告警
+        """
+        timestamp_ns = getattr(metric, 'timestamp_ns', None)
+        if timestamp_ns is not None:
+            timestamp = timestamp_ns / 1_000_000_000
+        else:
+            timestamp = metric.timestamp.timestamp() if isinstance(metric.timestamp, datetime) else metric.timestamp
+        return self.observe(metric.name, metric.value, metric.tags, timestamp)
+    
+    def observe(self, metric_name: str, value: float,
+                tags: Optional[Dict[str, str]] = None,
+                timestamp: Optional[float] = None) -> List[Alert]:
+        """
+        接收一个样本值并增量评估相关规则
+        
+        Args:
+            metric_name: 指标名
+            value: 样本值
+            tags: 样本标签
+            timestamp: 样本时间戳(秒)
+            
+        Returns:
+            本次新触发的告警
+        """
+        if metric_name not in self._series_by_metric:
             return []
         
+        tags = tags or {}
+        now = time.time()
+        timestamp = now if timestamp is None else timestamp
         new_alerts = []
         
         with self._lock:
-            for rule in self.rules.values():
-                if metrics_data and rule.metric_name in metrics_data:
-                    current_value = metrics_data[rule.metric_name]
-                elif self.metrics_collector:
-                    stats = self.metrics_collector.get_metric_statistics(
-                        rule.metric_name, 
-                        time_range=timedelta(minutes=5),
-                        tags=rule.tags
-                    )
-                    current_value = stats.get('latest', 0)
-                else:
+            for series in self._series_by_metric.get(metric_name, ()):
+                if not series.matches(tags):
                     continue
-                
-                if self._check_condition(current_value, rule.condition, rule.threshold):
-                    alert_key = f"{rule.name}:{rule.metric_name}"
-                    
-                    if alert_key not in self.active_alerts:
-                        alert = Alert(rule, current_value)
-                        self.active_alerts[alert_key] = alert
+                series.add(timestamp, value)
+                series.evict(now)
+                for compiled in self._rules_by_series.get(id(series), ()):
+                    alert = self._evaluate(compiled, now)
+                    if alert:
                         new_alerts.append(alert)
-                        
-                        self.alert_history.append(alert)
-                        if len(self.alert_history) > self.max_alerts:
-                            self.alert_history.pop(0)
-                        
-                        self._send_notification(alert)
-                else:
-                    alert_key = f"{rule.name}:{rule.metric_name}"
-                    if alert_key in self.active_alerts:
-                        self.active_alerts[alert_key].resolve()
-                        del self.active_alerts[alert_key]
         
         return new_alerts
     
+    def check_alerts(self, metrics_data: Optional[Dict[str, Any]] = None) -> List[Alert]:
+        """
+        推进评估时间
+        
+        给定 metrics_data 时作为样本写入；否则只处理窗口过期和 for 持续时长，
+        不重新读取原始样本。
+        
+        Args:
+            metrics_data: 指标名到当前值的映射
+            
+        Returns:
+            新触发的告警
+        """
+        new_alerts = []
+        if metrics_data:
+            for metric_name, value in metrics_data.items():
+                new_alerts.extend(self.observe(metric_name, value))
+        
+        now = time.time()
+        with self._lock:
+            for series in self._series.values():
+                series.evict(now)
+            for compiled in self._compiled.values():
+                alert = self._evaluate(compiled, now)
+                if alert:
+                    new_alerts.append(alert)
+        
+        return new_alerts
+    
+    def _evaluate(self, compiled: _CompiledRule, now: float) -> Optional[Alert]:
+        """评估单条规则的状态迁移（调用方持有锁）"""
+        value = compiled.series.value(compiled.rule.aggregation)
+        alert_key = compiled.alert_key
+        active = self.active_alerts.get(alert_key)
+        
+        if value is None:
+            compiled.pending_since = None
+            return None
+        
+        if active is not None:
+            if compiled.clears(value):
+                active.resolve()
+                del self.active_alerts[alert_key]
+                compiled.pending_since = None
+            else:
+                active.value = value
+            return None
+        
+        if not compiled.fires(value):
+            compiled.pending_since = None
+            return None
+        
+        if compiled.pending_since is None:
+            compiled.pending_since = now
+        if now - compiled.pending_since < compiled.rule.duration:
+            return None
+        
+        alert = Alert(compiled.rule, value)
+        self.active_alerts[alert_key] = alert
+        self.alert_history.append(alert)
+        self._send_notification(alert)
+        return alert
+    
     def _check_condition(self, value: float, condition: str, threshold: float) -> bool:
-        if condition == ">":
-            return value > threshold
-        elif condition == "<":
-            return value < threshold
-        elif condition == ">=":
-            return value >= threshold
-        elif condition == "<=":
-            return value <= threshold
-        elif condition == "==":
-            return value == threshold
-        elif condition == "!=":
-            return value != threshold
-        else:
-            return False
+        op = _OPERATORS.get(condition)
+        return op(value, threshold) if op else False
     
     def _send_notification(self, alert: Alert) -> None:
-        for handler in self.notification_handlers:
-            try:
-                handler(alert)
-            except Exception as e:
-                print(f"Notification handler error: {e}")
+        try:
+            self._notification_queue.put_nowait(alert)
+        except queue.Full:
+            logger.warning("Notification queue full, dropping alert: %s", alert.rule.name)
+    
+    def _notification_worker(self) -> None:
+        while True:
+            alert = self._notification_queue.get()
+            for handler in list(self.notification_handlers):
+                try:
+                    handler(alert)
+                except Exception:
+                    logger.exception("Notification handler error for alert %s", alert.rule.name)
     
     def get_active_alerts(self) -> List[Alert]:
         with self._lock:
@@ -195,7 +444,7 @@ class AlertManager:
     
     def get_alert_history(self, limit: int = 100) -> List[Alert]:
         with self._lock:
-            return self.alert_history[-limit:]
+            return list(self.alert_history)[-limit:]
     
     def resolve_alert(self, rule_name: str, metric_name: str) -> bool:
         with self._lock:
@@ -203,6 +452,9 @@ class AlertManager:
             if alert_key in self.active_alerts:
                 self.active_alerts[alert_key].resolve()
                 del self.active_alerts[alert_key]
+                compiled = self._compiled.get(rule_name)
+                if compiled:
+                    compiled.pending_since = None
                 return True
             return False
     
@@ -212,8 +464,8 @@ class AlertManager:
                 try:
                     time.sleep(self.check_interval)
                     self.check_alerts()
-                except Exception as e:
-                    print(f"Alert check error: {e}")
+                except Exception:
+                    logger.exception("Alert check error")
         
         thread = threading.Thread(target=check_worker, daemon=True)
         thread.start()
@@ -4,26 +4,55 @@
 提供性能指标收集、存储和查询功能。
 """
 
+import logging
+import sys
 import time
 import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Callable
 from collections import defaultdict, deque
 import json
 import psutil
 import os
 
+from ...utils.timestamps import local_to_ns, ns_to_local
+
+logger = logging.getLogger(__name__)
+
 
 class Metric:
-    """指标数据类"""
+    """
+    指标数据类
+    
+    时间戳以纪元纳秒整数保存在 timestamp_ns 中，timestamp 属性为本地时间的 naive
+    datetime（与其他记录的 UTC 不同，见 utils.timestamps）；名称和单位会被 intern，
+    同名样本共享同一个字符串。
+    """
+    
+    __slots__ = ('name', 'value', 'tags', 'timestamp_ns', 'unit')
     
     def __init__(self, name: str, value: float, tags: Optional[Dict[str, str]] = None,
-                 timestamp: Optional[datetime] = None, unit: str = ""):
-        self.name = name
+                 timestamp: Optional[datetime] = None, unit: str = "",
+                 timestamp_ns: Optional[int] = None):
+        self.name = sys.intern(name)
         self.value = value
         self.tags = tags or {}
-        self.timestamp = timestamp or datetime.now()
-        self.unit = unit
+        if timestamp_ns is not None:
+            self.timestamp_ns = timestamp_ns
+        elif timestamp is not None:
+            self.timestamp_ns = local_to_ns(timestamp)
+        else:
+            self.timestamp_ns = time.time_ns()
+        self.unit = sys.intern(unit)
+    
+    @property
+    def timestamp(self) -> datetime:
+        """采样时间（本地时间）"""
+        return ns_to_local(self.timestamp_ns)
+    
+    @timestamp.setter
+    def timestamp(self, value: datetime) -> None:
+        self.timestamp_ns = local_to_ns(value)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -57,6 +86,7 @@ class MetricsCollector:
         
         self.metrics: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.max_metrics))
         self._lock = threading.Lock()
+        self._listeners: List[Callable[[Metric], Any]] = []
         
         self.system_collector = None
         if self.enable_system_metrics:
@@ -71,6 +101,16 @@ class MetricsCollector:
         with self._lock:
             metric_key = self._generate_metric_key(metric)
             self.metrics[metric_key].append(metric)
+        
+        for listener in self._listeners:
+            try:
+                listener(metric)
+            except Exception:
+                logger.exception("Metric listener error for %s", metric.name)
+    
+    def add_listener(self, listener: Callable[[Metric], Any]) -> None:
+        """注册新样本监听器（如告警管理器的增量评估）"""
+        self._listeners.append(listener)
     
     def record_metric_simple(self, name: str, value: float, 
                            tags: Optional[Dict[str, str]] = None, unit: str = "") -> None:
@@ -97,15 +137,17 @@ class MetricsCollector:
             start_time = query['start_time']
             if isinstance(start_time, str):
                 start_time = datetime.fromisoformat(start_time)
-            all_metrics = [m for m in all_metrics if m.timestamp >= start_time]
+            start_ns = local_to_ns(start_time)
+            all_metrics = [m for m in all_metrics if m.timestamp_ns >= start_ns]
         
         if 'end_time' in query:
             end_time = query['end_time']
             if isinstance(end_time, str):
                 end_time = datetime.fromisoformat(end_time)
-            all_metrics = [m for m in all_metrics if m.timestamp <= end_time]
+            end_ns = local_to_ns(end_time)
+            all_metrics = [m for m in all_metrics if m.timestamp_ns <= end_ns]
         
-        all_metrics.sort(key=lambda x: x.timestamp)
+        all_metrics.sort(key=lambda x: x.timestamp_ns)
         limit = query.get('limit', 1000)
         return all_metrics[-limit:]
     
@@ -119,8 +161,8 @@ class MetricsCollector:
         metrics = self.get_metrics(query)
         
         if time_range:
-            cutoff_time = datetime.now() - time_range
-            metrics = [m for m in metrics if m.timestamp >= cutoff_time]
+            cutoff_ns = time.time_ns() - int(time_range.total_seconds() * 1_000_000_000)
+            metrics = [m for m in metrics if m.timestamp_ns >= cutoff_ns]
         
         if not metrics:
             return {'name': name, 'count': 0, 'min': 0, 'max': 0, 'avg': 0, 'sum': 0}
@@ -185,20 +227,20 @@ class MetricsCollector:
                     
                     self._cleanup_old_metrics()
                     
-                except Exception as e:
-                    print(f"Metrics collection error: {e}")
+                except Exception:
+                    logger.exception("Metrics collection error")
         
         thread = threading.Thread(target=collection_worker, daemon=True)
         thread.start()
     
     def _cleanup_old_metrics(self) -> None:
-        cutoff_time = datetime.now() - timedelta(hours=self.retention_period)
+        cutoff_ns = time.time_ns() - int(self.retention_period * 3600 * 1_000_000_000)
         
         with self._lock:
             for metric_key in list(self.metrics.keys()):
                 metrics_deque = self.metrics[metric_key]
                 
-                while metrics_deque and metrics_deque[0].timestamp < cutoff_time:
+                while metrics_deque and metrics_deque[0].timestamp_ns < cutoff_ns:
                     metrics_deque.popleft()
                 
                 if not metrics_deque:
@@ -236,7 +278,7 @@ class SystemMetricsCollector:
             metrics['process_cpu_percent'] = process.cpu_percent()
             metrics['process_memory_mb'] = process.memory_info().rss / (1024 * 1024)
             
-        except Exception as e:
-            print(f"System metrics collection error: {e}")
+        except Exception:
+            logger.exception("System metrics collection error")
         
         return metrics 
\ No newline at end of file
@@ -0,0 +1,515 @@
+"""
+分位数草图
+
+提供基于 DDSketch 的流式分位数估计，用于延迟 p50/p95/p99 统计。
+草图可跨时间窗口、跨进程合并，并支持紧凑的二进制序列化。
+"""
+
+import base64
+import math
+import struct
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+# 序列化格式: 版本、相对误差、计数、零桶计数、总和、最小值、最大值、桶数量
+_HEADER = struct.Struct('<BdQQdddI')
+_BIN = struct.Struct('<iQ')
+_FORMAT_VERSION = 1
+
+
+class DDSketch:
+    """
+    DDSketch 分位数草图
+
+    按对数间隔分桶，保证任意分位数估计的相对误差不超过 relative_accuracy。
+    仅跟踪非负数值（延迟、耗时等），小于等于 0 的值计入零桶。
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+        self._summary_cache: Optional[Dict[str, float]] = None
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # 返回桶的代表值，使相对误差对称
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        """
+        添加样本
+
+        Args:
+            value: 样本值
+            weight: 样本权重
+        """
+        if value > 0:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + weight
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zero_count += weight
+
+        self.count += weight
+        self.sum += value * weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self._summary_cache = None
+
+    def _collapse(self) -> None:
+        """合并最低的桶，将桶数量限制在 max_bins 以内"""
+        keys = sorted(self.bins)
+        overflow = len(keys) - self.max_bins
+        if overflow <= 0:
+            return
+        target = keys[overflow]
+        collapsed = sum(self.bins.pop(k) for k in keys[:overflow])
+        self.bins[target] += collapsed
+
+    def merge(self, other: 'DDSketch') -> None:
+        """
+        合并另一个草图
+
+        Args:
+            other: 相同精度的草图
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if other.count == 0:
+            return
+
+        for key, cnt in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + cnt
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._summary_cache = None
+
+    def copy(self) -> 'DDSketch':
+        sketch = DDSketch(self.relative_accuracy, self.max_bins)
+        sketch.merge(self)
+        return sketch
+
+    def quantile(self, q: float) -> float:
+        """
+        估计分位数
+
+        Args:
+            q: 分位点，取值 [0, 1]
+
+        Returns:
+            分位数估计值，空草图返回 0.0
+        """
+        if self.count == 0:
+            return 0.0
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        return self.quantiles((q,))[0]
+
+    def quantiles(self, qs: Tuple[float, ...] = DEFAULT_QUANTILES) -> List[float]:
+        """一次遍历估计多个分位数（qs 需升序）"""
+        if self.count == 0:
+            return [0.0 for _ in qs]
+
+        results = []
+        keys = sorted(self.bins)
+        seen = self.zero_count
+        idx = 0
+        for q in qs:
+            rank = q * (self.count - 1)
+            if rank < self.zero_count:
+                results.append(self.min)
+                continue
+            while idx < len(keys) and seen + self.bins[keys[idx]] <= rank:
+                seen += self.bins[keys[idx]]
+                idx += 1
+            if idx < len(keys):
+                results.append(min(max(self._value(keys[idx]), self.min), self.max))
+            else:
+                results.append(self.max)
+        return results
+
+    def summary(self) -> Dict[str, float]:
+        """
+        获取统计摘要（count/sum/min/max/avg/p50/p95/p99）
+
+        结果在草图未变化时被缓存，重复读取为 O(1)。
+        """
+        if self._summary_cache is None:
+            if self.count == 0:
+                self._summary_cache = {
+                    'count': 0, 'sum': 0.0, 'min': 0.0, 'max': 0.0, 'avg': 0.0,
+                    'p50': 0.0, 'p95': 0.0, 'p99': 0.0
+                }
+            else:
+                p50, p95, p99 = self.quantiles(DEFAULT_QUANTILES)
+                self._summary_cache = {
+                    'count': self.count,
+                    'sum': self.sum,
+                    'min': self.min,
+                    'max': self.max,
+                    'avg': self.sum / self.count,
+                    'p50': p50,
+                    'p95': p95,
+                    'p99': p99
+                }
+        return dict(self._summary_cache)
+
+    def to_bytes(self) -> bytes:
+        """序列化为紧凑的二进制格式"""
+        parts = [_HEADER.pack(
+            _FORMAT_VERSION, self.relative_accuracy, self.count, self.zero_count,
+            self.sum, self.min if self.count else 0.0, self.max if self.count else 0.0,
+            len(self.bins)
+        )]
+        for key in sorted(self.bins):
+            parts.append(_BIN.pack(key, self.bins[key]))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, max_bins: int = 2048) -> 'DDSketch':
+        version, accuracy, count, zero_count, total, vmin, vmax, nbins = _HEADER.unpack_from(data, 0)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported sketch format version: {version}")
+
+        sketch = cls(accuracy, max_bins)
+        offset = _HEADER.size
+        for _ in range(nbins):
+            key, cnt = _BIN.unpack_from(data, offset)
+            sketch.bins[key] = cnt
+            offset += _BIN.size
+        sketch.count = count
+        sketch.zero_count = zero_count
+        sketch.sum = total
+        if count:
+            sketch.min = vmin
+            sketch.max = vmax
+        return sketch
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'data': base64.b64encode(self.to_bytes()).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DDSketch':
+        return cls.from_bytes(base64.b64decode(data['data']), data.get('max_bins', 2048))
+
+
+class QuantileSketchStore:
+    """
+    分维度、分时间窗口的分位数草图存储
+
+    每个样本按 (dimension, key) 记录，例如 ('tool', 'search')、('server', 'github')、
+    ('agent', 'agent_001')。样本同时写入当前时间窗口和累计草图：
+    - 无时间范围的查询直接读取累计草图的缓存摘要
+    - 有时间范围的查询合并覆盖该范围的窗口草图
+    某个键在所有保留的窗口中都没有数据时，它的累计草图随最后一个窗口一起淘汰，
+    累计草图的数量不会超过窗口中出现过的键的数量。
+    不同进程的存储可以通过 merge 或 to_dict/from_dict 合并。
+    """
+
+    def __init__(self, window_seconds: int = 60, max_windows: int = 60,
+                 relative_accuracy: float = 0.01):
+        """
+        初始化草图存储
+
+        Args:
+            window_seconds: 单个时间窗口长度(秒)
+            max_windows: 保留的窗口数量
+            relative_accuracy: 草图相对误差
+        """
+        self.window_seconds = window_seconds
+        self.max_windows = max_windows
+        self.relative_accuracy = relative_accuracy
+
+        # (窗口起始时间, {(维度, 键): 草图}, {(维度, 键): 错误数})
+        self._windows: deque = deque()
+        self._totals: Dict[Tuple[str, str], DDSketch] = {}
+        self._total_errors: Dict[Tuple[str, str], int] = {}
+        # (维度, 键) -> 含有该键的窗口数，降为 0 时淘汰累计草图
+        self._window_refs: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _new_sketch(self) -> DDSketch:
+        return DDSketch(self.relative_accuracy)
+
+    def _window_for(self, timestamp: float) -> Optional[Tuple[float, Dict, Dict]]:
+        """返回时间戳所在的窗口，早于保留范围时返回 None"""
+        start = timestamp - (timestamp % self.window_seconds)
+        if self._windows and self._windows[-1][0] == start:
+            return self._windows[-1]
+        if self._windows and start < self._windows[-1][0]:
+            # 乱序样本写入对应的历史窗口
+            for window in reversed(self._windows):
+                if window[0] == start:
+                    return window
+                if window[0] < start:
+                    break
+            if len(self._windows) >= self.max_windows and start < self._windows[0][0]:
+                return None
+            window = (start, {}, {})
+            self._windows.append(window)
+            self._windows = deque(sorted(self._windows, key=lambda w: w[0]))
+        else:
+            window = (start, {}, {})
+            self._windows.append(window)
+        while len(self._windows) > self.max_windows:
+            self._release_window(self._windows.popleft())
+        return window
+
+    def _add_to_window(self, sketches: Dict, series: Tuple[str, str], sketch: DDSketch) -> None:
+        sketches[series] = sketch
+        self._window_refs[series] = self._window_refs.get(series, 0) + 1
+
+    def _release_window(self, window: Tuple[float, Dict, Dict]) -> None:
+        """淘汰窗口，不再出现在任何窗口中的键的累计草图一并淘汰"""
+        refs = self._window_refs
+        for series in window[1]:
+            remaining = refs.get(series, 0) - 1
+            if remaining > 0:
+                refs[series] = remaining
+                continue
+            refs.pop(series, None)
+            self._totals.pop(series, None)
+            self._total_errors.pop(series, None)
+
+    def record(self, dimension: str, key: str, value: float,
+               error: bool = False, timestamp: Optional[float] = None) -> None:
+        """
+        记录样本（时间戳早于所有保留窗口的样本被忽略）
+
+        Args:
+            dimension: 维度，如 tool/server/agent
+            key: 维度下的键
+            value: 样本值
+            error: 是否为失败样本
+            timestamp: 样本时间戳(秒)，默认当前时间
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        series = (dimension, key)
+
+        with self._lock:
+            window = self._window_for(timestamp)
+            if window is None:
+                # 已超出保留范围的样本不再计入
+                return
+            _, sketches, errors = window
+            sketch = sketches.get(series)
+            if sketch is None:
+                sketch = self._new_sketch()
+                self._add_to_window(sketches, series, sketch)
+            sketch.add(value)
+
+            total = self._totals.get(series)
+            if total is None:
+                total = self._totals[series] = self._new_sketch()
+            total.add(value)
+
+            if error:
+                errors[series] = errors.get(series, 0) + 1
+                self._total_errors[series] = self._total_errors.get(series, 0) + 1
+
+    def get_sketch(self, dimension: str, key: str,
+                   time_range: Optional[float] = None) -> Tuple[DDSketch, int]:
+        """
+        获取合并后的草图
+
+        Args:
+            dimension: 维度
+            key: 键
+            time_range: 时间范围(秒)，None 表示全部
+
+        Returns:
+            (草图, 错误数)
+        """
+        series = (dimension, key)
+        with self._lock:
+            if time_range is None:
+                total = self._totals.get(series)
+                return (total.copy() if total else self._new_sketch(),
+                        self._total_errors.get(series, 0))
+
+            cutoff = time.time() - time_range
+            merged = self._new_sketch()
+            error_count = 0
+            for start, sketches, errors in self._windows:
+                if start + self.window_seconds <= cutoff:
+                    continue
+                sketch = sketches.get(series)
+                if sketch is not None:
+                    merged.merge(sketch)
+                error_count += errors.get(series, 0)
+            return merged, error_count
+
+    def summary(self, dimension: str, key: str,
+                time_range: Optional[float] = None) -> Dict[str, float]:
+        """
+        获取统计摘要
+
+        Args:
+            dimension: 维度
+            key: 键
+            time_range: 时间范围(秒)，None 表示全部
+
+        Returns:
+            包含 count/errors/avg/min/max/p50/p95/p99 的字典
+        """
+        if time_range is None:
+            series = (dimension, key)
+            with self._lock:
+                total = self._totals.get(series)
+                result = total.summary() if total else self._new_sketch().summary()
+                result['errors'] = self._total_errors.get(series, 0)
+            return result
+
+        sketch, errors = self.get_sketch(dimension, key, time_range)
+        result = sketch.summary()
+        result['errors'] = errors
+        return result
+
+    def keys(self, dimension: str, time_range: Optional[float] = None) -> List[str]:
+        """列出维度下有数据的键"""
+        with self._lock:
+            if time_range is None:
+                return [k for d, k in self._totals if d == dimension]
+            cutoff = time.time() - time_range
+            found = set()
+            for start, sketches, _ in self._windows:
+                if start + self.window_seconds <= cutoff:
+                    continue
+                found.update(k for d, k in sketches if d == dimension)
+            return list(found)
+
+    def summaries(self, dimension: str,
+                  time_range: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """获取维度下所有键的统计摘要"""
+        return {key: self.summary(dimension, key, time_range)
+                for key in self.keys(dimension, time_range)}
+
+    def merge(self, other: 'QuantileSketchStore') -> None:
+        """
+        合并另一个存储（例如其他进程上报的数据）
+
+        Args:
+            other: 相同窗口长度的草图存储
+        """
+        if other.window_seconds != self.window_seconds:
+            raise ValueError("Cannot merge stores with different window sizes")
+
+        with other._lock:
+            other_windows = [(start, {s: sk.copy() for s, sk in sketches.items()}, dict(errors))
+                             for start, sketches, errors in other._windows]
+            other_totals = {s: sk.copy() for s, sk in other._totals.items()}
+            other_errors = dict(other._total_errors)
+
+        with self._lock:
+            for start, sketches, errors in other_windows:
+                window = self._window_for(start)
+                if window is None:
+                    continue
+                _, own_sketches, own_errors = window
+                for series, sketch in sketches.items():
+                    if series in own_sketches:
+                        own_sketches[series].merge(sketch)
+                    else:
+                        self._add_to_window(own_sketches, series, sketch)
+                for series, cnt in errors.items():
+                    own_errors[series] = own_errors.get(series, 0) + cnt
+
+            # 合并后已不在任何窗口中的键不再保留累计草图
+            for series, sketch in other_totals.items():
+                if series not in self._window_refs:
+                    continue
+                if series in self._totals:
+                    self._totals[series].merge(sketch)
+                else:
+                    self._totals[series] = sketch
+            for series, cnt in other_errors.items():
+                if series in self._window_refs:
+                    self._total_errors[series] = self._total_errors.get(series, 0) + cnt
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+            self._totals.clear()
+            self._total_errors.clear()
+            self._window_refs.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可 JSON 化的字典"""
+        def encode_series(sketches: Dict[Tuple[str, str], DDSketch],
+                          errors: Dict[Tuple[str, str], int]) -> List[Dict[str, Any]]:
+            return [{
+                'dimension': dimension,
+                'key': key,
+                'errors': errors.get((dimension, key), 0),
+                'sketch': base64.b64encode(sketch.to_bytes()).decode('ascii')
+            } for (dimension, key), sketch in sketches.items()]
+
+        with self._lock:
+            return {
+                'window_seconds': self.window_seconds,
+                'max_windows': self.max_windows,
+                'relative_accuracy': self.relative_accuracy,
+                'windows': [{'start': start, 'series': encode_series(sketches, errors)}
+                            for start, sketches, errors in self._windows],
+                'totals': encode_series(self._totals, self._total_errors)
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketchStore':
+        store = cls(
+            window_seconds=data['window_seconds'],
+            max_windows=data.get('max_windows', 60),
+            relative_accuracy=data.get('relative_accuracy', 0.01)
+        )
+
+        def decode_series(items: List[Dict[str, Any]]) -> Tuple[Dict, Dict]:
+            sketches, errors = {}, {}
+            for item in items:
+                series = (item['dimension'], item['key'])
+                sketches[series] = DDSketch.from_bytes(base64.b64decode(item['sketch']))
+                if item.get('errors'):
+                    errors[series] = item['errors']
+            return sketches, errors
+
+        for window in data.get('windows', []):
+            sketches, errors = decode_series(window['series'])
+            store._windows.append((window['start'], sketches, errors))
+            for series in sketches:
+                store._window_refs[series] = store._window_refs.get(series, 0) + 1
+        store._totals, store._total_errors = decode_series(data.get('totals', []))
+        return store
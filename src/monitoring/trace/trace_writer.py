@@ -17,6 +17,18 @@ class TraceWriter:
         }
         self.events.append(event)
 
+    def record_events(self, events):
+        # 批量记录 (trace_id, event_type, payload, timestamp_ns)，timestamp_ns 为事件发生时的 time_ns
+        self.events.extend({
+            "trace_id": trace_id,
+            "event_type": event_type,
+            "timestamp": datetime.utcfromtimestamp(timestamp_ns / 1e9).isoformat(),
+            "agent_id": None,
+            "session_id": None,
+            "context_id": None,
+            "payload": payload or {}
+        } for trace_id, event_type, payload, timestamp_ns in events)
+
     def query(self, trace_id=None, event_type=None, agent_id=None, time_range=None):
         results = self.events
         if trace_id:
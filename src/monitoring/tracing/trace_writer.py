@@ -3,11 +3,12 @@
 实现行为链的完整追踪和审计功能，包括trace记录、链路追踪、行为审计等
 """
 
+import sys
 import time
 import json
 import uuid
 from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 import logging
 from datetime import datetime
@@ -33,20 +34,62 @@ class TraceType(Enum):
     CALLBACK = "callback"           # 回调追踪
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TraceEntry:
-    """追踪条目"""
+    """追踪条目（写入后不可变）"""
     trace_id: str                   # 追踪ID
     context_id: str                 # 上下文ID
     session_id: Optional[str]       # 会话ID
     agent_id: Optional[str]         # 智能体ID
     trace_type: TraceType           # 追踪类型
     level: TraceLevel               # 追踪级别
-    timestamp: int                  # 时间戳
+    timestamp_ns: int               # 时间戳（纪元纳秒）
     message: str                    # 消息
     data: Dict[str, Any]           # 数据
     parent_trace_id: Optional[str] = None  # 父追踪ID
     duration: Optional[float] = None  # 持续时间
+    
+    @property
+    def timestamp(self) -> int:
+        """时间戳（秒）"""
+        return self.timestamp_ns // 1_000_000_000
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "trace_id": self.trace_id,
+            "context_id": self.context_id,
+            "session_id": self.session_id,
+            "agent_id": self.agent_id,
+            "trace_type": self.trace_type.value,
+            "level": self.level.value,
+            "timestamp": self.timestamp,
+            "timestamp_ns": self.timestamp_ns,
+            "message": self.message,
+            "data": self.data,
+            "parent_trace_id": self.parent_trace_id,
+            "duration": self.duration
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TraceEntry':
+        """从字典创建，兼容只有秒级 timestamp 的旧数据"""
+        timestamp_ns = data.get("timestamp_ns")
+        if timestamp_ns is None:
+            timestamp_ns = int(data["timestamp"]) * 1_000_000_000
+        return cls(
+            trace_id=data["trace_id"],
+            context_id=sys.intern(data["context_id"]),
+            session_id=data.get("session_id"),
+            agent_id=data.get("agent_id"),
+            trace_type=TraceType(data["trace_type"]),
+            level=TraceLevel(data["level"]),
+            timestamp_ns=timestamp_ns,
+            message=sys.intern(data["message"]),
+            data=data.get("data", {}),
+            parent_trace_id=data.get("parent_trace_id"),
+            duration=data.get("duration")
+        )
 
 
 class TraceWriter:
@@ -113,13 +156,13 @@ class TraceWriter:
         try:
             entry = TraceEntry(
                 trace_id=trace_id,
-                context_id=context_id,
+                context_id=sys.intern(context_id) if context_id else context_id,
                 session_id=session_id,
                 agent_id=agent_id,
                 trace_type=trace_type,
                 level=level,
-                timestamp=int(time.time()),
-                message=message,
+                timestamp_ns=time.time_ns(),
+                message=sys.intern(message),
                 data=data or {},
                 parent_trace_id=parent_trace_id,
                 duration=duration
@@ -438,7 +481,7 @@ class TraceWriter:
             entries = self.trace_entries
         
         if format.lower() == "json":
-            return json.dumps([asdict(entry) for entry in entries], 
+            return json.dumps([entry.to_dict() for entry in entries], 
                             ensure_ascii=False, indent=2)
         else:
             raise ValueError(f"Unsupported format: {format}")
@@ -496,7 +539,7 @@ class TraceWriter:
             "oldest_entry": min([entry.timestamp for entry in self.trace_entries]) if self.trace_entries else 0,
             "newest_entry": max([entry.timestamp for entry in self.trace_entries]) if self.trace_entries else 0
         } 
-
+    
     async def start_trace(self, trace_id, task):
         """兼容追踪调用，空实现"""
         pass
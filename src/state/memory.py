@@ -13,12 +13,16 @@
 
 import asyncio
 import json
+import sys
+import time
 import uuid
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 from enum import Enum
 import structlog
 
+from ..utils.timestamps import ns_to_utc, utc_to_ns
+
 logger = structlog.get_logger(__name__)
 
 
@@ -33,7 +37,18 @@ class MemoryType(Enum):
 
 
 class MemoryEntry:
-    """内存条目结构"""
+    """
+    内存条目结构
+    
+    使用 __slots__ 存放字段，时间戳保存为纪元纳秒整数（created_at_ns、
+    last_accessed_ns），created_at / last_accessed 属性为 naive UTC datetime
+    （见 utils.timestamps）。
+    """
+    
+    __slots__ = (
+        'entry_id', 'content', 'memory_type', 'context_id', 'trace_id',
+        'metadata', 'created_at_ns', 'last_accessed_ns', 'access_count'
+    )
     
     def __init__(
         self,
@@ -59,10 +74,32 @@ class MemoryEntry:
         self.context_id = context_id
         self.trace_id = trace_id
         self.metadata = metadata or {}
-        self.created_at = datetime.utcnow()
-        self.last_accessed = datetime.utcnow()
+        self.created_at_ns = self.last_accessed_ns = time.time_ns()
         self.access_count = 0
     
+    @property
+    def created_at(self) -> datetime:
+        """创建时间（naive UTC）"""
+        return ns_to_utc(self.created_at_ns)
+    
+    @created_at.setter
+    def created_at(self, value: datetime) -> None:
+        self.created_at_ns = utc_to_ns(value)
+    
+    @property
+    def last_accessed(self) -> datetime:
+        """最近访问时间（naive UTC）"""
+        return ns_to_utc(self.last_accessed_ns)
+    
+    @last_accessed.setter
+    def last_accessed(self, value: datetime) -> None:
+        self.last_accessed_ns = utc_to_ns(value)
+    
+    def touch(self) -> None:
+        """记录一次访问"""
+        self.access_count += 1
+        self.last_accessed_ns = time.time_ns()
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
@@ -83,7 +120,7 @@ class MemoryEntry:
         entry = cls(
             content=data["content"],
             memory_type=MemoryType(data["memory_type"]),
-            context_id=data["context_id"],
+            context_id=sys.intern(data["context_id"]),
             trace_id=data.get("trace_id"),
             metadata=data.get("metadata", {})
         )
@@ -228,8 +265,7 @@ class Memory:
         """
         for entry in self.memory_entries:
             if entry.entry_id == entry_id:
-                entry.access_count += 1
-                entry.last_accessed = datetime.utcnow()
+                entry.touch()
                 return entry
         return None
     
@@ -302,7 +338,7 @@ class Memory:
                 relevant_entries.append(entry)
         
         # 按访问时间排序，返回最近的
-        relevant_entries.sort(key=lambda x: x.last_accessed, reverse=True)
+        relevant_entries.sort(key=lambda x: x.last_accessed_ns, reverse=True)
         return relevant_entries[:limit]
     
     async def delete_memory(self, entry_id: str) -> bool:
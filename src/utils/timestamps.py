@@ -0,0 +1,76 @@
+"""
+纪元纳秒时间戳换算
+
+记录类型把时间戳保存为纪元纳秒整数（time.time_ns()），对外的 datetime 属性
+按需换算，精度截断到微秒：
+- MemoryEntry、ExecutionStep、CallbackResult 换算为 naive UTC datetime，
+  与它们改为纳秒存储之前 datetime.utcnow() 的取值一致
+- Metric 换算为本地时间的 naive datetime，与它原先 datetime.now() 的取值
+  以及 MetricsCollector 按 datetime.now() 计算的保留期、查询范围一致
+
+两种记录的 to_dict 输出因此分别是 UTC 和本地时间的 ISO 字符串，与换算前相同。
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def ns_to_utc(ns: Optional[int]) -> Optional[datetime]:
+    """
+    纪元纳秒 -> naive UTC datetime
+    
+    Args:
+        ns: 纪元纳秒，None 原样返回
+    
+    Returns:
+        naive UTC datetime
+    """
+    if ns is None:
+        return None
+    return _EPOCH + timedelta(microseconds=ns // 1000)
+
+
+def utc_to_ns(value: Optional[datetime]) -> Optional[int]:
+    """
+    naive UTC（或带时区）datetime -> 纪元纳秒
+    
+    Args:
+        value: datetime，None 原样返回
+    
+    Returns:
+        纪元纳秒
+    """
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND * 1000
+
+
+def ns_to_local(ns: int) -> datetime:
+    """
+    纪元纳秒 -> 本地时间的 naive datetime
+    
+    Args:
+        ns: 纪元纳秒
+    
+    Returns:
+        本地时间的 naive datetime
+    """
+    return datetime.fromtimestamp(ns // 1000 / 1_000_000)
+
+
+def local_to_ns(value: datetime) -> int:
+    """
+    datetime（naive 视为本地时间）-> 纪元纳秒
+    
+    Args:
+        value: datetime
+    
+    Returns:
+        纪元纳秒
+    """
+    return round(value.timestamp() * 1_000_000) * 1000
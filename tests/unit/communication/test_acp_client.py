@@ -0,0 +1,236 @@
+"""
+ACPClient 请求/确认、流量控制与重连单元测试
+"""
+
+import asyncio
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+import websockets
+
+from src.communication.protocols.acp.acp_client import ACPClient, ACPClientManager
+from src.communication.protocols.acp.message_schema import (
+    ACPMessage,
+    ACPPayload,
+    MessageContext,
+    MessageMeta,
+)
+
+
+def _message(trace_id: str = None) -> ACPMessage:
+    return ACPMessage(
+        meta=MessageMeta(str(uuid.uuid4()), "task", datetime.utcnow().isoformat(),
+                         "client", "acp_server", trace_id=trace_id),
+        context=MessageContext(session_id="s1"),
+        payload=ACPPayload("execute", "run", {"value": 1})
+    )
+
+
+class _FakeServer:
+    """记录收到的帧的 JSON WebSocket 服务端，可按需回送确认和响应"""
+    
+    def __init__(self, auto_ack: bool = True, reply: bool = True):
+        self.auto_ack = auto_ack
+        self.reply = reply
+        self.frames = []
+        self.connections = []
+        self._server = None
+    
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+    
+    @property
+    def messages(self) -> list:
+        return [m for frame in self.frames for m in (frame if isinstance(frame, list) else [frame])]
+    
+    async def __aenter__(self):
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0, subprotocols=["acp.json"])
+        return self
+    
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+    
+    async def ack(self, processed: int):
+        await self.connections[-1].send(json.dumps({"type": "ack", "message": "flow", "processed": processed}))
+    
+    async def _handle(self, websocket):
+        self.connections.append(websocket)
+        processed = 0
+        async for raw in websocket:
+            frame = json.loads(raw)
+            self.frames.append(frame)
+            batch = frame if isinstance(frame, list) else [frame]
+            processed += len(batch)
+            if self.reply:
+                for message in batch:
+                    await websocket.send(json.dumps({
+                        "type": "ack",
+                        "trace_id": message["meta"]["trace_id"],
+                        "message": "received"
+                    }))
+            if self.auto_ack:
+                await self.ack(processed)
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return predicate()
+
+
+class TestRequestAck:
+    """请求与确认测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_request_matches_response_by_trace_id(self):
+        """request 按 trace_id 返回对应的响应"""
+        async with _FakeServer() as server:
+            client = ACPClient(server.url)
+            assert await client.connect(timeout=2)
+            
+            response = await client.request(_message("t-1"), timeout=2)
+            
+            assert response == {"type": "ack", "trace_id": "t-1", "message": "received"}
+            assert client.codec.name == "json"
+            assert client.get_stats()["pending_requests"] == 0
+            await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_request_times_out_without_response(self):
+        """没有响应时 request 超时，并清理等待项"""
+        async with _FakeServer(reply=False) as server:
+            client = ACPClient(server.url)
+            await client.connect(timeout=2)
+            
+            with pytest.raises(asyncio.TimeoutError):
+                await client.request(_message("t-2"), timeout=0.1)
+            
+            assert client.get_stats()["pending_requests"] == 0
+            await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_queued_messages_coalesced_into_one_frame(self):
+        """连接建立前排队的消息合并为一个数组帧发送"""
+        async with _FakeServer(reply=False) as server:
+            client = ACPClient(server.url)
+            for i in range(5):
+                assert await client.send_message(_message(f"t-{i}"))
+            
+            await client.connect(timeout=2)
+            assert await client.flush(timeout=2)
+            await _wait_for(lambda: len(server.messages) == 5)
+            
+            assert len(server.frames) == 1
+            assert [m["meta"]["trace_id"] for m in server.messages] == [f"t-{i}" for i in range(5)]
+            assert client.get_stats()["frames"] == 1
+            await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_in_flight_limit_waits_for_flow_ack(self):
+        """在途消息达到上限时暂停发送，收到累计确认后继续"""
+        async with _FakeServer(auto_ack=False, reply=False) as server:
+            client = ACPClient(server.url, max_in_flight=2)
+            await client.connect(timeout=2)
+            for i in range(5):
+                await client.send_message(_message(f"t-{i}"))
+            
+            assert await _wait_for(lambda: len(server.messages) == 2)
+            await asyncio.sleep(0.05)
+            assert len(server.messages) == 2
+            assert client.get_stats()["in_flight"] == 2
+            
+            await server.ack(2)
+            assert await _wait_for(lambda: len(server.messages) == 4)
+            await server.ack(4)
+            assert await _wait_for(lambda: len(server.messages) == 5)
+            await server.ack(5)
+            await client.close()
+    
+    def test_callback_invoked_once(self):
+        """注册的回调在收到对应 trace_id 的响应时只调用一次"""
+        client = ACPClient()
+        calls = []
+        client.register_callback("t-1", calls.append)
+        response = {"meta": {"trace_id": "x", "correlation_id": "t-1"}, "context": {}}
+        
+        client.handle_server_response(response)
+        client.handle_server_response(response)
+        
+        assert calls == [response]
+    
+    def test_unmatched_message_goes_to_handler(self):
+        """未匹配到等待者的消息交给 message_handler"""
+        received = []
+        client = ACPClient(message_handler=received.append)
+        message = {"meta": {"trace_id": "t-9"}, "context": {"session_id": "s1"}}
+        
+        client.handle_server_response(message)
+        
+        assert received == [message]
+
+
+class TestQueueAndReconnect:
+    """发送队列与重连测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_sync_send_drops_when_queue_full(self):
+        """同步接口在发送队列满时丢弃消息并返回 False"""
+        client = ACPClient("ws://127.0.0.1:1", max_queue_size=2, reconnect_base_delay=10)
+        assert not client.send_acp_message(_message())
+        
+        assert not await client.connect(timeout=0.05)
+        results = [client.send_acp_message(_message(f"t-{i}")) for i in range(3)]
+        
+        assert results == [True, True, False]
+        assert client.stats["dropped"] == 1
+        assert [m["status"] for m in client.get_message_history()] == ["queued", "queued", "dropped"]
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_reconnect_replays_registration_and_fails_pending(self):
+        """连接断开时等待中的请求失败，重连后先重放注册消息"""
+        async with _FakeServer(reply=False) as server:
+            client = ACPClient(server.url, reconnect_base_delay=0.01)
+            await client.connect(timeout=2)
+            registration = asyncio.create_task(client.register(["search"], timeout=2))
+            await _wait_for(lambda: len(server.messages) == 1)
+            
+            await server.connections[0].close()
+            
+            with pytest.raises(ConnectionError):
+                await registration
+            assert await _wait_for(lambda: len(server.connections) == 2 and len(server.messages) == 2)
+            assert server.messages[1]["meta"]["message_type"] == "register"
+            assert await _wait_for(lambda: client.connected)
+            assert client.stats["reconnects"] == 1
+            await client.close()
+
+
+class TestACPClientManager:
+    """ACPClientManager 测试类"""
+    
+    def test_clients_share_connection_per_url(self):
+        """同一服务器地址的客户端共享一个实例，最后一个名称移除时才断开"""
+        manager = ACPClientManager()
+        first = manager.create_client("a", "http://localhost:9000")
+        second = manager.create_client("b", "ws://localhost:9000")
+        other = manager.create_client("c", "ws://localhost:9001")
+        
+        assert first is second
+        assert first is not other
+        assert first.server_url == "ws://localhost:9000"
+        
+        manager.remove_client("a")
+        assert not first._closing
+        assert manager.get_client() is first
+        
+        manager.remove_client("b")
+        assert first._closing
+        assert manager.get_client() is other
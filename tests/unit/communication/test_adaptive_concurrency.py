@@ -0,0 +1,244 @@
+"""
+自适应并发上限与调用合并单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.communication.protocols.mcp.adapters.adaptive_concurrency import (
+    AdaptiveConcurrencyLimiter,
+    LoadShedError,
+    SingleFlight,
+    call_key,
+)
+
+
+async def _hold(limiter: AdaptiveConcurrencyLimiter, count: int) -> None:
+    for _ in range(count):
+        await limiter.acquire()
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """AdaptiveConcurrencyLimiter 测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_waiters_admitted_in_order(self):
+        """超出上限的调用排队，名额归还后按到达顺序放行"""
+        limiter = AdaptiveConcurrencyLimiter("s", initial_limit=1)
+        await limiter.acquire()
+        order = []
+        
+        async def call(tag):
+            await limiter.acquire()
+            order.append(tag)
+        
+        tasks = [asyncio.create_task(call(tag)) for tag in ("a", "b")]
+        await asyncio.sleep(0)
+        assert limiter.get_stats()["waiting"] == 2
+        
+        limiter.release(0.01, None)
+        await asyncio.sleep(0)
+        assert order == ["a"]
+        limiter.release(0.01, None)
+        await asyncio.gather(*tasks)
+        
+        assert order == ["a", "b"]
+        assert limiter.in_flight == 1
+    
+    @pytest.mark.asyncio
+    async def test_error_cuts_limit(self):
+        """调用出错时乘性降低上限，不低于 min_limit"""
+        limiter = AdaptiveConcurrencyLimiter("s", initial_limit=8, min_limit=3)
+        
+        for expected in (4, 3):
+            await limiter.acquire()
+            limiter.release(0.01, False)
+            assert limiter.capacity == expected
+        
+        assert limiter.stats["errors"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_increase_only_when_saturated(self):
+        """延迟正常时只有上限成为瓶颈才加性增加"""
+        limiter = AdaptiveConcurrencyLimiter("s", initial_limit=2)
+        
+        await limiter.acquire()
+        limiter.release(0.01, True)
+        assert limiter.limit == 2.0
+        
+        await _hold(limiter, 2)
+        limiter.release(0.01, True)
+        limiter.release(0.01, True)
+        
+        assert limiter.limit == pytest.approx(2.5)
+    
+    @pytest.mark.asyncio
+    async def test_latency_spike_backs_off_once_per_period(self):
+        """延迟超过基线容忍倍数时降低上限，同一个平均延迟周期内只降一次"""
+        limiter = AdaptiveConcurrencyLimiter("s", initial_limit=10, backoff=0.5)
+        await limiter.acquire()
+        limiter.release(0.1, True)
+        
+        for _ in range(3):
+            await limiter.acquire()
+            limiter.release(0.5, True)
+        
+        assert limiter.limit == 5.0
+        assert limiter.stats["decreases"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_neutral_release_keeps_limit(self):
+        """结果不反映服务器状态时只归还名额"""
+        limiter = AdaptiveConcurrencyLimiter("s", initial_limit=2)
+        await _hold(limiter, 2)
+        
+        limiter.release(5.0, None)
+        
+        assert limiter.limit == 2.0
+        assert limiter.in_flight == 1
+        assert limiter.get_stats()["min_latency"] is None
+    
+    @pytest.mark.asyncio
+    async def test_sheds_call_that_cannot_meet_deadline(self):
+        """按延迟估算来不及完成的调用直接丢弃，不进入队列"""
+        limiter = AdaptiveConcurrencyLimiter("s", initial_limit=1, max_limit=1)
+        await limiter.acquire()
+        limiter.release(0.2, True)
+        await limiter.acquire()
+        
+        deadline = asyncio.get_running_loop().time() + 0.05
+        with pytest.raises(LoadShedError):
+            await limiter.acquire(deadline)
+        
+        assert limiter.stats["shed"] == 1
+        assert limiter.get_stats()["waiting"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_sheds_when_queue_full(self):
+        """等待队列已满时新调用直接丢弃"""
+        limiter = AdaptiveConcurrencyLimiter("s", initial_limit=1, max_queue_size=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        
+        with pytest.raises(LoadShedError, match="queue full"):
+            await limiter.acquire()
+        
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+    
+    @pytest.mark.asyncio
+    async def test_queued_call_shed_at_deadline(self):
+        """排队超过截止时间的调用被丢弃并移出队列"""
+        limiter = AdaptiveConcurrencyLimiter("s", initial_limit=1)
+        await limiter.acquire()
+        
+        with pytest.raises(LoadShedError, match="exceeded"):
+            await limiter.acquire(asyncio.get_running_loop().time() + 0.02)
+        
+        assert limiter.get_stats()["waiting"] == 0
+        assert limiter.in_flight == 1
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_returns_granted_slot(self):
+        """名额已分配给被取消的等待者时归还，交给下一个等待者"""
+        limiter = AdaptiveConcurrencyLimiter("s", initial_limit=1)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        
+        limiter.release(0.01, None)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, 1)
+        
+        assert limiter.in_flight == 1
+        assert limiter.get_stats()["waiting"] == 0
+
+
+class TestSingleFlight:
+    """SingleFlight 测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_execution(self):
+        """相同键的并发调用共享一次执行"""
+        flight = SingleFlight()
+        calls = []
+        
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+        
+        results = await asyncio.gather(*(flight.do("k", func) for _ in range(3)))
+        
+        assert results == [("result", False), ("result", True), ("result", True)]
+        assert len(calls) == 1
+        assert flight.stats == {"executions": 1, "coalesced": 2}
+        assert flight.in_flight() == 0
+    
+    @pytest.mark.asyncio
+    async def test_key_released_after_completion(self):
+        """执行结束后不缓存结果，再次调用重新执行"""
+        flight = SingleFlight()
+        counter = iter(range(10))
+        
+        async def func():
+            return next(counter)
+        
+        assert await flight.do("k", func) == (0, False)
+        assert await flight.do("k", func) == (1, False)
+    
+    @pytest.mark.asyncio
+    async def test_exception_shared_with_waiters(self):
+        """执行出错时等待者收到同一个异常"""
+        flight = SingleFlight()
+        
+        async def func():
+            await asyncio.sleep(0.01)
+            raise KeyError("missing")
+        
+        results = await asyncio.gather(flight.do("k", func), flight.do("k", func), return_exceptions=True)
+        
+        assert all(isinstance(result, KeyError) for result in results)
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_executor_fails_waiters(self):
+        """执行者被取消时等待者收到 RuntimeError 而不是被取消"""
+        flight = SingleFlight()
+        
+        async def func():
+            await asyncio.sleep(1)
+        
+        owner = asyncio.create_task(flight.do("k", func))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", func))
+        await asyncio.sleep(0)
+        owner.cancel()
+        
+        with pytest.raises(RuntimeError):
+            await waiter
+        assert flight.in_flight() == 0
+    
+    @pytest.mark.asyncio
+    async def test_waiter_timeout(self):
+        """加入已有执行的调用按 timeout 超时"""
+        flight = SingleFlight()
+        
+        async def func():
+            await asyncio.sleep(0.1)
+            return "late"
+        
+        owner = asyncio.create_task(flight.do("k", func))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("k", func, timeout=0.01)
+        
+        assert await owner == ("late", False)
+    
+    def test_call_key_ignores_argument_order(self):
+        """合并键与参数顺序无关"""
+        assert call_key("search", {"q": "x", "n": 1}) == call_key("search", {"n": 1, "q": "x"})
+        assert call_key("search", {"q": "x"}) != call_key("fetch", {"q": "x"})
@@ -0,0 +1,180 @@
+"""
+线路编解码器及协商单元测试
+"""
+
+import pytest
+
+from src.communication.protocols import codec as codec_module
+from src.communication.protocols.acp.message_schema import (
+    ACPMessage,
+    ACPPayload,
+    LazyACPMessage,
+    MessageContext,
+    MessageMeta,
+)
+from src.communication.protocols.codec import (
+    JSONCodec,
+    available_codecs,
+    codec_for_subprotocol,
+    get_codec,
+    negotiate,
+    subprotocols,
+)
+from src.communication.protocols.mcp.mcp_types import MCPMessage
+from src.communication.protocols.mcp.protocol_handler import MCPProtocolHandler
+
+
+class _FakeBinaryCodec(codec_module.Codec):
+    name = "msgpack"
+    binary = True
+
+
+def _acp_message() -> ACPMessage:
+    return ACPMessage(
+        meta=MessageMeta("m1", "task", "2026-01-01T00:00:00", "agent_a", "agent_b"),
+        context=MessageContext(session_id="s1", environment={"region": "cn"}),
+        payload=ACPPayload("execute", "run", {"steps": [1, 2, 3], "name": "任务"})
+    )
+
+
+class TestCodecs:
+    """编解码器测试类"""
+    
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_json_backends_share_wire_format(self, use_orjson):
+        """orjson 与标准库 json 的线路格式一致，且不转义非 ASCII 字符"""
+        codec = JSONCodec(use_orjson=use_orjson)
+        obj = {"a": [1, 2.5, None, True], "名称": "值"}
+        
+        encoded = codec.encode(obj)
+        
+        assert encoded == '{"a":[1,2.5,null,true],"名称":"值"}'
+        assert codec.decode(encoded) == obj
+        assert codec.decode(encoded.encode("utf-8")) == obj
+    
+    def test_invalid_json_raises_value_error(self):
+        """非法 JSON 抛出 ValueError"""
+        with pytest.raises(ValueError):
+            get_codec("json").decode("{not json")
+    
+    def test_msgpack_roundtrip(self):
+        """MessagePack 往返后数据不变，文本或非法数据抛出 ValueError"""
+        if "msgpack" not in available_codecs():
+            pytest.skip("msgpack is not installed")
+        codec = get_codec("msgpack")
+        obj = {"data": {"steps": [1, 2, 3]}, "blob": b"\x00\x01"}
+        
+        encoded = codec.encode(obj)
+        
+        assert isinstance(encoded, bytes)
+        assert codec.decode(encoded) == obj
+        with pytest.raises(ValueError):
+            codec.decode("text")
+        with pytest.raises(ValueError):
+            codec.decode(encoded + b"\x00")
+    
+    def test_unknown_codec(self):
+        """未知的编解码器抛出 ValueError，名称为空时返回 json"""
+        with pytest.raises(ValueError):
+            get_codec("yaml")
+        assert get_codec(None).name == "json"
+
+
+class TestNegotiation:
+    """编解码器协商测试类"""
+    
+    def test_binary_codecs_preferred(self, monkeypatch):
+        """本端编解码器按二进制优先排序，纯文本传输不包含二进制编解码器"""
+        monkeypatch.setattr(codec_module, "_codecs", {"json": JSONCodec(), "msgpack": _FakeBinaryCodec()})
+        
+        assert available_codecs() == ["msgpack", "json"]
+        assert available_codecs(binary=False) == ["json"]
+        assert subprotocols("acp") == ["acp.msgpack", "acp.json"]
+    
+    def test_follows_offer_order(self, monkeypatch):
+        """按对端的偏好顺序选出第一个本端也支持的编解码器"""
+        monkeypatch.setattr(codec_module, "_codecs", {"json": JSONCodec(), "msgpack": _FakeBinaryCodec()})
+        
+        assert negotiate(["cbor", "msgpack", "json"]) == "msgpack"
+        assert negotiate(["json", "msgpack"]) == "json"
+        assert negotiate(["msgpack"], binary=False) == "json"
+    
+    def test_falls_back_to_json(self):
+        """没有交集或对端未提供时使用 json"""
+        assert negotiate(None) == "json"
+        assert negotiate([]) == "json"
+        assert negotiate(["cbor"]) == "json"
+    
+    def test_codec_for_subprotocol(self):
+        """根据 WebSocket 子协议选择编解码器，未协商子协议时为 json"""
+        assert codec_for_subprotocol("acp.json", "acp").name == "json"
+        assert codec_for_subprotocol(None, "acp").name == "json"
+        assert codec_for_subprotocol("other.msgpack", "acp").name == "json"
+    
+    @pytest.mark.asyncio
+    async def test_mcp_initialize_negotiates_codec(self):
+        """MCP initialize 请求提供编解码器时在响应中返回协商结果"""
+        handler = MCPProtocolHandler()
+        request = MCPMessage(id=1, method="initialize", params={
+            "capabilities": {"experimental": {"codecs": ["cbor", "json"]}}
+        })
+        
+        response = await handler.handle_message(request)
+        
+        assert handler.negotiated_codec == "json"
+        assert response.result["capabilities"]["experimental"] == {"codec": "json"}
+    
+    @pytest.mark.asyncio
+    async def test_mcp_initialize_without_offer(self):
+        """对端未提供编解码器时不协商"""
+        handler = MCPProtocolHandler()
+        
+        response = await handler.handle_message(MCPMessage(id=1, method="initialize", params={}))
+        
+        assert handler.negotiated_codec is None
+        assert "experimental" not in response.result["capabilities"]
+
+
+class TestWireMessages:
+    """线路消息测试类"""
+    
+    def test_acp_to_wire_matches_to_dict(self):
+        """to_wire 与 to_dict 的内容一致，但不深拷贝载荷"""
+        message = _acp_message()
+        
+        wire = message.to_wire()
+        
+        assert wire == message.to_dict()
+        assert wire["payload"]["data"] is message.payload.data
+    
+    def test_lazy_message_parses_on_access(self):
+        """from_wire 只构造 meta，context 和 payload 在首次访问时构造"""
+        wire = get_codec("json").decode(get_codec("json").encode(_acp_message().to_wire()))
+        
+        message = ACPMessage.from_wire(wire)
+        
+        assert isinstance(message, LazyACPMessage)
+        assert message.meta.receiver_id == "agent_b"
+        assert message._payload is None and message._context is None
+        assert message.session_id == "s1"
+        assert message._context is None
+        assert message.to_wire()["payload"] is wire["payload"]
+        assert message.payload.data["name"] == "任务"
+        assert message.to_wire() == wire
+    
+    def test_lazy_message_rejects_bad_structure(self):
+        """context 或 payload 不是对象时抛出 TypeError"""
+        wire = _acp_message().to_wire()
+        wire["payload"] = "oops"
+        
+        with pytest.raises(TypeError):
+            ACPMessage.from_wire(wire)
+    
+    def test_mcp_message_codec_roundtrip(self):
+        """MCPMessage 按编解码器往返，非对象数据抛出 ValueError"""
+        message = MCPMessage(id=7, method="tools/call", params={"name": "search"})
+        
+        assert MCPMessage.from_json(message.to_json()).to_dict() == message.to_dict()
+        assert MCPMessage.decode(message.encode()).params == {"name": "search"}
+        with pytest.raises(ValueError):
+            MCPMessage.from_json("[1, 2]")
@@ -0,0 +1,52 @@
+"""
+智能体治理管理器单元测试
+"""
+
+import pytest
+
+from src.coordination.governance.agent_governance import AgentGovernanceManager, AgentType
+
+
+def _manager() -> AgentGovernanceManager:
+    return AgentGovernanceManager(service_registry=None, task_scheduler=None, trace_writer=None)
+
+
+class TestRegisterAgent:
+    """register_agent 测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_reregister_replaces_previous_entry(self):
+        """同一智能体重复注册时替换之前的治理信息，不重复计数"""
+        manager = _manager()
+        first_id = await manager.register_agent("agent-1", "old", AgentType.INTERNAL)
+        second_id = await manager.register_agent("agent-1", "new", AgentType.A2A_EXTERNAL)
+        
+        assert list(manager.governance_info) == [second_id]
+        assert first_id not in manager.governance_info
+        assert manager.governance_stats["total_agents"] == 1
+        assert manager.governance_stats["internal_agents"] == 0
+        assert manager.governance_stats["external_agents"] == 1
+        assert (await manager.get_agent_governance_status("agent-1"))["agent_name"] == "new"
+    
+    @pytest.mark.asyncio
+    async def test_metrics_recorded_on_current_entry(self):
+        """重新注册后的指标只记录到新的治理信息上"""
+        manager = _manager()
+        await manager.register_agent("agent-1", "old", AgentType.INTERNAL)
+        await manager.register_agent("agent-1", "new", AgentType.INTERNAL)
+        
+        await manager.update_agent_metrics("agent-1", response_time=120.0, success=True, cost=0.5)
+        
+        (info,) = manager.governance_info.values()
+        assert info.agent_name == "new"
+        assert info.total_invocations == 1
+    
+    @pytest.mark.asyncio
+    async def test_distinct_agents_are_kept(self):
+        """不同智能体各自保留治理信息"""
+        manager = _manager()
+        await manager.register_agent("agent-1", "a", AgentType.INTERNAL)
+        await manager.register_agent("agent-2", "b", AgentType.MCP_EXTERNAL)
+        
+        assert len(manager.governance_info) == 2
+        assert manager.governance_stats["total_agents"] == 2
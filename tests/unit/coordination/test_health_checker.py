@@ -0,0 +1,36 @@
+"""
+健康检查器调度单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.coordination.registry.health_checker import HealthChecker
+
+
+class _FailingRegistry:
+    """查询服务时抛出异常的注册中心"""
+    
+    async def get_service(self, service_id):
+        raise ConnectionError("registry unavailable")
+
+
+class TestProbe:
+    """_probe 测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_lookup_failure_reschedules_with_current_interval(self):
+        """查询服务失败时按当前间隔重新调度，服务不会从时间轮上丢失"""
+        checker = HealthChecker(_FailingRegistry(), check_interval=10, jitter=0)
+        checker._semaphore = asyncio.Semaphore(1)
+        checker._track("svc")
+        state = checker._schedule_state["svc"]
+        state["interval"] = 5.0
+        token = state["token"]
+        await checker._probe("svc", token)
+        
+        assert checker._schedule_state["svc"] is state
+        assert state["token"] != token
+        assert state["interval"] == 5.0
+        assert len(checker._wheel) == 2
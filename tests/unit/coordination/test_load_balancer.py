@@ -0,0 +1,162 @@
+"""
+负载均衡算法单元测试
+"""
+
+import random
+from collections import Counter
+
+from src.coordination.registry.load_balancer import (
+    ConsistentHashRing,
+    SmoothWeightedRoundRobin,
+    power_of_two_choices,
+    stable_hash,
+)
+from src.coordination.registry.service_registry import ServiceInfo
+
+
+def _service(service_id: str, weight: float = 1) -> ServiceInfo:
+    return ServiceInfo(service_id, "svc", "http", "127.0.0.1", 8000, weight=weight)
+
+
+def _services(count: int) -> list:
+    return [_service(f"s{i}") for i in range(count)]
+
+
+class TestSmoothWeightedRoundRobin:
+    """SmoothWeightedRoundRobin 测试类"""
+    
+    def test_smooth_sequence(self):
+        """权重 5:1:1 时按平滑序列选择"""
+        services = [_service("a", 5), _service("b", 1), _service("c", 1)]
+        balancer = SmoothWeightedRoundRobin()
+        
+        picks = [balancer.select(services).service_id for _ in range(7)]
+        
+        assert picks == ["a", "a", "b", "a", "c", "a", "a"]
+    
+    def test_selection_follows_weights(self):
+        """多轮选择后各服务被选中的次数与权重成正比"""
+        services = [_service("a", 3), _service("b", 2), _service("c", 0)]
+        balancer = SmoothWeightedRoundRobin()
+        
+        counts = Counter(balancer.select(services).service_id for _ in range(500))
+        
+        assert counts == {"a": 300, "b": 200}
+    
+    def test_rebuild_on_weight_change(self):
+        """权重变化后按新权重选择"""
+        services = [_service("a", 1), _service("b", 1)]
+        balancer = SmoothWeightedRoundRobin()
+        balancer.select(services)
+        
+        services[1].weight = 3
+        counts = Counter(balancer.select(services).service_id for _ in range(400))
+        
+        assert counts["b"] == 3 * counts["a"]
+    
+    def test_empty_services(self):
+        """没有候选服务时返回 None"""
+        assert SmoothWeightedRoundRobin().select([]) is None
+
+
+class TestConsistentHashRing:
+    """ConsistentHashRing 测试类"""
+    
+    def test_stable_hash_is_deterministic(self):
+        """稳定哈希不依赖进程的哈希种子"""
+        assert stable_hash("10.0.0.1") == stable_hash("10.0.0.1")
+        assert stable_hash("10.0.0.1") != stable_hash("10.0.0.2")
+        assert 0 <= stable_hash("key") < 2 ** 64
+    
+    def test_same_key_routes_to_same_service(self):
+        """相同成员构建的哈希环对同一个键返回相同服务"""
+        first = ConsistentHashRing(_services(10))
+        second = ConsistentHashRing(_services(10))
+        
+        for i in range(100):
+            key = f"client-{i}"
+            assert first.get(key).service_id == second.get(key).service_id
+    
+    def test_adding_service_moves_few_keys(self):
+        """新增一个服务时只有少量键迁移，且只迁移到新服务"""
+        before = ConsistentHashRing(_services(10))
+        after = ConsistentHashRing(_services(11))
+        keys = [f"client-{i}" for i in range(2000)]
+        
+        moved = [key for key in keys if before.get(key).service_id != after.get(key).service_id]
+        
+        assert len(moved) < len(keys) * 0.2
+        assert all(after.get(key).service_id == "s10" for key in moved)
+    
+    def test_weight_scales_share(self):
+        """权重高的服务分到更多的键"""
+        ring = ConsistentHashRing([_service("heavy", 3), _service("light", 1)])
+        
+        counts = Counter(ring.get(f"client-{i}").service_id for i in range(4000))
+        
+        assert counts["heavy"] > 2 * counts["light"]
+    
+    def test_bounded_skips_overloaded_service(self):
+        """有界负载时跳过负载已达上限的服务"""
+        services = _services(4)
+        ring = ConsistentHashRing(services)
+        preferred = ring.get("client")
+        loads = {service.service_id: 0 for service in services}
+        loads[preferred.service_id] = 10
+        
+        chosen = ring.get_bounded("client", lambda s: loads[s.service_id], total_load=10)
+        
+        assert chosen.service_id != preferred.service_id
+        assert ring.get_bounded("client", lambda s: 0, total_load=0) is preferred
+    
+    def test_bounded_falls_back_when_all_full(self):
+        """所有服务都达到上限时退回普通一致性哈希"""
+        ring = ConsistentHashRing(_services(3))
+        
+        chosen = ring.get_bounded("client", lambda s: 100, total_load=3)
+        
+        assert chosen is ring.get("client")
+    
+    def test_empty_ring(self):
+        """空哈希环返回 None"""
+        ring = ConsistentHashRing([])
+        
+        assert ring.get("client") is None
+        assert ring.get_bounded("client", lambda s: 0, 0) is None
+
+
+class TestPowerOfTwoChoices:
+    """power_of_two_choices 测试类"""
+    
+    def test_picks_lower_score_of_two(self):
+        """两个候选中返回打分较低者，从不返回打分最高的服务"""
+        services = _services(3)
+        scores = {"s0": 1, "s1": 2, "s2": 3}
+        rng = random.Random(7)
+        
+        picks = {power_of_two_choices(services, lambda s: scores[s.service_id], rng).service_id
+                 for _ in range(200)}
+        
+        assert picks == {"s0", "s1"}
+    
+    def test_small_inputs(self):
+        """空列表返回 None，单个服务直接返回"""
+        only = _service("only")
+        
+        assert power_of_two_choices([], lambda s: 0) is None
+        assert power_of_two_choices([only], lambda s: 0) is only
+
+
+class TestLatencyEwma:
+    """ServiceInfo 延迟 EWMA 测试类"""
+    
+    def test_peak_then_decay(self):
+        """更高的延迟直接取峰值，较低的延迟按衰减权重平滑"""
+        service = _service("a")
+        service.update_stats(0.1)
+        service.update_stats(0.5)
+        assert service.latency_ewma == 0.5
+        
+        service.update_stats(0.1)
+        
+        assert 0.1 <= service.latency_ewma <= 0.5
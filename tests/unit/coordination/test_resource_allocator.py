@@ -0,0 +1,152 @@
+"""
+资源分配器单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.coordination.scheduler.resource_allocator import ResourceAllocator
+
+
+def _allocator(nodes, **kwargs) -> ResourceAllocator:
+    allocator = ResourceAllocator(**kwargs)
+    for node_id, capacity in nodes.items():
+        allocator.add_node(node_id, capacity)
+    return allocator
+
+
+class TestBestFit:
+    """多维最佳适配放置"""
+    
+    @pytest.mark.asyncio
+    async def test_places_on_tightest_node(self):
+        """放到放置后剩余量最小的节点"""
+        allocator = _allocator({"big": {"cpu": 8}, "small": {"cpu": 4}})
+        
+        assert await allocator.request_resources("r1", {"cpu": 3})
+        assert await allocator.request_resources("r2", {"cpu": 5})
+        
+        assert allocator.resource_requests["r1"]["node"] == "small"
+        assert allocator.resource_requests["r2"]["node"] == "big"
+    
+    @pytest.mark.asyncio
+    async def test_headroom_limits_placement(self):
+        """实测余量不足的节点即使账面空闲也不放置"""
+        allocator = _allocator({"big": {"cpu": 8}, "small": {"cpu": 4}})
+        allocator.update_node_headroom("small", {"cpu": 1})
+        
+        assert await allocator.request_resources("r1", {"cpu": 2})
+        
+        assert allocator.resource_requests["r1"]["node"] == "big"
+    
+    @pytest.mark.asyncio
+    async def test_rejects_when_no_node_fits(self):
+        """任何节点都放不下时拒绝，且不保留请求"""
+        allocator = _allocator({"n1": {"cpu": 2}, "n2": {"cpu": 2}})
+        
+        assert not await allocator.request_resources("r1", {"cpu": 3})
+        
+        assert "r1" not in allocator.resource_requests
+        assert allocator.allocator_stats["rejected"] == 1
+
+
+class TestWaitingQueue:
+    """等待队列与公平排队"""
+    
+    async def _contended(self, fairness: str):
+        """A 已占 6 核、C 占 4 核，A、B 依次排队各要 4 核，释放 C 后返回先分到的属主"""
+        allocator = _allocator({"n1": {"cpu": 10}}, fairness=fairness)
+        await allocator.request_resources("a-held", {"cpu": 6}, owner="A")
+        await allocator.request_resources("c-held", {"cpu": 4}, owner="C")
+        waiter_a = asyncio.ensure_future(
+            allocator.request_resources("a-next", {"cpu": 4}, owner="A", wait=True, timeout=0.2))
+        await asyncio.sleep(0)
+        waiter_b = asyncio.ensure_future(
+            allocator.request_resources("b-next", {"cpu": 4}, owner="B", wait=True, timeout=0.2))
+        await asyncio.sleep(0)
+        
+        await allocator.release_resources("c-held")
+        granted_a, granted_b = await waiter_a, await waiter_b
+        return allocator, granted_a, granted_b
+    
+    @pytest.mark.asyncio
+    async def test_priority_mode_serves_in_arrival_order(self):
+        """priority 模式同优先级按排队顺序分配"""
+        _, granted_a, granted_b = await self._contended("priority")
+        
+        assert granted_a and not granted_b
+    
+    @pytest.mark.asyncio
+    async def test_drf_serves_lowest_dominant_share_first(self):
+        """drf 模式优先分配给主导资源份额最低的属主"""
+        allocator, granted_a, granted_b = await self._contended("drf")
+        
+        assert granted_b and not granted_a
+        assert allocator._dominant_share("B") == pytest.approx(0.4)
+    
+    @pytest.mark.asyncio
+    async def test_finished_requests_are_dropped(self):
+        """释放和等待超时的请求移出 resource_requests，截止时间条目随之失效"""
+        allocator = _allocator({"n1": {"cpu": 2}})
+        await allocator.request_resources("held", {"cpu": 2})
+        
+        assert not await allocator.request_resources("late", {"cpu": 2}, wait=True, timeout=0.05)
+        assert await allocator.release_resources("held")
+        await allocator.optimize_allocations()
+        
+        assert allocator.resource_requests == {}
+        assert allocator._waiting_count == 0
+        assert allocator.allocator_stats["wait_timeouts"] == 1
+
+
+class TestPreemption:
+    """抢占低优先级分配"""
+    
+    @pytest.mark.asyncio
+    async def test_preempts_lowest_priority_and_requeues_victim(self):
+        """抢占优先级最低的分配，被抢占的请求沿用原截止时间重新排队"""
+        allocator = _allocator({"n1": {"cpu": 4}})
+        events = []
+        allocator.add_listener(lambda event, request_id, info: events.append((event, request_id)))
+        await allocator.request_resources("low", {"cpu": 2}, priority=0, timeout=30)
+        await allocator.request_resources("mid", {"cpu": 2}, priority=3, timeout=30)
+        deadline = allocator.resource_requests["low"]["deadline"]
+        
+        assert await allocator.request_resources("high", {"cpu": 2}, priority=5, preempt=True)
+        
+        victim = allocator.resource_requests["low"]
+        assert ("preempted", "low") in events
+        assert victim["status"] == "waiting"
+        assert victim["deadline"] == deadline
+        assert allocator.resource_requests["mid"]["status"] == "allocated"
+        
+        await allocator.release_resources("high")
+        
+        assert victim["status"] == "allocated"
+        assert ("granted", "low") in events
+    
+    @pytest.mark.asyncio
+    async def test_requeued_victim_expires_at_original_deadline(self):
+        """原截止时间已过的被抢占请求在下一次清理时超时移除"""
+        allocator = _allocator({"n1": {"cpu": 2}})
+        events = []
+        allocator.add_listener(lambda event, request_id, info: events.append((event, request_id)))
+        await allocator.request_resources("low", {"cpu": 2}, priority=0, timeout=0)
+        await allocator.request_resources("high", {"cpu": 2}, priority=5, preempt=True)
+        
+        result = await allocator.optimize_allocations()
+        
+        assert result["requests_expired"] == 1
+        assert "low" not in allocator.resource_requests
+        assert ("timeout", "low") in events
+        assert allocator._deadlines == []
+    
+    @pytest.mark.asyncio
+    async def test_non_preemptible_allocation_is_kept(self):
+        """不可抢占的分配不会被抢占"""
+        allocator = _allocator({"n1": {"cpu": 2}})
+        await allocator.request_resources("pinned", {"cpu": 2}, preemptible=False)
+        
+        assert not await allocator.request_resources("high", {"cpu": 2}, priority=5, preempt=True)
+        assert allocator.resource_requests["pinned"]["status"] == "allocated"
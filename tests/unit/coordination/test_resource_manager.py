@@ -0,0 +1,118 @@
+"""
+资源管理器实测采样单元测试
+"""
+
+import asyncio
+import sys
+
+import psutil
+import pytest
+
+from src.coordination.container.container_manager import ContainerManager, ContainerStatus
+from src.coordination.container.resource_manager import ResourceManager
+
+# 占用约 64MB 内存并持续消耗 CPU 的子进程
+_BUSY = "x = bytearray(64 * 1024 * 1024)\nwhile True:\n    pass"
+_IGNORE_SIGTERM = "import signal, time\nsignal.signal(signal.SIGTERM, signal.SIG_IGN)\nprint('ready', flush=True)\ntime.sleep(60)"
+
+
+async def _spawn(code: str) -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(sys.executable, "-c", code, stdout=asyncio.subprocess.PIPE)
+
+
+async def _sample(manager: ResourceManager) -> None:
+    """采样两次，第二次得到 CPU 使用率"""
+    await manager._update_system_resources()
+    await manager._update_container_resources()
+    await asyncio.sleep(0.3)
+    await manager._update_container_resources()
+
+
+class _StubContainer:
+    """启动真实子进程的容器替身"""
+    
+    def __init__(self):
+        self.status = ContainerStatus.CREATED
+        self.process = None
+        self.pid = None
+    
+    async def start(self) -> bool:
+        self.process = await _spawn(_BUSY)
+        self.pid = self.process.pid
+        self.status = ContainerStatus.RUNNING
+        return True
+
+
+class _RecordingAllocator:
+    def __init__(self):
+        self.headroom = {}
+    
+    def update_node_headroom(self, node_id, headroom):
+        self.headroom[node_id] = headroom
+
+
+class TestResourceManager:
+    """ResourceManager 测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_attached_process_reports_measured_usage(self):
+        """绑定真实进程后采样得到非零的 CPU 和内存"""
+        manager = ResourceManager()
+        process = await _spawn(_BUSY)
+        try:
+            source = await manager.attach_container("c1", pid=process.pid)
+            await _sample(manager)
+            usage = (await manager.get_container_resources("c1"))["usage"]
+        finally:
+            process.kill()
+            await process.wait()
+        
+        assert source in ("process", "cgroup")
+        assert usage["memory_used"] > 32 * 1024 * 1024
+        assert usage["cpu_percent"] > 0
+    
+    @pytest.mark.asyncio
+    async def test_terminate_tree_kills_processes_ignoring_sigterm(self):
+        """SIGTERM 超时后仍存活的进程被 SIGKILL"""
+        process = await _spawn(_IGNORE_SIGTERM)
+        await process.stdout.readline()
+        
+        await asyncio.get_running_loop().run_in_executor(
+            None, ResourceManager._terminate_tree, process.pid, 0.2
+        )
+        
+        assert await asyncio.wait_for(process.wait(), timeout=2) == -9
+
+
+class TestContainerManagerResources:
+    """ContainerManager 资源接入测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_started_container_is_sampled_and_headroom_published(self):
+        """启动的容器绑定到资源管理器，采样后余量推送给分配器"""
+        allocator = _RecordingAllocator()
+        manager = ContainerManager(allocator=allocator, node_id="node-1")
+        container = _StubContainer()
+        manager.containers["c1"] = container
+        try:
+            assert await manager.start_container("c1")
+            await _sample(manager.resource_manager)
+            usage = (await manager.resource_manager.get_container_resources("c1"))["usage"]
+        finally:
+            container.process.kill()
+            await container.process.wait()
+        
+        assert usage["memory_used"] > 0
+        assert usage["cpu_percent"] > 0
+        assert set(allocator.headroom["node-1"]) == {"cpu", "memory"}
+    
+    def test_resource_limits_from_config(self):
+        """容器配置中的资源换算为资源限制"""
+        from src.coordination.container.container_manager import ContainerConfig
+        
+        config = ContainerConfig("a", "t", resources={"cpu": "500m", "memory": "512Mi", "gpu": "1"})
+        limits = ContainerManager._resource_limits(config)
+        
+        assert limits.cpu_limit == 0.5
+        assert limits.memory_limit == 512 * 1024 * 1024
+        assert limits.gpu_limit == 1
@@ -0,0 +1,67 @@
+"""
+调度策略批量分配单元测试
+"""
+
+import pytest
+
+from src.coordination.scheduler.scheduling_policy import SchedulingPolicy, PolicyType
+
+
+class TestAssignTasks:
+    """assign_tasks 容量约束测试类"""
+    
+    @pytest.mark.parametrize("method", ["greedy", "hungarian"])
+    def test_full_low_score_worker_falls_back_to_feasible_worker(self, method):
+        """打分最低的节点放不下任务时，分配给其他容量足够的节点"""
+        policy = SchedulingPolicy(PolicyType.LEAST_LOADED)
+        workers = [
+            {"worker_id": "a", "current_load": 0, "max_load": 0.5},
+            {"worker_id": "b", "current_load": 5, "max_load": 100},
+        ]
+        tasks = [{"task_id": "t1", "resource_usage": 1}]
+        
+        pairs = policy.assign_tasks(tasks, workers, method=method, commit=False)
+        
+        assert [(task["task_id"], worker["worker_id"]) for task, worker in pairs] == [("t1", "b")]
+    
+    @pytest.mark.parametrize("method", ["greedy", "hungarian"])
+    def test_large_task_outside_top_k_is_assigned(self, method):
+        """需求较大的任务在打分最低的 K 个节点之外找到容量足够的节点"""
+        policy = SchedulingPolicy(PolicyType.LEAST_LOADED)
+        workers = [
+            {"worker_id": "a", "current_load": 0, "max_load": 1},
+            {"worker_id": "b", "current_load": 1, "max_load": 2},
+            {"worker_id": "c", "current_load": 2, "max_load": 50},
+        ]
+        tasks = [
+            {"task_id": "small", "resource_usage": 1},
+            {"task_id": "large", "resource_usage": 10},
+        ]
+        
+        pairs = policy.assign_tasks(tasks, workers, method=method, commit=False)
+        assigned = {task["task_id"]: worker["worker_id"] for task, worker in pairs}
+        
+        assert assigned["large"] == "c"
+        assert "small" in assigned
+    
+    @pytest.mark.parametrize("method", ["greedy", "hungarian"])
+    def test_no_feasible_worker(self, method):
+        """没有节点放得下时不分配"""
+        policy = SchedulingPolicy(PolicyType.LEAST_LOADED)
+        workers = [{"worker_id": "a", "current_load": 0, "max_load": 0.5}]
+        
+        assert policy.assign_tasks([{"resource_usage": 1}], workers, method=method, commit=False) == []
+
+
+class TestWorkerLoads:
+    """worker_loads 兼容属性测试类"""
+    
+    def test_worker_loads_reflects_worker_table(self):
+        """worker_loads 返回工作节点表中的负载"""
+        policy = SchedulingPolicy(PolicyType.LEAST_LOADED)
+        policy.register_worker({"worker_id": "a", "current_load": 2})
+        policy.update_worker_load("b", 3)
+        policy.update_worker_load("a", 4)
+        
+        assert policy.worker_loads == {"a": 4.0, "b": 3.0}
+        assert policy.get_policy_stats()["worker_loads"] == {"a": 4.0, "b": 3.0}
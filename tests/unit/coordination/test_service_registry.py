@@ -0,0 +1,107 @@
+"""
+服务注册中心查询与服务发现均衡器状态单元测试
+"""
+
+import pytest
+
+from src.coordination.registry.discovery import LoadBalancingStrategy, ServiceDiscovery
+from src.coordination.registry.service_registry import ServiceRegistry, ServiceStatus
+
+
+async def _register(registry, count, name="svc", service_type="http", group=None):
+    """注册 count 个健康的服务，返回服务ID列表"""
+    ids = []
+    for i in range(count):
+        service_id = await registry.register_service(name, service_type, "127.0.0.1", 8000 + i, service_group=group)
+        await registry.update_service_health(service_id, ServiceStatus.HEALTHY)
+        ids.append(service_id)
+    return ids
+
+
+class TestFindServices:
+    """find_services 测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_results_follow_registration_order(self):
+        """各种查询条件的结果都按注册顺序排列"""
+        registry = ServiceRegistry()
+        ids = await _register(registry, 30, group="g")
+        await _register(registry, 5, name="other")
+        
+        for query in ({"service_name": "svc"}, {"service_type": "http"}, {"service_group": "g"},
+                      {"service_name": "svc", "status": ServiceStatus.HEALTHY}):
+            services = await registry.find_services(**query)
+            assert [s.service_id for s in services][:30] == ids
+    
+    @pytest.mark.asyncio
+    async def test_order_kept_after_status_change(self):
+        """状态变化后按状态查询仍按注册顺序返回"""
+        registry = ServiceRegistry()
+        ids = await _register(registry, 10)
+        for service_id in reversed(ids):
+            await registry.update_service_health(service_id, ServiceStatus.UNHEALTHY)
+        
+        services = await registry.find_services(status=ServiceStatus.UNHEALTHY)
+        
+        assert [s.service_id for s in services] == ids
+    
+    @pytest.mark.asyncio
+    async def test_returns_copy_of_cached_result(self):
+        """修改返回的列表不影响之后的查询"""
+        registry = ServiceRegistry()
+        await _register(registry, 3)
+        
+        first = await registry.find_services("svc")
+        first.clear()
+        
+        assert len(await registry.find_services("svc")) == 3
+    
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self):
+        """查询缓存不超过 query_cache_size 条，失效条目优先淘汰"""
+        registry = ServiceRegistry()
+        registry.query_cache_size = 4
+        await _register(registry, 1)
+        
+        for i in range(10):
+            await registry.find_services(f"missing-{i}")
+        await registry.find_services("svc")
+        
+        assert len(registry._query_cache) <= 4
+        assert len(await registry.find_services("svc")) == 1
+
+
+class TestDiscoveryBalancerState:
+    """ServiceDiscovery 均衡器状态测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_queries_by_type_keep_separate_balancers(self):
+        """同名服务按类型和不按类型查询时各自保留均衡器状态，不互相重建"""
+        registry = ServiceRegistry()
+        await _register(registry, 3)
+        discovery = ServiceDiscovery(registry)
+        
+        await discovery.discover_service("svc", strategy=LoadBalancingStrategy.CONSISTENT_HASH, client_ip="a")
+        await discovery.discover_service("svc", "http", strategy=LoadBalancingStrategy.CONSISTENT_HASH, client_ip="a")
+        rings = {key: entry[1] for key, entry in discovery._hash_rings.items()}
+        await discovery.discover_service("svc", strategy=LoadBalancingStrategy.CONSISTENT_HASH, client_ip="b")
+        await discovery.discover_service("svc", "http", strategy=LoadBalancingStrategy.CONSISTENT_HASH, client_ip="b")
+        
+        assert set(rings) == {"svc:all", "svc:http"}
+        assert all(discovery._hash_rings[key][1] is ring for key, ring in rings.items())
+    
+    @pytest.mark.asyncio
+    async def test_weighted_round_robin_sequence_per_query(self):
+        """交替按类型查询时平滑加权轮询序列不被打断"""
+        registry = ServiceRegistry()
+        ids = await _register(registry, 2)
+        await registry.update_service_weight(ids[0], 2)
+        discovery = ServiceDiscovery(registry)
+        
+        picks = []
+        for _ in range(3):
+            picks.append((await discovery.discover_service(
+                "svc", strategy=LoadBalancingStrategy.WEIGHTED_ROUND_ROBIN)).service_id)
+            await discovery.discover_service("svc", "http", strategy=LoadBalancingStrategy.WEIGHTED_ROUND_ROBIN)
+        
+        assert sorted(picks) == sorted([ids[0], ids[0], ids[1]])
@@ -0,0 +1,118 @@
+"""
+任务调度器单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.coordination.scheduler.task_scheduler import TaskScheduler, TaskStatus
+
+
+class TestWaitForTask:
+    """get_next_task(wait=True) 测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_submit_wakes_waiter_of_matching_type(self):
+        """提交的任务唤醒等待该类型的工作节点，而不是等待其他类型的"""
+        scheduler = TaskScheduler()
+        worker_a = asyncio.ensure_future(scheduler.get_next_task("A", "typeA", wait=True, timeout=0.5))
+        worker_b = asyncio.ensure_future(scheduler.get_next_task("B", "typeB", wait=True, timeout=0.5))
+        await asyncio.sleep(0.01)
+        await scheduler.submit_task("task", "typeB")
+        task_a, task_b = await worker_a, await worker_b
+        
+        assert task_a is None
+        assert task_b is not None and task_b.task_type == "typeB"
+    
+    @pytest.mark.asyncio
+    async def test_waiter_keeps_waiting_after_task_is_taken(self):
+        """唤醒后任务已被其他消费者取走时继续等待下一个任务"""
+        scheduler = TaskScheduler()
+        waiter = asyncio.ensure_future(scheduler.get_next_task("W", "typeC", wait=True, timeout=1.0))
+        await asyncio.sleep(0.01)
+        await scheduler.submit_task("first", "typeC")
+        stolen = await scheduler.get_next_task("X", "typeC")
+        await asyncio.sleep(0.01)
+        still_waiting = not waiter.done()
+        await scheduler.submit_task("second", "typeC")
+        task = await waiter
+        
+        assert stolen.task_name == "first"
+        assert still_waiting
+        assert task.task_name == "second"
+    
+    @pytest.mark.asyncio
+    async def test_untyped_waiter_receives_any_type(self):
+        """不限类型的等待者能收到任意类型的任务"""
+        scheduler = TaskScheduler()
+        waiter = asyncio.ensure_future(scheduler.get_next_task("U", wait=True, timeout=0.5))
+        await asyncio.sleep(0.01)
+        await scheduler.submit_task("task", "typeE")
+        
+        assert (await waiter).task_name == "task"
+
+
+class TestFinishedTasks:
+    """已结束任务的保留与截止时间堆"""
+    
+    async def _run_one(self, scheduler: TaskScheduler, name: str) -> str:
+        task_id = await scheduler.submit_task(name, "typeF")
+        await scheduler.get_next_task("W", "typeF")
+        await scheduler.complete_task(task_id, execution_time=0.1)
+        return task_id
+    
+    @pytest.mark.asyncio
+    async def test_finished_task_status_still_available(self):
+        """已结束的任务移出 tasks 后仍能查询状态"""
+        scheduler = TaskScheduler()
+        task_id = await self._run_one(scheduler, "done")
+        
+        status = await scheduler.get_task_status(task_id)
+        
+        assert task_id not in scheduler.tasks
+        assert status["status"] == TaskStatus.COMPLETED.value
+    
+    @pytest.mark.asyncio
+    async def test_finished_history_is_bounded(self):
+        """已结束任务只保留最近 max_finished_tasks 个"""
+        scheduler = TaskScheduler(max_finished_tasks=2)
+        task_ids = [await self._run_one(scheduler, f"t{i}") for i in range(4)]
+        
+        assert list(scheduler.finished_tasks) == task_ids[2:]
+        assert await scheduler.get_task_status(task_ids[0]) is None
+        assert (await scheduler.get_task_status(task_ids[3]))["status"] == TaskStatus.COMPLETED.value
+    
+    @pytest.mark.asyncio
+    async def test_finished_task_cannot_be_cancelled(self):
+        """已结束的任务不能再被取消，也不会重复计入保留队列"""
+        scheduler = TaskScheduler()
+        task_id = await self._run_one(scheduler, "done")
+        
+        assert not await scheduler.cancel_task(task_id)
+        assert len(scheduler.finished_tasks) == 1
+        assert scheduler.scheduler_stats["cancelled_tasks"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_deadline_heap_compacted_on_completion(self):
+        """完成的任务的截止时间条目失效，超过一半时堆被压缩"""
+        scheduler = TaskScheduler()
+        for i in range(500):
+            await self._run_one(scheduler, f"t{i}")
+        
+        assert not scheduler._run_tokens
+        assert len(scheduler._deadlines) <= 64
+    
+    @pytest.mark.asyncio
+    async def test_timeout_check_after_compaction(self):
+        """压缩后仍按截止时间处理运行中的超时任务"""
+        scheduler = TaskScheduler()
+        task_id = await scheduler.submit_task("slow", "typeG", timeout=0)
+        await scheduler.get_next_task("W", "typeG")
+        for i in range(200):
+            await self._run_one(scheduler, f"t{i}")
+        
+        await scheduler._check_task_timeouts()
+        
+        assert scheduler.tasks[task_id].status == TaskStatus.PENDING
+        assert scheduler.scheduler_stats["timeout_tasks"] == 1
@@ -0,0 +1,87 @@
+"""
+BaseAgent 并发名额测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.core.agent.base_agent import AgentConfig, AgentType, BaseAgent
+
+
+class _SlowAgent(BaseAgent):
+    """推理阶段等待外部信号的测试 Agent"""
+
+    def __init__(self, config: AgentConfig):
+        super().__init__(config)
+        self.release = asyncio.Event()
+        self.running = 0
+        self.peak = 0
+
+    async def _reason(self, task: str, **kwargs):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await self.release.wait()
+        self.running -= 1
+        return {"action": {"type": "respond", "message": task}}
+
+    async def _execute(self, reasoning_result, **kwargs):
+        return {"action": reasoning_result["action"], "result": {}}
+
+    async def _update_state(self, execution_result):
+        pass
+
+    async def _on_start(self) -> None:
+        pass
+
+    async def _on_stop(self) -> None:
+        pass
+
+    async def _on_message_received(self, message) -> None:
+        pass
+
+
+def _agent(max_concurrent_tasks: int = 1) -> _SlowAgent:
+    return _SlowAgent(AgentConfig(
+        agent_id="agent-1",
+        agent_type=AgentType.TASK,
+        name="slow",
+        max_concurrent_tasks=max_concurrent_tasks,
+    ))
+
+
+class TestTaskSlots:
+    """直接调用 execute_task 与并发名额"""
+
+    @pytest.mark.asyncio
+    async def test_direct_call_waits_for_slot(self):
+        """名额用完时直接调用等待，而不是返回失败"""
+        agent = _agent(max_concurrent_tasks=1)
+        first = asyncio.create_task(agent.execute_task("first"))
+        second = asyncio.create_task(agent.execute_task("second"))
+        await asyncio.sleep(0.05)
+
+        assert agent.running == 1
+        assert not second.done()
+
+        agent.release.set()
+        results = await asyncio.gather(first, second)
+
+        assert [r["status"] for r in results] == ["success", "success"]
+        assert agent.peak == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrency_bounded_by_max_concurrent_tasks(self):
+        """同时运行的任务数不超过 max_concurrent_tasks"""
+        agent = _agent(max_concurrent_tasks=2)
+        calls = [asyncio.create_task(agent.execute_task(f"t{i}")) for i in range(5)]
+        await asyncio.sleep(0.05)
+
+        assert agent.running == 2
+
+        agent.release.set()
+        results = await asyncio.gather(*calls)
+
+        assert all(r["status"] == "success" for r in results)
+        assert agent.peak == 2
+        assert len(agent.finished_tasks) == 5
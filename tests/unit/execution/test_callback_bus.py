@@ -0,0 +1,156 @@
+"""
+回调总线与回调处理器测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.execution.callbacks import CallbackBus, CallbackHandler, CallbackLane, CallbackType
+
+
+class TestCallbackBus:
+    """CallbackBus 通道与批量投递"""
+
+    @pytest.mark.asyncio
+    async def test_critical_callback_runs_inline(self):
+        """CRITICAL 回调内联执行并返回结果"""
+        bus = CallbackBus()
+
+        async def status_update(value):
+            return value * 2
+
+        bus.register("status_update", status_update)
+
+        assert await bus.dispatch("status_update", value=21) == 42
+        assert bus.get_stats()["inline_calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_background_callback_delivered_in_order(self):
+        """BACKGROUND 回调入队后立即返回，flush 后按入队顺序执行"""
+        bus = CallbackBus(default_lanes={"trace_write": CallbackLane.BACKGROUND})
+        seen = []
+
+        async def trace_write(step):
+            seen.append(step)
+
+        bus.register("trace_write", trace_write)
+        for step in range(5):
+            assert await bus.dispatch("trace_write", step=step) is None
+        await bus.flush()
+
+        assert seen == [0, 1, 2, 3, 4]
+        assert bus.get_stats()["delivered"] == 5
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_batch_callback_receives_one_call_per_batch(self):
+        """注册了批量回调的名称每批只调用一次"""
+        bus = CallbackBus(max_batch=10)
+        batches = []
+
+        async def memory_write(**kwargs):
+            raise AssertionError("single callback should not be called")
+
+        async def memory_write_batch(calls):
+            batches.append([call["key"] for call in calls])
+
+        bus.register("memory_write", memory_write, lane=CallbackLane.BACKGROUND, batch_func=memory_write_batch)
+        for key in range(4):
+            await bus.dispatch("memory_write", key=key)
+        await bus.flush()
+
+        assert batches == [[0, 1, 2, 3]]
+        assert bus.get_stats()["batched_calls"] == 1
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_background_failure_is_counted_not_raised(self):
+        """后台回调异常只计数，不传回调用方，也不影响后续回调"""
+        bus = CallbackBus()
+        seen = []
+
+        async def flaky(n):
+            if n == 0:
+                raise RuntimeError("boom")
+            seen.append(n)
+
+        bus.register("flaky", flaky, lane=CallbackLane.BACKGROUND)
+        await bus.dispatch("flaky", n=0)
+        await bus.dispatch("flaky", n=1)
+        await bus.flush()
+
+        stats = bus.get_stats()
+        assert stats["failed"] == 1
+        assert stats["delivered"] == 1
+        assert seen == [1]
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_background_kwargs_snapshot_at_enqueue(self):
+        """入队后调用方修改原字典不影响已入队的回调参数"""
+        bus = CallbackBus()
+        seen = []
+
+        async def trace_write(data):
+            seen.append(data)
+
+        bus.register("trace_write", trace_write, lane=CallbackLane.BACKGROUND)
+        data = {"step": 1}
+        await bus.dispatch("trace_write", data=data)
+        data["step"] = 2
+        await bus.flush()
+
+        assert seen == [{"step": 1}]
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_close_drains_queue_and_stops_worker(self):
+        """close 执行完已入队的回调后停止后台工作协程"""
+        bus = CallbackBus()
+        seen = []
+
+        async def slow(n):
+            await asyncio.sleep(0.01)
+            seen.append(n)
+
+        bus.register("slow", slow, lane=CallbackLane.BACKGROUND)
+        for n in range(3):
+            await bus.dispatch("slow", n=n)
+        await bus.close()
+
+        assert seen == [0, 1, 2]
+        assert bus._worker is None
+
+
+class TestCallbackHandler:
+    """CallbackHandler 经总线分发与关闭"""
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_background_callbacks(self):
+        """close 前入队的 memory_write 回调全部执行"""
+        handler = CallbackHandler(agent_id="agent-1")
+        await handler.initialize()
+        writes = []
+
+        async def memory_write(**kwargs):
+            writes.append(kwargs)
+
+        await handler.register_callback("memory_write", memory_write)
+        await handler.handle_callback(CallbackType.SUCCESS, {"output": "ok"}, "ctx-1")
+        await handler.close()
+
+        assert len(writes) == 1
+        assert handler.bus.get_stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_results_bounded_by_max_results(self):
+        """回调结果最多保留 max_results 条"""
+        handler = CallbackHandler(agent_id="agent-1", max_results=3)
+        await handler.initialize()
+        for i in range(5):
+            await handler.handle_callback(CallbackType.SUCCESS, {"i": i}, "ctx-1")
+        await handler.close()
+
+        assert len(handler.callback_results) == 3
+        assert handler.callback_stats["evicted_results"] == 2
@@ -0,0 +1,233 @@
+"""
+AsyncGraphExecutor 单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.graph_engine.checkpoint import MemoryCheckpointer
+from src.graph_engine.edge import Edge
+from src.graph_engine.executor import AsyncGraphExecutor
+from src.graph_engine.graph import Graph
+from src.graph_engine.node import BaseNode, EndNode, JoinNode
+
+
+class _Probe:
+    """记录节点执行次数和最大并发数"""
+    
+    def __init__(self):
+        self.calls = {}
+        self.running = 0
+        self.peak = 0
+
+
+class _AsyncNode(BaseNode):
+    """异步节点：等待 delay 秒后把 key 写入状态"""
+    
+    def __init__(self, name, probe, delay=0.0, key=None, fail_times=0, timeout=None):
+        super().__init__(name)
+        self.probe = probe
+        self.delay = delay
+        self.key = key or name
+        self.fail_times = fail_times
+        self.timeout = timeout
+    
+    async def execute(self, state):
+        probe = self.probe
+        probe.calls[self.name] = probe.calls.get(self.name, 0) + 1
+        probe.running += 1
+        probe.peak = max(probe.peak, probe.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            probe.running -= 1
+        if probe.calls[self.name] <= self.fail_times:
+            raise RuntimeError(f"{self.name} failed")
+        state[self.key] = True
+        return state
+
+
+class _SyncNode(BaseNode):
+    """同步节点：在线程池中执行"""
+    
+    def __init__(self, name, probe):
+        super().__init__(name)
+        self.probe = probe
+    
+    def execute(self, state):
+        self.probe.calls[self.name] = self.probe.calls.get(self.name, 0) + 1
+        state[self.name] = True
+        return state
+
+
+def _graph(nodes, edges):
+    graph = Graph()
+    for node in nodes:
+        graph.add_node(node)
+    for edge in edges:
+        graph.add_edge(edge if isinstance(edge, Edge) else Edge(*edge))
+    return graph
+
+
+class TestFanOutAndJoin:
+    """扇出与汇合"""
+    
+    @pytest.mark.asyncio
+    async def test_branches_run_concurrently_and_join_merges(self):
+        """所有激活的出边并行执行，join 节点合并各分支状态"""
+        probe = _Probe()
+        graph = _graph(
+            [_SyncNode("start", probe), _AsyncNode("a", probe, 0.05), _AsyncNode("b", probe, 0.05),
+             JoinNode("join")],
+            [("start", "a"), ("start", "b"), ("a", "join"), ("b", "join")],
+        )
+        
+        result = await AsyncGraphExecutor(graph).run("start", {})
+        
+        assert probe.peak == 2
+        assert result == {"start": True, "a": True, "b": True}
+    
+    @pytest.mark.asyncio
+    async def test_branches_get_separate_state_copies(self):
+        """并行分支各自拿到状态的浅拷贝，互不可见"""
+        probe = _Probe()
+        seen = {}
+        
+        class _Spy(BaseNode):
+            async def execute(self, state):
+                seen[self.name] = dict(state)
+                state[self.name] = True
+                return state
+        
+        graph = _graph(
+            [_SyncNode("start", probe), _Spy("a"), _Spy("b")],
+            [("start", "a"), ("start", "b")],
+        )
+        
+        result = await AsyncGraphExecutor(graph).run("start", {})
+        
+        assert seen == {"a": {"start": True}, "b": {"start": True}}
+        assert result == {"start": True, "a": True, "b": True}
+    
+    @pytest.mark.asyncio
+    async def test_max_workers_bounds_concurrency(self):
+        """同时执行的节点数不超过 max_workers"""
+        probe = _Probe()
+        branches = [_AsyncNode(f"n{i}", probe, 0.02) for i in range(6)]
+        graph = _graph(
+            [_SyncNode("start", probe)] + branches,
+            [("start", node.name) for node in branches],
+        )
+        
+        await AsyncGraphExecutor(graph, max_workers=2).run("start", {})
+        
+        assert probe.peak == 2
+        assert all(probe.calls[node.name] == 1 for node in branches)
+    
+    @pytest.mark.asyncio
+    async def test_join_released_when_branch_not_taken(self):
+        """未选中的条件分支不会到达时，join 在空闲后以已到达的前驱放行"""
+        probe = _Probe()
+        graph = _graph(
+            [_SyncNode("start", probe), _AsyncNode("a", probe), _AsyncNode("b", probe),
+             JoinNode("join"), _AsyncNode("after", probe)],
+            [Edge("start", "a"), Edge("start", "b", condition=lambda s: s.get("take_b")),
+             ("a", "join"), ("b", "join"), ("join", "after")],
+        )
+        
+        result = await AsyncGraphExecutor(graph).run("start", {})
+        
+        assert "b" not in probe.calls
+        assert probe.calls["after"] == 1
+        assert result == {"start": True, "a": True, "after": True}
+    
+    @pytest.mark.asyncio
+    async def test_finished_cancels_running_nodes(self):
+        """节点置 finished 后整个图结束，运行中的其他节点被取消"""
+        probe = _Probe()
+        graph = _graph(
+            [_SyncNode("start", probe), EndNode("end"), _AsyncNode("slow", probe, 5.0)],
+            [("start", "end"), ("start", "slow")],
+        )
+        
+        result = await asyncio.wait_for(AsyncGraphExecutor(graph).run("start", {}), 1.0)
+        
+        assert result["finished"] is True
+        assert "slow" not in result
+        assert probe.running == 0
+
+
+class TestTimeouts:
+    """节点超时"""
+    
+    @pytest.mark.asyncio
+    async def test_node_timeout_raises(self):
+        """节点自身的 timeout 优先于执行器默认值"""
+        probe = _Probe()
+        graph = _graph([_AsyncNode("slow", probe, 1.0, timeout=0.05)], [])
+        
+        with pytest.raises(TimeoutError, match="slow"):
+            await AsyncGraphExecutor(graph, node_timeout=10).run("slow", {})
+    
+    @pytest.mark.asyncio
+    async def test_default_node_timeout(self):
+        """节点未设置 timeout 时使用执行器的 node_timeout"""
+        probe = _Probe()
+        graph = _graph([_AsyncNode("slow", probe, 1.0)], [])
+        
+        with pytest.raises(TimeoutError):
+            await AsyncGraphExecutor(graph, node_timeout=0.05).run("slow", {})
+    
+    @pytest.mark.asyncio
+    async def test_max_steps_stops_cycles(self):
+        """回环超过 max_steps 时报错"""
+        probe = _Probe()
+        graph = _graph([_AsyncNode("a", probe), _AsyncNode("b", probe)], [("a", "b"), ("b", "a")])
+        
+        with pytest.raises(RuntimeError, match="max_steps"):
+            await AsyncGraphExecutor(graph, max_steps=5).run("a", {})
+
+
+class TestCheckpoint:
+    """检查点与恢复"""
+    
+    @pytest.mark.asyncio
+    async def test_resume_skips_completed_nodes(self):
+        """失败后 resume 从快照继续，已完成的节点不再执行"""
+        probe = _Probe()
+        checkpointer = MemoryCheckpointer()
+        graph = _graph(
+            [_SyncNode("start", probe), _AsyncNode("a", probe), _AsyncNode("b", probe, fail_times=1)],
+            [("start", "a"), ("a", "b")],
+        )
+        
+        with pytest.raises(RuntimeError, match="b failed"):
+            await AsyncGraphExecutor(graph, checkpointer=checkpointer).run("start", {})
+        assert [name for name, _ in checkpointer.snapshot["pending"]] == ["b"]
+        
+        result = await AsyncGraphExecutor(graph, checkpointer=checkpointer).run("start", {}, resume=True)
+        
+        assert probe.calls == {"start": 1, "a": 1, "b": 2}
+        assert result == {"start": True, "a": True, "b": True}
+        assert checkpointer.snapshot is None
+    
+    @pytest.mark.asyncio
+    async def test_resume_keeps_join_arrivals(self):
+        """恢复时保留快照中 join 已到达的分支状态"""
+        probe = _Probe()
+        checkpointer = MemoryCheckpointer()
+        graph = _graph(
+            [_SyncNode("start", probe), _AsyncNode("a", probe), _AsyncNode("b", probe, 0.05, fail_times=1),
+             JoinNode("join")],
+            [("start", "a"), ("start", "b"), ("a", "join"), ("b", "join")],
+        )
+        
+        with pytest.raises(RuntimeError):
+            await AsyncGraphExecutor(graph, checkpointer=checkpointer).run("start", {})
+        assert list(checkpointer.snapshot["joins"]["join"]) == ["a"]
+        
+        result = await AsyncGraphExecutor(graph, checkpointer=checkpointer).run("start", {}, resume=True)
+        
+        assert probe.calls["a"] == 1
+        assert result == {"start": True, "a": True, "b": True}
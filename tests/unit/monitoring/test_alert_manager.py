@@ -0,0 +1,158 @@
+"""
+告警管理器增量评估单元测试
+"""
+
+import logging
+import threading
+import time
+
+from src.monitoring.metrics.alert_manager import AlertManager, AlertRule
+from src.monitoring.metrics.metrics_collector import MetricsCollector
+
+
+def _manager(*rules, **config) -> AlertManager:
+    manager = AlertManager(config)
+    for rule in rules:
+        manager.add_rule(rule)
+    return manager
+
+
+def _wait_for(predicate, timeout=1.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestObserve:
+    """AlertManager.observe 测试类"""
+    
+    def test_fires_once_until_resolved(self):
+        """条件满足时触发一次，告警未解除前不重复触发"""
+        manager = _manager(AlertRule('cpu_high', 'cpu', '>', 80))
+        
+        assert manager.observe('cpu', 50) == []
+        fired = manager.observe('cpu', 90)
+        
+        assert [alert.rule.name for alert in fired] == ['cpu_high']
+        assert manager.observe('cpu', 95) == []
+        assert manager.get_active_alerts()[0].value == 95
+    
+    def test_window_aggregation(self):
+        """按窗口聚合值比较，而不是最新值"""
+        manager = _manager(AlertRule('cpu_avg', 'cpu', '>', 80, aggregation='avg', window=60))
+        now = time.time()
+        
+        assert manager.observe('cpu', 60, timestamp=now - 2) == []
+        assert manager.observe('cpu', 90, timestamp=now - 1) == []
+        assert len(manager.observe('cpu', 100, timestamp=now)) == 1
+    
+    def test_samples_outside_window_evicted(self):
+        """窗口外的样本不参与聚合"""
+        manager = _manager(AlertRule('cpu_max', 'cpu', '>', 80, aggregation='max', window=10))
+        now = time.time()
+        
+        assert manager.observe('cpu', 100, timestamp=now - 60) == []
+        assert manager.observe('cpu', 50, timestamp=now) == []
+    
+    def test_hysteresis(self):
+        """值需越过 threshold - hysteresis 才解除告警"""
+        manager = _manager(AlertRule('cpu_high', 'cpu', '>', 80, hysteresis=10))
+        manager.observe('cpu', 90)
+        
+        manager.observe('cpu', 75)
+        assert len(manager.get_active_alerts()) == 1
+        
+        manager.observe('cpu', 65)
+        assert manager.get_active_alerts() == []
+    
+    def test_duration_requires_sustained_condition(self):
+        """设置 duration 时条件持续满足后由 check_alerts 触发"""
+        manager = _manager(AlertRule('cpu_high', 'cpu', '>', 80, duration=0.05))
+        
+        assert manager.observe('cpu', 90) == []
+        time.sleep(0.06)
+        
+        assert [alert.rule.name for alert in manager.check_alerts()] == ['cpu_high']
+    
+    def test_tags_select_series(self):
+        """规则只评估标签匹配的样本"""
+        manager = _manager(AlertRule('cpu_high', 'cpu', '>', 80, tags={'host': 'a'}))
+        
+        assert manager.observe('cpu', 90, tags={'host': 'b'}) == []
+        assert len(manager.observe('cpu', 90, tags={'host': 'a', 'zone': 'z1'})) == 1
+    
+    def test_observe_metric_from_collector(self):
+        """通过 MetricsCollector 监听器接收样本"""
+        manager = _manager(AlertRule('cpu_high', 'cpu', '>', 80))
+        collector = MetricsCollector({'enable_system_metrics': False})
+        manager.set_metrics_collector(collector)
+        
+        collector.record_metric_simple('cpu', 99)
+        
+        assert len(manager.get_active_alerts()) == 1
+
+
+class TestNotifications:
+    """通知与错误日志测试类"""
+    
+    def test_handler_error_logged_and_worker_continues(self, caplog):
+        """通知处理器异常写入日志，后续告警仍会通知"""
+        manager = _manager(AlertRule('a', 'm1', '>', 0), AlertRule('b', 'm2', '>', 0))
+        received = []
+        
+        def handler(alert):
+            if alert.rule.name == 'a':
+                raise RuntimeError('boom')
+            received.append(alert.rule.name)
+        
+        manager.add_notification_handler(handler)
+        with caplog.at_level(logging.ERROR, logger='src.monitoring.metrics.alert_manager'):
+            manager.observe('m1', 1)
+            manager.observe('m2', 1)
+            assert _wait_for(lambda: received == ['b'])
+        
+        assert 'Notification handler error' in caplog.text
+    
+    def test_queue_full_logged(self, caplog):
+        """通知队列满时丢弃告警并写警告日志"""
+        manager = _manager(*(AlertRule(f'r{i}', f'm{i}', '>', 0) for i in range(3)),
+                           notification_queue_size=1)
+        entered, release = threading.Event(), threading.Event()
+        
+        def handler(alert):
+            entered.set()
+            release.wait(1)
+        
+        manager.add_notification_handler(handler)
+        with caplog.at_level(logging.WARNING, logger='src.monitoring.metrics.alert_manager'):
+            manager.observe('m0', 1)
+            assert entered.wait(1)
+            manager.observe('m1', 1)
+            manager.observe('m2', 1)
+        release.set()
+        
+        assert 'Notification queue full, dropping alert: r2' in caplog.text
+
+
+class TestMetricsCollectorListeners:
+    """MetricsCollector 监听器测试类"""
+    
+    def test_listener_error_logged(self, caplog):
+        """监听器异常写入日志，不影响样本记录和其他监听器"""
+        collector = MetricsCollector({'enable_system_metrics': False})
+        seen = []
+        
+        def broken(metric):
+            raise ValueError('bad listener')
+        
+        collector.add_listener(broken)
+        collector.add_listener(lambda metric: seen.append(metric.name))
+        with caplog.at_level(logging.ERROR, logger='src.monitoring.metrics.metrics_collector'):
+            collector.record_metric_simple('latency', 1.0)
+        
+        assert seen == ['latency']
+        assert len(collector.get_metrics({'name': 'latency'})) == 1
+        assert 'Metric listener error for latency' in caplog.text
@@ -0,0 +1,82 @@
+"""
+日志索引单元测试
+"""
+
+import json
+
+import pytest
+
+from src.monitoring.log.log_index import LogIndex, whole_tokens
+from src.monitoring.log.log_manager import LogManager
+
+
+def _index(*messages, capacity=1000):
+    index = LogIndex(capacity)
+    for i, (level, message) in enumerate(messages):
+        index.add({'level': level, 'message': message, 'context': {'step': f'step-{i}'}}, float(i))
+    return index
+
+
+class TestLogIndex:
+    """LogIndex 测试类"""
+    
+    def test_whole_tokens_skips_partial_edge_words(self):
+        """关键词首尾的英文词元可能是更长单词的一部分，不用于索引查找"""
+        assert whole_tokens("err") == []
+        assert whole_tokens("connection fail") == []
+        assert whole_tokens("a connection failed b") == ["connection", "failed"]
+        assert whole_tokens("连接失败") == ["连", "接", "失", "败"]
+    
+    @pytest.mark.parametrize("keyword", ["err", "connection fail", "ection fa", "database error"])
+    def test_message_keyword_matches_substrings(self, keyword):
+        """消息关键词与逐条子串匹配的结果一致"""
+        index = _index(('ERROR', 'Database error: connection failed'), ('INFO', 'all good'))
+        
+        assert [e['message'] for e in index.query(message=keyword)] == ['Database error: connection failed']
+    
+    def test_context_keyword_matches_substrings(self):
+        """上下文关键词按子串匹配"""
+        index = _index(('INFO', 'a'), ('INFO', 'b'))
+        
+        assert [e['message'] for e in index.query(context='ep-1')] == ['b']
+    
+    def test_level_and_time_range(self):
+        """级别过滤与时间范围（包含端点）组合，默认按时间倒序"""
+        index = _index(('INFO', 'a'), ('ERROR', 'b'), ('ERROR', 'c'), ('ERROR', 'd'))
+        
+        assert [e['message'] for e in index.query(level='error', start_time=1.0, end_time=2.0)] == ['c', 'b']
+        assert [e['message'] for e in index.query(level='ERROR', reverse=False)] == ['b', 'c', 'd']
+    
+    def test_capacity_evicts_oldest(self):
+        """超出容量后最旧的条目不再返回，计数随之更新"""
+        index = _index(*[('INFO', f'm{i}') for i in range(10)], capacity=4)
+        
+        assert [e['message'] for e in index.query()] == ['m9', 'm8', 'm7', 'm6']
+        assert index.count_by_level() == {'INFO': 4}
+
+
+class TestLogManagerQueries:
+    """LogManager 查询与导出测试类"""
+    
+    def test_get_logs_keeps_substring_search(self, tmp_path):
+        """get_logs 的消息关键词仍按子串匹配"""
+        manager = LogManager({'log_file': str(tmp_path / 'agent.log')})
+        try:
+            manager.error('Database error: connection failed')
+            manager.info('all good')
+            
+            assert len(manager.get_logs({'message': 'err'})) == 1
+            assert len(manager.get_logs({'message': 'connection fail'})) == 1
+        finally:
+            manager.close()
+    
+    def test_export_logs_returns_whole_cache_by_default(self, tmp_path):
+        """export_logs 默认导出全部缓存"""
+        manager = LogManager({'log_file': str(tmp_path / 'agent.log')})
+        try:
+            for i in range(150):
+                manager.info(f'message {i}')
+            
+            assert len(json.loads(manager.export_logs())) == 150
+        finally:
+            manager.close()
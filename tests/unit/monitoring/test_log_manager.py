@@ -0,0 +1,69 @@
+"""
+日志管理器写入管道单元测试
+"""
+
+from src.monitoring.log.log_handler import LogHandler
+from src.monitoring.log.log_manager import LogManager
+
+
+class TestWritePipeline:
+    """LogManager 写入管道测试类"""
+    
+    def test_context_is_copied_at_enqueue(self, tmp_path):
+        """入队后修改原 context 不影响已记录的日志"""
+        manager = LogManager({'log_file': str(tmp_path / 'agent.log'), 'flush_interval': 60})
+        try:
+            context = {'step': 1}
+            manager.info('step done', context)
+            context['step'] = 2
+            manager.flush()
+            
+            assert manager.get_logs()[0]['context'] == {'step': 1}
+        finally:
+            manager.close()
+    
+    def test_batch_written_to_file(self, tmp_path):
+        """flush 后记录写入日志文件"""
+        log_file = tmp_path / 'agent.log'
+        manager = LogManager({'log_file': str(log_file)})
+        try:
+            manager.info('first')
+            manager.warning('second')
+            manager.flush()
+            
+            lines = log_file.read_text(encoding='utf-8').splitlines()
+            assert len(lines) == 2
+            assert manager.get_pipeline_stats()['written'] == 2
+        finally:
+            manager.close()
+
+
+class TestLogHandler:
+    """LogHandler 批量写入测试类"""
+    
+    def test_write_batch_reopens_closed_stream(self, tmp_path):
+        """文件流关闭后 write_batch 重新打开并追加写入"""
+        log_file = tmp_path / 'agent.log'
+        handler = LogHandler(str(log_file))
+        try:
+            handler.write_batch(['a'])
+            handler.rotating_handler.close()
+            handler.write_batch(['b', 'c'])
+            
+            assert log_file.read_text(encoding='utf-8').splitlines() == ['a', 'b', 'c']
+        finally:
+            handler.close()
+    
+    def test_write_batch_rolls_over(self, tmp_path):
+        """超过文件大小上限时轮转到备份文件"""
+        log_file = tmp_path / 'agent.log'
+        handler = LogHandler(str(log_file), backup_count=2)
+        handler.rotating_handler.maxBytes = 16
+        try:
+            handler.write_batch(['0123456789'])
+            handler.write_batch(['abcdefghij'])
+            
+            assert log_file.read_text(encoding='utf-8') == 'abcdefghij\n'
+            assert (tmp_path / 'agent.log.1').read_text(encoding='utf-8') == '0123456789\n'
+        finally:
+            handler.close()
@@ -0,0 +1,188 @@
+"""
+分位数草图及草图存储单元测试
+"""
+
+import time
+
+import pytest
+
+from src.communication.protocols.mcp.adapters.monitoring_integration import (
+    MCPExecutionEvent,
+    MCPMonitoringIntegration,
+)
+from src.monitoring.metrics.quantile_sketch import DDSketch, QuantileSketchStore
+
+
+def _aligned_now(window_seconds: int) -> float:
+    now = time.time()
+    return now - (now % window_seconds)
+
+
+class TestDDSketch:
+    """DDSketch 测试类"""
+    
+    def test_quantiles_within_relative_accuracy(self):
+        """分位数估计的相对误差不超过 relative_accuracy"""
+        sketch = DDSketch(relative_accuracy=0.01)
+        for value in range(1, 1001):
+            sketch.add(float(value))
+        
+        for q, expected in ((0.5, 500.0), (0.95, 950.0), (0.99, 990.0)):
+            assert sketch.quantile(q) == pytest.approx(expected, rel=0.02)
+        summary = sketch.summary()
+        assert summary['count'] == 1000
+        assert summary['min'] == 1.0
+        assert summary['max'] == 1000.0
+        assert summary['avg'] == pytest.approx(500.5)
+    
+    def test_merge_matches_single_sketch(self):
+        """合并两个草图与直接写入一个草图的结果一致"""
+        left, right, combined = DDSketch(), DDSketch(), DDSketch()
+        for value in range(1, 501):
+            left.add(float(value))
+            combined.add(float(value))
+        for value in range(501, 1001):
+            right.add(float(value))
+            combined.add(float(value))
+        
+        left.merge(right)
+        
+        assert left.count == combined.count
+        assert left.bins == combined.bins
+        assert left.summary() == combined.summary()
+    
+    def test_collapse_bounds_bin_count(self):
+        """桶数量超过 max_bins 时合并最低的桶"""
+        sketch = DDSketch(relative_accuracy=0.01, max_bins=16)
+        for exponent in range(64):
+            sketch.add(1.5 ** exponent)
+        
+        assert len(sketch.bins) <= 16
+        assert sketch.count == 64
+        assert sketch.quantile(1.0) == pytest.approx(1.5 ** 63, rel=0.02)
+    
+    def test_bytes_roundtrip(self):
+        """二进制序列化往返后数据不变"""
+        sketch = DDSketch()
+        for value in (0.0, 0.5, 3.0, 42.0):
+            sketch.add(value)
+        
+        restored = DDSketch.from_bytes(sketch.to_bytes())
+        
+        assert restored.bins == sketch.bins
+        assert restored.zero_count == sketch.zero_count
+        assert restored.summary() == sketch.summary()
+    
+    def test_dict_roundtrip_keeps_max_bins(self):
+        """字典序列化往返后保留 max_bins"""
+        sketch = DDSketch(relative_accuracy=0.02, max_bins=32)
+        sketch.add(1.0)
+        
+        restored = DDSketch.from_dict(sketch.to_dict())
+        
+        assert restored.max_bins == 32
+        assert restored.relative_accuracy == 0.02
+        assert restored.summary() == sketch.summary()
+
+
+class TestQuantileSketchStore:
+    """QuantileSketchStore 测试类"""
+    
+    def test_total_and_windowed_summaries(self):
+        """无时间范围读取累计数据，有时间范围只合并覆盖的窗口"""
+        store = QuantileSketchStore(window_seconds=10, max_windows=10)
+        now = _aligned_now(10)
+        store.record('tool', 'search', 1.0, timestamp=now - 30)
+        store.record('tool', 'search', 2.0, error=True, timestamp=now)
+        
+        total = store.summary('tool', 'search')
+        recent = store.summary('tool', 'search', time_range=5)
+        
+        assert (total['count'], total['errors']) == (2, 1)
+        assert (recent['count'], recent['errors']) == (1, 1)
+        assert recent['max'] == 2.0
+    
+    def test_totals_expire_with_last_window(self):
+        """键不再出现在任何保留窗口中时，累计草图一并淘汰"""
+        store = QuantileSketchStore(window_seconds=10, max_windows=2)
+        base = _aligned_now(10) - 100
+        store.record('tool', 'old', 1.0, error=True, timestamp=base)
+        store.record('tool', 'busy', 1.0, timestamp=base)
+        store.record('tool', 'busy', 1.0, timestamp=base + 10)
+        store.record('tool', 'busy', 1.0, timestamp=base + 20)
+        
+        assert store.keys('tool') == ['busy']
+        assert store.summary('tool', 'old')['count'] == 0
+        assert store.summary('tool', 'old')['errors'] == 0
+        assert store.summary('tool', 'busy')['count'] == 3
+    
+    def test_samples_older_than_retention_are_ignored(self):
+        """早于所有保留窗口的样本不计入"""
+        store = QuantileSketchStore(window_seconds=10, max_windows=2)
+        base = _aligned_now(10) - 100
+        store.record('tool', 'search', 1.0, timestamp=base + 10)
+        store.record('tool', 'search', 1.0, timestamp=base + 20)
+        
+        store.record('tool', 'late', 1.0, timestamp=base)
+        
+        assert store.keys('tool') == ['search']
+        assert len(store._windows) == 2
+    
+    def test_merge_combines_windows_and_totals(self):
+        """合并另一个存储时累加窗口和累计数据"""
+        now = _aligned_now(10)
+        left = QuantileSketchStore(window_seconds=10, max_windows=10)
+        right = QuantileSketchStore(window_seconds=10, max_windows=10)
+        left.record('server', 'github', 1.0, timestamp=now)
+        right.record('server', 'github', 3.0, error=True, timestamp=now)
+        right.record('server', 'gitlab', 2.0, timestamp=now - 10)
+        
+        left.merge(right)
+        
+        assert left.summary('server', 'github')['count'] == 2
+        assert left.summary('server', 'github')['errors'] == 1
+        assert left.summary('server', 'github', time_range=5)['count'] == 2
+        assert sorted(left.keys('server')) == ['github', 'gitlab']
+    
+    def test_merge_rejects_different_window_size(self):
+        """窗口长度不同的存储不能合并"""
+        with pytest.raises(ValueError):
+            QuantileSketchStore(window_seconds=10).merge(QuantileSketchStore(window_seconds=60))
+    
+    def test_dict_roundtrip_keeps_expiry(self):
+        """序列化往返后数据不变，累计草图仍随窗口淘汰"""
+        store = QuantileSketchStore(window_seconds=10, max_windows=2)
+        base = _aligned_now(10) - 100
+        store.record('agent', 'a1', 1.0, error=True, timestamp=base)
+        store.record('agent', 'a2', 2.0, timestamp=base + 10)
+        
+        restored = QuantileSketchStore.from_dict(store.to_dict())
+        
+        assert restored.summary('agent', 'a1') == store.summary('agent', 'a1')
+        restored.record('agent', 'a2', 2.0, timestamp=base + 20)
+        assert restored.keys('agent') == ['a2']
+
+
+class TestMCPExecutionStats:
+    """MCPMonitoringIntegration 执行统计测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_average_duration_skips_missing_durations(self):
+        """没有耗时的执行计入次数，但不计入平均耗时"""
+        integration = MCPMonitoringIntegration(mcp_adapter=None, external_registry=None)
+        start = time.time()
+        timed = MCPExecutionEvent('search', 'github', 'e1', start, {})
+        timed.complete(True)
+        timed.duration = 2.0
+        untimed = MCPExecutionEvent('search', 'github', 'e2', start, {})
+        untimed.success = False
+        
+        integration._record_duration(timed)
+        integration._record_duration(untimed)
+        stats = await integration.get_execution_stats()
+        
+        assert stats['total_executions'] == 2
+        assert stats['failed_executions'] == 1
+        assert stats['average_duration'] == pytest.approx(2.0, rel=0.02)
+        assert stats['tool_stats']['search']['executions'] == 2
+        assert stats['tool_stats']['search']['avg_duration'] == pytest.approx(2.0, rel=0.02)
@@ -0,0 +1,106 @@
+"""
+二进制分段日志单元测试
+"""
+
+from src.monitoring.log.log_manager import LogManager
+from src.monitoring.log.segment_log import (
+    SegmentLogReader,
+    SegmentLogWriter,
+    _is_sealed,
+    list_segments,
+)
+
+
+def _write(directory, count, start=1000.0, **kwargs):
+    writer = SegmentLogWriter(str(directory), **kwargs)
+    for i in range(count):
+        level = 'ERROR' if i % 5 == 0 else 'INFO'
+        writer.write(start + i, level, f'message {i}', {'i': i})
+    return writer
+
+
+class TestSegmentLog:
+    """SegmentLogWriter / SegmentLogReader 测试类"""
+    
+    def test_read_time_window(self, tmp_path):
+        """按时间窗口读取，起止时间都包含在内"""
+        _write(tmp_path, 200, index_interval=8).close()
+        
+        entries = list(SegmentLogReader(tmp_path).read(1050.0, 1059.0))
+        
+        assert [e['context']['i'] for e in entries] == list(range(50, 60))
+    
+    def test_level_filter(self, tmp_path):
+        """只返回不低于最低级别的记录"""
+        _write(tmp_path, 20).close()
+        
+        entries = list(SegmentLogReader(tmp_path).read(min_level='ERROR'))
+        
+        assert [e['message'] for e in entries] == [f'message {i}' for i in (0, 5, 10, 15)]
+        assert all(e['level'] == 'ERROR' for e in entries)
+    
+    def test_tail_across_segments(self, tmp_path):
+        """tail 跨段读取最后 n 条，按时间正序返回"""
+        _write(tmp_path, 100, segment_size=512).close()
+        
+        assert len(list_segments(tmp_path)) > 1
+        entries = SegmentLogReader(tmp_path).tail(3)
+        assert [e['context']['i'] for e in entries] == [97, 98, 99]
+    
+    def test_active_segment_readable_after_flush(self, tmp_path):
+        """未封存的活动段 flush 后即可读取"""
+        writer = _write(tmp_path, 5)
+        writer.flush()
+        try:
+            assert len(list(SegmentLogReader(tmp_path).read())) == 5
+        finally:
+            writer.close()
+    
+    def test_retention_keeps_newest_segments(self, tmp_path):
+        """超过 max_segments 时删除最旧的段"""
+        _write(tmp_path, 200, segment_size=512, max_segments=2).close()
+        
+        segments = list_segments(tmp_path)
+        assert len(segments) == 2
+        assert all(_is_sealed(path) for path in segments)
+        assert list(SegmentLogReader(tmp_path).read())[-1]['context']['i'] == 199
+    
+    def test_recovers_torn_tail(self, tmp_path):
+        """启动时截断未封存段中不完整的尾部记录并封存"""
+        writer = _write(tmp_path, 10)
+        writer.flush()
+        path = list_segments(tmp_path)[0]
+        writer._file.close()
+        with open(path, 'ab') as f:
+            f.write(b'\x40\x00\x00\x00partial')
+        
+        SegmentLogWriter(str(tmp_path)).close()
+        
+        assert _is_sealed(path)
+        assert len(list(SegmentLogReader(tmp_path).read())) == 10
+
+
+class TestLogManagerSegmentSink:
+    """LogManager 分段日志输出测试类"""
+    
+    def test_segment_written_when_text_handler_fails(self, tmp_path):
+        """文本文件写入失败时分段日志仍然写入"""
+        manager = LogManager({
+            'log_file': str(tmp_path / 'agent.log'),
+            'segment_dir': str(tmp_path / 'segments'),
+            'flush_interval': 60
+        })
+        
+        def broken(lines):
+            raise OSError('disk full')
+        
+        manager.handler.write_batch = broken
+        try:
+            manager.error('still recorded', {'step': 1})
+            manager.flush()
+            
+            entries = list(SegmentLogReader(tmp_path / 'segments').read())
+            assert [e['message'] for e in entries] == ['still recorded']
+            assert manager.get_pipeline_stats()['write_errors'] == 1
+        finally:
+            manager.close()